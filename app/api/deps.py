@@ -1,18 +1,28 @@
 """Dependency injections for FastAPI endpoints."""
-from fastapi import Depends, HTTPException, status
+from typing import Optional
+
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError
 from sqlalchemy.orm import Session
 
 from app.core import security
-from app.db.session import get_db
+from app.core.config import settings
+from app.core.events import verify_stream_token
+from app.db.session import SessionLocal, get_db
 from app.models.user import User as UserModel
+from app.services.grievance_repository import (
+    GrievanceRepository,
+    InMemoryGrievanceRepository,
+    SqlGrievanceRepository,
+)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login", auto_error=False)
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    """Validate JWT token and return current User from database."""
+def user_from_token(token: str, db: Session) -> UserModel:
+    """Validate a JWT and return the matching User from the database."""
     try:
         payload = security.decode_token(token)
         # Prefer explicit 'email' claim; handle 'sub' which may be either an id or an email
@@ -40,8 +50,50 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
 
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    """Validate JWT token and return current User from database."""
+    return user_from_token(token, db)
+
+
+def get_stream_user(
+    header_token: Optional[str] = Depends(optional_oauth2_scheme),
+    token: Optional[str] = Query(None),
+):
+    """
+    Authenticate a long-lived stream. Browsers' EventSource cannot send headers,
+    so it passes a short-lived stream token as `?token=`; login tokens are only
+    accepted in the Authorization header. The DB session is closed before
+    returning so an open stream does not hold a pooled connection.
+    """
+    if not header_token and not token:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+    db = SessionLocal()
+    try:
+        if header_token:
+            user = user_from_token(header_token, db)
+        else:
+            user_id = verify_stream_token(token)
+            user = db.get(UserModel, user_id) if user_id is not None else None
+            if user is None:
+                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid stream token")
+        db.expunge(user)
+        return user
+    finally:
+        db.close()
+
+
 def admin_required(current_user: UserModel = Depends(get_current_user)):
     """Dependency that ensures current_user is an admin."""
     if not current_user.is_admin:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin privileges required")
     return current_user
+
+
+_memory_grievances = InMemoryGrievanceRepository()
+
+
+def get_grievance_repository(db: Session = Depends(get_db)) -> GrievanceRepository:
+    """Grievance storage selected by GRIEVANCE_BACKEND, sharing the request's session."""
+    if settings.GRIEVANCE_BACKEND == "memory":
+        return _memory_grievances
+    return SqlGrievanceRepository(db)
@@ -1,8 +1,15 @@
 from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import FileResponse
 from pydantic import BaseModel
+from typing import List
+from sqlalchemy.orm import Session
 from app.api.deps import get_current_user
-from app.core.storage import save_upload, delete_file, MEDIA_ROOT
+from app.core.config import settings
+from app.core.storage import save_upload, save_uploads, delete_file, MEDIA_ROOT
+from app.db.session import get_db
+from app.models.file_upload import FileUpload
+from app.models.user import User
 from pathlib import Path
 
 router = APIRouter(prefix="/api/v1/files", tags=["files"])
@@ -20,37 +27,66 @@ class FileDownloadResponse(FileResponse):
     pass
 
 
-# In-memory file store for demo; replace with DB queries
-_files = {}
-_next_id = 1
+def _store_metadata(db: Session, saved: List[dict], user_id: int) -> List[int]:
+    """
+    Record `file_uploads` rows for saved files and return their ids.
+    The orphan file collector keeps exactly the files these rows point at.
+    """
+    rows = [
+        FileUpload(
+            filename=f["filename"],
+            file_path=f["file_path"],
+            content_type=f["content_type"],
+            file_size=f["file_size"],
+            user_id=user_id,
+        )
+        for f in saved
+    ]
+    db.add_all(rows)
+    db.commit()
+    return [row.id for row in rows]
+
+
+def _get_owned(db: Session, file_id: int, user: User) -> FileUpload:
+    file_meta = db.get(FileUpload, file_id)
+    if not file_meta:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+
+    # Check authorization
+    if file_meta.user_id != user.id and not user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You do not have permission to access this file",
+        )
+    return file_meta
 
 
 @router.post("/upload", status_code=201, response_model=dict)
 async def upload_file(
     file: UploadFile = File(...),
-    current_user: dict = Depends(get_current_user),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
 ):
     """
     Upload a file. Only authenticated users can upload.
     Validates file type and size before saving.
     """
-    global _next_id
-    
     # Save file to disk
-    file_path, file_size = await save_upload(file, prefix=f"user_{current_user['sub']}")
-    
+    file_path, file_size = await save_upload(file, prefix=f"user_{current_user.id}")
+
     # Store metadata
-    file_id = _next_id
-    _files[file_id] = {
-        "id": file_id,
+    saved = {
         "filename": file.filename,
         "file_path": file_path,
         "content_type": file.content_type,
         "file_size": file_size,
-        "user_id": int(current_user["sub"]),
     }
-    _next_id += 1
-    
+    try:
+        [file_id] = await run_in_threadpool(_store_metadata, db, [saved], current_user.id)
+    except Exception:
+        delete_file(file_path)
+        raise
+
     return {
         "id": file_id,
         "filename": file.filename,
@@ -59,59 +95,76 @@ async def upload_file(
     }
 
 
+@router.post("/upload/batch", status_code=201, response_model=dict)
+async def upload_files_batch(
+    files: List[UploadFile] = File(...),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Upload several files in one multipart request.
+    Files are written concurrently (bounded by UPLOAD_CONCURRENCY) against a
+    combined size budget; each file gets its own result entry.
+    """
+    if len(files) > settings.MAX_BATCH_UPLOAD_FILES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.MAX_BATCH_UPLOAD_FILES} files per batch",
+        )
+
+    results = await save_uploads(files, prefix=f"user_{current_user.id}")
+
+    saved = [result for result in results if result["status"] == "ok"]
+    try:
+        ids = await run_in_threadpool(_store_metadata, db, saved, current_user.id)
+    except Exception:
+        for result in saved:
+            delete_file(result["file_path"])
+        raise
+    for result, file_id in zip(saved, ids):
+        result["id"] = file_id
+        del result["file_path"]
+
+    return {"uploaded": len(saved), "failed": len(results) - len(saved), "results": results}
+
+
 @router.get("/{file_id}", response_class=FileResponse)
-async def download_file(
+def download_file(
     file_id: int,
-    current_user: dict = Depends(get_current_user),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
 ):
     """
     Download a file. Only the user who uploaded it can download (or admin).
     """
-    file_meta = _files.get(file_id)
-    if not file_meta:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
-    
-    # Check authorization
-    if file_meta["user_id"] != int(current_user["sub"]):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You do not have permission to download this file",
-        )
-    
-    file_path = Path(file_meta["file_path"])
+    file_meta = _get_owned(db, file_id, current_user)
+
+    file_path = Path(file_meta.file_path)
     if not file_path.exists():
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found on disk")
-    
+
     return FileResponse(
         path=file_path,
-        filename=file_meta["filename"],
-        media_type=file_meta["content_type"],
+        filename=file_meta.filename,
+        media_type=file_meta.content_type,
     )
 
 
 @router.delete("/{file_id}", status_code=204)
-async def delete_file_endpoint(
+def delete_file_endpoint(
     file_id: int,
-    current_user: dict = Depends(get_current_user),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
 ):
     """
     Delete a file. Only the user who uploaded it can delete it (or admin).
     """
-    file_meta = _files.get(file_id)
-    if not file_meta:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
-    
-    # Check authorization
-    if file_meta["user_id"] != int(current_user["sub"]):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You do not have permission to delete this file",
-        )
-    
-    # Delete from disk
-    delete_file(file_meta["file_path"])
-    
-    # Remove from store
-    del _files[file_id]
-    
+    file_meta = _get_owned(db, file_id, current_user)
+    file_path = file_meta.file_path
+
+    # Metadata first: if the unlink fails, the orphan collector removes the file later
+    db.delete(file_meta)
+    db.commit()
+    delete_file(file_path)
+
     return None
@@ -1,22 +1,34 @@
-from fastapi import APIRouter, BackgroundTasks, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, Query, status, Depends
 from pydantic import BaseModel
-from app.api.deps import get_current_user
-from app.services.notifications import (
-    notify_grievance_created,
-    notify_grievance_status_changed,
-    notify_grievance_assigned,
-    notify_grievance_resolved,
-)
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy.orm import Session
+from app.api.deps import admin_required, get_current_user, get_grievance_repository
+from app.db.session import get_db
 from app.core.config import settings
+from app.core.events import publish_grievance_status
+from app.core.sql_profiler import query_budget
+from app.models.user import User
+from app.schemas.audit import AuditRead
+from app.services import outbox
+from app.services.audit import audit_writer, history
+from app.services.audit_archive import full_history
+from app.services.classifier import classify_submission
+from app.services.dedup import duplicate_detector
+from app.services.grievance_repository import GrievanceRepository, normalize_status
+from app.services.routing import routing_engine
 
 router = APIRouter(prefix="/api/v1/grievances", tags=["grievances"])
 
+# Statuses that no longer count towards a handler's load
+CLOSED = ("resolved", "closed")
+
 
 class GrievanceCreate(BaseModel):
     title: str
     category: str
     description: str
-    dept_id: int = None
+    dept_id: Optional[int] = None
 
 
 class GrievanceUpdate(BaseModel):
@@ -26,70 +38,123 @@ class GrievanceUpdate(BaseModel):
 class GrievanceResponse(BaseModel):
     id: int
     title: str
-    category: str
+    category: Optional[str] = None
     description: str
     status: str
     student_id: int
+    dept_id: Optional[int] = None
+    handler_id: Optional[int] = None
+    created_at: Optional[datetime] = None
+    duplicate_of: Optional[int] = None
+    suggested_category: Optional[str] = None
+    suggested_dept_id: Optional[int] = None
 
 
-# In-memory store for demo; replace with DB
-_grievances = {}
-_next_id = 1
+def _enqueue_assigned(db: Session, grievance: dict, handler_id: int) -> None:
+    outbox.enqueue(
+        db,
+        "grievance_assigned",
+        grievance_id=grievance["id"],
+        handler_email=routing_engine.handler_email(handler_id) or f"handler_{handler_id}@example.com",
+        handler_name=f"Handler {handler_id}",
+        grievance_title=grievance["title"],
+    )
 
 
 @router.post("/", status_code=201, response_model=GrievanceResponse)
-async def create_grievance(
+def create_grievance(
     req: GrievanceCreate,
-    current_user: dict = Depends(get_current_user),
-    background_tasks: BackgroundTasks = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    grievances: GrievanceRepository = Depends(get_grievance_repository),
 ):
     """
-    Create a new grievance. Notifies admin and student asynchronously.
+    Create a new grievance. Notifies admin and student via the outbox worker.
+    With AUTO_ROUTING it is assigned to the least-loaded eligible handler.
+    A likely duplicate is reported as `duplicate_of` (the cluster's first grievance).
+    The classifier's suggestion is returned; with CLASSIFIER_MODE=normalize it
+    also replaces category and department before routing.
     """
-    global _next_id
-    
-    grievance_id = _next_id
-    grievance = {
-        "id": grievance_id,
-        "title": req.title,
-        "category": req.category,
-        "description": req.description,
-        "status": "submitted",
-        "student_id": int(current_user["sub"]),
-        "student_email": current_user.get("email", "student@example.com"),
-        "dept_id": req.dept_id,
-    }
-    _grievances[grievance_id] = grievance
-    _next_id += 1
+    category, dept_id, suggestion = classify_submission(req.title, req.description, req.category, req.dept_id)
+    grievance = grievances.add(
+        title=req.title,
+        category=category,
+        description=req.description,
+        student_id=current_user.id,
+        student_email=current_user.email,
+        dept_id=dept_id,
+    )
+    grievance_id = grievance["id"]
     
-    # Schedule background notification tasks
-    if background_tasks:
-        background_tasks.add_task(
-            notify_grievance_created,
-            grievance_id=grievance_id,
-            student_email=grievance["student_email"],
-            student_name=f"Student {current_user['sub']}",
-            title=req.title,
-            admin_email=settings.ADMIN_EMAIL,
+    # Queue notifications for the outbox worker
+    outbox.enqueue(
+        db,
+        "grievance_created",
+        grievance_id=grievance_id,
+        student_email=grievance["student_email"],
+        student_name=f"Student {current_user.id}",
+        title=req.title,
+    )
+    match = duplicate_detector.check(db, grievance_id, req.description) if settings.DEDUP_ENABLED else None
+    handler_id = None
+    if settings.AUTO_ROUTING:
+        routing_engine.ensure_fresh(db)
+        handler_id = routing_engine.route(dept_id, category)
+        if handler_id is not None:
+            grievance = grievances.update(grievance_id, handler_id=handler_id)
+            _enqueue_assigned(db, grievance, handler_id)
+    db.commit()
+    audit_writer.record(grievance_id, "created", performed_by=current_user.id)
+    if handler_id is not None:
+        audit_writer.record(grievance_id, "assigned", remarks=f"auto: handler {handler_id}")
+    if match is not None:
+        audit_writer.record(
+            grievance_id, "flagged_duplicate",
+            remarks=f"cluster {match.cluster_id}, similarity {match.similarity}",
         )
     
-    return GrievanceResponse(**grievance)
+    return GrievanceResponse(
+        **grievance,
+        duplicate_of=match.cluster_id if match else None,
+        suggested_category=suggestion.category if suggestion else None,
+        suggested_dept_id=suggestion.dept_id if suggestion else None,
+    )
+
+
+@router.get("/", response_model=List[GrievanceResponse])
+@query_budget(2)
+def list_grievances(
+    status_filter: Optional[str] = Query(None, alias="status"),
+    current_user: User = Depends(get_current_user),
+    grievances: GrievanceRepository = Depends(get_grievance_repository),
+):
+    """
+    List the current student's grievances, optionally only those in one status.
+    """
+    mine = grievances.list_by_student(current_user.id)
+    if status_filter is not None:
+        try:
+            wanted = normalize_status(status_filter)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+        mine = [g for g in mine if g["status"] == wanted]
+    return [GrievanceResponse(**g) for g in mine]
 
 
 @router.get("/{grievance_id}", response_model=GrievanceResponse)
-async def get_grievance(
+def get_grievance(
     grievance_id: int,
-    current_user: dict = Depends(get_current_user),
+    current_user: User = Depends(get_current_user),
+    grievances: GrievanceRepository = Depends(get_grievance_repository),
 ):
     """
     Retrieve a grievance. Only the student who created it or admin can view.
     """
-    grievance = _grievances.get(grievance_id)
+    grievance = grievances.get(grievance_id)
     if not grievance:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Grievance not found")
     
-    # Authorization check (simplified)
-    if grievance["student_id"] != int(current_user["sub"]):
+    if grievance["student_id"] != current_user.id and not current_user.is_admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You do not have permission to view this grievance",
@@ -99,92 +164,161 @@ async def get_grievance(
 
 
 @router.patch("/{grievance_id}", response_model=GrievanceResponse)
-async def update_grievance(
+def update_grievance(
     grievance_id: int,
     req: GrievanceUpdate,
-    current_user: dict = Depends(get_current_user),
-    background_tasks: BackgroundTasks = None,
+    current_user: User = Depends(admin_required),
+    db: Session = Depends(get_db),
+    grievances: GrievanceRepository = Depends(get_grievance_repository),
 ):
     """
-    Update grievance status. Notifies student of status change asynchronously.
-    (Admin/handler only in real app)
+    Update grievance status (admin only). Notifies student of status change via the outbox.
     """
-    grievance = _grievances.get(grievance_id)
+    grievance = grievances.get(grievance_id)
     if not grievance:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Grievance not found")
     
     old_status = grievance["status"]
-    grievance["status"] = req.status
+    try:
+        grievance = grievances.update(grievance_id, status=req.status)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
     
-    # Schedule notification for status change
-    if background_tasks and old_status != req.status:
-        background_tasks.add_task(
-            notify_grievance_status_changed,
+    # Queue notification for status change
+    if old_status != grievance["status"]:
+        outbox.enqueue(
+            db,
+            "grievance_status_changed",
             grievance_id=grievance_id,
             student_email=grievance["student_email"],
             student_name=f"Student {grievance['student_id']}",
             old_status=old_status,
-            new_status=req.status,
+            new_status=grievance["status"],
             title=grievance["title"],
         )
+    db.commit()
+    if old_status != grievance["status"]:
+        was_open = old_status not in CLOSED
+        is_open = grievance["status"] not in CLOSED
+        if was_open and not is_open:
+            routing_engine.release(grievance["handler_id"])
+        elif is_open and not was_open and grievance["handler_id"] is not None:
+            routing_engine.assign(grievance["handler_id"])
+        audit_writer.record(
+            grievance_id,
+            "status_changed",
+            performed_by=current_user.id,
+            remarks=f"{old_status} -> {grievance['status']}",
+        )
+        publish_grievance_status(grievance["student_id"], grievance_id, old_status, grievance["status"])
     
     return GrievanceResponse(**grievance)
 
 
 @router.post("/{grievance_id}/assign", status_code=200)
-async def assign_grievance(
+def assign_grievance(
     grievance_id: int,
-    handler_id: int,
-    background_tasks: BackgroundTasks = None,
+    handler_id: Optional[int] = None,
+    current_user: User = Depends(admin_required),
+    db: Session = Depends(get_db),
+    grievances: GrievanceRepository = Depends(get_grievance_repository),
 ):
     """
-    Assign a grievance to a handler. Notifies handler asynchronously.
-    (Admin only in real app)
+    Assign a grievance to a handler. Without `handler_id` the least-loaded
+    eligible handler is chosen (admin only). Notifies handler via the outbox.
     """
-    grievance = _grievances.get(grievance_id)
+    grievance = grievances.get(grievance_id)
     if not grievance:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Grievance not found")
     
-    grievance["handler_id"] = handler_id
+    routing_engine.ensure_fresh(db)
+    previous = grievance["handler_id"]
+    if handler_id is None:
+        handler_id = routing_engine.route(grievance["dept_id"], grievance["category"])
+        if handler_id is None:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="No eligible handler available")
+        remarks = f"auto: handler {handler_id}"
+    else:
+        routing_engine.assign(handler_id)
+        remarks = f"handler {handler_id}"
+    routing_engine.release(previous)
+    grievance = grievances.update(grievance_id, handler_id=handler_id)
     
-    # Schedule notification for assignment
-    if background_tasks:
-        background_tasks.add_task(
-            notify_grievance_assigned,
-            grievance_id=grievance_id,
-            handler_email=f"handler_{handler_id}@example.com",
-            handler_name=f"Handler {handler_id}",
-            grievance_title=grievance["title"],
-        )
+    # Queue notification for assignment
+    _enqueue_assigned(db, grievance, handler_id)
+    db.commit()
+    audit_writer.record(grievance_id, "assigned", performed_by=current_user.id, remarks=remarks)
     
     return {"status": "assigned", "grievance_id": grievance_id, "handler_id": handler_id}
 
 
 @router.post("/{grievance_id}/resolve", status_code=200)
-async def resolve_grievance(
+def resolve_grievance(
     grievance_id: int,
     resolution: str = "",
-    background_tasks: BackgroundTasks = None,
+    current_user: User = Depends(admin_required),
+    db: Session = Depends(get_db),
+    grievances: GrievanceRepository = Depends(get_grievance_repository),
 ):
     """
-    Mark a grievance as resolved. Notifies student asynchronously.
+    Mark a grievance as resolved (admin only). Notifies student via the outbox.
+    The audit entry is written in the same transaction as the resolution.
     """
-    grievance = _grievances.get(grievance_id)
+    grievance = grievances.get(grievance_id)
     if not grievance:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Grievance not found")
     
-    grievance["status"] = "resolved"
-    grievance["resolution"] = resolution
+    old_status = grievance["status"]
+    grievance = grievances.update(grievance_id, status="resolved", resolution=resolution)
     
-    # Schedule notification for resolution
-    if background_tasks:
-        background_tasks.add_task(
-            notify_grievance_resolved,
-            grievance_id=grievance_id,
-            student_email=grievance["student_email"],
-            student_name=f"Student {grievance['student_id']}",
-            title=grievance["title"],
-            resolution=resolution,
-        )
+    # Queue notification for resolution
+    outbox.enqueue(
+        db,
+        "grievance_resolved",
+        grievance_id=grievance_id,
+        student_email=grievance["student_email"],
+        student_name=f"Student {grievance['student_id']}",
+        title=grievance["title"],
+        resolution=resolution,
+    )
+    audit_writer.record(
+        grievance_id, "resolved", performed_by=current_user.id, remarks=resolution,
+        durable=True, db=db,
+    )
+    db.commit()
+    if old_status not in CLOSED:
+        routing_engine.release(grievance["handler_id"])
+    publish_grievance_status(grievance["student_id"], grievance_id, old_status, "resolved", resolution=resolution)
     
     return {"status": "resolved", "grievance_id": grievance_id}
+
+
+@router.get("/{grievance_id}/history", response_model=List[AuditRead])
+def grievance_history(
+    grievance_id: int,
+    limit: int = 50,
+    offset: int = 0,
+    include_archived: bool = False,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    grievances: GrievanceRepository = Depends(get_grievance_repository),
+):
+    """
+    Audit trail of a grievance, newest first. Visible to the student who owns it and admins.
+    With `include_archived`, events moved to the audit archive are included.
+    """
+    grievance = grievances.get(grievance_id)
+    if not grievance:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Grievance not found")
+    if grievance["student_id"] != current_user.id and not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You do not have permission to view this grievance",
+        )
+    
+    # Merge events still waiting in this worker's buffer instead of flushing it
+    pending = audit_writer.buffered(grievance_id)
+    limit = min(limit, 500)
+    if include_archived:
+        return full_history(db, grievance_id, pending=pending, limit=limit, offset=offset)
+    return history(db, grievance_id, limit=limit, offset=offset, pending=pending)
@@ -1 +1 @@
-from . import auth, student, admin
+from . import auth, admin
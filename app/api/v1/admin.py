@@ -1,24 +1,230 @@
 from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+from fastapi.responses import FileResponse
+from typing import List, Optional
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from app.schemas.grievance import GrievanceRead
+from app.schemas.email import FailedEmailRead, OutboxMessageRead
+from app.schemas.grievance import BulkStatusUpdate, GrievanceRead
+from app.schemas.sla import SlaRuleCreate, SlaRuleRead
 from app.api.deps import get_current_user, admin_required
+from app.core.config import settings
+from app.core.request_profiler import TOKEN_HEADER, create_profile_token, profile_store
+from app.core.sql_profiler import query_budget
 from app.db.session import get_db
+from app.models.failed_email import FailedEmail
 from app.models.grievance import Grievance
+from app.models.grievance_signature import GrievanceSignature
+from app.models.outbox import OutboxMessage
+from app.models.sla_rule import SlaRule
+from app.services import email_retry, outbox
+from app.services.audit import audit_writer
+from app.services.bulk_status import BulkStatusFilter, bulk_update_status
+from app.services.dedup import duplicate_detector
+from app.services.routing import routing_engine
 
 router = APIRouter()
 
 
 @router.get("/grievances", response_model=List[GrievanceRead])
+@query_budget(2)
 def list_grievances(user=Depends(get_current_user), db: Session = Depends(get_db)):
     # TODO: enforce admin role
     return db.query(Grievance).all()
 
 
+@router.post("/grievances/bulk-status")
+def bulk_status_update(req: BulkStatusUpdate, user=Depends(admin_required), db: Session = Depends(get_db)):
+    """
+    Move many grievances to one status with chunked set-based updates; audit
+    rows and student notifications are written in bulk. Reports per-id results.
+    """
+    if (req.ids is None) == (req.filter is None):
+        raise HTTPException(status_code=422, detail="Give either ids or filter")
+    if req.ids is not None and len(req.ids) > settings.BULK_UPDATE_MAX_ROWS:
+        raise HTTPException(status_code=422, detail=f"At most {settings.BULK_UPDATE_MAX_ROWS} ids per request")
+    try:
+        report = bulk_update_status(
+            db,
+            req.status,
+            ids=req.ids,
+            filter=BulkStatusFilter(**req.filter.model_dump()) if req.filter else None,
+            performed_by=user.id,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return report.as_dict()
+
+
 @router.get("/grievances/{grievance_id}", response_model=GrievanceRead)
 def get_grievance(grievance_id: int, user=Depends(get_current_user), db: Session = Depends(get_db)):
     g = db.query(Grievance).filter(Grievance.id == grievance_id).first()
     if not g:
         raise HTTPException(status_code=404, detail="Not found")
     return g
+
+
+@router.get("/dead-letters", response_model=List[FailedEmailRead])
+@query_budget(2)
+def list_dead_letters(
+    limit: int = 50,
+    offset: int = 0,
+    user=Depends(admin_required),
+    db: Session = Depends(get_db),
+):
+    """List emails that exhausted their retries, newest first."""
+    return (
+        db.query(FailedEmail)
+        .filter(FailedEmail.status == "dead")
+        .order_by(FailedEmail.id.desc())
+        .offset(offset)
+        .limit(min(limit, 500))
+        .all()
+    )
+
+
+@router.post("/dead-letters/{email_id}/replay", response_model=FailedEmailRead, status_code=202)
+def replay_dead_letter(email_id: int, user=Depends(admin_required), db: Session = Depends(get_db)):
+    """Queue a dead-lettered email for immediate redelivery by the worker."""
+    failed = db.query(FailedEmail).filter(FailedEmail.id == email_id, FailedEmail.status == "dead").first()
+    if not failed:
+        raise HTTPException(status_code=404, detail="Not found")
+    return email_retry.replay(db, failed)
+
+
+@router.get("/dead-letters/outbox", response_model=List[OutboxMessageRead])
+@query_budget(2)
+def list_failed_notifications(
+    limit: int = 50,
+    offset: int = 0,
+    user=Depends(admin_required),
+    db: Session = Depends(get_db),
+):
+    """List outbox notifications that exhausted their retries, newest first."""
+    return (
+        db.query(OutboxMessage)
+        .filter(OutboxMessage.status == "failed")
+        .order_by(OutboxMessage.id.desc())
+        .offset(offset)
+        .limit(min(limit, 500))
+        .all()
+    )
+
+
+@router.post("/dead-letters/outbox/{message_id}/replay", response_model=OutboxMessageRead, status_code=202)
+def replay_failed_notification(message_id: int, user=Depends(admin_required), db: Session = Depends(get_db)):
+    """Queue a failed outbox notification for immediate redelivery by the worker."""
+    message = db.query(OutboxMessage).filter(OutboxMessage.id == message_id, OutboxMessage.status == "failed").first()
+    if not message:
+        raise HTTPException(status_code=404, detail="Not found")
+    return outbox.replay(db, message)
+
+
+@router.post("/routing/backlog")
+def route_backlog(limit: Optional[int] = None, user=Depends(admin_required), db: Session = Depends(get_db)):
+    """Assign every open, unassigned grievance to the least-loaded eligible handler."""
+    report, assignments = routing_engine.route_backlog(db, limit=limit)
+    for grievance_id, handler_id, title in assignments:
+        outbox.enqueue(
+            db,
+            "grievance_assigned",
+            grievance_id=grievance_id,
+            handler_email=routing_engine.handler_email(handler_id),
+            handler_name=f"Handler {handler_id}",
+            grievance_title=title,
+        )
+    db.commit()
+    for grievance_id, handler_id, _ in assignments:
+        audit_writer.record(grievance_id, "assigned", performed_by=user.id, remarks=f"auto: handler {handler_id}")
+    return report.as_dict()
+
+
+@router.get("/sla-rules", response_model=List[SlaRuleRead])
+@query_budget(2)
+def list_sla_rules(user=Depends(admin_required), db: Session = Depends(get_db)):
+    """SLA rules overriding SLA_DEFAULT_HOURS for a department and/or category."""
+    return db.query(SlaRule).order_by(SlaRule.id).all()
+
+
+@router.put("/sla-rules", response_model=SlaRuleRead)
+def put_sla_rule(rule: SlaRuleCreate, user=Depends(admin_required), db: Session = Depends(get_db)):
+    """Create the rule for a (status, department, category) scope, or change its limit."""
+    category = rule.category.strip().lower() if rule.category else None
+    existing = (
+        db.query(SlaRule)
+        .filter(
+            SlaRule.status == rule.status,
+            SlaRule.dept_id.is_not_distinct_from(rule.dept_id),
+            SlaRule.category.is_not_distinct_from(category),
+        )
+        .first()
+    )
+    if existing is None:
+        existing = SlaRule(status=rule.status, dept_id=rule.dept_id, category=category)
+        db.add(existing)
+    existing.max_hours = rule.max_hours
+    db.commit()
+    db.refresh(existing)
+    return existing
+
+
+@router.delete("/sla-rules/{rule_id}", status_code=204)
+def delete_sla_rule(rule_id: int, user=Depends(admin_required), db: Session = Depends(get_db)):
+    """Remove a rule; its scope falls back to the next less specific rule."""
+    rule = db.query(SlaRule).filter(SlaRule.id == rule_id).first()
+    if not rule:
+        raise HTTPException(status_code=404, detail="Not found")
+    db.delete(rule)
+    db.commit()
+
+
+@router.get("/duplicates")
+@query_budget(3)
+def list_duplicate_clusters(
+    limit: int = 50,
+    offset: int = 0,
+    user=Depends(admin_required),
+    db: Session = Depends(get_db),
+):
+    """Clusters of likely duplicate grievances, largest first."""
+    size = func.count(GrievanceSignature.grievance_id)
+    clusters = (
+        db.query(GrievanceSignature.cluster_id, size)
+        .group_by(GrievanceSignature.cluster_id)
+        .having(size > 1)
+        .order_by(size.desc(), GrievanceSignature.cluster_id)
+        .offset(offset)
+        .limit(min(limit, 500))
+        .all()
+    )
+    members = duplicate_detector.clusters_members(db, [cluster_id for cluster_id, _ in clusters])
+    return [
+        {"cluster_id": cluster_id, "size": count, "grievance_ids": members.get(cluster_id, [])}
+        for cluster_id, count in clusters
+    ]
+
+
+@router.post("/profiles/token")
+def create_profiling_token(ttl_seconds: Optional[int] = None, user=Depends(admin_required)):
+    """
+    A short-lived token; requests sending it as X-Profile-Token are profiled
+    (when PROFILER_ENABLED) and answer with the profile's id in X-Profile-Id.
+    """
+    ttl = min(ttl_seconds or settings.PROFILER_TOKEN_TTL_SECONDS, settings.PROFILER_TOKEN_TTL_SECONDS)
+    return {"header": TOKEN_HEADER.decode(), "token": create_profile_token(user.id, ttl), "expires_in": ttl}
+
+
+@router.get("/profiles")
+def list_profiles(user=Depends(admin_required)):
+    """Stored request profiles, newest first."""
+    return profile_store.list()
+
+
+@router.get("/profiles/{profile_id}/{kind}")
+def download_profile(profile_id: str, kind: str, user=Depends(admin_required)):
+    """A profile's `svg` flamegraph, `folded` stacks (flamegraph.pl, speedscope) or `json` summary."""
+    path = profile_store.path(profile_id, kind)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    media_type = {"svg": "image/svg+xml", "folded": "text/plain", "json": "application/json"}[kind]
+    return FileResponse(path, media_type=media_type, filename=path.name)
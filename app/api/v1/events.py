@@ -0,0 +1,59 @@
+"""
+Server-Sent Events stream of the current user's grievance updates.
+
+    POST /api/v1/events/token               (Authorization: Bearer <login jwt>)
+    GET  /api/v1/events/?token=<stream token>
+
+The stream token expires after SSE_TOKEN_TTL_SECONDS and is only checked on
+connect, so clients fetch a fresh one whenever they reconnect.
+
+Each update arrives as `event: grievance_status` with a JSON `data` line; a
+comment line is sent every SSE_HEARTBEAT_SECONDS so proxies keep idle streams
+open. Clients should re-fetch the grievance after reconnecting, since events
+published while disconnected are not replayed.
+"""
+from typing import AsyncIterator
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+
+from app.api.deps import get_current_user, get_stream_user
+from app.core.config import settings
+from app.core.events import EventBus, TooManySubscribers, bus, create_stream_token, user_channel
+
+router = APIRouter()
+
+RETRY_MS = 5000
+
+
+def format_event(data: str, event: str = "grievance_status") -> str:
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+async def event_stream(events: EventBus, channel: str, heartbeat: float) -> AsyncIterator[str]:
+    """Yield SSE frames for `channel` until the client disconnects."""
+    try:
+        with events.subscribe(channel) as subscription:
+            yield f"retry: {RETRY_MS}\n\n"
+            while True:
+                data = await subscription.get(timeout=heartbeat)
+                yield ": keepalive\n\n" if data is None else format_event(data)
+    except TooManySubscribers:
+        yield format_event('{"detail": "Too many open streams"}', event="error")
+
+
+@router.post("/token")
+def create_events_token(user=Depends(get_current_user)):
+    """A short-lived token that opens this user's event stream and nothing else."""
+    return {"token": create_stream_token(user.id), "expires_in": settings.SSE_TOKEN_TTL_SECONDS}
+
+
+@router.get("/")
+async def stream_events(user=Depends(get_stream_user)):
+    if bus.subscriber_count() >= bus.max_subscribers:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Too many open streams")
+    return StreamingResponse(
+        event_stream(bus, user_channel(user.id), settings.SSE_HEARTBEAT_SECONDS),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
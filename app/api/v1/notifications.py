@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends
+from typing import List, Optional
+from sqlalchemy.orm import Session
+
+from app.schemas.notification import MarkReadRequest, MarkReadResult, NotificationRead, UnreadCount
+from app.api.deps import get_current_user
+from app.core.sql_profiler import query_budget
+from app.db.session import get_db
+from app.services import inbox
+
+router = APIRouter()
+
+
+@router.get("/", response_model=List[NotificationRead])
+@query_budget(2)
+def list_notifications(
+    limit: int = 20,
+    before: Optional[int] = None,
+    unread_only: bool = False,
+    user=Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Inbox page, newest first; pass the last id as `before` for the next page."""
+    return inbox.list_notifications(db, user.id, limit=limit, before=before, unread_only=unread_only)
+
+
+@router.get("/unread-count", response_model=UnreadCount)
+def unread_count(user=Depends(get_current_user), db: Session = Depends(get_db)):
+    return {"unread": inbox.unread_count(db, user.id)}
+
+
+@router.post("/read", response_model=MarkReadResult)
+def mark_read(payload: MarkReadRequest, user=Depends(get_current_user), db: Session = Depends(get_db)):
+    """Mark the given notifications read, or all of them when `ids` is omitted."""
+    updated = inbox.mark_read(db, user.id, payload.ids)
+    return {"updated": updated, "unread": inbox.unread_count(db, user.id)}
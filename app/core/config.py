@@ -13,11 +13,130 @@ class Settings:
     SMTP_PASSWORD: str = os.getenv("SMTP_PASSWORD", "")
     FROM_EMAIL: str = os.getenv("FROM_EMAIL", "noreply@grievanceportal.local")
     ADMIN_EMAIL: str = os.getenv("ADMIN_EMAIL", "admin@grievanceportal.local")
+    SMTP_TIMEOUT: float = float(os.getenv("SMTP_TIMEOUT", "30"))
+    SMTP_POOL_SIZE: int = int(os.getenv("SMTP_POOL_SIZE", "4"))
+    SMTP_POOL_MAX_MESSAGES: int = int(os.getenv("SMTP_POOL_MAX_MESSAGES", "100"))
+    SMTP_POOL_IDLE_TIMEOUT: float = float(os.getenv("SMTP_POOL_IDLE_TIMEOUT", "60"))
+    SMTP_POOL_NOOP_INTERVAL: float = float(os.getenv("SMTP_POOL_NOOP_INTERVAL", "10"))
+    SMTP_ASYNC_MAX_CONCURRENCY: int = int(os.getenv("SMTP_ASYNC_MAX_CONCURRENCY", "10"))
+    
+    # Re-read edited email templates on use (development only)
+    EMAIL_TEMPLATE_AUTO_RELOAD: bool = os.getenv("EMAIL_TEMPLATE_AUTO_RELOAD", "false").lower() == "true"
+    
+    # Seconds to buffer digest-eligible notifications per recipient (0 disables)
+    NOTIFICATION_DIGEST_WINDOW: int = int(os.getenv("NOTIFICATION_DIGEST_WINDOW", "300"))
+    
+    # Notification outbox worker
+    OUTBOX_BATCH_SIZE: int = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+    OUTBOX_POLL_INTERVAL: float = float(os.getenv("OUTBOX_POLL_INTERVAL", "1.0"))
+    OUTBOX_MAX_ATTEMPTS: int = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5"))
+    OUTBOX_RETRY_BASE_SECONDS: int = int(os.getenv("OUTBOX_RETRY_BASE_SECONDS", "30"))
+    OUTBOX_RETRY_MAX_SECONDS: int = int(os.getenv("OUTBOX_RETRY_MAX_SECONDS", "3600"))
+    OUTBOX_LOCK_TIMEOUT: int = int(os.getenv("OUTBOX_LOCK_TIMEOUT", "300"))
+    
+    # Failed email retries / dead letters
+    EMAIL_MAX_ATTEMPTS: int = int(os.getenv("EMAIL_MAX_ATTEMPTS", "6"))
+    EMAIL_RETRY_BASE_SECONDS: int = int(os.getenv("EMAIL_RETRY_BASE_SECONDS", "30"))
+    EMAIL_RETRY_MAX_SECONDS: int = int(os.getenv("EMAIL_RETRY_MAX_SECONDS", "3600"))
+    EMAIL_RETRY_BATCH_SIZE: int = int(os.getenv("EMAIL_RETRY_BATCH_SIZE", "50"))
+    EMAIL_RETRY_POLL_INTERVAL: float = float(os.getenv("EMAIL_RETRY_POLL_INTERVAL", "5.0"))
+    EMAIL_RETRY_TICK_SECONDS: float = float(os.getenv("EMAIL_RETRY_TICK_SECONDS", "30"))
+    # One email is claimed at a time, so this only has to outlast a single send
+    EMAIL_RETRY_LOCK_TIMEOUT: int = int(os.getenv("EMAIL_RETRY_LOCK_TIMEOUT", "120"))
+    
+    # Real-time grievance events (Server-Sent Events)
+    EVENT_BROKER: str = os.getenv("EVENT_BROKER", "local")  # "local" or "redis"
+    REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    SSE_HEARTBEAT_SECONDS: float = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+    SSE_QUEUE_SIZE: int = int(os.getenv("SSE_QUEUE_SIZE", "100"))
+    SSE_MAX_CONNECTIONS: int = int(os.getenv("SSE_MAX_CONNECTIONS", "5000"))
+    # Lifetime of a stream token; only checked when a stream (re)connects
+    SSE_TOKEN_TTL_SECONDS: int = int(os.getenv("SSE_TOKEN_TTL_SECONDS", "60"))
+    
+    # Audit trail batching
+    AUDIT_BATCH_SIZE: int = int(os.getenv("AUDIT_BATCH_SIZE", "100"))
+    AUDIT_FLUSH_INTERVAL: float = float(os.getenv("AUDIT_FLUSH_INTERVAL", "1.0"))
+    AUDIT_MAX_BUFFER: int = int(os.getenv("AUDIT_MAX_BUFFER", "10000"))
+    
+    # Audit archival (scripts/archive_audits.py)
+    AUDIT_ARCHIVE_DIR: str = os.getenv("AUDIT_ARCHIVE_DIR", "archive/audits")
+    AUDIT_ARCHIVE_AFTER_DAYS: int = int(os.getenv("AUDIT_ARCHIVE_AFTER_DAYS", "180"))
+    AUDIT_ARCHIVE_BATCH_SIZE: int = int(os.getenv("AUDIT_ARCHIVE_BATCH_SIZE", "5000"))
+    
+    # Grievance storage for app/api/grievances.py: "sql" or "memory" (tests/single-process demos)
+    GRIEVANCE_BACKEND: str = os.getenv("GRIEVANCE_BACKEND", "sql")
+    
+    # Automatic routing of new grievances to the least-loaded handler
+    AUTO_ROUTING: bool = os.getenv("AUTO_ROUTING", "true").lower() == "true"
+    ROUTING_RESYNC_SECONDS: float = float(os.getenv("ROUTING_RESYNC_SECONDS", "60"))
+    
+    # SLA escalation (python -m app.workers.sla); rules in sla_rules override these defaults
+    SLA_DEFAULT_HOURS: str = os.getenv("SLA_DEFAULT_HOURS", "submitted=72,under_review=168")
+    SLA_ESCALATION_EMAIL: str = os.getenv("SLA_ESCALATION_EMAIL", ADMIN_EMAIL)
+    SLA_TICK_SECONDS: float = float(os.getenv("SLA_TICK_SECONDS", "60"))
+    SLA_SCAN_BATCH_SIZE: int = int(os.getenv("SLA_SCAN_BATCH_SIZE", "5000"))
+
+    # Prometheus metrics middleware and GET /metrics
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    # Bearer token scrapers must send to GET /metrics; unset keeps the endpoint closed
+    METRICS_TOKEN: str = os.getenv("METRICS_TOKEN", "")
+
+    # Per-request SQL profiler: N+1 warnings, X-SQL-* debug headers, @query_budget checks
+    SQL_PROFILER_ENABLED: bool = os.getenv("SQL_PROFILER_ENABLED", "false").lower() == "true"
+    SQL_PROFILER_HEADERS: bool = os.getenv("SQL_PROFILER_HEADERS", "false").lower() == "true"
+    SQL_PROFILER_STRICT: bool = os.getenv("SQL_PROFILER_STRICT", "false").lower() == "true"
+    SQL_PROFILER_REPEAT_THRESHOLD: int = int(os.getenv("SQL_PROFILER_REPEAT_THRESHOLD", "5"))
+
+    # On-demand request profiler (X-Profile-Token from POST /admin/profiles/token, or random sampling)
+    PROFILER_ENABLED: bool = os.getenv("PROFILER_ENABLED", "false").lower() == "true"
+    PROFILER_SAMPLE_RATE: float = float(os.getenv("PROFILER_SAMPLE_RATE", "0"))
+    PROFILER_INTERVAL_MS: float = float(os.getenv("PROFILER_INTERVAL_MS", "5"))
+    PROFILER_MAX_CONCURRENT: int = int(os.getenv("PROFILER_MAX_CONCURRENT", "1"))
+    PROFILER_MAX_SECONDS: float = float(os.getenv("PROFILER_MAX_SECONDS", "30"))
+    PROFILER_DIR: str = os.getenv("PROFILER_DIR", "profiles")
+    PROFILER_MAX_STORED: int = int(os.getenv("PROFILER_MAX_STORED", "50"))
+    PROFILER_TOKEN_TTL_SECONDS: int = int(os.getenv("PROFILER_TOKEN_TTL_SECONDS", "600"))
+
+    # Logging through a bounded queue and a background writer (app/core/logging_setup.py)
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "json")  # "json" or "text"
+    LOG_FILE: str = os.getenv("LOG_FILE", "")  # Empty: stderr
+    LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    LOG_QUEUE_OVERFLOW: str = os.getenv("LOG_QUEUE_OVERFLOW", "drop_newest")  # or "drop_oldest", "block"
+
+    # Admin bulk status updates: rows per UPDATE/commit, and most rows one filter request changes
+    BULK_UPDATE_CHUNK_SIZE: int = int(os.getenv("BULK_UPDATE_CHUNK_SIZE", "500"))
+    BULK_UPDATE_MAX_ROWS: int = int(os.getenv("BULK_UPDATE_MAX_ROWS", "20000"))
+    
+    # Near-duplicate detection (MinHash/LSH over grievance descriptions)
+    DEDUP_ENABLED: bool = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+    DEDUP_NUM_PERM: int = int(os.getenv("DEDUP_NUM_PERM", "128"))
+    DEDUP_BANDS: int = int(os.getenv("DEDUP_BANDS", "32"))
+    DEDUP_THRESHOLD: float = float(os.getenv("DEDUP_THRESHOLD", "0.5"))
+    DEDUP_WINDOW_DAYS: int = int(os.getenv("DEDUP_WINDOW_DAYS", "30"))
+    DEDUP_RESYNC_SECONDS: float = float(os.getenv("DEDUP_RESYNC_SECONDS", "30"))
+    DEDUP_SYNC_OVERLAP_SECONDS: float = float(os.getenv("DEDUP_SYNC_OVERLAP_SECONDS", "300"))
+    
+    # Category/department classifier (scripts/classifier.py train); "suggest", "normalize" or "off".
+    # Rewriting what students submit ("normalize") is opt-in.
+    CLASSIFIER_MODE: str = os.getenv("CLASSIFIER_MODE", "suggest")
+    CLASSIFIER_MODEL_PATH: str = os.getenv("CLASSIFIER_MODEL_PATH", "classifier/grievance_classifier.npz")
+    CLASSIFIER_FEATURES: int = int(os.getenv("CLASSIFIER_FEATURES", "131072"))
+    CLASSIFIER_MIN_CONFIDENCE: float = float(os.getenv("CLASSIFIER_MIN_CONFIDENCE", "0.6"))
     
     # Database (for future use)
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///grievance_portal.db")
     
     # File uploads
     MAX_FILE_SIZE: int = int(os.getenv("MAX_FILE_SIZE", "10485760"))  # 10MB
+    MAX_BATCH_UPLOAD_FILES: int = int(os.getenv("MAX_BATCH_UPLOAD_FILES", "10"))
+    MAX_BATCH_UPLOAD_SIZE: int = int(os.getenv("MAX_BATCH_UPLOAD_SIZE", "52428800"))  # 50MB
+    UPLOAD_CONCURRENCY: int = int(os.getenv("UPLOAD_CONCURRENCY", "4"))
+
+    # Orphan file garbage collection
+    GC_GRACE_PERIOD_SECONDS: int = int(os.getenv("GC_GRACE_PERIOD_SECONDS", "86400"))  # 1 day
+    GC_BATCH_SIZE: int = int(os.getenv("GC_BATCH_SIZE", "500"))
+    GC_MAX_RUNTIME_SECONDS: int = int(os.getenv("GC_MAX_RUNTIME_SECONDS", "300"))
+    GC_QUARANTINE: bool = os.getenv("GC_QUARANTINE", "true").lower() == "true"  # Move orphans to .quarantine instead of deleting
 
 settings = Settings()
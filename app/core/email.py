@@ -1,45 +1,377 @@
+import asyncio
+import os
 import smtplib
+import socket
+import threading
+import time
+from contextlib import contextmanager
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from typing import Iterable, Optional
+import aiosmtplib
 from app.core.config import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-def send_email(to: str, subject: str, body: str, html: bool = False) -> bool:
+
+class EmailDeliveryError(Exception):
+    """Raised by notification handlers when send_email fails, so the outbox retries the message."""
+
+
+# Errors that mean the connection is gone and the message can be resent on a fresh one
+_RECONNECT_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, socket.timeout)
+
+
+class _PooledConnection:
+    __slots__ = ("server", "sent", "last_used")
+
+    def __init__(self, server: smtplib.SMTP):
+        self.server = server
+        self.sent = 0
+        self.last_used = time.monotonic()
+
+
+class SMTPConnectionPool:
+    """
+    Thread-safe pool of persistent SMTP connections.
+
+    Connections are opened (and STARTTLS/login performed) once and reused.
+    A connection idle for longer than `noop_interval` is checked with NOOP
+    before reuse, one idle for longer than `idle_timeout` is closed, and every
+    connection is recycled after `max_messages` messages.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: str = "",
+        password: str = "",
+        max_size: int = 4,
+        max_messages: int = 100,
+        idle_timeout: float = 60.0,
+        noop_interval: float = 10.0,
+        timeout: float = 30.0,
+    ):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.max_size = max_size
+        self.max_messages = max_messages
+        self.idle_timeout = idle_timeout
+        self.noop_interval = noop_interval
+        self.timeout = timeout
+        self._idle: list[_PooledConnection] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._pid = os.getpid()
+
+    def _connect(self) -> _PooledConnection:
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.user and self.password:
+            server.starttls()
+            server.login(self.user, self.password)
+        return _PooledConnection(server)
+
+    @staticmethod
+    def _close(conn: _PooledConnection) -> None:
+        try:
+            conn.server.quit()
+        except Exception:
+            conn.server.close()
+
+    def _reset_after_fork(self) -> None:
+        # Sockets inherited from a parent process must not be shared
+        if self._pid != os.getpid():
+            with self._lock:
+                self._idle = []
+                self._slots = threading.BoundedSemaphore(self.max_size)
+                self._pid = os.getpid()
+
+    def _checkout(self) -> _PooledConnection:
+        while True:
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                return self._connect()
+            idle = time.monotonic() - conn.last_used
+            if idle > self.idle_timeout:
+                self._close(conn)
+                continue
+            if idle > self.noop_interval:
+                try:
+                    code, _ = conn.server.noop()
+                except (smtplib.SMTPException, OSError):
+                    code = None
+                if code != 250:
+                    conn.server.close()
+                    continue
+            return conn
+
+    def _checkin(self, conn: _PooledConnection) -> None:
+        conn.sent += 1
+        conn.last_used = time.monotonic()
+        if conn.sent >= self.max_messages:
+            self._close(conn)
+            return
+        with self._lock:
+            self._idle.append(conn)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; it is discarded instead of returned if the block raises."""
+        self._reset_after_fork()
+        slots = self._slots
+        slots.acquire()
+        try:
+            conn = self._checkout()
+            try:
+                yield conn.server
+            except Exception:
+                conn.server.close()
+                raise
+            self._checkin(conn)
+        finally:
+            slots.release()
+
+    def send_message(self, msg, retries: int = 1) -> None:
+        """Send `msg`, reconnecting and retrying if the pooled connection was dropped."""
+        for attempt in range(retries + 1):
+            try:
+                with self.connection() as server:
+                    server.send_message(msg)
+                return
+            except _RECONNECT_ERRORS as e:
+                if attempt >= retries:
+                    raise
+                logger.debug("SMTP connection lost (%s), reconnecting", e)
+
+    def close(self) -> None:
+        """Close all idle connections."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            self._close(conn)
+
+
+_pool: Optional[SMTPConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_smtp_pool() -> SMTPConnectionPool:
+    """Return the process-wide SMTP pool, creating it from settings on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = SMTPConnectionPool(
+                    settings.SMTP_HOST,
+                    settings.SMTP_PORT,
+                    user=settings.SMTP_USER,
+                    password=settings.SMTP_PASSWORD,
+                    max_size=settings.SMTP_POOL_SIZE,
+                    max_messages=settings.SMTP_POOL_MAX_MESSAGES,
+                    idle_timeout=settings.SMTP_POOL_IDLE_TIMEOUT,
+                    noop_interval=settings.SMTP_POOL_NOOP_INTERVAL,
+                    timeout=settings.SMTP_TIMEOUT,
+                )
+    return _pool
+
+
+def reset_smtp_pool() -> None:
+    """Close and drop the process-wide pool (e.g. after SMTP settings change)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+        _pool = None
+
+
+def build_message(
+    to: str, subject: str, body: str, html: bool = False, html_body: Optional[str] = None
+) -> MIMEMultipart:
+    """
+    Build the MIME message shared by the sync and async senders.
+    With `html_body`, `body` is the plain-text part and both are attached as
+    alternatives (plain first, so clients prefer HTML).
     """
-    Send email via SMTP.
+    msg = MIMEMultipart("alternative")
+    msg["Subject"] = subject
+    msg["From"] = settings.FROM_EMAIL
+    msg["To"] = to
+
+    # Attach body
+    if html_body is not None:
+        msg.attach(MIMEText(body, "plain"))
+        msg.attach(MIMEText(html_body, "html"))
+    elif html:
+        msg.attach(MIMEText(body, "html"))
+    else:
+        msg.attach(MIMEText(body, "plain"))
+    return msg
+
+
+def send_email(
+    to: str, subject: str, body: str, html: bool = False, html_body: Optional[str] = None
+) -> bool:
+    """
+    Send email via SMTP using the shared connection pool.
     Returns True if successful, False otherwise.
     """
     try:
-        msg = MIMEMultipart("alternative")
-        msg["Subject"] = subject
-        msg["From"] = settings.FROM_EMAIL
-        msg["To"] = to
-        
-        # Attach body
-        if html:
-            msg.attach(MIMEText(body, "html"))
-        else:
-            msg.attach(MIMEText(body, "plain"))
-        
-        # Connect to SMTP server
-        with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT) as server:
-            if settings.SMTP_USER and settings.SMTP_PASSWORD:
-                server.starttls()
-                server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
-            server.send_message(msg)
-        
-        logger.info(f"Email sent to {to}: {subject}")
+        msg = build_message(to, subject, body, html, html_body)
+        get_smtp_pool().send_message(msg)
+
+        logger.info("Email sent to %s: %s", to, subject)
         return True
     except Exception as e:
-        logger.error(f"Failed to send email to {to}: {str(e)}")
+        logger.error("Failed to send email to %s: %s", to, e)
         return False
 
 
-def send_email_async(to: str, subject: str, body: str, html: bool = False) -> None:
+def send_email_async(
+    to: str, subject: str, body: str, html: bool = False, html_body: Optional[str] = None
+) -> None:
     """
     Wrapper for background task. Sends email asynchronously.
     """
-    send_email(to, subject, body, html)
+    send_email(to, subject, body, html, html_body)
+
+
+class AsyncEmailSender:
+    """
+    asyncio-native SMTP sender for use inside async handlers.
+
+    At most `max_concurrency` SMTP sessions are open at once; sessions are
+    kept and reused like the sync pool, and every send is bounded by
+    `timeout` seconds so a stuck server cannot hold a session forever.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: str = "",
+        password: str = "",
+        max_concurrency: int = 10,
+        max_messages: int = 100,
+        timeout: float = 30.0,
+    ):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.max_concurrency = max_concurrency
+        self.max_messages = max_messages
+        self.timeout = timeout
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._idle: list[tuple[aiosmtplib.SMTP, int]] = []
+
+    def _bind_loop(self) -> asyncio.Semaphore:
+        # Sessions and the semaphore belong to one event loop
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._idle = []
+        return self._semaphore
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        auth = bool(self.user and self.password)
+        client = aiosmtplib.SMTP(
+            hostname=self.host,
+            port=self.port,
+            username=self.user if auth else None,
+            password=self.password if auth else None,
+            start_tls=auth,
+            timeout=self.timeout,
+        )
+        await client.connect()
+        return client
+
+    async def send_message(self, msg, retries: int = 1) -> None:
+        """Send `msg` on a pooled session, reconnecting once if it was dropped."""
+        async with self._bind_loop():
+            for attempt in range(retries + 1):
+                client, sent = self._idle.pop() if self._idle else (None, 0)
+                try:
+                    if client is None or not client.is_connected:
+                        client, sent = await asyncio.wait_for(self._connect(), self.timeout), 0
+                    await asyncio.wait_for(client.send_message(msg), self.timeout)
+                except (aiosmtplib.SMTPServerDisconnected, ConnectionError) as e:
+                    if client is not None:
+                        client.close()
+                    if attempt >= retries:
+                        raise
+                    logger.debug("Async SMTP session lost (%s), reconnecting", e)
+                    continue
+                except BaseException:
+                    if client is not None:
+                        client.close()
+                    raise
+                sent += 1
+                if sent >= self.max_messages:
+                    client.close()
+                else:
+                    self._idle.append((client, sent))
+                return
+
+    async def send(
+        self, to: str, subject: str, body: str, html: bool = False, html_body: Optional[str] = None
+    ) -> bool:
+        """
+        Send one email. Returns True if successful, False otherwise.
+        """
+        try:
+            await self.send_message(build_message(to, subject, body, html, html_body))
+            logger.info("Email sent to %s: %s", to, subject)
+            return True
+        except Exception as e:
+            logger.error("Failed to send email to %s: %r", to, e)
+            return False
+
+    async def send_many(self, messages: Iterable[tuple]) -> list[bool]:
+        """Send (to, subject, body[, html[, html_body]]) tuples concurrently; results keep input order."""
+        return list(await asyncio.gather(*(self.send(*m) for m in messages)))
+
+    async def close(self) -> None:
+        """Close idle sessions."""
+        idle, self._idle = self._idle, []
+        for client, _ in idle:
+            try:
+                await client.quit()
+            except Exception:
+                client.close()
+
+
+_async_sender: Optional[AsyncEmailSender] = None
+
+
+def get_async_sender() -> AsyncEmailSender:
+    """Return the process-wide async sender, creating it from settings on first use."""
+    global _async_sender
+    if _async_sender is None:
+        _async_sender = AsyncEmailSender(
+            settings.SMTP_HOST,
+            settings.SMTP_PORT,
+            user=settings.SMTP_USER,
+            password=settings.SMTP_PASSWORD,
+            max_concurrency=settings.SMTP_ASYNC_MAX_CONCURRENCY,
+            max_messages=settings.SMTP_POOL_MAX_MESSAGES,
+            timeout=settings.SMTP_TIMEOUT,
+        )
+    return _async_sender
+
+
+async def asend_email(
+    to: str, subject: str, body: str, html: bool = False, html_body: Optional[str] = None
+) -> bool:
+    """
+    Send email without blocking the event loop or tying up a threadpool thread.
+    Await it from async handlers; returns True if successful, False otherwise.
+    """
+    return await get_async_sender().send(to, subject, body, html, html_body)
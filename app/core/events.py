@@ -0,0 +1,231 @@
+"""
+In-process pub/sub bus for pushing grievance updates to connected clients.
+
+Handlers call `bus.publish(user_channel(user_id), {...})` after committing a
+change; every open event stream for that user receives it. Publishing goes
+through a broker so that, with several web workers, an event published in
+one worker reaches streams held by the others:
+
+- LocalBroker (default) delivers inside the current process only.
+- RedisBroker (EVENT_BROKER=redis) fans out through Redis pub/sub.
+
+A subscriber is one small asyncio.Queue, so thousands of idle streams per
+worker cost little more than their sockets.
+
+Browsers' EventSource cannot send headers, so streams authenticate with a
+stream token in the query string: a JWT valid for SSE_TOKEN_TTL_SECONDS
+that only opens a stream, never calls the API, so one leaked through a
+URL log is worth little.
+"""
+import asyncio
+import json
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Callable, Dict, Optional, Set
+
+from jose import JWTError
+
+from app.core import security
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+Deliver = Callable[[str, str], None]
+
+STREAM_TOKEN_PREFIX = "stream:"
+
+
+def user_channel(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+def create_stream_token(user_id: int, ttl_seconds: Optional[int] = None) -> str:
+    """A signed token that only opens `user_id`'s event stream."""
+    ttl = ttl_seconds or settings.SSE_TOKEN_TTL_SECONDS
+    return security.create_access_token(f"{STREAM_TOKEN_PREFIX}{user_id}", timedelta(seconds=ttl))
+
+
+def verify_stream_token(token: str) -> Optional[int]:
+    """The user id a valid, unexpired stream token was issued to, else None."""
+    try:
+        subject = security.decode_token(token).get("sub", "")
+    except JWTError:
+        return None
+    if not subject.startswith(STREAM_TOKEN_PREFIX):
+        return None  # A login token is not a stream token
+    return int(subject[len(STREAM_TOKEN_PREFIX):])
+
+
+class TooManySubscribers(Exception):
+    """Raised when a worker already holds SSE_MAX_CONNECTIONS streams."""
+
+
+class Subscription:
+    """One open stream's queue. Fed from any thread, read on its own event loop."""
+
+    def __init__(self, channel: str, maxsize: int):
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    def _put(self, data: str) -> None:
+        # A client that stops reading loses its oldest events, not the newest
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(data)
+
+    def put_threadsafe(self, data: str) -> None:
+        try:
+            self.loop.call_soon_threadsafe(self._put, data)
+        except RuntimeError:
+            pass  # Loop already closed; the stream is gone
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[str]:
+        """Next event, or None if nothing arrives within `timeout` seconds."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class LocalBroker:
+    """Delivers published events to subscribers in this process."""
+
+    def __init__(self):
+        self._deliver: Optional[Deliver] = None
+
+    def start(self, deliver: Deliver) -> None:
+        self._deliver = deliver
+
+    def publish(self, channel: str, data: str) -> None:
+        if self._deliver is not None:
+            self._deliver(channel, data)
+
+    def close(self) -> None:
+        self._deliver = None
+
+
+class RedisBroker:
+    """
+    Fans events out to every worker through Redis pub/sub.
+    Requires the `redis` package; a listener thread per process feeds the bus.
+    """
+
+    prefix = "grievance-events:"
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("EVENT_BROKER=redis requires the 'redis' package") from e
+        self._client = redis.Redis.from_url(url)
+        self._pubsub = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, deliver: Deliver) -> None:
+        self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.psubscribe(f"{self.prefix}*")
+
+        def listen():
+            for message in self._pubsub.listen():
+                try:
+                    channel = message["channel"].decode()[len(self.prefix):]
+                    deliver(channel, message["data"].decode())
+                except Exception:
+                    logger.exception("Failed to deliver event from Redis")
+
+        self._thread = threading.Thread(target=listen, name="event-bus-redis", daemon=True)
+        self._thread.start()
+
+    def publish(self, channel: str, data: str) -> None:
+        self._client.publish(f"{self.prefix}{channel}", data)
+
+    def close(self) -> None:
+        if self._pubsub is not None:
+            self._pubsub.close()
+
+
+def make_broker():
+    if settings.EVENT_BROKER == "redis":
+        return RedisBroker(settings.REDIS_URL)
+    if settings.EVENT_BROKER != "local":
+        raise ValueError(f"Unknown EVENT_BROKER: {settings.EVENT_BROKER}")
+    return LocalBroker()
+
+
+class EventBus:
+    """Routes published events to the subscriptions of each channel."""
+
+    def __init__(self, broker=None, queue_size: Optional[int] = None, max_subscribers: Optional[int] = None):
+        self._broker = broker
+        self.queue_size = settings.SSE_QUEUE_SIZE if queue_size is None else queue_size
+        self.max_subscribers = settings.SSE_MAX_CONNECTIONS if max_subscribers is None else max_subscribers
+        self._channels: Dict[str, Set[Subscription]] = {}
+        self._count = 0
+        self._lock = threading.Lock()
+
+    @property
+    def broker(self):
+        if self._broker is None:
+            with self._lock:
+                if self._broker is None:
+                    broker = make_broker()
+                    broker.start(self._deliver)
+                    self._broker = broker
+        return self._broker
+
+    def publish(self, channel: str, event: dict) -> None:
+        """Publish `event` to `channel`. Safe to call from any thread; never raises."""
+        try:
+            self.broker.publish(channel, json.dumps(event, default=str))
+        except Exception:
+            logger.exception("Failed to publish event on %s", channel)
+
+    def _deliver(self, channel: str, data: str) -> None:
+        with self._lock:
+            subscribers = list(self._channels.get(channel, ()))
+        for subscription in subscribers:
+            subscription.put_threadsafe(data)
+
+    @contextmanager
+    def subscribe(self, channel: str):
+        """Register a subscription for the duration of the block (call on the event loop)."""
+        self.broker  # Start the broker listener before the first event can arrive
+        with self._lock:
+            if self._count >= self.max_subscribers:
+                raise TooManySubscribers(channel)
+            subscription = Subscription(channel, self.queue_size)
+            self._channels.setdefault(channel, set()).add(subscription)
+            self._count += 1
+        try:
+            yield subscription
+        finally:
+            with self._lock:
+                subscribers = self._channels.get(channel)
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._channels[channel]
+                self._count -= 1
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return self._count
+
+    def close(self) -> None:
+        if self._broker is not None:
+            self._broker.close()
+
+
+bus = EventBus()
+
+
+def publish_grievance_status(student_id: int, grievance_id: int, old_status: str, new_status: str, **extra) -> None:
+    """Push a status change to the student's open streams (call after commit)."""
+    bus.publish(
+        user_channel(student_id),
+        {"grievance_id": grievance_id, "old_status": old_status, "status": new_status, **extra},
+    )
@@ -0,0 +1,247 @@
+"""
+Logging that never does I/O on the caller's thread.
+
+`setup_logging()` adds a `BoundedQueueHandler` to the root logger. The
+calling thread only builds the message and enqueues the record; a
+`QueueListener` thread writes it to stderr, or to LOG_FILE through a
+WatchedFileHandler (so logrotate can move the file). A slow disk or a
+stalled syslog pipe then delays the listener, not requests.
+
+The queue holds LOG_QUEUE_SIZE records. When the writer falls behind,
+LOG_QUEUE_OVERFLOW decides: "drop_newest" discards the record being logged,
+"drop_oldest" discards the oldest queued one, and "block" waits for room
+(for processes where losing records is worse than stalling). Dropped
+records are counted, and a warning with the count is queued once there is
+room again.
+
+With LOG_FORMAT=json each record is one JSON object: timestamp, level,
+logger, message, request_id, any `extra={...}` fields and the traceback.
+`RequestIdMiddleware` takes the request's X-Request-ID (or makes one up),
+echoes it on the response and keeps it in a context variable, which
+FastAPI copies into the threadpool running sync endpoints, so every record
+logged while handling the request carries it.
+
+Log with %-style arguments (`logger.info("Sent to %s", to)`), not
+f-strings: the message is then only built when the level is enabled.
+"""
+import atexit
+import copy
+import json
+import logging
+import queue
+import re
+import sys
+import threading
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, WatchedFileHandler
+from typing import Optional
+
+from app.core.config import settings
+
+OVERFLOW_POLICIES = ("drop_newest", "drop_oldest", "block")
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s [%(request_id)s]: %(message)s"
+REQUEST_ID_HEADER = b"x-request-id"
+NO_REQUEST = "-"
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+# LogRecord attributes that are not `extra` fields
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id"}
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamps records with the current request id (in the caller's thread, before the queue)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "request_id"):
+            record.request_id = request_id_var.get() or NO_REQUEST
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", NO_REQUEST)
+        if request_id != NO_REQUEST:
+            entry["request_id"] = request_id
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_FIELDS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        if record.stack_info:
+            entry["stack_info"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+
+class BoundedQueueHandler(QueueHandler):
+    """QueueHandler over a bounded queue, applying `overflow` when it is full."""
+
+    def __init__(self, log_queue: queue.Queue, overflow: str = "drop_newest"):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy {overflow!r}; choose from {', '.join(OVERFLOW_POLICIES)}")
+        super().__init__(log_queue)
+        self.overflow = overflow
+        self.dropped = 0  # Since the last drop warning
+        self.dropped_total = 0
+        self._lock = threading.Lock()
+        self._exc_formatter = logging.Formatter()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Like QueueHandler.prepare, but the traceback stays apart from the message for JsonFormatter
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = self._exc_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.overflow == "block":
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if self.overflow == "drop_oldest":
+                try:
+                    self.queue.get_nowait()
+                    self.queue.task_done()
+                    self.queue.put_nowait(record)
+                except (queue.Empty, queue.Full):
+                    pass  # Raced with the listener or another thread; the record is lost either way
+            with self._lock:
+                self.dropped += 1
+                self.dropped_total += 1
+            return
+        if self.dropped:
+            self._report_dropped()
+
+    def _report_dropped(self) -> None:
+        with self._lock:
+            dropped, self.dropped = self.dropped, 0
+        if not dropped:
+            return
+        warning = logging.LogRecord(
+            __name__, logging.WARNING, __file__, 0, f"{dropped} log records dropped: logging queue full", None, None
+        )
+        warning.request_id = NO_REQUEST
+        warning.dropped = dropped
+        try:
+            self.queue.put_nowait(warning)
+        except queue.Full:
+            with self._lock:
+                self.dropped += dropped  # Report them next time
+
+
+class _StderrHandler(logging.StreamHandler):
+    """Writes to whatever sys.stderr is at the time (test runners swap it)."""
+
+    @property
+    def stream(self):
+        return sys.stderr
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+_handler: Optional[BoundedQueueHandler] = None
+_listener: Optional[QueueListener] = None
+
+
+def setup_logging(
+    level: Optional[str] = None,
+    log_format: Optional[str] = None,
+    log_file: Optional[str] = None,
+    queue_size: Optional[int] = None,
+    overflow: Optional[str] = None,
+    target: Optional[logging.Handler] = None,
+) -> BoundedQueueHandler:
+    """
+    Route the root logger through the queue to `target` (stderr or LOG_FILE by
+    default) and start the writer thread. Idempotent; shutdown_logging() undoes it.
+    """
+    global _handler, _listener
+    if _handler is not None:
+        return _handler
+
+    log_format = log_format or settings.LOG_FORMAT
+    log_file = settings.LOG_FILE if log_file is None else log_file
+    if target is None:
+        target = WatchedFileHandler(log_file) if log_file else _StderrHandler()
+    if target.formatter is None:
+        target.setFormatter(JsonFormatter() if log_format == "json" else logging.Formatter(TEXT_FORMAT))
+
+    handler = BoundedQueueHandler(
+        queue.Queue(queue_size or settings.LOG_QUEUE_SIZE), overflow or settings.LOG_QUEUE_OVERFLOW
+    )
+    handler.addFilter(RequestIdFilter())
+    listener = QueueListener(handler.queue, target, respect_handler_level=True)
+    listener.start()
+
+    root = logging.getLogger()
+    root.addHandler(handler)
+    root.setLevel((level or settings.LOG_LEVEL).upper())
+    _handler, _listener = handler, listener
+    return handler
+
+
+def shutdown_logging() -> None:
+    """Write out queued records, stop the writer thread and remove the queue handler."""
+    global _handler, _listener
+    if _handler is None:
+        return
+    logging.getLogger().removeHandler(_handler)
+    _listener.stop()  # Drains the queue first
+    for handler in _listener.handlers:
+        handler.close()
+    _handler = _listener = None
+
+
+atexit.register(shutdown_logging)
+
+
+class RequestIdMiddleware:
+    """ASGI middleware giving each request an id, from X-Request-ID when it is sane."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers", ()):
+            if name == REQUEST_ID_HEADER:
+                candidate = value.decode("latin-1")
+                if _VALID_REQUEST_ID.match(candidate):
+                    request_id = candidate
+                break
+        request_id = request_id or uuid.uuid4().hex
+        header = (REQUEST_ID_HEADER, request_id.encode())
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [header]
+            await send(message)
+
+        token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(token)
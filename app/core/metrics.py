@@ -0,0 +1,262 @@
+"""
+Request and database metrics in the Prometheus text exposition format.
+
+`MetricsMiddleware` is a plain ASGI middleware (no per-request task or body
+buffering, so streamed responses such as SSE pass through untouched). Per
+request it records, labelled by method and route template (`/api/v1/
+grievances/{grievance_id}`, never the raw path, so label sets stay bounded):
+
+- http_requests_total and http_request_duration_seconds;
+- http_requests_in_progress;
+- http_response_size_bytes;
+- http_request_db_queries and http_request_db_seconds, from SQLAlchemy
+  cursor events on engines passed to `instrument_engine`.
+
+The query counters live in a per-request object reached through a context
+variable, which FastAPI copies into the threadpool running sync endpoints.
+Observing a histogram is one bisect and one lock; the whole middleware adds
+about 25 microseconds per request (benchmarks/bench_metrics.py).
+
+Metrics are per process: with several web workers, each scrape sees the
+worker that answered it; run one scrape target per worker, or sum over them
+in Prometheus.
+"""
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+UNMATCHED = "unmatched"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[tuple, float] = {}
+
+    def inc(self, labels: tuple = (), amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels: tuple = ()) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}" for labels, value in items
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, labels: tuple = (), amount: float = 1) -> None:
+        self.inc(labels, -amount)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last is +Inf), sum, count]
+        self._values: Dict[tuple, list] = {}
+
+    def observe(self, labels: tuple, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def snapshot(self, labels: tuple = ()) -> Optional[Tuple[List[int], float, int]]:
+        """Cumulative bucket counts, sum and count for one label set."""
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                return None
+            counts, total, count = list(state[0]), state[1], state[2]
+        cumulative, running = [], 0
+        for n in counts:
+            running += n
+            cumulative.append(running)
+        return cumulative, total, count
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        with self._lock:
+            label_sets = sorted(self._values)
+        for labels in label_sets:
+            cumulative, total, count = self.snapshot(labels)
+            for bound, n in zip(self.buckets + (float("inf"),), cumulative):
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {n}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class RequestMetrics:
+    """The metrics recorded by `MetricsMiddleware`; one set per registry."""
+
+    def __init__(self, registry: Registry):
+        route = ("method", "route")
+        self.requests = registry.register(Counter(
+            "http_requests_total", "HTTP requests by route and status code.", route + ("status",)))
+        self.duration = registry.register(Histogram(
+            "http_request_duration_seconds", "Time to the end of the response body.", route))
+        self.in_progress = registry.register(Gauge(
+            "http_requests_in_progress", "Requests being handled.", ("method",)))
+        self.response_size = registry.register(Histogram(
+            "http_response_size_bytes", "Response body size.", route, SIZE_BUCKETS))
+        self.db_queries = registry.register(Histogram(
+            "http_request_db_queries", "SQL statements executed per request.", route, QUERY_COUNT_BUCKETS))
+        self.db_seconds = registry.register(Histogram(
+            "http_request_db_seconds", "Time spent in SQL statements per request.", route))
+        self.db_queries_total = registry.register(Counter(
+            "db_queries_total", "SQL statements executed, in requests or not."))
+        self.db_seconds_total = registry.register(Counter(
+            "db_query_seconds_total", "Time spent in SQL statements, in requests or not."))
+
+
+class QueryStats:
+    __slots__ = ("count", "seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+registry = Registry()
+request_metrics = RequestMetrics(registry)
+_current_queries: ContextVar[Optional[QueryStats]] = ContextVar("current_queries", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_started"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info.pop("query_started", time.perf_counter())
+    request_metrics.db_queries_total.inc()
+    request_metrics.db_seconds_total.inc(amount=elapsed)
+    stats = _current_queries.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Count and time every statement `engine` runs (idempotent)."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _route_label(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording `request_metrics` for every HTTP request."""
+
+    def __init__(self, app, metrics: RequestMetrics = request_metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = self.metrics
+        method = scope["method"]
+        stats = QueryStats()
+        token = _current_queries.set(stats)
+        status = [500]
+        size = [0]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            elif message["type"] == "http.response.body":
+                size[0] += len(message.get("body", b""))
+            await send(message)
+
+        metrics.in_progress.inc((method,))
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _current_queries.reset(token)
+            metrics.in_progress.dec((method,))
+            labels = (method, _route_label(scope))
+            metrics.requests.inc(labels + (str(status[0]),))
+            metrics.duration.observe(labels, elapsed)
+            metrics.response_size.observe(labels, size[0])
+            metrics.db_queries.observe(labels, stats.count)
+            metrics.db_seconds.observe(labels, stats.seconds)
@@ -0,0 +1,295 @@
+"""
+On-demand profiling of single requests in production workers.
+
+`RequestProfilerMiddleware` (PROFILER_ENABLED) profiles a request when it
+carries a valid `X-Profile-Token` header, a short-lived token an admin gets
+from POST /api/v1/admin/profiles/token, or when it is picked at random
+with probability PROFILER_SAMPLE_RATE. Every other request pays one header
+lookup and one random() call.
+
+The profiler is a wall-clock stack sampler: a thread reads
+`sys._current_frames()` every PROFILER_INTERVAL_MS and counts the stacks of
+busy threads (idle pool threads and the event loop waiting in `select` are
+skipped). cProfile only sees the thread that enabled it, while sync
+endpoints run in FastAPI's threadpool, so it would miss exactly the code
+of interest. Since the sampler sees the whole process, requests running at
+the same time can show up in a profile; profile on a quiet worker when
+that matters. At most PROFILER_MAX_CONCURRENT requests are profiled at
+once (extra triggers are served unprofiled), and sampling stops after
+PROFILER_MAX_SECONDS.
+
+Each profile is stored in PROFILER_DIR as folded stacks (`a;b;c 12`, the
+input format of flamegraph.pl and speedscope), a self-contained SVG
+flamegraph and a JSON summary; only the newest PROFILER_MAX_STORED are
+kept. The response carries the profile's id in `X-Profile-Id`.
+"""
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+import zlib
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from html import escape
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from jose import JWTError
+
+from app.core import security
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+TOKEN_HEADER = b"x-profile-token"
+TOKEN_PREFIX = "profile:"
+PROFILE_ID = re.compile(r"^\d{8}T\d{6}-[0-9a-f]{8}$")
+# (file name, function) of the innermost Python frame of a thread that is waiting, not working
+IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+}
+# Frames are named relative to the sys.path entry they were imported from
+_PATH_ROOTS = sorted({os.path.abspath(p) for p in sys.path if p}, key=len, reverse=True)
+
+
+def create_profile_token(admin_id: int, ttl_seconds: Optional[int] = None) -> str:
+    """A signed token that makes requests carrying it in X-Profile-Token get profiled."""
+    ttl = ttl_seconds or settings.PROFILER_TOKEN_TTL_SECONDS
+    return security.create_access_token(f"{TOKEN_PREFIX}{admin_id}", timedelta(seconds=ttl))
+
+
+def verify_profile_token(token: str) -> Optional[int]:
+    """The admin id a valid, unexpired profile token was issued to, else None."""
+    try:
+        subject = security.decode_token(token).get("sub", "")
+    except JWTError:
+        return None
+    if not subject.startswith(TOKEN_PREFIX):
+        return None  # A login token is not a profile token
+    return int(subject[len(TOKEN_PREFIX):])
+
+
+def _frame_name(code) -> str:
+    path = code.co_filename
+    for root in _PATH_ROOTS:
+        if path.startswith(root + os.sep):
+            path = path[len(root) + 1:]
+            break
+    return f"{code.co_name} ({path}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Counts the stacks of busy threads every `interval` seconds, from a background thread."""
+
+    def __init__(self, interval: float, max_seconds: float):
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        deadline = time.monotonic() + self.max_seconds
+        while not self._stop.wait(self.interval) and time.monotonic() < deadline:
+            self.samples += 1
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                code = frame.f_code
+                if (os.path.basename(code.co_filename), code.co_name) in IDLE_LEAVES:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_name(frame.f_code))
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+
+
+def folded(stacks: Counter) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+def flamegraph_svg(stacks: Counter, title: str, width: int = 1200, frame_height: int = 16) -> str:
+    """A self-contained SVG flamegraph (root at the top) with a tooltip per frame."""
+    root: Dict = {"name": "all", "value": 0, "children": {}}
+    for stack, count in stacks.items():
+        root["value"] += count
+        node = root
+        for name in stack.split(";"):
+            node = node["children"].setdefault(name, {"name": name, "value": 0, "children": {}})
+            node["value"] += count
+
+    rects: List[str] = []
+    depth_max = [0]
+    total = root["value"] or 1
+
+    def layout(node: Dict, x: float, depth: int) -> None:
+        w = node["value"] / total * width
+        if w < 0.3:
+            return
+        depth_max[0] = max(depth_max[0], depth)
+        y = 24 + depth * frame_height
+        hue = zlib.crc32(node["name"].encode()) % 50
+        label = escape(node["name"])
+        share = f"{node['value']} samples, {node['value'] / total:.1%}"
+        text = ""
+        if w > 40:
+            chars = int(w / 7)
+            shown = node["name"] if len(node["name"]) <= chars else node["name"][:max(chars - 2, 1)] + ".."
+            text = f'<text x="{x + 3:.1f}" y="{y + 12}">{escape(shown)}</text>'
+        rects.append(
+            f'<g><title>{label} ({share})</title>'
+            f'<rect x="{x:.1f}" y="{y}" width="{w:.1f}" height="{frame_height - 1}" '
+            f'fill="hsl({hue},85%,60%)"/>{text}</g>'
+        )
+        for child in sorted(node["children"].values(), key=lambda c: c["name"]):
+            layout(child, x, depth + 1)
+            x += child["value"] / total * width
+
+    layout(root, 0.0, 0)
+    height = 24 + (depth_max[0] + 1) * frame_height + 8
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'font-family="monospace" font-size="11">'
+        f'<text x="4" y="16" font-size="13">{escape(title)}</text>{"".join(rects)}</svg>\n'
+    )
+
+
+class ProfileStore:
+    """Profiles on disk: <id>.folded, <id>.svg and <id>.json, newest `max_stored` kept."""
+
+    KINDS = {"folded": ".folded", "svg": ".svg", "json": ".json"}
+
+    def __init__(self, directory: Optional[str] = None, max_stored: Optional[int] = None):
+        self.directory = Path(directory or settings.PROFILER_DIR)
+        self.max_stored = max_stored or settings.PROFILER_MAX_STORED
+
+    def save(self, summary: dict, stacks: Counter) -> str:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        profile_id = summary["id"]
+        title = f"{summary['method']} {summary['route']} - {summary['duration_ms']} ms, {summary['samples']} samples"
+        (self.directory / f"{profile_id}.folded").write_text(folded(stacks))
+        (self.directory / f"{profile_id}.svg").write_text(flamegraph_svg(stacks, title))
+        # Written last: a listed profile always has its artifacts
+        (self.directory / f"{profile_id}.json").write_text(json.dumps(summary))
+        self.prune()
+        return profile_id
+
+    def list(self) -> List[dict]:
+        if not self.directory.exists():
+            return []
+        summaries = []
+        for path in sorted(self.directory.glob("*.json"), reverse=True):
+            try:
+                summaries.append(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                continue
+        return summaries
+
+    def path(self, profile_id: str, kind: str) -> Optional[Path]:
+        if not PROFILE_ID.match(profile_id) or kind not in self.KINDS:
+            return None
+        path = self.directory / f"{profile_id}{self.KINDS[kind]}"
+        return path if path.exists() else None
+
+    def prune(self) -> None:
+        for path in sorted(self.directory.glob("*.json"), reverse=True)[self.max_stored:]:
+            for suffix in self.KINDS.values():
+                path.with_suffix(suffix).unlink(missing_ok=True)
+
+
+profile_store = ProfileStore()
+
+
+def _new_profile_id() -> str:
+    return f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+
+
+class RequestProfilerMiddleware:
+    """ASGI middleware sampling the stacks of triggered requests."""
+
+    def __init__(self, app, store: Optional[ProfileStore] = None, sample_rate: Optional[float] = None,
+                 max_concurrent: Optional[int] = None):
+        self.app = app
+        self.store = store or profile_store
+        self.sample_rate = settings.PROFILER_SAMPLE_RATE if sample_rate is None else sample_rate
+        self._slots = threading.BoundedSemaphore(max_concurrent or settings.PROFILER_MAX_CONCURRENT)
+        self.skipped = 0
+
+    def _trigger(self, scope) -> Optional[Tuple[str, Optional[int]]]:
+        for name, value in scope.get("headers", ()):
+            if name == TOKEN_HEADER:
+                admin_id = verify_profile_token(value.decode("latin-1"))
+                if admin_id is not None:
+                    return "token", admin_id
+                logger.warning("Ignoring invalid or expired X-Profile-Token")
+                break
+        if self.sample_rate and random.random() < self.sample_rate:
+            return "sampled", None
+        return None
+
+    async def __call__(self, scope, receive, send):
+        trigger = self._trigger(scope) if scope["type"] == "http" else None
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+        if not self._slots.acquire(blocking=False):
+            self.skipped += 1
+            logger.info("Profiler busy, serving the request unprofiled")
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = _new_profile_id()
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        started = time.perf_counter()
+        sampler = StackSampler(settings.PROFILER_INTERVAL_MS / 1000, settings.PROFILER_MAX_SECONDS).start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.stop()
+            self._slots.release()
+            route = getattr(scope.get("route"), "path", scope["path"])
+            summary = {
+                "id": profile_id,
+                "method": scope["method"],
+                "route": route,
+                "path": scope["path"],
+                "status": status[0],
+                "trigger": trigger[0],
+                "requested_by": trigger[1],
+                "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+                "samples": sampler.samples,
+                "interval_ms": settings.PROFILER_INTERVAL_MS,
+                "created_at": datetime.now(timezone.utc).isoformat(),
+            }
+            try:
+                await run_in_threadpool(self.store.save, summary, sampler.stacks)
+                logger.info("Profiled %s %s as %s", summary["method"], route, profile_id)
+            except OSError:
+                logger.exception("Could not store profile %s", profile_id)
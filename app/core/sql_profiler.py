@@ -0,0 +1,196 @@
+"""
+Per-request SQL profiling and N+1 detection.
+
+SQLAlchemy cursor events (on engines passed to `instrument_engine`, or on
+the `Engine` class for every engine) feed the profiles active in the
+current context. SQLAlchemy renders parameters as placeholders, so the
+statement text groups the same parameterized query across executions; a
+statement run SQL_PROFILER_REPEAT_THRESHOLD times or more in one request is
+the usual N+1 shape (one query per row of a previous result).
+
+`SqlProfilerMiddleware` profiles each request. It logs suspected N+1
+statements with the route, optionally adds X-SQL-Queries / X-SQL-Time-Ms /
+X-SQL-Repeated response headers (SQL_PROFILER_HEADERS, for debugging), and
+checks the endpoint's declared `@query_budget(n)`. Over budget, it logs a
+warning, or raises QueryBudgetExceeded in strict mode (SQL_PROFILER_STRICT,
+which the test suite turns on) so the test calling the endpoint fails.
+
+Tests can also wrap code in `assert_max_queries(n)`, or mark a whole test
+with `@pytest.mark.query_budget(n)` (see tests/conftest.py).
+"""
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+BUDGET_ATTRIBUTE = "__query_budget__"
+
+
+class QueryBudgetExceeded(AssertionError):
+    """More SQL statements ran than the declared budget allows."""
+
+
+class QueryProfile:
+    """Statements run while the profile was active, grouped by text."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        # statement -> [executions, seconds]
+        self.statements: Dict[str, list] = {}
+
+    def add(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        stats = self.statements.get(statement)
+        if stats is None:
+            self.statements[statement] = [1, seconds]
+        else:
+            stats[0] += 1
+            stats[1] += seconds
+
+    def repeated(self, threshold: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Statements run at least `threshold` times, most frequent first."""
+        threshold = threshold or settings.SQL_PROFILER_REPEAT_THRESHOLD
+        found = [(s, stats[0]) for s, stats in self.statements.items() if stats[0] >= threshold]
+        return sorted(found, key=lambda item: -item[1])
+
+    def summary(self, limit: int = 10) -> str:
+        top = sorted(self.statements.items(), key=lambda item: -item[1][1])[:limit]
+        lines = [f"{self.count} statements in {self.seconds * 1000:.1f} ms"]
+        lines += [f"  {n}x {seconds * 1000:.1f} ms  {_short(s)}" for s, (n, seconds) in top]
+        return "\n".join(lines)
+
+
+def _short(statement: str, width: int = 160) -> str:
+    statement = " ".join(statement.split())
+    return statement if len(statement) <= width else statement[:width - 3] + "..."
+
+
+_active: ContextVar[Tuple[QueryProfile, ...]] = ContextVar("sql_profiles", default=())
+# Profiles that see statements from every thread (test-wide budgets, where TestClient
+# runs the app in its own thread and context)
+_global: List[QueryProfile] = []
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["profile_started"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profiles = _active.get() + tuple(_global) if _global else _active.get()
+    if not profiles:
+        return
+    elapsed = time.perf_counter() - conn.info.pop("profile_started", time.perf_counter())
+    for profile in profiles:
+        profile.add(statement, elapsed)
+
+
+def instrument_engine(target=Engine) -> None:
+    """Profile statements of one engine, or of every engine by default (idempotent)."""
+    if event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        return  # Already listening on every engine
+    if not event.contains(target, "before_cursor_execute", _before_cursor_execute):
+        event.listen(target, "before_cursor_execute", _before_cursor_execute)
+        event.listen(target, "after_cursor_execute", _after_cursor_execute)
+
+
+@contextmanager
+def profile_queries(all_threads: bool = False) -> Iterator[QueryProfile]:
+    """
+    Collect the statements run inside the block (nested profiles all see
+    them). With `all_threads`, statements run by other threads meanwhile count too.
+    """
+    profile = QueryProfile()
+    if all_threads:
+        _global.append(profile)
+        try:
+            yield profile
+        finally:
+            _global.remove(profile)
+        return
+    token = _active.set(_active.get() + (profile,))
+    try:
+        yield profile
+    finally:
+        _active.reset(token)
+
+
+@contextmanager
+def assert_max_queries(max_queries: int, all_threads: bool = False) -> Iterator[QueryProfile]:
+    """Raise QueryBudgetExceeded if the block runs more than `max_queries` statements."""
+    with profile_queries(all_threads) as profile:
+        yield profile
+    if profile.count > max_queries:
+        raise QueryBudgetExceeded(f"{profile.count} SQL statements, budget {max_queries}\n{profile.summary()}")
+
+
+def query_budget(max_queries: int) -> Callable:
+    """Declare how many statements an endpoint may run per request (put below the route decorator)."""
+    def decorate(endpoint: Callable) -> Callable:
+        setattr(endpoint, BUDGET_ATTRIBUTE, max_queries)
+        return endpoint
+    return decorate
+
+
+def _route(scope) -> str:
+    route = scope.get("route")
+    return f"{scope['method']} {getattr(route, 'path', scope['path'])}"
+
+
+class SqlProfilerMiddleware:
+    """ASGI middleware profiling the SQL of each request."""
+
+    def __init__(self, app, headers: Optional[bool] = None, strict: Optional[bool] = None,
+                 threshold: Optional[int] = None):
+        self.app = app
+        self.headers = headers
+        self.strict = strict
+        self.threshold = threshold
+
+    def _check(self, scope, profile: QueryProfile) -> None:
+        route = _route(scope)
+        for statement, count in profile.repeated(self.threshold):
+            logger.warning("Possible N+1 on %s: %dx %s", route, count, _short(statement))
+        budget = getattr(scope.get("endpoint"), BUDGET_ATTRIBUTE, None)
+        if budget is not None and profile.count > budget:
+            message = f"{route} ran {profile.count} SQL statements, budget {budget}\n{profile.summary()}"
+            strict = settings.SQL_PROFILER_STRICT if self.strict is None else self.strict
+            if strict:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = settings.SQL_PROFILER_HEADERS if self.headers is None else self.headers
+        checked = []
+
+        with profile_queries() as profile:
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    # The endpoint has returned; streamed bodies may still query later
+                    checked.append(True)
+                    self._check(scope, profile)
+                    if headers:
+                        message["headers"] = list(message.get("headers", [])) + [
+                            (b"x-sql-queries", str(profile.count).encode()),
+                            (b"x-sql-time-ms", f"{profile.seconds * 1000:.2f}".encode()),
+                            (b"x-sql-repeated", str(len(profile.repeated(self.threshold))).encode()),
+                        ]
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
+        if not checked:
+            self._check(scope, profile)
+        logger.debug("%s: %d SQL statements in %.1f ms", _route(scope), profile.count, profile.seconds * 1000)
@@ -1,7 +1,12 @@
+import asyncio
+import threading
 import time
 import shutil
+import uuid
 from pathlib import Path
+from typing import Optional
 from fastapi import UploadFile, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from app.core.config import settings
 
 # Configure media root outside web root
@@ -11,6 +16,7 @@ MEDIA_ROOT.mkdir(exist_ok=True)
 # Configuration
 # Use configured limit from settings if available
 MAX_FILE_SIZE = getattr(settings, "MAX_FILE_SIZE", 10 * 1024 * 1024)
+CHUNK_SIZE = 1024 * 1024  # Read 1MB at a time
 ALLOWED_CONTENT_TYPES = {
     "application/pdf",
     "image/jpeg",
@@ -30,35 +36,81 @@ def validate_file(file: UploadFile) -> None:
         )
 
 
-async def save_upload(file: UploadFile, prefix: str = "") -> tuple[str, int]:
-    """
-    Save uploaded file to MEDIA_ROOT and return (file_path, file_size).
-    Validates file as it streams.
-    """
-    validate_file(file)
-    
-    # Generate filename
-    ext = Path(file.filename).suffix
-    filename = f"{prefix}_{int(time.time())}{ext}"
-    target = MEDIA_ROOT / filename
-    
-    # Write file and track size
+class UploadBudget:
+    """Thread-safe byte budget shared by all files of one batch upload."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def reserve(self, size: int) -> bool:
+        with self._lock:
+            if self.used + size > self.limit:
+                return False
+            self.used += size
+            return True
+
+    def release(self, size: int) -> None:
+        with self._lock:
+            self.used -= size
+
+
+def _unique_filename(original: str, prefix: str) -> str:
+    ext = Path(original or "").suffix
+    return f"{prefix}_{int(time.time())}_{uuid.uuid4().hex[:12]}{ext}"
+
+
+def _copy_to_disk(source, target: Path, budget: Optional[UploadBudget] = None) -> int:
+    """Stream `source` into `target` in chunks, enforcing size limits. Runs in a worker thread."""
     file_size = 0
+    reserved = 0
     try:
         with target.open("wb") as buffer:
             while True:
-                chunk = await file.read(1024 * 1024)  # Read 1MB at a time
+                chunk = source.read(CHUNK_SIZE)
                 if not chunk:
                     break
                 file_size += len(chunk)
                 if file_size > MAX_FILE_SIZE:
-                    target.unlink()  # Delete incomplete file
                     raise HTTPException(
                         status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
                         detail=f"File size exceeds {MAX_FILE_SIZE / 1024 / 1024}MB limit",
                     )
+                if budget is not None:
+                    if not budget.reserve(len(chunk)):
+                        raise HTTPException(
+                            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail=f"Batch exceeds {budget.limit / 1024 / 1024}MB combined limit",
+                        )
+                    reserved += len(chunk)
                 buffer.write(chunk)
+    except Exception:
+        if budget is not None and reserved:
+            budget.release(reserved)  # Failed files don't count against the batch
+        raise
+    return file_size
+
+
+async def save_upload(
+    file: UploadFile,
+    prefix: str = "",
+    budget: Optional[UploadBudget] = None,
+) -> tuple[str, int]:
+    """
+    Save uploaded file to MEDIA_ROOT and return (file_path, file_size).
+    Validates file as it streams; the disk write runs in the threadpool so
+    concurrent uploads overlap instead of blocking the event loop.
+    """
+    validate_file(file)
+    
+    target = MEDIA_ROOT / _unique_filename(file.filename, prefix)
+    
+    try:
+        file_size = await run_in_threadpool(_copy_to_disk, file.file, target, budget)
     except HTTPException:
+        if target.exists():
+            target.unlink()  # Delete incomplete file
         raise
     except Exception as e:
         if target.exists():
@@ -71,6 +123,50 @@ async def save_upload(file: UploadFile, prefix: str = "") -> tuple[str, int]:
     return str(target), file_size
 
 
+async def save_uploads(
+    files: list[UploadFile],
+    prefix: str = "",
+    max_concurrency: Optional[int] = None,
+    max_total_size: Optional[int] = None,
+) -> list[dict]:
+    """
+    Save several uploads concurrently and return one result per file, in order.
+    At most `max_concurrency` files are written at once and all files share a
+    combined size budget. A failing file does not abort the others.
+    """
+    max_total_size = max_total_size or settings.MAX_BATCH_UPLOAD_SIZE
+    declared = [getattr(f, "size", None) for f in files]
+    if all(size is not None for size in declared) and sum(declared) > max_total_size:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batch exceeds {max_total_size / 1024 / 1024}MB combined limit",
+        )
+
+    semaphore = asyncio.Semaphore(max_concurrency or settings.UPLOAD_CONCURRENCY)
+    budget = UploadBudget(max_total_size)
+
+    async def _save(file: UploadFile) -> dict:
+        async with semaphore:
+            try:
+                file_path, file_size = await save_upload(file, prefix=prefix, budget=budget)
+            except HTTPException as e:
+                return {
+                    "filename": file.filename,
+                    "status": "error",
+                    "status_code": e.status_code,
+                    "detail": e.detail,
+                }
+        return {
+            "filename": file.filename,
+            "status": "ok",
+            "file_path": file_path,
+            "file_size": file_size,
+            "content_type": file.content_type,
+        }
+
+    return list(await asyncio.gather(*(_save(f) for f in files)))
+
+
 def get_file_path(file_id: int, filename: str) -> Path:
     """Retrieve path for a stored file (used for serving)."""
     # In production, this would query the DB; here we construct from params
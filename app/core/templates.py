@@ -0,0 +1,114 @@
+"""
+Email template registry.
+
+Templates live in app/templates/email as `<name>.txt` (first line
+`Subject: ...`, then a blank line and the plain-text body) plus an optional
+`<name>.html` alternative. They use string.Template `$placeholders`, are
+compiled once when the registry is created, and are re-read on change only
+when EMAIL_TEMPLATE_AUTO_RELOAD is enabled (development).
+"""
+import html
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from string import Template
+from typing import Dict, Iterable, List, Optional
+
+from app.core.config import settings
+
+TEMPLATE_DIR = Path(__file__).resolve().parent.parent / "templates" / "email"
+
+
+class Safe(str):
+    """A value that is already HTML and must not be escaped again."""
+
+
+@dataclass
+class RenderedEmail:
+    subject: str
+    text: str
+    html: Optional[str] = None
+
+
+class EmailTemplate:
+    """One compiled template: subject, text body and optional HTML body."""
+
+    def __init__(self, name: str, text_path: Path, html_path: Optional[Path]):
+        self.name = name
+        self.text_path = text_path
+        self.html_path = html_path
+        self.mtimes = self._mtimes()
+        raw = text_path.read_text(encoding="utf-8")
+        header, _, body = raw.partition("\n\n")
+        if not header.startswith("Subject:"):
+            raise ValueError(f"Email template {text_path} must start with a 'Subject:' line")
+        self.subject = Template(header[len("Subject:"):].strip())
+        self.text = Template(body)
+        self.html = Template(html_path.read_text(encoding="utf-8")) if html_path else None
+
+    def _mtimes(self) -> tuple:
+        paths = [self.text_path] + ([self.html_path] if self.html_path else [])
+        return tuple(os.stat(p).st_mtime_ns for p in paths)
+
+    def is_stale(self) -> bool:
+        try:
+            return self._mtimes() != self.mtimes
+        except FileNotFoundError:
+            return True
+
+    def render(self, context: dict) -> RenderedEmail:
+        text_context = {k: "" if v is None else v for k, v in context.items()}
+        rendered = RenderedEmail(
+            subject=self.subject.substitute(text_context),
+            text=self.text.substitute(text_context),
+        )
+        if self.html is not None:
+            html_context = {
+                k: v if isinstance(v, Safe) else html.escape(str(v)) for k, v in text_context.items()
+            }
+            rendered.html = self.html.substitute(html_context)
+        return rendered
+
+
+class TemplateRegistry:
+    """Loads and caches every template in a directory."""
+
+    def __init__(self, directory: Path = TEMPLATE_DIR, auto_reload: Optional[bool] = None):
+        self.directory = Path(directory)
+        self.auto_reload = settings.EMAIL_TEMPLATE_AUTO_RELOAD if auto_reload is None else auto_reload
+        self._templates: Dict[str, EmailTemplate] = {}
+        self._lock = threading.Lock()
+        self.load_all()
+
+    def _load(self, name: str) -> EmailTemplate:
+        text_path = self.directory / f"{name}.txt"
+        if not text_path.exists():
+            raise KeyError(f"Unknown email template: {name}")
+        html_path = self.directory / f"{name}.html"
+        return EmailTemplate(name, text_path, html_path if html_path.exists() else None)
+
+    def load_all(self) -> None:
+        """Compile every template in the directory."""
+        templates = {p.stem: self._load(p.stem) for p in sorted(self.directory.glob("*.txt"))}
+        with self._lock:
+            self._templates = templates
+
+    def get(self, name: str) -> EmailTemplate:
+        template = self._templates.get(name)
+        if template is None or (self.auto_reload and template.is_stale()):
+            template = self._load(name)
+            with self._lock:
+                self._templates[name] = template
+        return template
+
+    def render(self, name: str, **context) -> RenderedEmail:
+        return self.get(name).render(context)
+
+    def render_many(self, name: str, contexts: Iterable[dict]) -> List[RenderedEmail]:
+        """Render one template for many recipients with a single lookup."""
+        template = self.get(name)
+        return [template.render(context) for context in contexts]
+
+
+templates = TemplateRegistry()
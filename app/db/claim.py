@@ -0,0 +1,64 @@
+"""Row claiming for table-backed work queues (outbox, email retries)."""
+import uuid
+from datetime import datetime
+from typing import List
+
+from sqlalchemy import and_, select, update
+from sqlalchemy.orm import Session
+
+
+def claim_rows(
+    db: Session,
+    model,
+    claimable,
+    batch_size: int,
+    claimed_status: str,
+    now: datetime,
+) -> List:
+    """
+    Atomically claim up to `batch_size` rows of `model` matching `claimable`.
+
+    PostgreSQL uses FOR UPDATE SKIP LOCKED so concurrent workers never block
+    on each other; SQLite serializes writers, so a single UPDATE ... WHERE id
+    IN (SELECT ... LIMIT n) is already atomic there. Claimed rows get
+    `claimed_status`, a fresh `locked_by` token, `locked_at = now` and their
+    `attempts` incremented. Commits and returns the claimed rows.
+    """
+    token = uuid.uuid4().hex
+    due = (
+        select(model.id)
+        .where(claimable)
+        .order_by(model.next_attempt_at, model.id)
+        .limit(batch_size)
+    )
+
+    if db.get_bind().dialect.name == "postgresql":
+        ids = db.execute(due.with_for_update(skip_locked=True)).scalars().all()
+        if not ids:
+            db.commit()
+            return []
+        target = model.id.in_(ids)
+    else:
+        target = and_(model.id.in_(due.scalar_subquery()), claimable)
+
+    db.execute(
+        update(model)
+        .where(target)
+        .values(
+            status=claimed_status,
+            locked_by=token,
+            locked_at=now,
+            attempts=model.attempts + 1,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return (
+        db.execute(
+            select(model)
+            .where(model.locked_by == token, model.status == claimed_status)
+            .order_by(model.id)
+        )
+        .scalars()
+        .all()
+    )
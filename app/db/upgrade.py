@@ -0,0 +1,86 @@
+"""
+Create missing tables and bring existing ones up to the current models.
+
+`Base.metadata.create_all()` only creates tables that do not exist yet; it
+never alters one. `upgrade_schema()` runs it, then adds the columns and
+indexes that models gained after a table was created (e.g. `grievances`
+got `handler_id`, `resolution` and its status/updated_at index) and fills in
+values older rows lack (`_backfill`). Every step checks the live schema first, so it is
+safe to run on every start of the app, the workers and scripts/create_db.py.
+
+Only additive changes are handled: new columns must be nullable or carry a
+server default. Renames and type changes need a hand-written step here.
+"""
+import logging
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.schema import Column, Table
+
+import app.models  # noqa: F401  (registers every table on Base.metadata)
+from app.db.base import Base
+
+logger = logging.getLogger(__name__)
+
+
+def _add_column(conn: Connection, table: Table, column: Column) -> None:
+    preparer = conn.dialect.identifier_preparer
+    ddl = f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {preparer.format_column(column)} "
+    ddl += column.type.compile(dialect=conn.dialect)
+    if column.server_default is not None:
+        ddl += f" DEFAULT {conn.dialect.ddl_compiler(conn.dialect, None).get_column_default_string(column)}"
+    for fk in column.foreign_keys:
+        ddl += f" REFERENCES {preparer.format_table(fk.column.table)} ({preparer.format_column(fk.column)})"
+    conn.execute(text(ddl))
+    logger.info("Added column %s.%s", table.name, column.name)
+
+
+def _apply(engine: Engine, step, exists) -> None:
+    """Run one change in its own transaction; another process may have applied it first."""
+    try:
+        with engine.begin() as conn:
+            step(conn)
+    except DBAPIError:
+        if not exists(inspect(engine)):
+            raise
+
+
+def _backfill(engine: Engine) -> None:
+    # updated_at used to be set only on edits; the SLA scan keys on it, so
+    # grievances never touched since submission would never be escalated
+    created_at = "created_at"
+    if engine.dialect.name == "sqlite":
+        # The text format SQLAlchemy writes, so comparisons with bound datetimes hold
+        created_at = "strftime('%Y-%m-%d %H:%M:%f', created_at) || '000'"
+    with engine.begin() as conn:
+        result = conn.execute(text(
+            f"UPDATE grievances SET updated_at = {created_at} WHERE updated_at IS NULL AND created_at IS NOT NULL"
+        ))
+    if result.rowcount:
+        logger.info("Set updated_at on %d grievances from created_at", result.rowcount)
+
+
+def upgrade_schema(engine: Engine) -> None:
+    """Create missing tables, then add missing columns and indexes to existing ones."""
+    Base.metadata.create_all(bind=engine)
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        columns = {c["name"] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in columns:
+                _apply(
+                    engine,
+                    lambda conn: _add_column(conn, table, column),
+                    lambda fresh: column.name in {c["name"] for c in fresh.get_columns(table.name)},
+                )
+        indexes = {i["name"] for i in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in indexes:
+                _apply(
+                    engine,
+                    lambda conn: index.create(conn),
+                    lambda fresh: index.name in {i["name"] for i in fresh.get_indexes(table.name)},
+                )
+                logger.info("Created index %s", index.name)
+    _backfill(engine)
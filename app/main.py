@@ -1,11 +1,20 @@
-from fastapi import FastAPI
+import hmac
+from typing import Optional
+
+from fastapi import FastAPI, Header, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.v1 import auth, student, admin
-from app.db.base import Base
+from app.api import files, grievances
+from app.api.v1 import auth, admin, events, notifications
+from app.core import metrics, request_profiler, sql_profiler
+from app.core.config import settings
+from app.core.logging_setup import RequestIdMiddleware, setup_logging
 from app.db.session import engine
+from app.db.upgrade import upgrade_schema
+
+setup_logging()
 
-# Create tables on startup (idempotent)
-Base.metadata.create_all(bind=engine)
+# Create tables and add columns/indexes new models need on startup (idempotent)
+upgrade_schema(engine)
 
 app = FastAPI(title="Student Grievance Portal API", version="1.0")
 
@@ -19,6 +28,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.PROFILER_ENABLED:
+    app.add_middleware(request_profiler.RequestProfilerMiddleware)
+
+if settings.SQL_PROFILER_ENABLED:
+    app.add_middleware(sql_profiler.SqlProfilerMiddleware)
+    sql_profiler.instrument_engine(engine)
+
+if settings.METRICS_ENABLED:
+    # Outside everything but the request id, so it times CORS handling too
+    app.add_middleware(metrics.MetricsMiddleware)
+    metrics.instrument_engine(engine)
+
+# Outermost: every record logged while handling a request carries its id
+app.add_middleware(RequestIdMiddleware)
+
 
 @app.get("/", tags=["health"])
 def root():
@@ -30,7 +54,20 @@ def health():
     return {"status": "ok"}
 
 
+@app.get("/metrics", tags=["health"], include_in_schema=False)
+def prometheus_metrics(authorization: Optional[str] = Header(None)):
+    """Prometheus scrape target; needs `Authorization: Bearer <METRICS_TOKEN>`."""
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not found")
+    expected = f"Bearer {settings.METRICS_TOKEN}"
+    if not hmac.compare_digest((authorization or "").encode(), expected.encode()):
+        raise HTTPException(status_code=401, detail="Invalid metrics token", headers={"WWW-Authenticate": "Bearer"})
+    return Response(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["auth"])
-app.include_router(student.router, prefix="/api/v1/grievances", tags=["grievances"])
+app.include_router(grievances.router)
 app.include_router(admin.router, prefix="/api/v1/admin", tags=["admin"])
-
+app.include_router(events.router, prefix="/api/v1/events", tags=["events"])
+app.include_router(notifications.router, prefix="/api/v1/notifications", tags=["notifications"])
+app.include_router(files.router)
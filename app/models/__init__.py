@@ -5,5 +5,15 @@ from .audit import Audit
 from .user import User
 from .grievance import Grievance
 from .file_upload import FileUpload
+from .outbox import OutboxMessage
+from .failed_email import FailedEmail
+from .digest_item import DigestItem
+from .notification import Notification
+from .notification_counter import NotificationCounter
+from .handler import Handler
+from .sla_rule import SlaRule
+from .sla_escalation import SlaEscalation
+from .sla_watermark import SlaWatermark
+from .grievance_signature import GrievanceSignature
 
-__all__ = ["Department", "Audit", "User", "Grievance", "FileUpload"]
+__all__ = ["Department", "Audit", "User", "Grievance", "FileUpload", "OutboxMessage", "FailedEmail", "DigestItem", "Notification", "NotificationCounter", "Handler", "SlaRule", "SlaEscalation", "SlaWatermark", "GrievanceSignature"]
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, func, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, func, Text, Index
 from app.db.base import Base
 
 class Audit(Base):
@@ -9,3 +9,8 @@ class Audit(Base):
     performed_by = Column(Integer, ForeignKey("users.id"), nullable=True)
     remarks = Column(Text)
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # Per-grievance history, newest first
+        Index("ix_audits_grievance_timestamp", "grievance_id", "timestamp"),
+    )
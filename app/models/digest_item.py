@@ -0,0 +1,35 @@
+from datetime import datetime
+from sqlalchemy import Boolean, Column, Integer, String, DateTime, Text, Index
+from app.db.base import Base
+
+
+class DigestItem(Base):
+    """One email waiting in a recipient's digest window; the whole window is sent as one email."""
+    __tablename__ = "digest_items"
+    id = Column(Integer, primary_key=True)
+    recipient = Column(String(255), nullable=False)
+    name = Column(String(255), nullable=False, default="")
+    item_key = Column(String(100))  # Items with the same key in one window replace each other
+    subject = Column(String(255), nullable=False)
+    body = Column(Text, nullable=False)
+    html_body = Column(Text)
+    summary = Column(Text, nullable=False)
+    since = Column(String(100))
+    until = Column(String(100))
+    merged = Column(Boolean, nullable=False, default=False)
+    status = Column(String(20), nullable=False, default="pending")  # pending/sending
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False)  # When the recipient's window closes
+    locked_by = Column(String(64))
+    locked_at = Column(DateTime)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_digest_items_status_next_attempt", "status", "next_attempt_at"),
+        Index("ix_digest_items_recipient_status", "recipient", "status"),
+    )
+
+    def line(self) -> str:
+        if self.since is not None and self.until is not None:
+            return f"{self.summary}: {self.since} -> {self.until}"
+        return self.summary
@@ -0,0 +1,24 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index
+from app.db.base import Base
+
+
+class FailedEmail(Base):
+    """An email whose delivery failed; retried with backoff, then dead-lettered."""
+    __tablename__ = "failed_emails"
+    id = Column(Integer, primary_key=True)
+    recipient = Column(String(255), nullable=False)
+    subject = Column(String(255), nullable=False)
+    body = Column(Text, nullable=False)
+    html_body = Column(Text)
+    status = Column(String(20), nullable=False, default="retrying")  # retrying/sending/dead
+    attempts = Column(Integer, nullable=False, default=1)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    locked_by = Column(String(64))
+    locked_at = Column(DateTime)
+    last_error = Column(Text)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_failed_emails_status_next_attempt", "status", "next_attempt_at"),
+    )
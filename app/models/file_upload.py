@@ -5,7 +5,7 @@ class FileUpload(Base):
     __tablename__ = "file_uploads"
     id = Column(Integer, primary_key=True)
     filename = Column(String(255), nullable=False)
-    file_path = Column(String(500), nullable=False)
+    file_path = Column(String(500), nullable=False, index=True)
     content_type = Column(String(100), nullable=False)
     file_size = Column(Integer, nullable=False)
     user_id = Column(Integer, nullable=False)  # Foreign key to User
@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Enum, Text, func
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Enum, Text, Index, func
 from app.db.base import Base
 import enum
+from datetime import datetime, timezone
 
 class StatusEnum(str, enum.Enum):
     submitted = "Submitted"
@@ -9,15 +10,27 @@ class StatusEnum(str, enum.Enum):
     resolved = "Resolved"
     closed = "Closed"
 
+def _utcnow():
+    return datetime.now(timezone.utc)
+
 class Grievance(Base):
     __tablename__ = "grievances"
     id = Column(Integer, primary_key=True)
-    student_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    dept_id = Column(Integer, ForeignKey("departments.id"))
+    student_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    dept_id = Column(Integer, ForeignKey("departments.id"), index=True)
     title = Column(String(255), nullable=False)
     category = Column(String(100))
     description = Column(Text, nullable=False)
-    attachment_path = Column(String(255))
+    attachment_path = Column(String(255), index=True)
     status = Column(Enum(StatusEnum), default=StatusEnum.submitted)
+    handler_id = Column(Integer, ForeignKey("users.id"), index=True)
+    resolution = Column(Text)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Set on insert too, so the SLA scan sees grievances never touched since submission.
+    # Python-side so SQLite stores one format that compares correctly with bound parameters.
+    updated_at = Column(DateTime(timezone=True), default=_utcnow, onupdate=_utcnow)
+
+    __table_args__ = (
+        # Status filters and the SLA overdue scan (status, then oldest activity first)
+        Index("ix_grievances_status_updated_at", "status", "updated_at"),
+    )
@@ -0,0 +1,13 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, Float, DateTime, LargeBinary, ForeignKey
+from app.db.base import Base
+
+
+class GrievanceSignature(Base):
+    """MinHash signature of a grievance description and the duplicate cluster it joined."""
+    __tablename__ = "grievance_signatures"
+    grievance_id = Column(Integer, ForeignKey("grievances.id"), primary_key=True)
+    signature = Column(LargeBinary, nullable=False)  # uint32 little-endian, DEDUP_NUM_PERM values
+    cluster_id = Column(Integer, nullable=False, index=True)  # Earliest grievance of the cluster
+    similarity = Column(Float)  # Estimated Jaccard similarity to the matched grievance
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
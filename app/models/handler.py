@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey
+from app.db.base import Base
+
+
+class Handler(Base):
+    """Staff member who can be assigned grievances (grievances.handler_id is the user id)."""
+    __tablename__ = "handlers"
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, unique=True)
+    dept_id = Column(Integer, ForeignKey("departments.id"), index=True)  # NULL: any department
+    categories = Column(String(255))  # Comma-separated; NULL: any category
+    capacity = Column(Integer)  # Max open grievances; NULL: unlimited
+    is_active = Column(Boolean, nullable=False, default=True)
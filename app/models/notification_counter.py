@@ -0,0 +1,9 @@
+from sqlalchemy import Column, Integer, ForeignKey
+from app.db.base import Base
+
+
+class NotificationCounter(Base):
+    """Denormalized unread count per user, kept in step with `notifications`."""
+    __tablename__ = "notification_counters"
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    unread = Column(Integer, nullable=False, default=0)
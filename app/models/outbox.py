@@ -0,0 +1,23 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index
+from app.db.base import Base
+
+
+class OutboxMessage(Base):
+    """Notification event written in the same transaction as the change that caused it."""
+    __tablename__ = "notification_outbox"
+    id = Column(Integer, primary_key=True)
+    event = Column(String(100), nullable=False)
+    payload = Column(Text, nullable=False)  # JSON-encoded handler kwargs
+    status = Column(String(20), nullable=False, default="pending")  # pending/processing/sent/failed
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    locked_by = Column(String(64))
+    locked_at = Column(DateTime)
+    last_error = Column(Text)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    processed_at = Column(DateTime)
+
+    __table_args__ = (
+        Index("ix_notification_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
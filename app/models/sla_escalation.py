@@ -0,0 +1,21 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Enum, UniqueConstraint
+from app.db.base import Base
+from app.models.grievance import StatusEnum
+
+
+class SlaEscalation(Base):
+    """A grievance found overdue; `since` is the updated_at of the stale state."""
+    __tablename__ = "sla_escalations"
+    id = Column(Integer, primary_key=True)
+    grievance_id = Column(Integer, ForeignKey("grievances.id"), nullable=False, index=True)
+    status = Column(Enum(StatusEnum), nullable=False)
+    since = Column(DateTime(timezone=True), nullable=False)
+    max_hours = Column(Integer, nullable=False)
+    handler_id = Column(Integer, ForeignKey("users.id"))
+    escalated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        # One escalation per stale state; any update to the grievance starts a new one
+        UniqueConstraint("grievance_id", "since", name="uq_sla_escalations_state"),
+    )
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Enum, UniqueConstraint
+from app.db.base import Base
+from app.models.grievance import StatusEnum
+
+
+class SlaRule(Base):
+    """Maximum time a grievance may stay in a status; the most specific rule wins."""
+    __tablename__ = "sla_rules"
+    id = Column(Integer, primary_key=True)
+    status = Column(Enum(StatusEnum), nullable=False)
+    dept_id = Column(Integer, ForeignKey("departments.id"))  # NULL: any department
+    category = Column(String(100))  # NULL: any category
+    max_hours = Column(Integer, nullable=False)
+
+    __table_args__ = (UniqueConstraint("status", "dept_id", "category", name="uq_sla_rules_scope"),)
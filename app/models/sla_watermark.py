@@ -0,0 +1,10 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from app.db.base import Base
+
+
+class SlaWatermark(Base):
+    """Keyset position of the overdue scan for one (status, max_hours) threshold."""
+    __tablename__ = "sla_watermarks"
+    key = Column(String(100), primary_key=True)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+    grievance_id = Column(Integer, nullable=False)
@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+
+class AuditRead(BaseModel):
+    id: Optional[int]  # None while the event is still buffered
+    grievance_id: int
+    action: str
+    performed_by: Optional[int]
+    remarks: Optional[str]
+    timestamp: datetime
+
+    class Config:
+        from_attributes = True
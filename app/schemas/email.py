@@ -0,0 +1,31 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+
+class FailedEmailRead(BaseModel):
+    id: int
+    recipient: str
+    subject: str
+    status: str
+    attempts: int
+    next_attempt_at: datetime
+    last_error: Optional[str]
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class OutboxMessageRead(BaseModel):
+    id: int
+    event: str
+    payload: str
+    status: str
+    attempts: int
+    next_attempt_at: datetime
+    last_error: Optional[str]
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -21,3 +21,17 @@ class GrievanceRead(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+class BulkStatusFilterIn(BaseModel):
+    status: Optional[str] = None
+    dept_id: Optional[int] = None
+    category: Optional[str] = None
+    updated_before: Optional[datetime] = None
+
+
+class BulkStatusUpdate(BaseModel):
+    """Either `ids` or `filter` selects the grievances to move to `status`."""
+    status: str
+    ids: Optional[List[int]] = None
+    filter: Optional[BulkStatusFilterIn] = None
@@ -0,0 +1,29 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+
+
+class NotificationRead(BaseModel):
+    id: int
+    kind: str
+    title: str
+    body: str
+    grievance_id: Optional[int]
+    is_read: bool
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class UnreadCount(BaseModel):
+    unread: int
+
+
+class MarkReadRequest(BaseModel):
+    ids: Optional[List[int]] = None  # None marks every notification read
+
+
+class MarkReadResult(BaseModel):
+    updated: int
+    unread: int
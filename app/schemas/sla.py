@@ -0,0 +1,22 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+from app.models.grievance import StatusEnum
+
+
+class SlaRuleBase(BaseModel):
+    status: StatusEnum
+    dept_id: Optional[int] = None
+    category: Optional[str] = None
+    max_hours: int = Field(gt=0)
+
+
+class SlaRuleCreate(SlaRuleBase):
+    pass
+
+
+class SlaRuleRead(SlaRuleBase):
+    id: int
+
+    class Config:
+        from_attributes = True
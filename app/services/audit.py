@@ -0,0 +1,221 @@
+"""
+Append-only audit trail for grievance lifecycle events.
+
+`audit_writer.record()` buffers events in memory and a background thread
+writes them with one multi-row INSERT when AUDIT_BATCH_SIZE events are
+pending or AUDIT_FLUSH_INTERVAL seconds have passed, so mutations do not pay
+an extra round-trip each. Events are timestamped when recorded, not when
+written.
+
+For compliance-critical actions pass `durable=True` with the request's
+session: the row is added to that session and commits (or rolls back)
+atomically with the change itself. Buffered events still pending when the
+process crashes are lost; they are flushed on normal shutdown.
+
+Readers never force a flush: the history endpoint passes this worker's
+buffered events (`audit_writer.buffered()`) to `history()`, which merges
+them into the page; events buffered by other workers appear within
+AUDIT_FLUSH_INTERVAL.
+"""
+import atexit
+import logging
+import math
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Callable, Deque, List, Optional, Sequence
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.audit import Audit
+
+logger = logging.getLogger(__name__)
+
+
+class AuditWriter:
+    """Buffers audit events and writes them in batches."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        max_buffer: Optional[int] = None,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = settings.AUDIT_BATCH_SIZE if batch_size is None else batch_size
+        self.flush_interval = settings.AUDIT_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self.max_buffer = settings.AUDIT_MAX_BUFFER if max_buffer is None else max_buffer
+        self._buffer: Deque[dict] = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self.dropped = 0
+
+    def record(
+        self,
+        grievance_id: int,
+        action: str,
+        performed_by: Optional[int] = None,
+        remarks: Optional[str] = None,
+        durable: bool = False,
+        db: Optional[Session] = None,
+    ) -> None:
+        """
+        Record one event. With `durable=True` and `db`, the row joins the
+        caller's transaction; with `durable=True` alone it is written and
+        committed before returning. Otherwise it is buffered.
+        """
+        row = {
+            "grievance_id": grievance_id,
+            "action": action,
+            "performed_by": performed_by,
+            "remarks": remarks,
+            "timestamp": datetime.now(timezone.utc),
+        }
+        if durable and db is not None:
+            db.execute(insert(Audit), [row])
+            return
+        if durable:
+            self._write([row])
+            return
+
+        with self._lock:
+            if len(self._buffer) >= self.max_buffer:
+                self._buffer.popleft()
+                self.dropped += 1
+                logger.error("Audit buffer full, dropped oldest event")
+            self._buffer.append(row)
+            full = len(self._buffer) >= self.batch_size
+        self._ensure_flusher()
+        if full:
+            self._wakeup.set()
+
+    def record_many(
+        self,
+        grievance_ids: Sequence[int],
+        action: str,
+        performed_by: Optional[int] = None,
+        remarks: Optional[str] = None,
+        durable: bool = False,
+        db: Optional[Session] = None,
+    ) -> None:
+        """The same event for many grievances; durable rows go in one multi-row INSERT."""
+        if not durable:
+            for grievance_id in grievance_ids:
+                self.record(grievance_id, action, performed_by, remarks)
+            return
+        now = datetime.now(timezone.utc)
+        rows = [
+            {"grievance_id": gid, "action": action, "performed_by": performed_by, "remarks": remarks, "timestamp": now}
+            for gid in grievance_ids
+        ]
+        if not rows:
+            return
+        if db is not None:
+            db.execute(insert(Audit), rows)
+        else:
+            self._write(rows)
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._buffer)
+
+    def buffered(self, grievance_id: int) -> List[dict]:
+        """Copies of the events of one grievance that are not written yet."""
+        with self._lock:
+            return [dict(row) for row in self._buffer if row["grievance_id"] == grievance_id]
+
+    def _write(self, rows: List[dict]) -> None:
+        db = self.session_factory()
+        try:
+            db.execute(insert(Audit), rows)
+            db.commit()
+        finally:
+            db.close()
+
+    def flush(self) -> int:
+        """Write every buffered event now. Returns the number written."""
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    if not self._buffer:
+                        return written
+                    rows = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+                try:
+                    self._write(rows)
+                except Exception:
+                    # Keep the events (in order) for the next attempt
+                    with self._lock:
+                        self._buffer.extendleft(reversed(rows))
+                    raise
+                written += len(rows)
+
+    def _ensure_flusher(self) -> None:
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+        with self._lock:
+            if self._flusher is not None and self._flusher.is_alive():
+                return
+            self._flusher = threading.Thread(target=self._run, name="audit-flusher", daemon=True)
+            self._flusher.start()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Audit flush failed")
+
+    def close(self) -> None:
+        """Stop the flusher thread and write what is still buffered."""
+        self._stop.set()
+        self._wakeup.set()
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Could not write %d buffered audit events", self.pending())
+
+
+def newest_first(timestamp: datetime, audit_id: Optional[int]) -> tuple:
+    """Sort key for events (newest first with reverse=True); unwritten events count as newest on ties."""
+    if timestamp.tzinfo is None:  # SQLite hands back naive UTC datetimes
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp, math.inf if audit_id is None else audit_id
+
+
+def history(
+    db: Session,
+    grievance_id: int,
+    limit: int = 100,
+    offset: int = 0,
+    pending: Sequence[dict] = (),
+) -> List[Audit]:
+    """
+    Audit events of one grievance, newest first. Ordered by event time, since
+    batched events get their ids later than durable ones recorded after them.
+    `pending` (buffered, unwritten events) are merged in without an id.
+    """
+    query = (
+        select(Audit)
+        .where(Audit.grievance_id == grievance_id)
+        .order_by(Audit.timestamp.desc(), Audit.id.desc())
+    )
+    if not pending:
+        return list(db.execute(query.offset(offset).limit(limit)).scalars())
+    events = list(db.execute(query.limit(offset + limit)).scalars())
+    events.extend(Audit(**row) for row in pending)
+    events.sort(key=lambda a: newest_first(a.timestamp, a.id), reverse=True)
+    return events[offset:offset + limit]
+
+
+audit_writer = AuditWriter()
+atexit.register(audit_writer.close)
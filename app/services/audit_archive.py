@@ -0,0 +1,335 @@
+"""
+Archival of old audit rows to compressed, append-only segment files.
+
+`archive_audits()` moves rows older than a cutoff out of the `audits` table
+into gzip-compressed NDJSON segments under AUDIT_ARCHIVE_DIR, one or more
+per calendar month (`2024-03/000001.ndjson.gz`). Segments are written once
+and never modified. The index is split so that neither archiving nor a
+lookup touches metadata proportional to the whole archive:
+
+- `manifest.json` has one summary per month (rows, time range, grievance id
+  range), so it grows by one entry a month;
+- `<month>/index.json` lists that month's segments with their id, time and
+  grievance id ranges;
+- `<month>/<seq>.ids.json` next to each segment holds its sorted grievance
+  ids, read only for segments whose ranges match a query.
+
+Each batch writes its segments and id files, widens the month summaries,
+then replaces the month indexes (atomic renames). Files and the directories
+holding them are fsynced before the rows are deleted from the hot table.
+Month indexes are authoritative: a crash before one is replaced leaves
+unlisted segment files that readers ignore; a crash before the delete
+commits leaves rows both archived and hot, which readers de-duplicate by id.
+
+AUDIT_ARCHIVE_DIR must be persistent storage that the web workers can read
+too (the `audit_archive` volume in docker-compose.yml): once a batch is
+archived its rows exist nowhere else.
+"""
+import bisect
+import gzip
+import json
+import logging
+import os
+import time
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.audit import Audit
+from app.services.audit import newest_first
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = "manifest.json"
+INDEX = "index.json"
+COLUMNS = ("id", "grievance_id", "action", "performed_by", "remarks", "timestamp")
+
+
+def _utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes; everything is stored in UTC
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return _utc(value).isoformat() if value else None
+
+
+def _overlaps(entry: dict, grievance_id: int, since_iso: Optional[str], until_iso: Optional[str]) -> bool:
+    """Whether a month summary or segment entry can hold events of `grievance_id` in the time range."""
+    if since_iso and entry["end"] < since_iso:
+        return False
+    if until_iso and entry["start"] > until_iso:
+        return False
+    return entry["min_grievance_id"] is not None and entry["min_grievance_id"] <= grievance_id <= entry["max_grievance_id"]
+
+
+def _fsync_dir(path: Path) -> None:
+    """Make renames and new files in a directory durable (no-op where directories cannot be opened)."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+@dataclass
+class ArchiveReport:
+    archived: int = 0
+    segments: int = 0
+    batches: int = 0
+    complete: bool = True
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class AuditArchive:
+    """Segment files plus the per-month indexes that locate them."""
+
+    def __init__(self, root=None):
+        self.root = Path(root or settings.AUDIT_ARCHIVE_DIR).absolute()
+
+    def _load(self, path: Path, default):
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return default
+
+    def _save(self, path: Path, data) -> None:
+        tmp = path.with_name(f"{path.name}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        _fsync_dir(path.parent)
+
+    def load_manifest(self) -> dict:
+        """Month summaries: {"version": 2, "months": {"2024-03": {...}}}."""
+        return self._load(self.root / MANIFEST, {"version": 2, "months": {}})
+
+    def month_index(self, month: str) -> List[dict]:
+        """Segment entries of one month, in the order they were written."""
+        return self._load(self.root / month / INDEX, {"segments": []})["segments"]
+
+    def segments(self) -> List[dict]:
+        """Every segment entry, month by month."""
+        return [entry for month in sorted(self.load_manifest()["months"]) for entry in self.month_index(month)]
+
+    def _grievance_ids(self, segment: dict) -> List[int]:
+        return self._load(self.root / segment["ids"], [])
+
+    def _write_segment(self, month: str, seq: int, rows: List[dict]) -> dict:
+        directory = self.root / month
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{seq:06d}.ndjson.gz"
+        while path.exists():  # Left behind by an interrupted run
+            seq += 1
+            path = directory / f"{seq:06d}.ndjson.gz"
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(row, separators=(",", ":")) + "\n")
+        with open(path, "rb") as f:
+            os.fsync(f.fileno())
+        grievance_ids = sorted({r["grievance_id"] for r in rows if r["grievance_id"] is not None})
+        ids_path = directory / f"{seq:06d}.ids.json"
+        self._save(ids_path, grievance_ids)
+        return {
+            "file": str(path.relative_to(self.root)),
+            "ids": str(ids_path.relative_to(self.root)),
+            "month": month,
+            "rows": len(rows),
+            "min_id": min(r["id"] for r in rows),
+            "max_id": max(r["id"] for r in rows),
+            "start": min(r["timestamp"] for r in rows),
+            "end": max(r["timestamp"] for r in rows),
+            "min_grievance_id": grievance_ids[0] if grievance_ids else None,
+            "max_grievance_id": grievance_ids[-1] if grievance_ids else None,
+        }
+
+    @staticmethod
+    def _summarize(summary: Optional[dict], entry: dict) -> dict:
+        """Widen a month summary to cover a new segment entry."""
+        if summary is None:
+            return {key: entry[key] for key in ("start", "end", "min_grievance_id", "max_grievance_id")} | {
+                "segments": 1, "rows": entry["rows"],
+            }
+        ids = [v for v in (summary["min_grievance_id"], summary["max_grievance_id"],
+                           entry["min_grievance_id"], entry["max_grievance_id"]) if v is not None]
+        return {
+            "segments": summary["segments"] + 1,
+            "rows": summary["rows"] + entry["rows"],
+            "start": min(summary["start"], entry["start"]),
+            "end": max(summary["end"], entry["end"]),
+            "min_grievance_id": min(ids) if ids else None,
+            "max_grievance_id": max(ids) if ids else None,
+        }
+
+    def append(self, rows: List[dict]) -> List[dict]:
+        """Write `rows` as new segments (one per month) and index them."""
+        by_month: Dict[str, List[dict]] = defaultdict(list)
+        for row in rows:
+            by_month[row["timestamp"][:7]].append(row)
+        self.root.mkdir(parents=True, exist_ok=True)
+        manifest = self.load_manifest()
+        indexes = {}
+        entries = []
+        for month, month_rows in sorted(by_month.items()):
+            index = self.month_index(month)
+            entry = self._write_segment(
+                month, len(index) + 1, sorted(month_rows, key=lambda r: (r["grievance_id"] or 0, r["id"]))
+            )
+            indexes[month] = index + [entry]
+            manifest["months"][month] = self._summarize(manifest["months"].get(month), entry)
+            entries.append(entry)
+        # Summaries first: a summary wider than its index only costs a lookup
+        self._save(self.root / MANIFEST, manifest)
+        for month, index in indexes.items():
+            self._save(self.root / month / INDEX, {"segments": index})
+        return entries
+
+    def segments_for(
+        self, grievance_id: int, since: Optional[datetime] = None, until: Optional[datetime] = None
+    ) -> List[dict]:
+        """Segment entries that may hold events of `grievance_id` in the time range."""
+        since_iso, until_iso = _iso(since), _iso(until)
+        matches = []
+        for month, summary in sorted(self.load_manifest()["months"].items()):
+            if not _overlaps(summary, grievance_id, since_iso, until_iso):
+                continue
+            for segment in self.month_index(month):
+                if not _overlaps(segment, grievance_id, since_iso, until_iso):
+                    continue
+                ids = self._grievance_ids(segment)
+                i = bisect.bisect_left(ids, grievance_id)
+                if i < len(ids) and ids[i] == grievance_id:
+                    matches.append(segment)
+        return matches
+
+    def read_segment(
+        self, segment: dict, grievance_id: int, since: Optional[datetime] = None, until: Optional[datetime] = None
+    ) -> Iterator[dict]:
+        """Events of one grievance in one segment."""
+        since_iso, until_iso = _iso(since), _iso(until)
+        with gzip.open(self.root / segment["file"], "rt", encoding="utf-8") as f:
+            for line in f:
+                row = json.loads(line)
+                if row["grievance_id"] != grievance_id:
+                    continue
+                if since_iso and row["timestamp"] < since_iso:
+                    continue
+                if until_iso and row["timestamp"] > until_iso:
+                    continue
+                yield row
+
+    def read(
+        self, grievance_id: int, since: Optional[datetime] = None, until: Optional[datetime] = None
+    ) -> Iterator[dict]:
+        """Archived events of one grievance, scanning only matching segments."""
+        for segment in self.segments_for(grievance_id, since, until):
+            yield from self.read_segment(segment, grievance_id, since, until)
+
+
+def _to_row(audit: Audit) -> dict:
+    row = {column: getattr(audit, column) for column in COLUMNS}
+    row["timestamp"] = _utc(audit.timestamp).isoformat()
+    return row
+
+
+def archive_audits(
+    db: Session,
+    archive: Optional[AuditArchive] = None,
+    older_than: Optional[timedelta] = None,
+    batch_size: Optional[int] = None,
+    max_runtime: Optional[float] = None,
+    now: Optional[datetime] = None,
+) -> ArchiveReport:
+    """Move audit rows older than `older_than` into the archive, batch by batch."""
+    archive = archive or AuditArchive()
+    older_than = older_than or timedelta(days=settings.AUDIT_ARCHIVE_AFTER_DAYS)
+    batch_size = batch_size or settings.AUDIT_ARCHIVE_BATCH_SIZE
+    cutoff = (now or datetime.now(timezone.utc)) - older_than
+    started = time.monotonic()
+    report = ArchiveReport()
+
+    while True:
+        if max_runtime is not None and time.monotonic() - started >= max_runtime:
+            report.complete = False
+            break
+        audits = db.execute(
+            select(Audit).where(Audit.timestamp < cutoff).order_by(Audit.id).limit(batch_size)
+        ).scalars().all()
+        if not audits:
+            break
+        rows = [_to_row(a) for a in audits]
+        ids = [r["id"] for r in rows]
+        db.expunge_all()
+
+        entries = archive.append(rows)
+        db.execute(delete(Audit).where(Audit.id.in_(ids)).execution_options(synchronize_session=False))
+        db.commit()
+
+        report.archived += len(rows)
+        report.segments += len(entries)
+        report.batches += 1
+        logger.info("Archived %d audit rows into %d segments", len(rows), len(entries))
+    return report
+
+
+def _history_key(row: dict) -> tuple:
+    return newest_first(datetime.fromisoformat(row["timestamp"]), row["id"])
+
+
+def full_history(
+    db: Session,
+    grievance_id: int,
+    archive: Optional[AuditArchive] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    pending: Sequence[dict] = (),
+    limit: Optional[int] = None,
+    offset: int = 0,
+) -> List[dict]:
+    """
+    Hot, archived and `pending` (buffered, id-less) events of one grievance as
+    dicts, newest first. With `limit`, only one page is assembled: the hot
+    query is limited and segments are read newest first until the rest can
+    no longer reach the page.
+    """
+    archive = archive or AuditArchive()
+    wanted = None if limit is None else offset + limit
+    query = (
+        select(Audit)
+        .where(Audit.grievance_id == grievance_id)
+        .order_by(Audit.timestamp.desc(), Audit.id.desc())
+    )
+    if since is not None:
+        query = query.where(Audit.timestamp >= since)
+    if until is not None:
+        query = query.where(Audit.timestamp <= until)
+    if wanted is not None:
+        query = query.limit(wanted)
+    events = {a.id: _to_row(a) for a in db.execute(query).scalars()}
+    rows = [{**row, "id": None, "timestamp": _utc(row["timestamp"]).isoformat()} for row in pending]
+
+    segments = sorted(archive.segments_for(grievance_id, since, until), key=lambda s: s["end"], reverse=True)
+    for segment in segments:
+        if wanted is not None and len(events) + len(rows) >= wanted:
+            page_end = sorted(list(events.values()) + rows, key=_history_key, reverse=True)[wanted - 1]
+            if segment["end"] < page_end["timestamp"]:
+                break  # This and every later segment only holds older events
+        for row in archive.read_segment(segment, grievance_id, since, until):
+            events.setdefault(row["id"], row)  # Rows archived but not yet deleted are also hot
+    rows.extend(events.values())
+    rows.sort(key=_history_key, reverse=True)
+    return rows[offset:] if wanted is None else rows[offset:wanted]
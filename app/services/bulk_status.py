@@ -0,0 +1,205 @@
+"""
+Bulk grievance status changes, e.g. closing every resolved grievance at the
+end of a semester.
+
+Grievances are picked by explicit ids or by a filter and handled in chunks
+of BULK_UPDATE_CHUNK_SIZE. Each chunk costs a fixed number of statements
+however many rows it holds:
+
+- one SELECT reads the current status, handler and student email;
+- one set-based UPDATE per distinct current status (`WHERE id IN (...) AND
+  status = :old RETURNING id`), so a row changed by someone else in between
+  is left alone and reported as a conflict;
+- one multi-row INSERT for the audit rows and one for the outbox
+  notifications, in the same transaction, which then commits.
+
+Handler loads and the students' event streams are updated after each
+commit, as the single-grievance PATCH does.
+"""
+import logging
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.events import publish_grievance_status
+from app.models.grievance import Grievance, StatusEnum, _utcnow
+from app.models.user import User
+from app.services import outbox
+from app.services.audit import audit_writer
+from app.services.grievance_repository import normalize_status
+from app.services.routing import CLOSED_STATUSES, routing_engine
+
+logger = logging.getLogger(__name__)
+
+UPDATED = "updated"
+UNCHANGED = "unchanged"
+NOT_FOUND = "not_found"
+CONFLICT = "conflict"
+CLOSED = {status.name for status in CLOSED_STATUSES}
+
+
+@dataclass
+class BulkStatusFilter:
+    status: Optional[str] = None
+    dept_id: Optional[int] = None
+    category: Optional[str] = None
+    updated_before: Optional[datetime] = None
+
+    def conditions(self) -> list:
+        """WHERE clauses of the filter. Raises ValueError when it has none, which would match every grievance."""
+        conditions = []
+        if self.status is not None:
+            conditions.append(Grievance.status == StatusEnum[normalize_status(self.status)])
+        if self.dept_id is not None:
+            conditions.append(Grievance.dept_id == self.dept_id)
+        if self.category is not None:
+            conditions.append(func.lower(Grievance.category) == self.category.strip().lower())
+        if self.updated_before is not None:
+            conditions.append(Grievance.updated_at < self.updated_before)
+        if not conditions:
+            raise ValueError("filter needs at least one of status, dept_id, category, updated_before")
+        return conditions
+
+
+@dataclass
+class BulkStatusReport:
+    status: str
+    matched: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    not_found: int = 0
+    conflicts: int = 0
+    complete: bool = True
+    seconds: float = 0.0
+    results: List[dict] = field(default_factory=list)
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def _select(conditions: list, chunk_size: int):
+    return (
+        select(Grievance.id, Grievance.status, Grievance.handler_id, Grievance.student_id, Grievance.title, User.email)
+        .outerjoin(User, User.id == Grievance.student_id)
+        .where(*conditions)
+        .order_by(Grievance.id)
+        .limit(chunk_size)
+    )
+
+
+def _apply_chunk(db: Session, rows: list, new_status: str, performed_by: Optional[int],
+                 report: BulkStatusReport) -> None:
+    """Move one chunk's rows to `new_status` and commit with their audit rows and notifications."""
+    by_status: Dict[str, list] = {}
+    for row in rows:
+        old = row.status.name
+        if old == new_status:
+            report.unchanged += 1
+            report.results.append({"grievance_id": row.id, "result": UNCHANGED, "old_status": old})
+        else:
+            by_status.setdefault(old, []).append(row)
+
+    now = _utcnow()
+    changed = []
+    for old, group in by_status.items():
+        updated = set(db.execute(
+            update(Grievance)
+            .where(Grievance.id.in_([r.id for r in group]), Grievance.status == StatusEnum[old])
+            .values(status=StatusEnum[new_status], updated_at=now)
+            .returning(Grievance.id)
+        ).scalars())
+        for row in group:
+            if row.id in updated:
+                changed.append((row, old))
+            else:
+                report.conflicts += 1
+                report.results.append({"grievance_id": row.id, "result": CONFLICT, "old_status": old})
+        audit_writer.record_many(
+            sorted(updated), "status_changed", performed_by=performed_by,
+            remarks=f"{old} -> {new_status} (bulk)", durable=True, db=db,
+        )
+    outbox.enqueue_many(db, "grievance_status_changed", [
+        {
+            "grievance_id": row.id,
+            "student_email": row.email,
+            "student_name": f"Student {row.student_id}",
+            "old_status": old,
+            "new_status": new_status,
+            "title": row.title,
+        }
+        for row, old in changed
+    ])
+    db.commit()
+
+    closes = new_status in CLOSED
+    for row, old in changed:
+        report.updated += 1
+        report.results.append({"grievance_id": row.id, "result": UPDATED, "old_status": old})
+        if row.handler_id is not None and closes != (old in CLOSED):
+            if closes:
+                routing_engine.release(row.handler_id)
+            else:
+                routing_engine.assign(row.handler_id)
+        publish_grievance_status(row.student_id, row.id, old, new_status)
+
+
+def bulk_update_status(
+    db: Session,
+    new_status: str,
+    ids: Optional[Sequence[int]] = None,
+    filter: Optional[BulkStatusFilter] = None,
+    performed_by: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    limit: Optional[int] = None,
+) -> BulkStatusReport:
+    """
+    Move the grievances in `ids`, or those matching `filter`, to `new_status`.
+    With a filter, rows already in `new_status` are skipped and at most
+    `limit` rows (BULK_UPDATE_MAX_ROWS) are changed; `complete` is False when
+    more remain. Raises ValueError for an unknown status or a filter without
+    criteria.
+    """
+    started = time.perf_counter()
+    new_status = normalize_status(new_status)
+    chunk_size = chunk_size or settings.BULK_UPDATE_CHUNK_SIZE
+    report = BulkStatusReport(status=new_status)
+
+    if ids is not None:
+        wanted = list(dict.fromkeys(ids))
+        for start in range(0, len(wanted), chunk_size):
+            chunk = wanted[start:start + chunk_size]
+            rows = db.execute(_select([Grievance.id.in_(chunk)], chunk_size)).all()
+            found = {row.id for row in rows}
+            for grievance_id in chunk:
+                if grievance_id not in found:
+                    report.not_found += 1
+                    report.results.append({"grievance_id": grievance_id, "result": NOT_FOUND, "old_status": None})
+            report.matched += len(rows)
+            _apply_chunk(db, rows, new_status, performed_by, report)
+    else:
+        limit = limit or settings.BULK_UPDATE_MAX_ROWS
+        conditions = (filter or BulkStatusFilter()).conditions()
+        conditions.append(Grievance.status != StatusEnum[new_status])
+        last_id = 0
+        while True:
+            size = min(chunk_size, limit - report.matched)
+            if size <= 0:
+                report.complete = db.execute(_select(conditions + [Grievance.id > last_id], 1)).first() is None
+                break
+            rows = db.execute(_select(conditions + [Grievance.id > last_id], size)).all()
+            if not rows:
+                break
+            report.matched += len(rows)
+            _apply_chunk(db, rows, new_status, performed_by, report)
+            last_id = rows[-1].id
+
+    report.seconds = round(time.perf_counter() - started, 3)
+    logger.info(
+        "Bulk status update to %s: %d of %d grievances changed", new_status, report.updated, report.matched
+    )
+    return report
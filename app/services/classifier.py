@@ -0,0 +1,419 @@
+"""
+Grievance auto-categorization: hashed TF-IDF features and softmax
+regression, in NumPy only.
+
+Title and description are lowercased into word unigrams and bigrams, hashed
+(CRC32) into CLASSIFIER_FEATURES buckets, weighted by sublinear tf x idf and
+L2-normalised. Two linear heads are trained on historical grievances, one
+for the category (normalised to lowercase) and one for dept_id; classes
+with fewer than `min_examples` grievances are left out.
+
+Documents are kept sparse (indptr/indices/values, CSR style), so scoring a
+batch costs one gather of the weight rows per non-zero feature and one
+reduceat per document. A single prediction stays well under a millisecond.
+
+The model is one .npz file at CLASSIFIER_MODEL_PATH. `get_classifier()`
+loads it once per process and reloads only when the file changes, so a
+retrain reaches every worker without a restart.
+"""
+import logging
+import os
+import re
+import threading
+import time
+import zlib
+from collections import Counter
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.grievance import Grievance, StatusEnum
+
+logger = logging.getLogger(__name__)
+
+TOKEN = re.compile(r"[a-z0-9]+")
+FORMAT_VERSION = 1
+
+
+def normalize_category(category: Optional[str]) -> Optional[str]:
+    category = " ".join((category or "").lower().split())
+    return category or None
+
+
+class HashingVectorizer:
+    """Word unigram+bigram features hashed into a fixed number of buckets."""
+
+    def __init__(self, n_features: int):
+        self.n_features = n_features
+        self.idf = np.ones(n_features, dtype=np.float32)
+
+    def _terms(self, text: str) -> Counter:
+        tokens = TOKEN.findall(text.lower())
+        terms = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        return Counter(zlib.crc32(t.encode()) % self.n_features for t in terms)
+
+    def _sparse(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        indptr, indices, counts = [0], [], []
+        for text in texts:
+            terms = self._terms(text)
+            indices.extend(terms.keys())
+            counts.extend(terms.values())
+            indptr.append(len(indices))
+        return (
+            np.asarray(indptr, dtype=np.int64),
+            np.asarray(indices, dtype=np.int64),
+            np.asarray(counts, dtype=np.float32),
+        )
+
+    def fit(self, texts: Sequence[str]) -> None:
+        indptr, indices, _ = self._sparse(texts)
+        df = np.bincount(indices, minlength=self.n_features)
+        self.idf = (np.log((1 + len(texts)) / (1 + df)) + 1).astype(np.float32)
+
+    def transform(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """CSR parts (indptr, indices, values) of L2-normalised tf-idf rows."""
+        indptr, indices, counts = self._sparse(texts)
+        values = (1 + np.log(counts)) * self.idf[indices]
+        lengths = np.diff(indptr)
+        squares = np.zeros(len(texts), dtype=np.float32)
+        nonempty = lengths > 0
+        squares[nonempty] = np.add.reduceat(values ** 2, indptr[:-1][nonempty])
+        norms = np.sqrt(np.repeat(squares, lengths))
+        return indptr, indices, values / np.maximum(norms, 1e-12)
+
+
+class SoftmaxRegression:
+    """Multinomial logistic regression over sparse rows."""
+
+    def __init__(self, n_features: int, classes: Sequence):
+        self.classes = list(classes)
+        self.weights = np.zeros((n_features, len(self.classes)), dtype=np.float32)
+        self.bias = np.zeros(len(self.classes), dtype=np.float32)
+
+    def _scores(self, indptr, indices, values) -> np.ndarray:
+        scores = np.tile(self.bias, (len(indptr) - 1, 1))
+        lengths = np.diff(indptr)
+        nonempty = lengths > 0
+        if indices.size:
+            contributions = self.weights[indices] * values[:, None]
+            scores[nonempty] += np.add.reduceat(contributions, indptr[:-1][nonempty], axis=0)
+        return scores
+
+    def predict_proba(self, indptr, indices, values) -> np.ndarray:
+        scores = self._scores(indptr, indices, values)
+        scores -= scores.max(axis=1, keepdims=True)
+        np.exp(scores, out=scores)
+        return scores / scores.sum(axis=1, keepdims=True)
+
+    def fit(self, indptr, indices, values, labels: np.ndarray, epochs: int = 30,
+            learning_rate: float = 8.0, l2: float = 1e-5, batch_size: int = 256, seed: int = 0) -> None:
+        rng = np.random.default_rng(seed)
+        n = len(labels)
+        lengths = np.diff(indptr)
+        for epoch in range(epochs):
+            lr = learning_rate / (1 + epoch * 0.1)
+            order = rng.permutation(n)
+            for start in range(0, n, batch_size):
+                rows = order[start:start + batch_size]
+                # Gather the batch's sparse rows
+                batch_lengths = lengths[rows]
+                batch_indptr = np.concatenate([[0], np.cumsum(batch_lengths)])
+                take = np.concatenate([np.arange(indptr[r], indptr[r + 1]) for r in rows]) if batch_lengths.sum() \
+                    else np.empty(0, dtype=np.int64)
+                b_indices, b_values = indices[take], values[take]
+
+                probs = self.predict_proba(batch_indptr, b_indices, b_values)
+                probs[np.arange(len(rows)), labels[rows]] -= 1  # d(loss)/d(score)
+                probs /= len(rows)
+                row_of = np.repeat(np.arange(len(rows)), batch_lengths)
+                gradient = b_values[:, None] * probs[row_of]
+                touched, position = np.unique(b_indices, return_inverse=True)
+                summed = np.zeros((touched.size, len(self.classes)), dtype=np.float32)
+                np.add.at(summed, position, gradient)
+                self.weights[touched] -= lr * (summed + l2 * self.weights[touched])
+                self.bias -= lr * probs.sum(axis=0)
+
+
+@dataclass
+class Suggestion:
+    category: Optional[str]
+    category_confidence: float
+    dept_id: Optional[int]
+    dept_confidence: float
+
+
+class GrievanceClassifier:
+    """Category and department heads sharing one vectorizer."""
+
+    def __init__(self, n_features: Optional[int] = None):
+        self.vectorizer = HashingVectorizer(n_features or settings.CLASSIFIER_FEATURES)
+        self.category_model: Optional[SoftmaxRegression] = None
+        self.dept_model: Optional[SoftmaxRegression] = None
+        self.trained_at: Optional[str] = None
+
+    @staticmethod
+    def text(title: Optional[str], description: Optional[str]) -> str:
+        return f"{title or ''} {description or ''}"
+
+    @property
+    def categories(self) -> List[str]:
+        return self.category_model.classes if self.category_model else []
+
+    def _fit_head(self, features, labels: List, min_examples: int, **options) -> Optional[SoftmaxRegression]:
+        indptr, indices, values = features
+        counts = Counter(label for label in labels if label is not None)
+        classes = sorted(c for c, n in counts.items() if n >= min_examples)
+        if len(classes) < 2:
+            return None
+        position = {c: i for i, c in enumerate(classes)}
+        rows = np.array([i for i, label in enumerate(labels) if label in position], dtype=np.int64)
+        lengths = np.diff(indptr)[rows]
+        take = np.concatenate([np.arange(indptr[r], indptr[r + 1]) for r in rows])
+        model = SoftmaxRegression(self.vectorizer.n_features, classes)
+        model.fit(
+            np.concatenate([[0], np.cumsum(lengths)]), indices[take], values[take],
+            np.array([position[labels[r]] for r in rows], dtype=np.int64), **options,
+        )
+        return model
+
+    def fit(self, texts: Sequence[str], categories: Sequence[Optional[str]],
+            dept_ids: Sequence[Optional[int]], min_examples: int = 5, **options) -> "GrievanceClassifier":
+        self.vectorizer.fit(texts)
+        features = self.vectorizer.transform(texts)
+        self.category_model = self._fit_head(features, [normalize_category(c) for c in categories],
+                                             min_examples, **options)
+        self.dept_model = self._fit_head(features, list(dept_ids), min_examples, **options)
+        self.trained_at = datetime.now(timezone.utc).isoformat()
+        return self
+
+    def predict_batch(self, texts: Sequence[str]) -> List[Suggestion]:
+        features = self.vectorizer.transform(texts)
+        heads = []
+        for model in (self.category_model, self.dept_model):
+            if model is None:
+                heads.append(([None] * len(texts), [0.0] * len(texts)))
+                continue
+            probs = model.predict_proba(*features)
+            best = probs.argmax(axis=1)
+            heads.append(([model.classes[i] for i in best], probs[np.arange(len(texts)), best].tolist()))
+        (categories, category_conf), (depts, dept_conf) = heads
+        return [
+            Suggestion(category, round(cc, 3), int(dept) if dept is not None else None, round(dc, 3))
+            for category, cc, dept, dc in zip(categories, category_conf, depts, dept_conf)
+        ]
+
+    def predict(self, title: Optional[str], description: Optional[str]) -> Suggestion:
+        return self.predict_batch([self.text(title, description)])[0]
+
+    def save(self, path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        arrays = {"version": np.array(FORMAT_VERSION), "idf": self.vectorizer.idf,
+                  "trained_at": np.array(self.trained_at or "")}
+        for name, model in (("category", self.category_model), ("dept", self.dept_model)):
+            if model is not None:
+                arrays[f"{name}_weights"] = model.weights
+                arrays[f"{name}_bias"] = model.bias
+                arrays[f"{name}_classes"] = np.array(model.classes)
+        tmp = path.with_name(path.name + ".tmp.npz")
+        np.savez_compressed(tmp, **arrays)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path) -> "GrievanceClassifier":
+        with np.load(path) as data:
+            if int(data["version"]) != FORMAT_VERSION:
+                raise ValueError(f"Unsupported classifier format in {path}")
+            classifier = cls(n_features=len(data["idf"]))
+            classifier.vectorizer.idf = data["idf"]
+            classifier.trained_at = str(data["trained_at"]) or None
+            for name in ("category", "dept"):
+                if f"{name}_weights" not in data:
+                    continue
+                classes = data[f"{name}_classes"].tolist()
+                model = SoftmaxRegression(len(data["idf"]), classes)
+                model.weights = data[f"{name}_weights"]
+                model.bias = data[f"{name}_bias"]
+                setattr(classifier, f"{name}_model", model)
+        return classifier
+
+
+_cache: Dict[str, object] = {"path": None, "mtime": None, "classifier": None}
+_cache_lock = threading.Lock()
+
+
+def get_classifier(path: Optional[str] = None) -> Optional[GrievanceClassifier]:
+    """The model at `path`, loaded once per process and again only when the file changes."""
+    path = str(path or settings.CLASSIFIER_MODEL_PATH)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    if _cache["path"] == path and _cache["mtime"] == mtime:
+        return _cache["classifier"]
+    with _cache_lock:
+        if _cache["path"] != path or _cache["mtime"] != mtime:
+            try:
+                _cache["classifier"] = GrievanceClassifier.load(path)
+            except Exception:
+                logger.exception("Could not load classifier from %s", path)
+                _cache["classifier"] = None
+            _cache.update(path=path, mtime=mtime)
+            logger.info("Loaded grievance classifier from %s", path)
+    return _cache["classifier"]
+
+
+def apply_suggestion(category: Optional[str], dept_id: Optional[int], suggestion: Optional[Suggestion],
+                     known_categories: Sequence[str]) -> Tuple[Optional[str], Optional[int]]:
+    """
+    Normalize a submitted category and department: a category matching a
+    known class (ignoring case and spacing) takes its canonical spelling; an
+    unknown category or a missing department is replaced by a confident
+    prediction (CLASSIFIER_MIN_CONFIDENCE).
+    """
+    normalized = normalize_category(category)
+    if normalized in known_categories:
+        category = normalized
+    elif suggestion and suggestion.category and suggestion.category_confidence >= settings.CLASSIFIER_MIN_CONFIDENCE:
+        category = suggestion.category
+    if dept_id is None and suggestion and suggestion.dept_id is not None \
+            and suggestion.dept_confidence >= settings.CLASSIFIER_MIN_CONFIDENCE:
+        dept_id = suggestion.dept_id
+    return category, dept_id
+
+
+@dataclass
+class TrainReport:
+    examples: int = 0
+    categories: int = 0
+    departments: int = 0
+    category_accuracy: Optional[float] = None
+    dept_accuracy: Optional[float] = None
+    seconds: float = 0.0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def _accuracy(predicted: List, expected: List) -> Optional[float]:
+    pairs = [(p, e) for p, e in zip(predicted, expected) if e is not None]
+    return round(sum(p == e for p, e in pairs) / len(pairs), 3) if pairs else None
+
+
+def train_from_db(db: Session, path: Optional[str] = None, min_examples: int = 5,
+                  holdout: float = 0.2, seed: int = 0, **options) -> TrainReport:
+    """
+    Train on historical grievances and save the model. Accuracy is measured
+    on a `holdout` share first; the saved model is then fitted on everything.
+    """
+    started = time.perf_counter()
+    rows = db.execute(
+        select(Grievance.title, Grievance.description, Grievance.category, Grievance.dept_id)
+        .order_by(Grievance.id)
+    ).all()
+    texts = [GrievanceClassifier.text(r.title, r.description) for r in rows]
+    categories = [normalize_category(r.category) for r in rows]
+    depts = [r.dept_id for r in rows]
+    report = TrainReport(examples=len(rows))
+
+    if holdout and len(rows) >= 10:
+        test = set(np.random.default_rng(seed).permutation(len(rows))[: int(len(rows) * holdout)].tolist())
+        train = [i for i in range(len(rows)) if i not in test]
+        test = sorted(test)
+        model = GrievanceClassifier().fit([texts[i] for i in train], [categories[i] for i in train],
+                                          [depts[i] for i in train], min_examples, **options)
+        predictions = model.predict_batch([texts[i] for i in test])
+        if model.category_model:
+            known = set(model.category_model.classes)
+            report.category_accuracy = _accuracy(
+                [p.category for p in predictions],
+                [categories[i] if categories[i] in known else None for i in test],
+            )
+        if model.dept_model:
+            known = set(model.dept_model.classes)
+            report.dept_accuracy = _accuracy(
+                [p.dept_id for p in predictions], [depts[i] if depts[i] in known else None for i in test]
+            )
+
+    classifier = GrievanceClassifier().fit(texts, categories, depts, min_examples, **options)
+    classifier.save(path or settings.CLASSIFIER_MODEL_PATH)
+    report.categories = len(classifier.categories)
+    report.departments = len(classifier.dept_model.classes) if classifier.dept_model else 0
+    report.seconds = round(time.perf_counter() - started, 3)
+    logger.info("Trained classifier on %d grievances", report.examples)
+    return report
+
+
+@dataclass
+class ReclassifyReport:
+    scanned: int = 0
+    category_changes: int = 0
+    dept_changes: int = 0
+    applied: bool = False
+    seconds: float = 0.0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def reclassify_backlog(db: Session, classifier: GrievanceClassifier, batch_size: int = 1000,
+                       apply: bool = False, open_only: bool = True) -> ReclassifyReport:
+    """
+    Run batched inference over existing grievances and count (or, with
+    `apply`, write) the category/department changes `apply_suggestion` makes.
+    """
+    started = time.perf_counter()
+    report = ReclassifyReport(applied=apply)
+    known = classifier.categories
+    last_id = 0
+    while True:
+        query = select(
+            Grievance.id, Grievance.title, Grievance.description, Grievance.category, Grievance.dept_id,
+            Grievance.updated_at,
+        )
+        if open_only:
+            query = query.where(Grievance.status.not_in((StatusEnum.resolved, StatusEnum.closed)))
+        rows = db.execute(query.where(Grievance.id > last_id).order_by(Grievance.id).limit(batch_size)).all()
+        if not rows:
+            break
+        suggestions = classifier.predict_batch([GrievanceClassifier.text(r.title, r.description) for r in rows])
+        changes = []
+        for row, suggestion in zip(rows, suggestions):
+            category, dept_id = apply_suggestion(row.category, row.dept_id, suggestion, known)
+            if category != row.category or dept_id != row.dept_id:
+                report.category_changes += category != row.category
+                report.dept_changes += dept_id != row.dept_id
+                # Keep updated_at: a reclassification is not activity and must not reset SLA clocks
+                changes.append({"id": row.id, "category": category, "dept_id": dept_id, "updated_at": row.updated_at})
+        if apply and changes:
+            db.execute(update(Grievance), changes)
+            db.commit()
+        report.scanned += len(rows)
+        last_id = rows[-1].id
+    report.seconds = round(time.perf_counter() - started, 3)
+    return report
+
+
+def classify_submission(
+    title: Optional[str], description: Optional[str], category: Optional[str], dept_id: Optional[int]
+) -> Tuple[Optional[str], Optional[int], Optional[Suggestion]]:
+    """
+    Category and department to store for a new grievance, plus the model's
+    suggestion. CLASSIFIER_MODE "suggest" (the default) leaves the submitted
+    values alone, "normalize" applies `apply_suggestion`, "off" skips the model.
+    """
+    if settings.CLASSIFIER_MODE == "off":
+        return category, dept_id, None
+    classifier = get_classifier()
+    if classifier is None:
+        return category, dept_id, None
+    suggestion = classifier.predict(title, description)
+    if settings.CLASSIFIER_MODE == "normalize":
+        category, dept_id = apply_suggestion(category, dept_id, suggestion, classifier.categories)
+    return category, dept_id, suggestion
@@ -0,0 +1,188 @@
+"""
+Per-recipient coalescing of notification emails.
+
+Each notification event is either sent immediately or buffered per recipient
+for NOTIFICATION_DIGEST_WINDOW seconds and then sent as one digest email.
+Status changes of the same grievance collapse into a single line
+("Submitted -> In Progress"), so bulk triage produces one email per student
+instead of one per transition.
+
+Buffered emails are rows in `digest_items`, committed before the outbox
+message that produced them is marked sent, so a worker crash loses nothing.
+Every item of one recipient's open window shares its closing time
+(`next_attempt_at`); the outbox worker calls `flush_due()` each tick, which
+claims closed windows like outbox rows, sends one email per recipient and
+deletes the items. A digest that fails to send goes to the failed-email
+retry store. Keyed items are idempotent: redelivering the outbox message
+that buffered one replaces it instead of adding a second line.
+"""
+import html
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, func, or_, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.email import send_email
+from app.core.templates import Safe, templates
+from app.db.claim import claim_rows
+from app.db.session import SessionLocal
+from app.models.digest_item import DigestItem
+from app.services.email_retry import record_failure
+
+logger = logging.getLogger(__name__)
+
+IMMEDIATE = "immediate"
+DIGEST = "digest"
+
+# Delivery rule per event type; anything not listed is sent immediately
+DIGEST_RULES: Dict[str, str] = {
+    "grievance_created.admin": DIGEST,
+    "grievance_created.student": IMMEDIATE,
+    "grievance_status_changed": DIGEST,
+    "grievance_assigned": IMMEDIATE,
+    "grievance_resolved": IMMEDIATE,
+}
+
+
+def _key(key: Optional[Tuple]) -> Optional[str]:
+    return None if key is None else ":".join(str(part) for part in key)
+
+
+class NotificationCoalescer:
+    """Buffers digest-eligible emails per recipient in `digest_items` and sends one email per window."""
+
+    def __init__(
+        self,
+        window: Optional[float] = None,
+        send: Optional[Callable[..., bool]] = None,
+        clock: Callable[[], datetime] = datetime.utcnow,
+        rules: Optional[Dict[str, str]] = None,
+        session_factory: Callable[[], Session] = SessionLocal,
+    ):
+        self.window = settings.NOTIFICATION_DIGEST_WINDOW if window is None else window
+        self._send = send
+        self.clock = clock
+        self.rules = DIGEST_RULES if rules is None else rules
+        self.session_factory = session_factory
+
+    def send(self, to: str, subject: str, body: str, html_body: Optional[str] = None) -> bool:
+        """Send one email now; False when it failed."""
+        return (self._send or send_email)(to, subject, body, html_body=html_body)
+
+    def submit(
+        self,
+        event: str,
+        to: str,
+        subject: str,
+        body: str,
+        summary: str,
+        name: str = "",
+        key: Optional[Tuple] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        html_body: Optional[str] = None,
+    ) -> bool:
+        """
+        Send or buffer one notification email. Returns False if an immediate
+        send failed. Items sharing `key` within a window replace each other;
+        `since`/`until` track the first and latest values so transitions stay readable.
+        """
+        if self.window <= 0 or self.rules.get(event, IMMEDIATE) != DIGEST:
+            return self.send(to, subject, body, html_body)
+
+        item_key = _key(key)
+        window_open = and_(DigestItem.recipient == to, DigestItem.status == "pending")
+        with self.session_factory() as db:
+            closes_at = db.execute(select(DigestItem.next_attempt_at).where(window_open).limit(1)).scalar()
+            previous = None
+            if item_key is not None:
+                previous = db.execute(
+                    select(DigestItem).where(window_open, DigestItem.item_key == item_key).limit(1)
+                ).scalar()
+            if previous is None:
+                db.add(DigestItem(
+                    recipient=to, name=name, item_key=item_key, subject=subject, body=body,
+                    html_body=html_body, summary=summary, since=since, until=until,
+                    next_attempt_at=closes_at or self.clock() + timedelta(seconds=self.window),
+                ))
+            else:
+                previous.subject, previous.body, previous.html_body = subject, body, html_body
+                previous.summary, previous.until = summary, until
+                # Redelivery of the same message is not a new transition
+                previous.merged = previous.merged or previous.since != since
+            db.commit()
+        return True
+
+    def flush_due(self, now: Optional[datetime] = None, limit: Optional[int] = None) -> int:
+        """Send digests whose window has closed. Returns the number of emails sent."""
+        now = now or self.clock()
+        stale = now - timedelta(seconds=settings.OUTBOX_LOCK_TIMEOUT)
+        claimable = or_(
+            and_(DigestItem.status == "pending", DigestItem.next_attempt_at <= now),
+            # Items held by a worker that died while sending
+            and_(DigestItem.status == "sending", DigestItem.locked_at < stale),
+        )
+        return self._flush(claimable, now, limit)
+
+    def flush_all(self, limit: Optional[int] = None) -> int:
+        """Send every pending digest now, closed or not."""
+        total = 0
+        while True:
+            sent = self._flush(DigestItem.status == "pending", self.clock(), limit)
+            if not sent:
+                return total
+            total += sent
+
+    def pending(self) -> int:
+        with self.session_factory() as db:
+            return db.execute(select(func.count()).select_from(DigestItem)).scalar_one()
+
+    def _flush(self, claimable, now: datetime, limit: Optional[int]) -> int:
+        with self.session_factory() as db:
+            claimed = claim_rows(db, DigestItem, claimable, limit or settings.OUTBOX_BATCH_SIZE, "sending", now)
+            by_recipient: Dict[str, List[DigestItem]] = defaultdict(list)
+            for item in claimed:
+                by_recipient[item.recipient].append(item)
+            emails = []
+            digests = []
+            for to, items in by_recipient.items():
+                if len(items) == 1 and not items[0].merged:
+                    emails.append((to, [items[0].id], items[0].subject, items[0].body, items[0].html_body))
+                else:
+                    digests.append((to, items))
+            contexts = [
+                {
+                    "name": items[0].name or "there",
+                    "count": len(items),
+                    "noun": "update" if len(items) == 1 else "updates",
+                    "lines": "\n".join(f"  - {item.line()}" for item in items),
+                    "items": Safe("\n".join(f"  <li>{html.escape(item.line())}</li>" for item in items)),
+                }
+                for _, items in digests
+            ]
+            # One template lookup for every digest in this flush
+            for (to, items), email in zip(digests, templates.render_many("digest", contexts)):
+                emails.append((to, [item.id for item in items], email.subject, email.text, email.html))
+
+            for to, ids, subject, body, html_body in emails:
+                self._deliver(db, to, ids, subject, body, html_body)
+        return len(emails)
+
+    def _deliver(self, db: Session, to: str, ids: List[int], subject: str, body: str,
+                 html_body: Optional[str]) -> None:
+        """Send one digest and drop its items, moving it to the retry store if sending fails."""
+        sent = self.send(to, subject, body, html_body)
+        db.execute(delete(DigestItem).where(DigestItem.id.in_(ids)).execution_options(synchronize_session=False))
+        if sent:
+            db.commit()
+            logger.info("Digest with %d items sent to %s", len(ids), to)
+        else:
+            record_failure(db, to, subject, body, html_body, error="send_email failed")  # Commits
+            logger.warning("Digest with %d items to %s queued for retry", len(ids), to)
+
+
+coalescer = NotificationCoalescer()
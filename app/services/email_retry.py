@@ -0,0 +1,135 @@
+"""
+Retry scheduling and dead-letter store for failed emails.
+
+Digests that fail to send are written to `failed_emails` through
+`record_failure()` instead of being dropped. (Immediate notification emails
+are retried by the outbox itself; see app/services/outbox.py.)
+
+The outbox worker runs `process_due()` on its own thread. Due rows are
+claimed one at a time (so two workers never resend the same email and a
+crash strands at most one), committed per email, retried with exponential
+backoff plus jitter, and after EMAIL_MAX_ATTEMPTS left in status "dead"
+for an admin to inspect and replay. A tick stops after
+EMAIL_RETRY_TICK_SECONDS, so a slow SMTP server cannot hold it for a whole
+batch of timeouts.
+"""
+import logging
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.email import send_email
+from app.db.claim import claim_rows
+from app.db.session import SessionLocal
+from app.models.failed_email import FailedEmail
+
+logger = logging.getLogger(__name__)
+
+
+def backoff_delay(
+    attempts: int,
+    rng: Callable[[float, float], float] = random.uniform,
+    base: Optional[float] = None,
+    cap: Optional[float] = None,
+) -> timedelta:
+    """
+    Delay before the next attempt after `attempts` failures.
+    Exponential (base * 2^(n-1), capped) with "equal jitter": half the delay
+    is fixed, the other half random, so retries of a burst spread out.
+    `base` and `cap` default to EMAIL_RETRY_BASE_SECONDS/EMAIL_RETRY_MAX_SECONDS.
+    """
+    base = settings.EMAIL_RETRY_BASE_SECONDS if base is None else base
+    cap = settings.EMAIL_RETRY_MAX_SECONDS if cap is None else cap
+    delay = min(base * (2 ** max(attempts - 1, 0)), cap)
+    return timedelta(seconds=delay / 2 + rng(0, delay / 2))
+
+
+def record_failure(
+    db: Session,
+    to: str,
+    subject: str,
+    body: str,
+    html_body: Optional[str] = None,
+    error: str = "",
+) -> FailedEmail:
+    """Store a failed email for retry. Commits."""
+    failed = FailedEmail(
+        recipient=to,
+        subject=subject,
+        body=body,
+        html_body=html_body,
+        attempts=1,
+        next_attempt_at=datetime.utcnow() + backoff_delay(1),
+        last_error=error,
+    )
+    db.add(failed)
+    db.commit()
+    return failed
+
+
+def _claimable(now: datetime):
+    stale = now - timedelta(seconds=settings.EMAIL_RETRY_LOCK_TIMEOUT)
+    return or_(
+        and_(FailedEmail.status == "retrying", FailedEmail.next_attempt_at <= now),
+        and_(FailedEmail.status == "sending", FailedEmail.locked_at < stale),
+    )
+
+
+def process_due(
+    db: Session,
+    limit: Optional[int] = None,
+    now: Optional[datetime] = None,
+    max_runtime: Optional[float] = None,
+) -> int:
+    """
+    Retry failed emails whose backoff has elapsed. Returns the number retried.
+    Sent emails are deleted; failures are rescheduled or dead-lettered.
+    Stops after `limit` emails or `max_runtime` seconds, whichever comes first.
+    """
+    limit = limit or settings.EMAIL_RETRY_BATCH_SIZE
+    max_runtime = settings.EMAIL_RETRY_TICK_SECONDS if max_runtime is None else max_runtime
+    deadline = time.monotonic() + max_runtime
+    retried = 0
+    while retried < limit and time.monotonic() < deadline:
+        claim_time = now or datetime.utcnow()
+        claimed = claim_rows(db, FailedEmail, _claimable(claim_time), 1, "sending", claim_time)
+        if not claimed:
+            break
+        _retry(db, claimed[0])
+        retried += 1
+    return retried
+
+
+def _retry(db: Session, failed: FailedEmail) -> None:
+    """Resend one claimed email and commit its outcome."""
+    if send_email(failed.recipient, failed.subject, failed.body, html_body=failed.html_body):
+        db.delete(failed)
+        db.commit()
+        return
+    failed.locked_by = None
+    failed.locked_at = None
+    failed.last_error = "send_email failed"
+    if failed.attempts >= settings.EMAIL_MAX_ATTEMPTS:
+        failed.status = "dead"
+        logger.error("Email %s to %s dead-lettered after %s attempts", failed.id, failed.recipient, failed.attempts)
+    else:
+        failed.status = "retrying"
+        failed.next_attempt_at = datetime.utcnow() + backoff_delay(failed.attempts)
+    db.commit()
+
+
+def replay(db: Session, failed: FailedEmail) -> FailedEmail:
+    """Move a dead-lettered email back into the retry queue, due now."""
+    failed.status = "retrying"
+    failed.attempts = 0
+    failed.next_attempt_at = datetime.utcnow()
+    failed.locked_by = None
+    failed.locked_at = None
+    db.commit()
+    db.refresh(failed)
+    return failed
@@ -0,0 +1,212 @@
+"""
+Grievance storage behind one interface with two backends.
+
+- SqlGrievanceRepository stores rows in the `grievances` table through the
+  caller's session. It flushes but never commits, so a grievance change and
+  the outbox message it enqueues commit together.
+- InMemoryGrievanceRepository keeps rows in a dict guarded by a lock, with
+  secondary indexes on student_id, status and dept_id. It is meant for tests
+  and single-process demos: every worker process has its own copy.
+
+Both return plain dicts (copies, never live objects) and store statuses as
+StatusEnum member names ("submitted", "in_progress", ...); either the name
+or the display value ("In Progress") is accepted as input.
+"""
+import itertools
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.grievance import Grievance, StatusEnum
+from app.models.user import User
+
+FIELDS = (
+    "id", "title", "category", "description", "status",
+    "student_id", "student_email", "dept_id", "handler_id", "resolution", "created_at",
+)
+UPDATABLE = {"title", "category", "description", "status", "dept_id", "handler_id", "resolution"}
+INDEXED = ("student_id", "status", "dept_id")
+
+
+def normalize_status(value) -> str:
+    """Map a StatusEnum, member name or display value to the member name."""
+    if isinstance(value, StatusEnum):
+        return value.name
+    if value in StatusEnum.__members__:
+        return value
+    try:
+        return StatusEnum(value).name
+    except ValueError:
+        raise ValueError(f"Unknown grievance status: {value}") from None
+
+
+def _check_changes(changes: dict) -> dict:
+    unknown = set(changes) - UPDATABLE
+    if unknown:
+        raise ValueError(f"Cannot update grievance fields: {', '.join(sorted(unknown))}")
+    if "status" in changes:
+        changes = {**changes, "status": normalize_status(changes["status"])}
+    return changes
+
+
+class GrievanceRepository(ABC):
+    """Storage interface used by the grievance API."""
+
+    @abstractmethod
+    def add(
+        self,
+        title: str,
+        description: str,
+        student_id: int,
+        category: Optional[str] = None,
+        dept_id: Optional[int] = None,
+        student_email: Optional[str] = None,
+        status: str = "submitted",
+    ) -> dict:
+        """Store a new grievance and return it with its id."""
+
+    @abstractmethod
+    def get(self, grievance_id: int) -> Optional[dict]:
+        """Return one grievance, or None."""
+
+    @abstractmethod
+    def update(self, grievance_id: int, **changes) -> Optional[dict]:
+        """Apply `changes` and return the updated grievance, or None if missing."""
+
+    @abstractmethod
+    def list_by_student(self, student_id: int) -> List[dict]:
+        """Grievances of one student, oldest first."""
+
+    @abstractmethod
+    def list_by_status(self, status: str) -> List[dict]:
+        """Grievances in one status, oldest first."""
+
+    @abstractmethod
+    def list_by_dept(self, dept_id: int) -> List[dict]:
+        """Grievances of one department, oldest first."""
+
+
+class InMemoryGrievanceRepository(GrievanceRepository):
+    """Lock-protected dict store with secondary indexes (O(1) get, O(k) lookups)."""
+
+    def __init__(self):
+        self._rows: Dict[int, dict] = {}
+        self._indexes: Dict[str, Dict[object, Set[int]]] = {field: {} for field in INDEXED}
+        self._ids = itertools.count(1)
+        self._lock = threading.RLock()
+
+    def _index(self, row: dict) -> None:
+        for field in INDEXED:
+            self._indexes[field].setdefault(row[field], set()).add(row["id"])
+
+    def _unindex(self, row: dict) -> None:
+        for field in INDEXED:
+            ids = self._indexes[field].get(row[field])
+            if ids is not None:
+                ids.discard(row["id"])
+                if not ids:
+                    del self._indexes[field][row[field]]
+
+    def _lookup(self, field: str, value) -> List[dict]:
+        with self._lock:
+            ids = sorted(self._indexes[field].get(value, ()))
+            return [dict(self._rows[i]) for i in ids]
+
+    def add(self, title, description, student_id, category=None, dept_id=None, student_email=None,
+            status="submitted") -> dict:
+        status = normalize_status(status)
+        with self._lock:
+            row = dict.fromkeys(FIELDS)
+            row.update(
+                id=next(self._ids), title=title, description=description, student_id=student_id,
+                category=category, dept_id=dept_id, student_email=student_email, status=status,
+                created_at=datetime.now(timezone.utc),
+            )
+            self._rows[row["id"]] = row
+            self._index(row)
+            return dict(row)
+
+    def get(self, grievance_id: int) -> Optional[dict]:
+        with self._lock:
+            row = self._rows.get(grievance_id)
+            return dict(row) if row is not None else None
+
+    def update(self, grievance_id: int, **changes) -> Optional[dict]:
+        changes = _check_changes(changes)
+        with self._lock:
+            row = self._rows.get(grievance_id)
+            if row is None:
+                return None
+            self._unindex(row)
+            row.update(changes)
+            self._index(row)
+            return dict(row)
+
+    def list_by_student(self, student_id: int) -> List[dict]:
+        return self._lookup("student_id", student_id)
+
+    def list_by_status(self, status: str) -> List[dict]:
+        return self._lookup("status", normalize_status(status))
+
+    def list_by_dept(self, dept_id: int) -> List[dict]:
+        return self._lookup("dept_id", dept_id)
+
+
+class SqlGrievanceRepository(GrievanceRepository):
+    """Grievance table access through a caller-owned session (flushes, never commits)."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    @staticmethod
+    def _to_dict(grievance: Grievance, student_email: Optional[str]) -> dict:
+        row = {field: getattr(grievance, field, None) for field in FIELDS}
+        row["status"] = normalize_status(grievance.status or StatusEnum.submitted)
+        row["student_email"] = student_email
+        return row
+
+    def _select(self):
+        return select(Grievance, User.email).outerjoin(User, User.id == Grievance.student_id)
+
+    def _all(self, condition) -> List[dict]:
+        rows = self.db.execute(self._select().where(condition).order_by(Grievance.id))
+        return [self._to_dict(g, email) for g, email in rows]
+
+    def add(self, title, description, student_id, category=None, dept_id=None, student_email=None,
+            status="submitted") -> dict:
+        grievance = Grievance(
+            title=title, description=description, student_id=student_id,
+            category=category, dept_id=dept_id, status=StatusEnum[normalize_status(status)],
+        )
+        self.db.add(grievance)
+        self.db.flush()
+        if student_email is None:
+            student_email = self.db.execute(select(User.email).where(User.id == student_id)).scalar()
+        return self._to_dict(grievance, student_email)
+
+    def get(self, grievance_id: int) -> Optional[dict]:
+        row = self.db.execute(self._select().where(Grievance.id == grievance_id)).first()
+        return self._to_dict(*row) if row else None
+
+    def update(self, grievance_id: int, **changes) -> Optional[dict]:
+        changes = _check_changes(changes)
+        grievance = self.db.get(Grievance, grievance_id)
+        if grievance is None:
+            return None
+        for field, value in changes.items():
+            setattr(grievance, field, StatusEnum[value] if field == "status" else value)
+        self.db.flush()
+        return self.get(grievance_id)
+
+    def list_by_student(self, student_id: int) -> List[dict]:
+        return self._all(Grievance.student_id == student_id)
+
+    def list_by_status(self, status: str) -> List[dict]:
+        return self._all(Grievance.status == StatusEnum[normalize_status(status)])
+
+    def list_by_dept(self, dept_id: int) -> List[dict]:
+        return self._all(Grievance.dept_id == dept_id)
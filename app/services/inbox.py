@@ -0,0 +1,132 @@
+"""
+In-app notification inbox.
+
+Each notification is a row in `notifications`; the unread total per user is
+kept in `notification_counters` and updated in the same transaction as the
+rows it counts, so the badge is a primary-key lookup instead of COUNT(*).
+Mark-as-read is one UPDATE for any number of notifications, and the counter
+is decremented by exactly the number of rows that statement changed.
+"""
+import logging
+from typing import List, Optional, Sequence
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal
+from app.models.notification import Notification
+from app.models.notification_counter import NotificationCounter
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+MAX_PAGE_SIZE = 100
+
+
+def _adjust_unread(db: Session, user_id: int, delta: int) -> None:
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = insert(NotificationCounter).values(user_id=user_id, unread=max(delta, 0))
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[NotificationCounter.user_id],
+                set_={"unread": NotificationCounter.unread + delta},
+            )
+        )
+        return
+    result = db.execute(
+        update(NotificationCounter)
+        .where(NotificationCounter.user_id == user_id)
+        .values(unread=NotificationCounter.unread + delta)
+    )
+    if result.rowcount == 0:
+        db.add(NotificationCounter(user_id=user_id, unread=max(delta, 0)))
+        db.flush()
+
+
+def add_notification(
+    db: Session,
+    user_id: int,
+    kind: str,
+    title: str,
+    body: str = "",
+    grievance_id: Optional[int] = None,
+) -> Notification:
+    """Add an unread notification and bump the user's counter. Does not commit."""
+    notification = Notification(
+        user_id=user_id, kind=kind, title=title, body=body, grievance_id=grievance_id
+    )
+    db.add(notification)
+    _adjust_unread(db, user_id, 1)
+    return notification
+
+
+def record_notification(
+    email: str, kind: str, title: str, body: str = "", grievance_id: Optional[int] = None
+) -> bool:
+    """
+    Add an inbox entry for the user with `email` (used by the notification
+    hooks, which only know addresses). Returns False if no such user exists.
+    """
+    db = SessionLocal()
+    try:
+        user_id = db.execute(select(User.id).where(User.email == email)).scalar()
+        if user_id is None:
+            return False
+        add_notification(db, user_id, kind, title, body, grievance_id)
+        db.commit()
+        return True
+    except Exception as e:
+        db.rollback()
+        logger.error("Could not add %s notification for %s: %s", kind, email, e)
+        return False
+    finally:
+        db.close()
+
+
+def unread_count(db: Session, user_id: int) -> int:
+    counter = db.get(NotificationCounter, user_id)
+    return counter.unread if counter else 0
+
+
+def list_notifications(
+    db: Session,
+    user_id: int,
+    limit: int = 20,
+    before: Optional[int] = None,
+    unread_only: bool = False,
+) -> List[Notification]:
+    """
+    One inbox page, newest first. Pass the last id of a page as `before` to
+    get the next one (keyset pagination, so deep pages stay cheap).
+    """
+    query = select(Notification).where(Notification.user_id == user_id)
+    if unread_only:
+        query = query.where(Notification.is_read.is_(False))
+    if before is not None:
+        query = query.where(Notification.id < before)
+    query = query.order_by(Notification.id.desc()).limit(min(max(limit, 1), MAX_PAGE_SIZE))
+    return list(db.execute(query).scalars())
+
+
+def mark_read(db: Session, user_id: int, ids: Optional[Sequence[int]] = None) -> int:
+    """
+    Mark the given notifications (or all of them) read in a single UPDATE.
+    Returns the number that were unread. Commits.
+    """
+    stmt = update(Notification).where(
+        Notification.user_id == user_id, Notification.is_read.is_(False)
+    )
+    if ids is not None:
+        if not ids:
+            return 0
+        stmt = stmt.where(Notification.id.in_(ids))
+    updated = db.execute(
+        stmt.values(is_read=True).execution_options(synchronize_session=False)
+    ).rowcount
+    if updated:
+        _adjust_unread(db, user_id, -updated)
+    db.commit()
+    return updated
@@ -1,54 +1,95 @@
 """
 Notification service for grievance lifecycle events.
-Designed to work with FastAPI BackgroundTasks and migrate to Celery/RQ.
+Run by the outbox worker; bodies come from the email template registry,
+emails pass through the digest coalescer, and recipients with an account
+also get an in-app inbox entry.
+
+Every hook runs twice per event, from two outbox messages: once to send
+the email and once with `inbox=True` to add the inbox entry. Handlers raise
+EmailDeliveryError when an email that is sent immediately fails, so the
+outbox retries that message with backoff and finally marks it failed; the
+inbox entry is written regardless, and only once. Each outbox message
+emails one recipient, so a retry never resends mail that already went out.
 """
-from app.core.email import send_email_async
+import html
+from typing import List
+
 from app.core.config import settings
+from app.core.email import EmailDeliveryError
+from app.core.templates import Safe, templates
+from app.services.digest import coalescer
+from app.services.inbox import record_notification
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-def notify_grievance_created(
+def _email(event: str, to: str, subject: str, body: str, **options) -> None:
+    """Send or buffer one email through the coalescer; raise if sending it failed."""
+    if not coalescer.submit(event, to, subject, body, **options):
+        raise EmailDeliveryError(f"Sending {event} email to {to} failed")
+
+
+def notify_grievance_created_admin(
     grievance_id: int,
     student_email: str,
     student_name: str,
     title: str,
     admin_email: str = settings.ADMIN_EMAIL,
+    inbox: bool = False,
 ) -> None:
-    """Notify admin and student that a new grievance was created."""
-    admin_subject = f"New Grievance Submitted: {title}"
-    admin_body = f"""
-Hello Admin,
-
-A new grievance has been submitted.
-
-Grievance ID: {grievance_id}
-Student: {student_name} ({student_email})
-Title: {title}
-
-Please log in to review and take action.
-
-Best regards,
-Grievance Portal
-"""
-    send_email_async(admin_email, admin_subject, admin_body)
-    
-    student_subject = f"Grievance Received: {title}"
-    student_body = f"""
-Hello {student_name},
-
-Your grievance has been successfully submitted and assigned ID: {grievance_id}.
-
-Title: {title}
-
-You can track the status at any time. We will notify you of updates.
-
-Best regards,
-Grievance Portal Team
-"""
-    send_email_async(student_email, student_subject, student_body)
-    logger.info(f"Grievance {grievance_id} notifications sent to {student_email} and admin")
+    """Notify admin that a new grievance was created."""
+    email = templates.render(
+        "grievance_created_admin",
+        grievance_id=grievance_id,
+        student_email=student_email,
+        student_name=student_name,
+        title=title,
+    )
+    if inbox:
+        record_notification(admin_email, "grievance_created", email.subject, f"{title} ({student_email})", grievance_id)
+        return
+    _email(
+        "grievance_created.admin",
+        admin_email,
+        email.subject,
+        email.text,
+        summary=f"New grievance #{grievance_id}: {title} ({student_email})",
+        name="Admin",
+        key=("created", grievance_id),
+        html_body=email.html,
+    )
+    logger.info("Grievance %s created notification sent to admin", grievance_id)
+
+
+def notify_grievance_created_student(
+    grievance_id: int,
+    student_email: str,
+    student_name: str,
+    title: str,
+    inbox: bool = False,
+) -> None:
+    """Confirm to the student that their grievance was received."""
+    email = templates.render(
+        "grievance_created_student",
+        grievance_id=grievance_id,
+        student_email=student_email,
+        student_name=student_name,
+        title=title,
+    )
+    if inbox:
+        record_notification(student_email, "grievance_created", email.subject, title, grievance_id)
+        return
+    _email(
+        "grievance_created.student",
+        student_email,
+        email.subject,
+        email.text,
+        summary=f"Grievance #{grievance_id} received: {title}",
+        name=student_name,
+        html_body=email.html,
+    )
+    logger.info("Grievance %s created notification sent to %s", grievance_id, student_email)
 
 
 def notify_grievance_status_changed(
@@ -58,25 +99,36 @@ def notify_grievance_status_changed(
     old_status: str,
     new_status: str,
     title: str,
+    inbox: bool = False,
 ) -> None:
     """Notify student when grievance status changes."""
-    subject = f"Grievance Status Update: {title}"
-    body = f"""
-Hello {student_name},
-
-The status of your grievance (ID: {grievance_id}) has been updated.
-
-Previous Status: {old_status}
-New Status: {new_status}
-Title: {title}
-
-Please log in for more details.
-
-Best regards,
-Grievance Portal Team
-"""
-    send_email_async(student_email, subject, body)
-    logger.info(f"Grievance {grievance_id} status changed notification sent to {student_email}")
+    email = templates.render(
+        "grievance_status_changed",
+        grievance_id=grievance_id,
+        student_name=student_name,
+        old_status=old_status,
+        new_status=new_status,
+        title=title,
+    )
+    if inbox:
+        record_notification(
+            student_email, "grievance_status_changed", email.subject,
+            f"{title}: {old_status} -> {new_status}", grievance_id,
+        )
+        return
+    _email(
+        "grievance_status_changed",
+        student_email,
+        email.subject,
+        email.text,
+        summary=f"Grievance #{grievance_id} ({title})",
+        name=student_name,
+        key=("status", grievance_id),
+        since=old_status,
+        until=new_status,
+        html_body=email.html,
+    )
+    logger.info("Grievance %s status changed notification sent to %s", grievance_id, student_email)
 
 
 def notify_grievance_assigned(
@@ -84,24 +136,28 @@ def notify_grievance_assigned(
     handler_email: str,
     handler_name: str,
     grievance_title: str,
+    inbox: bool = False,
 ) -> None:
     """Notify handler/staff when a grievance is assigned to them."""
-    subject = f"New Grievance Assigned: {grievance_title}"
-    body = f"""
-Hello {handler_name},
-
-A grievance has been assigned to you for resolution.
-
-Grievance ID: {grievance_id}
-Title: {grievance_title}
-
-Please review and take necessary action.
-
-Best regards,
-Grievance Portal
-"""
-    send_email_async(handler_email, subject, body)
-    logger.info(f"Grievance {grievance_id} assignment notification sent to {handler_email}")
+    email = templates.render(
+        "grievance_assigned",
+        grievance_id=grievance_id,
+        handler_name=handler_name,
+        grievance_title=grievance_title,
+    )
+    if inbox:
+        record_notification(handler_email, "grievance_assigned", email.subject, grievance_title, grievance_id)
+        return
+    _email(
+        "grievance_assigned",
+        handler_email,
+        email.subject,
+        email.text,
+        summary=f"Grievance #{grievance_id} assigned: {grievance_title}",
+        name=handler_name,
+        html_body=email.html,
+    )
+    logger.info("Grievance %s assignment notification sent to %s", grievance_id, handler_email)
 
 
 def notify_grievance_resolved(
@@ -110,21 +166,53 @@ def notify_grievance_resolved(
     student_name: str,
     title: str,
     resolution: str = "",
+    inbox: bool = False,
 ) -> None:
     """Notify student when their grievance is resolved."""
-    subject = f"Grievance Resolved: {title}"
-    body = f"""
-Hello {student_name},
-
-Your grievance (ID: {grievance_id}) has been marked as resolved.
-
-Title: {title}
-Resolution: {resolution}
-
-Thank you for bringing this matter to our attention.
-
-Best regards,
-Grievance Portal Team
-"""
-    send_email_async(student_email, subject, body)
-    logger.info(f"Grievance {grievance_id} resolution notification sent to {student_email}")
+    email = templates.render(
+        "grievance_resolved",
+        grievance_id=grievance_id,
+        student_name=student_name,
+        title=title,
+        resolution=resolution,
+    )
+    if inbox:
+        record_notification(student_email, "grievance_resolved", email.subject, resolution or title, grievance_id)
+        return
+    _email(
+        "grievance_resolved",
+        student_email,
+        email.subject,
+        email.text,
+        summary=f"Grievance #{grievance_id} resolved: {title}",
+        name=student_name,
+        html_body=email.html,
+    )
+    logger.info("Grievance %s resolution notification sent to %s", grievance_id, student_email)
+
+
+def notify_sla_escalation(recipient_email: str, grievances: List[dict], inbox: bool = False) -> None:
+    """Tell a handler or the escalation address which grievances breached their SLA."""
+    lines = [
+        f"#{g['grievance_id']} {g['title']}: {g['status']} for {g['hours']}h (limit {g['max_hours']}h)"
+        for g in grievances
+    ]
+    email = templates.render(
+        "sla_escalation",
+        count=len(grievances),
+        noun="grievance" if len(grievances) == 1 else "grievances",
+        lines="\n".join(f"  - {line}" for line in lines),
+        items=Safe("\n".join(f"  <li>{html.escape(line)}</li>" for line in lines)),
+    )
+    if inbox:
+        record_notification(recipient_email, "sla_escalation", email.subject, "\n".join(lines))
+        return
+    _email(
+        "sla_escalation",
+        recipient_email,
+        email.subject,
+        email.text,
+        summary=email.subject,
+        html_body=email.html,
+    )
+    logger.info("SLA escalation for %d grievances sent to %s", len(grievances), recipient_email)
@@ -0,0 +1,157 @@
+"""
+Transactional outbox for notifications.
+
+Request handlers call `enqueue()` with the same session that writes the
+grievance change, so the notification is committed (or rolled back) together
+with it. A separate worker process (`python -m app.workers.outbox`) claims
+pending rows in batches and runs the matching notification handler, keeping
+per-message retry state. The web tier never waits on SMTP.
+
+Each message's outcome is committed as soon as it is handled, so a worker
+that dies mid-batch only redelivers the message it was working on. Events
+that email several people are queued as one message per recipient
+(RECIPIENT_EVENTS), so retrying one failed recipient resends nothing else,
+and each recipient's inbox entry travels in a message of its own
+(INBOX_SUFFIX), so an email outage neither suppresses nor repeats it.
+Failures are retried with jittered backoff; after OUTBOX_MAX_ATTEMPTS a
+message stays "failed", where admins list and replay it alongside the
+failed digests (/api/v1/admin/dead-letters/outbox).
+"""
+import json
+import logging
+import random
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, insert, or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.claim import claim_rows
+from app.models.outbox import OutboxMessage
+from app.services.email_retry import backoff_delay
+from app.services.notifications import (
+    notify_grievance_created_admin,
+    notify_grievance_created_student,
+    notify_grievance_status_changed,
+    notify_grievance_assigned,
+    notify_grievance_resolved,
+    notify_sla_escalation,
+)
+
+logger = logging.getLogger(__name__)
+
+# Suffix of the message that adds an event's inbox entry (the hook run with inbox=True)
+INBOX_SUFFIX = ".inbox"
+
+NOTIFICATION_HANDLERS: Dict[str, Callable[..., None]] = {
+    "grievance_created.admin": notify_grievance_created_admin,
+    "grievance_created.student": notify_grievance_created_student,
+    "grievance_status_changed": notify_grievance_status_changed,
+    "grievance_assigned": notify_grievance_assigned,
+    "grievance_resolved": notify_grievance_resolved,
+    "sla_escalation": notify_sla_escalation,
+}
+NOTIFICATION_HANDLERS.update({
+    event + INBOX_SUFFIX: partial(handler, inbox=True) for event, handler in NOTIFICATION_HANDLERS.items()
+})
+
+
+# Events queued as one message per recipient, with the same payload
+RECIPIENT_EVENTS: Dict[str, Tuple[str, ...]] = {
+    "grievance_created": ("grievance_created.admin", "grievance_created.student"),
+}
+
+
+def _events(event: str) -> Tuple[str, ...]:
+    recipients = RECIPIENT_EVENTS.get(event, (event,))
+    if any(name + INBOX_SUFFIX not in NOTIFICATION_HANDLERS for name in recipients):
+        raise ValueError(f"Unknown notification event: {event}")
+    return tuple(name for recipient in recipients for name in (recipient, recipient + INBOX_SUFFIX))
+
+
+def enqueue(db: Session, event: str, **payload) -> List[OutboxMessage]:
+    """
+    Add a notification to the outbox. Does not commit: the caller's commit
+    makes the message visible to workers atomically with its own changes.
+    """
+    messages = [OutboxMessage(event=name, payload=json.dumps(payload)) for name in _events(event)]
+    db.add_all(messages)
+    return messages
+
+
+def enqueue_many(db: Session, event: str, payloads: List[dict]) -> int:
+    """
+    Add one notification per payload with a single multi-row INSERT. Like
+    `enqueue`, joins the caller's transaction without committing.
+    """
+    rows = [{"event": name, "payload": json.dumps(p)} for p in payloads for name in _events(event)]
+    if rows:
+        db.execute(insert(OutboxMessage), rows)
+    return len(payloads)
+
+
+def _claimable(now: datetime):
+    stale = now - timedelta(seconds=settings.OUTBOX_LOCK_TIMEOUT)
+    return or_(
+        and_(OutboxMessage.status == "pending", OutboxMessage.next_attempt_at <= now),
+        # Rows held by a worker that died mid-batch
+        and_(OutboxMessage.status == "processing", OutboxMessage.locked_at < stale),
+    )
+
+
+def claim_batch(db: Session, batch_size: int, now: Optional[datetime] = None) -> List[OutboxMessage]:
+    """Atomically claim up to `batch_size` due messages for this worker."""
+    now = now or datetime.utcnow()
+    return claim_rows(db, OutboxMessage, _claimable(now), batch_size, "processing", now)
+
+
+def retry_delay(attempts: int, rng: Callable[[float, float], float] = random.uniform) -> timedelta:
+    """Exponential backoff with jitter, as for failed emails, so a burst of failures spreads out."""
+    return backoff_delay(
+        attempts, rng, base=settings.OUTBOX_RETRY_BASE_SECONDS, cap=settings.OUTBOX_RETRY_MAX_SECONDS
+    )
+
+
+def replay(db: Session, message: OutboxMessage) -> OutboxMessage:
+    """Put a failed message back in the queue with a fresh set of attempts. Commits."""
+    message.status = "pending"
+    message.attempts = 0
+    message.next_attempt_at = datetime.utcnow()
+    message.locked_by = None
+    message.locked_at = None
+    db.commit()
+    db.refresh(message)
+    return message
+
+
+def process_batch(db: Session, batch_size: Optional[int] = None) -> int:
+    """
+    Claim and deliver one batch. Returns the number of messages claimed.
+    Every message's outcome is committed before the next one is sent.
+    """
+    messages = claim_batch(db, batch_size or settings.OUTBOX_BATCH_SIZE)
+    # Read before the per-message commits expire the instances
+    work = [(m, m.id, m.event, m.payload, m.attempts) for m in messages]
+    for message, message_id, event, payload, attempts in work:
+        try:
+            NOTIFICATION_HANDLERS[event](**json.loads(payload))
+        except Exception as e:
+            message.last_error = str(e)
+            message.locked_by = None
+            message.locked_at = None
+            if attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+                message.status = "failed"
+                logger.error("Outbox message %s failed permanently: %s", message_id, e)
+            else:
+                message.status = "pending"
+                message.next_attempt_at = datetime.utcnow() + retry_delay(attempts)
+                logger.warning("Outbox message %s failed (attempt %s): %s", message_id, attempts, e)
+        else:
+            message.status = "sent"
+            message.processed_at = datetime.utcnow()
+            message.locked_by = None
+            message.locked_at = None
+        db.commit()
+    return len(messages)
@@ -0,0 +1,214 @@
+"""
+Load-aware automatic routing of grievances to handlers.
+
+Handlers are grouped into pools by the (dept_id, category) pairs they can
+take; a handler with no department or no categories also joins the
+wildcard pools. Each pool is a min-heap of (open_count, user_id) holding
+only handlers with spare capacity. A grievance (d, c) looks at the tops of
+pools (d, c), (d, *), (*, c) and (*, *) and takes the least-loaded one, so
+an assignment costs O(log n) instead of a COUNT query per candidate.
+
+Heap entries are invalidated lazily: when a load changes a new entry is
+pushed (unless the handler is now full; `release()` pushes it back) and
+stale or full ones are popped when they surface. Loads come from one
+GROUP BY over the grievances table at startup and every
+ROUTING_RESYNC_SECONDS afterwards (other workers assign too), and are
+adjusted in between by `assign()`/`release()`.
+"""
+import heapq
+import logging
+import threading
+import time
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.grievance import Grievance, StatusEnum
+from app.models.handler import Handler
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+CLOSED_STATUSES = (StatusEnum.resolved, StatusEnum.closed)
+ANY = None
+
+PoolKey = Tuple[Optional[int], Optional[str]]
+
+
+def _categories(value: Optional[str]) -> Optional[Set[str]]:
+    if not value:
+        return None
+    return {c.strip().lower() for c in value.split(",") if c.strip()}
+
+
+@dataclass
+class _HandlerInfo:
+    user_id: int
+    email: str
+    capacity: Optional[int]
+    pools: List[PoolKey] = field(default_factory=list)
+
+
+@dataclass
+class BacklogReport:
+    routed: int = 0
+    unroutable: int = 0
+    seconds: float = 0.0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class RoutingEngine:
+    """In-memory least-loaded handler selection, kept in step with the database."""
+
+    def __init__(self, resync_interval: Optional[float] = None):
+        self.resync_interval = settings.ROUTING_RESYNC_SECONDS if resync_interval is None else resync_interval
+        self._handlers: Dict[int, _HandlerInfo] = {}
+        self._load: Dict[int, int] = {}
+        self._pools: Dict[PoolKey, List[Tuple[int, int]]] = {}
+        self._lock = threading.RLock()
+        self._synced_at: Optional[float] = None
+
+    def rebuild(self, db: Session) -> None:
+        """Reload active handlers and their open-grievance counts from the database."""
+        rows = db.execute(
+            select(Handler.user_id, Handler.dept_id, Handler.categories, Handler.capacity, User.email)
+            .join(User, User.id == Handler.user_id)
+            .where(Handler.is_active.is_(True))
+        ).all()
+        counts = dict(
+            db.execute(
+                select(Grievance.handler_id, func.count())
+                .where(Grievance.handler_id.is_not(None), Grievance.status.not_in(CLOSED_STATUSES))
+                .group_by(Grievance.handler_id)
+            ).all()
+        )
+
+        handlers: Dict[int, _HandlerInfo] = {}
+        pools: Dict[PoolKey, List[Tuple[int, int]]] = defaultdict(list)
+        for user_id, dept_id, categories, capacity, email in rows:
+            info = handlers[user_id] = _HandlerInfo(user_id, email, capacity)
+            load = counts.get(user_id, 0)
+            for category in _categories(categories) or [ANY]:
+                info.pools.append((dept_id, category))
+                if capacity is None or load < capacity:
+                    pools[(dept_id, category)].append((load, user_id))
+        for heap in pools.values():
+            heapq.heapify(heap)
+
+        with self._lock:
+            self._handlers = handlers
+            self._load = {user_id: counts.get(user_id, 0) for user_id in handlers}
+            self._pools = dict(pools)
+            self._synced_at = time.monotonic()
+
+    def ensure_fresh(self, db: Session) -> None:
+        """Rebuild if never loaded or older than the resync interval."""
+        if self._synced_at is None or time.monotonic() - self._synced_at >= self.resync_interval:
+            self.rebuild(db)
+
+    def _available(self, load: int, user_id: int) -> bool:
+        capacity = self._handlers[user_id].capacity
+        return capacity is None or load < capacity
+
+    def _top(self, key: PoolKey) -> Optional[Tuple[int, int]]:
+        """Least-loaded handler of a pool with spare capacity."""
+        heap = self._pools.get(key)
+        while heap:
+            load, user_id = heap[0]
+            if self._load.get(user_id) == load and self._available(load, user_id):
+                return load, user_id
+            heapq.heappop(heap)  # Stale or full; `_adjust` pushes it back once it has room
+        return None
+
+    def choose(self, dept_id: Optional[int], category: Optional[str]) -> Optional[int]:
+        """Least-loaded eligible handler's user id, without assigning."""
+        category = category.strip().lower() if category else None
+        keys = {(dept_id, category), (dept_id, ANY), (ANY, category), (ANY, ANY)}
+        with self._lock:
+            best = None
+            for key in keys:
+                top = self._top(key)
+                if top is not None and (best is None or top < best):
+                    best = top
+            return best[1] if best else None
+
+    def _adjust(self, user_id: int, delta: int) -> None:
+        with self._lock:
+            if user_id not in self._load:
+                return
+            load = max(self._load[user_id] + delta, 0)
+            self._load[user_id] = load
+            if not self._available(load, user_id):
+                return
+            for key in self._handlers[user_id].pools:
+                heapq.heappush(self._pools.setdefault(key, []), (load, user_id))
+
+    def assign(self, user_id: int) -> None:
+        """Count one more open grievance for a handler."""
+        self._adjust(user_id, 1)
+
+    def release(self, user_id: Optional[int]) -> None:
+        """Count one grievance less (resolved, closed or reassigned)."""
+        if user_id is not None:
+            self._adjust(user_id, -1)
+
+    def route(self, dept_id: Optional[int], category: Optional[str]) -> Optional[int]:
+        """Choose a handler and count the assignment. Returns the user id or None."""
+        with self._lock:
+            user_id = self.choose(dept_id, category)
+            if user_id is not None:
+                self.assign(user_id)
+            return user_id
+
+    def handler_email(self, user_id: int) -> Optional[str]:
+        info = self._handlers.get(user_id)
+        return info.email if info else None
+
+    def load(self, user_id: int) -> Optional[int]:
+        with self._lock:
+            return self._load.get(user_id)
+
+    def route_backlog(
+        self, db: Session, limit: Optional[int] = None
+    ) -> Tuple[BacklogReport, List[Tuple[int, int, str]]]:
+        """
+        Assign every open, unassigned grievance (oldest first) in one pass:
+        one SELECT, in-memory routing, one bulk UPDATE. Does not commit.
+        Returns the report and (grievance_id, handler user id, title) tuples.
+        """
+        started = time.perf_counter()
+        self.rebuild(db)
+        query = (
+            select(Grievance.id, Grievance.dept_id, Grievance.category, Grievance.title)
+            .where(Grievance.handler_id.is_(None), Grievance.status.not_in(CLOSED_STATUSES))
+            .order_by(Grievance.id)
+        )
+        if limit is not None:
+            query = query.limit(limit)
+
+        report = BacklogReport()
+        assignments = []
+        for grievance_id, dept_id, category, title in db.execute(query).all():
+            user_id = self.route(dept_id, category)
+            if user_id is None:
+                report.unroutable += 1
+            else:
+                assignments.append((grievance_id, user_id, title))
+        if assignments:
+            db.execute(
+                update(Grievance),
+                [{"id": grievance_id, "handler_id": user_id} for grievance_id, user_id, _ in assignments],
+            )
+        report.routed = len(assignments)
+        report.seconds = round(time.perf_counter() - started, 4)
+        logger.info("Routed %d backlog grievances (%d without a handler)", report.routed, report.unroutable)
+        return report, assignments
+
+
+routing_engine = RoutingEngine()
@@ -0,0 +1,201 @@
+"""
+SLA escalation for grievances left too long in one status.
+
+An SLA rule caps the hours a grievance may stay in a status, optionally per
+department and/or category; the most specific rule wins, and
+SLA_DEFAULT_HOURS covers everything else. A grievance's clock restarts
+whenever it is updated (`grievances.updated_at`).
+
+`scan_overdue()` never sweeps the table. For every distinct (status, hours)
+threshold it keeps a keyset watermark (updated_at, id) in `sla_watermarks`
+and reads only rows between the watermark and `now - hours`, in
+(status, updated_at) index order. A grievance is therefore examined once
+per threshold, when it crosses it, and a tick costs time proportional to
+what became overdue since the previous tick, not to the table size.
+
+Escalations are recorded in `sla_escalations` and notified through the
+outbox: one `sla_escalation` message per recipient per batch, listing all of
+that recipient's overdue grievances. Rows, notifications and the watermark
+commit together, so a crashed tick is simply repeated.
+"""
+import logging
+import time
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.grievance import Grievance, StatusEnum
+from app.models.sla_escalation import SlaEscalation
+from app.models.sla_rule import SlaRule
+from app.models.sla_watermark import SlaWatermark
+from app.models.user import User
+from app.services import outbox
+
+logger = logging.getLogger(__name__)
+
+
+def _utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes; everything is stored in UTC
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def parse_default_hours(value: str) -> Dict[str, int]:
+    """Parse "submitted=72,under_review=168" into {status name: hours}."""
+    defaults = {}
+    for part in filter(None, (p.strip() for p in value.split(","))):
+        status, _, hours = part.partition("=")
+        if status.strip() not in StatusEnum.__members__:
+            raise ValueError(f"Unknown grievance status in SLA_DEFAULT_HOURS: {status}")
+        defaults[status.strip()] = int(hours)
+    return defaults
+
+
+class SlaRules:
+    """Rule lookup by (status, dept_id, category), most specific first."""
+
+    def __init__(self, rules: Iterable[Tuple[str, Optional[int], Optional[str], int]]):
+        self._hours: Dict[Tuple[str, Optional[int], Optional[str]], int] = {}
+        for status, dept_id, category, hours in rules:
+            self._hours[(status, dept_id, category.strip().lower() if category else None)] = hours
+
+    @classmethod
+    def load(cls, db: Session, defaults: Optional[Dict[str, int]] = None) -> "SlaRules":
+        if defaults is None:
+            defaults = parse_default_hours(settings.SLA_DEFAULT_HOURS)
+        rules = [(status, None, None, hours) for status, hours in defaults.items()]
+        rules.extend(
+            (rule.status.name, rule.dept_id, rule.category, rule.max_hours)
+            for rule in db.execute(select(SlaRule)).scalars()
+        )
+        return cls(rules)
+
+    def hours_for(self, status: str, dept_id: Optional[int], category: Optional[str]) -> Optional[int]:
+        category = category.strip().lower() if category else None
+        for key in ((status, dept_id, category), (status, dept_id, None), (status, None, category), (status, None, None)):
+            if key in self._hours:
+                return self._hours[key]
+        return None
+
+    def thresholds(self) -> Dict[str, List[int]]:
+        """Distinct hour limits per status; each gets its own watermark."""
+        by_status = defaultdict(set)
+        for (status, _, _), hours in self._hours.items():
+            by_status[status].add(hours)
+        return {status: sorted(hours) for status, hours in by_status.items()}
+
+
+@dataclass
+class SlaReport:
+    scanned: int = 0
+    escalated: int = 0
+    notifications: int = 0
+    complete: bool = True
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def _advance_watermark(db: Session, key: str, updated_at: datetime, grievance_id: int) -> None:
+    watermark = db.get(SlaWatermark, key)
+    if watermark is None:
+        db.add(SlaWatermark(key=key, updated_at=updated_at, grievance_id=grievance_id))
+    else:
+        watermark.updated_at = updated_at
+        watermark.grievance_id = grievance_id
+
+
+def _escalate(db: Session, status: str, hours: int, rows: list, now: datetime) -> Tuple[int, int]:
+    """Record escalations for `rows` and enqueue one notification per recipient."""
+    if not rows:
+        return 0, 0
+    existing = set(
+        db.execute(
+            select(SlaEscalation.grievance_id, SlaEscalation.since)
+            .where(SlaEscalation.grievance_id.in_([r.id for r in rows]))
+        ).all()
+    )
+    rows = [r for r in rows if (r.id, r.updated_at) not in existing]
+    handler_emails = dict(
+        db.execute(
+            select(User.id, User.email).where(User.id.in_({r.handler_id for r in rows if r.handler_id}))
+        ).all()
+    )
+
+    by_recipient: Dict[str, List[dict]] = defaultdict(list)
+    for row in rows:
+        db.add(SlaEscalation(
+            grievance_id=row.id, status=StatusEnum[status], since=row.updated_at,
+            max_hours=hours, handler_id=row.handler_id,
+        ))
+        item = {
+            "grievance_id": row.id,
+            "title": row.title,
+            "status": StatusEnum[status].value,
+            "hours": int((now - _utc(row.updated_at)).total_seconds() // 3600),
+            "max_hours": hours,
+        }
+        by_recipient[settings.SLA_ESCALATION_EMAIL].append(item)
+        if row.handler_id in handler_emails:
+            by_recipient[handler_emails[row.handler_id]].append(item)
+
+    for recipient, items in by_recipient.items():
+        outbox.enqueue(db, "sla_escalation", recipient_email=recipient, grievances=items)
+    return len(rows), len(by_recipient)
+
+
+def scan_overdue(
+    db: Session,
+    rules: Optional[SlaRules] = None,
+    now: Optional[datetime] = None,
+    batch_size: Optional[int] = None,
+    max_runtime: Optional[float] = None,
+) -> SlaReport:
+    """Escalate grievances that crossed an SLA threshold since the last scan."""
+    rules = rules or SlaRules.load(db)
+    now = _utc(now or datetime.now(timezone.utc))
+    batch_size = batch_size or settings.SLA_SCAN_BATCH_SIZE
+    started = time.monotonic()
+    report = SlaReport()
+
+    for status, limits in rules.thresholds().items():
+        for hours in limits:
+            key = f"{status}:{hours}"
+            cutoff = now - timedelta(hours=hours)
+            while True:
+                if max_runtime is not None and time.monotonic() - started >= max_runtime:
+                    report.complete = False
+                    return report
+                query = select(
+                    Grievance.id, Grievance.dept_id, Grievance.category, Grievance.handler_id,
+                    Grievance.title, Grievance.updated_at,
+                ).where(Grievance.status == StatusEnum[status], Grievance.updated_at <= cutoff)
+                watermark = db.get(SlaWatermark, key)
+                if watermark is not None:
+                    query = query.where(or_(
+                        Grievance.updated_at > watermark.updated_at,
+                        and_(Grievance.updated_at == watermark.updated_at, Grievance.id > watermark.grievance_id),
+                    ))
+                rows = db.execute(query.order_by(Grievance.updated_at, Grievance.id).limit(batch_size)).all()
+                if not rows:
+                    break
+
+                # Rows under a more specific rule with another limit belong to that threshold
+                overdue = [r for r in rows if rules.hours_for(status, r.dept_id, r.category) == hours]
+                escalated, notifications = _escalate(db, status, hours, overdue, now)
+                _advance_watermark(db, key, rows[-1].updated_at, rows[-1].id)
+                db.commit()
+
+                report.scanned += len(rows)
+                report.escalated += escalated
+                report.notifications += notifications
+                if len(rows) < batch_size:
+                    break
+
+    if report.escalated:
+        logger.info("Escalated %d overdue grievances (%d notifications)", report.escalated, report.notifications)
+    return report
@@ -0,0 +1,232 @@
+"""
+Orphan file garbage collection for MEDIA_ROOT.
+
+Files end up orphaned when an upload request fails half-way (after the file
+is written, before its `file_uploads` row commits), a file row is deleted but
+the unlink fails, or a grievance is deleted. The collector walks MEDIA_ROOT in
+path order, in fixed-size batches, and resolves each batch against the
+`file_uploads` and `grievances` tables with one indexed lookup. Each
+directory is listed once and sorted, so memory is bounded by the largest
+single directory (its entries, not their contents), not by the whole tree.
+
+Orphans are moved to MEDIA_ROOT/.quarantine by default (GC_QUARANTINE) rather
+than deleted; empty it once nothing is missed. A run that reaches its time
+budget saves the last path it finished in MEDIA_ROOT/.gc_cursor and the next
+run resumes after it; a run that reaches the end starts over next time.
+"""
+import logging
+import os
+import time
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.storage import MEDIA_ROOT
+from app.models.file_upload import FileUpload
+from app.models.grievance import Grievance
+
+logger = logging.getLogger(__name__)
+
+QUARANTINE_DIRNAME = ".quarantine"
+CURSOR_FILENAME = ".gc_cursor"
+
+
+@dataclass
+class GCReport:
+    """Summary of a single garbage collection run."""
+    scanned: int = 0
+    skipped_recent: int = 0
+    referenced: int = 0
+    orphaned: int = 0
+    removed: int = 0
+    quarantined: int = 0
+    reclaimed_bytes: int = 0
+    errors: int = 0
+    batches: int = 0
+    complete: bool = True
+    dry_run: bool = False
+    resumed_from: Optional[str] = None
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def _sorted_entries(directory: str, after: Optional[str]) -> List[os.DirEntry]:
+    """Entries of `directory` named after `after`, in name order, from a single listing."""
+    try:
+        with os.scandir(directory) as it:
+            entries = [e for e in it if after is None or e.name > after]
+    except FileNotFoundError:
+        return []
+    entries.sort(key=lambda e: e.name)
+    return entries
+
+
+def _walk(directory: str, resume: Tuple[str, ...]) -> Iterator[os.DirEntry]:
+    """Regular files below `directory` in path order, strictly after the relative path `resume`."""
+    after = None
+    if resume:
+        after = resume[0]
+        if len(resume) > 1:
+            yield from _walk(os.path.join(directory, after), resume[1:])
+    for entry in _sorted_entries(directory, after):
+        if entry.name in (QUARANTINE_DIRNAME, CURSOR_FILENAME):
+            continue
+        if entry.is_dir(follow_symlinks=False):
+            yield from _walk(entry.path, ())
+        elif entry.is_file(follow_symlinks=False):
+            yield entry
+
+
+def iter_file_batches(
+    root: Path, batch_size: int, resume_after: Optional[str] = None
+) -> Iterator[List[os.DirEntry]]:
+    """
+    Yield batches of regular files below `root` in path order, starting after
+    the relative path `resume_after`. Each directory is scanned once; only
+    the directories on the current path are held in memory.
+    """
+    resume = Path(resume_after).parts if resume_after else ()
+    batch: List[os.DirEntry] = []
+    for entry in _walk(str(root), resume):
+        batch.append(entry)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def read_cursor(root: Path) -> Optional[str]:
+    """The relative path an interrupted run finished at, if any."""
+    try:
+        return (Path(root) / CURSOR_FILENAME).read_text().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def write_cursor(root: Path, cursor: Optional[str]) -> None:
+    """Save where to resume (atomically), or clear it with None."""
+    path = Path(root) / CURSOR_FILENAME
+    if cursor is None:
+        path.unlink(missing_ok=True)
+        return
+    tmp = path.with_name(CURSOR_FILENAME + ".tmp")
+    tmp.write_text(cursor)
+    os.replace(tmp, path)
+
+
+def find_referenced(db: Session, root: Path, paths: List[str]) -> Set[str]:
+    """
+    Return the subset of absolute `paths` referenced by file metadata.
+    Grievance attachments may be stored relative to MEDIA_ROOT, so both
+    forms are looked up.
+    """
+    if not paths:
+        return set()
+    relative = {}
+    for path in paths:
+        try:
+            relative[os.path.relpath(path, root)] = path
+        except ValueError:
+            continue
+
+    referenced = set(
+        db.execute(select(FileUpload.file_path).where(FileUpload.file_path.in_(paths))).scalars()
+    )
+    candidates = paths + list(relative)
+    for value in db.execute(
+        select(Grievance.attachment_path).where(Grievance.attachment_path.in_(candidates))
+    ).scalars():
+        referenced.add(relative.get(value, value))
+    return referenced
+
+
+def _quarantine(entry: os.DirEntry, root: Path) -> None:
+    target = root / QUARANTINE_DIRNAME / os.path.relpath(entry.path, root)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(entry.path, target)
+
+
+def collect_orphans(
+    db: Session,
+    root: Path = MEDIA_ROOT,
+    grace_period: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    max_runtime: Optional[float] = None,
+    quarantine: Optional[bool] = None,
+    dry_run: bool = False,
+) -> GCReport:
+    """
+    Remove (or quarantine) files under `root` that no metadata points at.
+
+    Files modified within `grace_period` seconds are never touched, which
+    protects uploads whose metadata has not been committed yet. The run stops
+    after `max_runtime` seconds; `report.complete` is False in that case and
+    the cursor file makes the next run continue after the last finished batch.
+    Dry runs neither read nor move the cursor.
+    """
+    root = Path(root).resolve()
+    grace_period = settings.GC_GRACE_PERIOD_SECONDS if grace_period is None else grace_period
+    batch_size = batch_size or settings.GC_BATCH_SIZE
+    max_runtime = settings.GC_MAX_RUNTIME_SECONDS if max_runtime is None else max_runtime
+    quarantine = settings.GC_QUARANTINE if quarantine is None else quarantine
+
+    report = GCReport(dry_run=dry_run, resumed_from=None if dry_run else read_cursor(root))
+    cutoff = time.time() - grace_period
+    deadline = time.monotonic() + max_runtime
+    finished = report.resumed_from
+
+    for batch in iter_file_batches(root, batch_size, resume_after=report.resumed_from):
+        if time.monotonic() > deadline:
+            report.complete = False
+            break
+        report.batches += 1
+        report.scanned += len(batch)
+
+        candidates = {}
+        for entry in batch:
+            try:
+                stat = entry.stat(follow_symlinks=False)
+            except FileNotFoundError:
+                continue
+            if stat.st_mtime > cutoff:
+                report.skipped_recent += 1
+                continue
+            candidates[entry.path] = (entry, stat.st_size)
+
+        referenced = find_referenced(db, root, list(candidates))
+        report.referenced += len(referenced)
+
+        for path, (entry, size) in candidates.items():
+            if path in referenced:
+                continue
+            report.orphaned += 1
+            if dry_run:
+                report.reclaimed_bytes += size
+                continue
+            try:
+                if quarantine:
+                    _quarantine(entry, root)
+                    report.quarantined += 1
+                else:
+                    os.unlink(path)
+                    report.removed += 1
+                report.reclaimed_bytes += size
+            except OSError as e:
+                report.errors += 1
+                logger.warning("Failed to collect orphan file %s: %s", path, e)
+        finished = os.path.relpath(batch[-1].path, root)
+
+    if not dry_run:
+        write_cursor(root, None if report.complete else finished)
+
+    logger.info(
+        "Orphan GC finished: scanned=%d orphaned=%d reclaimed=%d bytes complete=%s",
+        report.scanned, report.orphaned, report.reclaimed_bytes, report.complete,
+    )
+    return report
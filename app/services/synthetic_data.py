@@ -0,0 +1,490 @@
+"""
+Synthetic data for load testing: users, departments, handlers, grievances
+with their audit trails, and attachment metadata, at millions of rows.
+
+Rows are generated in chunks of `chunk_size` grievances (or users), each
+from its own numpy generator seeded with (seed, table, chunk), so a chunk's
+rows depend only on the plan and never on how many worker processes built
+them. Workers generate chunks in parallel while the main process loads
+them in order, one transaction per chunk:
+
+- PostgreSQL: `COPY ... FROM STDIN` (CSV) through the psycopg connection;
+- SQLite: one DBAPI executemany per table with pre-formatted values, and
+  `PRAGMA synchronous=OFF` on the loading connection;
+- anything else: Core `insert()` executemany.
+
+The shape is meant to look like a real portal, not uniform noise:
+
+- departments get Zipf-like shares of grievances, and categories within a
+  department too;
+- a few students file many grievances (power-law), most file one or two;
+- grievances are submitted over the last `days` days, mostly in working
+  hours; the older a grievance, the further along it is (resolved/closed),
+  with a tail of old ones still open, which is what the SLA scan looks for;
+- in-progress and later grievances have a handler of their department;
+- each grievance has a "created" audit row and one "status_changed" row per
+  step it went through, spaced between created_at and updated_at;
+- `attachment_rate` of the grievances carry an attachment with a
+  `file_uploads` row (metadata only, no file on disk).
+
+All users share one password hash (bcrypt per row would dominate the run);
+their password is SYNTHETIC_PASSWORD.
+
+User and grievance ids are assigned here, above the current maxima, so
+audits and attachments can reference them without reading anything back;
+rerunning against the same database appends another data set.
+"""
+import csv
+import io
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field, replace
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import DateTime, func, insert, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.core.security import get_password_hash
+from app.models.audit import Audit
+from app.models.department import Department
+from app.models.file_upload import FileUpload
+from app.models.grievance import Grievance
+from app.models.handler import Handler
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+SYNTHETIC_PASSWORD = "loadtest123"
+EMAIL_DOMAIN = "load.example.edu"
+
+# (department, its categories), most to least busy
+DEPARTMENTS: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ("Academic Affairs", ("grading", "timetable", "course registration", "attendance")),
+    ("Student Services", ("hostel", "canteen", "transport", "counselling")),
+    ("Infrastructure", ("wifi", "classroom", "maintenance", "electricity")),
+    ("Finance", ("fees", "scholarship", "refund")),
+    ("Examinations", ("revaluation", "hall ticket", "results")),
+    ("Admissions", ("admission", "transfer", "documents")),
+    ("Library", ("books", "library access", "fines")),
+    ("IT Services", ("email account", "student portal", "software licences")),
+)
+# Lifecycle order; a grievance at stage k went through stages 0..k
+STAGES = ("submitted", "under_review", "in_progress", "resolved", "closed")
+ASSIGNED_FROM = STAGES.index("in_progress")
+RESOLVED_FROM = STAGES.index("resolved")
+# Share of submissions per hour of day (UTC), peaking in working hours
+HOURLY = np.array([1, 1, 1, 1, 1, 2, 3, 5, 8, 10, 10, 9, 8, 9, 10, 9, 8, 6, 5, 4, 3, 3, 2, 1], dtype=float)
+TITLES = ("{} issue", "Problem with {}", "{} request pending", "Complaint about {}", "{} not resolved")
+OPENINGS = (
+    "I am writing about a {} problem.",
+    "There is an ongoing issue with {}.",
+    "My {} request has not been handled.",
+)
+SENTENCES = (
+    "It has been going on for several weeks.",
+    "Nobody from the office has replied yet.",
+    "Please look into this as soon as possible.",
+    "This affects several students in my year.",
+    "I already raised this at the front desk.",
+    "The deadline is approaching and I need this sorted out.",
+    "I have attached the relevant documents.",
+    "The same thing happened last semester.",
+)
+RESOLUTIONS = (
+    "Issue fixed and verified with the student.",
+    "Request processed; the record has been updated.",
+    "Forwarded to the responsible office, which resolved it.",
+    "Explained the policy to the student; no further action needed.",
+)
+ATTACHMENTS = (
+    ("pdf", "application/pdf"),
+    ("jpg", "image/jpeg"),
+    ("png", "image/png"),
+    ("docx", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"),
+)
+US_PER_DAY = 86_400_000_000
+US_PER_HOUR = 3_600_000_000
+_TABLE_CODES = {"users": 1, "grievances": 2}
+
+
+@dataclass(frozen=True)
+class SyntheticPlan:
+    """What to generate; `dept_ids`, the id offsets and `password_hash` are filled in by `load`."""
+
+    users: int = 10_000
+    grievances: int = 100_000
+    handlers: int = 200
+    admins: int = 1
+    departments: int = len(DEPARTMENTS)
+    days: int = 365
+    attachment_rate: float = 0.2
+    seed: int = 42
+    chunk_size: int = 50_000
+    # Microseconds since the epoch that "now" is, so the same seed gives the same timestamps
+    now_us: int = 0
+    user_offset: int = 0
+    grievance_offset: int = 0
+    dept_ids: Tuple[int, ...] = ()
+    password_hash: str = ""
+
+    def validate(self) -> None:
+        if self.users < self.admins + self.handlers + 1:
+            raise ValueError("users must leave room for admins, handlers and at least one student")
+        if not 1 <= self.departments <= len(DEPARTMENTS):
+            raise ValueError(f"departments must be between 1 and {len(DEPARTMENTS)}")
+        if self.days < 1 or self.chunk_size < 1 or not 0 <= self.attachment_rate <= 1:
+            raise ValueError("days and chunk_size must be positive and attachment_rate within [0, 1]")
+
+    @property
+    def first_handler(self) -> int:
+        return self.user_offset + self.admins + 1
+
+    @property
+    def first_student(self) -> int:
+        return self.first_handler + self.handlers
+
+    @property
+    def students(self) -> int:
+        return self.users - self.admins - self.handlers
+
+    def chunks(self, table: str) -> List[int]:
+        total = self.users if table == "users" else self.grievances
+        return list(range((total + self.chunk_size - 1) // self.chunk_size))
+
+
+# table -> column -> values (numpy array, or list where NULLs occur)
+Chunk = Dict[str, Dict[str, object]]
+
+
+def _rng(plan: SyntheticPlan, table: str, index: int) -> np.random.Generator:
+    return np.random.default_rng([plan.seed, _TABLE_CODES[table], index])
+
+
+def _zipf_weights(n: int, exponent: float) -> np.ndarray:
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return weights / weights.sum()
+
+
+def generate_users(plan: SyntheticPlan, index: int) -> Chunk:
+    """Users of chunk `index`: the admins first, then the handlers (staff), then students."""
+    start = index * plan.chunk_size
+    stop = min(start + plan.chunk_size, plan.users)
+    ids = np.arange(start, stop, dtype=np.int64) + plan.user_offset + 1
+    rng = _rng(plan, "users", index)
+    emails = []
+    for user_id in ids.tolist():
+        if user_id < plan.first_handler:
+            emails.append(f"admin{user_id}@{EMAIL_DOMAIN}")
+        elif user_id < plan.first_student:
+            emails.append(f"staff{user_id}@{EMAIL_DOMAIN}")
+        else:
+            emails.append(f"student{user_id}@{EMAIL_DOMAIN}")
+    return {"users": {
+        "id": ids,
+        "email": emails,
+        "hashed_password": [plan.password_hash] * len(ids),
+        # A few students have left
+        "is_active": (ids < plan.first_student) | (rng.random(len(ids)) >= 0.02),
+        "is_admin": ids < plan.first_handler,
+    }}
+
+
+def _handlers_for(plan: SyntheticPlan, dept_index: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """A random handler of each grievance's department (handlers are dealt to departments in turn), or 0."""
+    d = plan.departments
+    per_dept = (plan.handlers - np.arange(d) + d - 1) // d
+    available = per_dept[dept_index]
+    pick = np.floor(rng.random(len(dept_index)) * np.maximum(available, 1)).astype(np.int64)
+    handler = plan.first_handler + dept_index + pick * d
+    return np.where(available > 0, handler, 0)
+
+
+def _format_text(template_index: np.ndarray, templates: Sequence[str], words: Sequence[str]) -> List[str]:
+    return [templates[t].format(w) for t, w in zip(template_index.tolist(), words)]
+
+
+def generate_grievances(plan: SyntheticPlan, index: int) -> Chunk:
+    """Grievances of chunk `index`, with their audit rows and attachment metadata."""
+    start = index * plan.chunk_size
+    stop = min(start + plan.chunk_size, plan.grievances)
+    n = stop - start
+    rng = _rng(plan, "grievances", index)
+    ids = np.arange(start, stop, dtype=np.int64) + plan.grievance_offset + 1
+
+    # Where: department, then a category of it
+    dept_index = rng.choice(plan.departments, size=n, p=_zipf_weights(plan.departments, 0.8))
+    categories = np.empty(n, dtype=object)
+    for d in range(plan.departments):
+        mask = dept_index == d
+        names = DEPARTMENTS[d][1]
+        categories[mask] = np.array(names, dtype=object)[
+            rng.choice(len(names), size=int(mask.sum()), p=_zipf_weights(len(names), 1.0))
+        ]
+    students = plan.first_student + np.floor(plan.students * rng.power(0.8, n)).astype(np.int64)
+    students = np.minimum(students, plan.first_student + plan.students - 1)
+
+    # When: a day in the window, an hour weighted towards working hours
+    day = rng.integers(0, plan.days, n)
+    hour = rng.choice(24, size=n, p=HOURLY / HOURLY.sum())
+    today = plan.now_us - plan.now_us % US_PER_DAY
+    created = today - day * US_PER_DAY + hour * US_PER_HOUR + rng.integers(0, US_PER_HOUR, n)
+    created = np.where(created > plan.now_us, created - US_PER_DAY, created)
+    age_days = (plan.now_us - created) / US_PER_DAY
+
+    # How far along: mostly a function of age, plus a tail of old grievances left open
+    expected = (len(STAGES) - 1) * np.minimum(age_days / 21, 1)
+    stage = np.clip(np.rint(rng.normal(expected, 0.8)), 0, len(STAGES) - 1).astype(np.int64)
+    stuck = rng.random(n) < 0.05
+    stage = np.where(stuck, rng.integers(0, ASSIGNED_FROM + 1, n), stage)
+    span = ((plan.now_us - created) * rng.beta(2, 5, n)).astype(np.int64)
+    updated = np.where(stage > 0, created + span, created)
+
+    handler = np.where(stage >= ASSIGNED_FROM, _handlers_for(plan, dept_index, rng), 0)
+    has_attachment = rng.random(n) < plan.attachment_rate
+    kind = rng.integers(0, len(ATTACHMENTS), n)
+    category_list = categories.tolist()
+    attachment_paths = [
+        f"synthetic/user_{s}_{g}.{ATTACHMENTS[k][0]}" if a else None
+        for s, g, k, a in zip(students.tolist(), ids.tolist(), kind.tolist(), has_attachment.tolist())
+    ]
+    resolution_index = rng.integers(0, len(RESOLUTIONS), n)
+    descriptions = []
+    openings = _format_text(rng.integers(0, len(OPENINGS), n), OPENINGS, category_list)
+    extra = rng.integers(1, 4, n)
+    picks = rng.integers(0, len(SENTENCES), (n, 3))
+    for opening, k, row in zip(openings, extra.tolist(), picks.tolist()):
+        descriptions.append(" ".join([opening] + [SENTENCES[i] for i in row[:k]]))
+
+    grievances = {
+        "id": ids,
+        "student_id": students,
+        "dept_id": np.asarray(plan.dept_ids, dtype=np.int64)[dept_index],
+        "title": [
+            title[0].upper() + title[1:]
+            for title in _format_text(rng.integers(0, len(TITLES), n), TITLES, category_list)
+        ],
+        "category": category_list,
+        "description": descriptions,
+        "attachment_path": attachment_paths,
+        "status": [STAGES[s] for s in stage.tolist()],
+        "handler_id": [h or None for h in handler.tolist()],
+        "resolution": [
+            RESOLUTIONS[r] if s >= RESOLVED_FROM else None
+            for r, s in zip(resolution_index.tolist(), stage.tolist())
+        ],
+        "created_at": created,
+        "updated_at": updated,
+    }
+
+    # Audit trail: "created" then one row per step, evenly spaced up to updated_at
+    steps = stage + 1
+    first_row = np.cumsum(steps) - steps
+    owner = np.repeat(np.arange(n), steps)
+    step = np.arange(int(steps.sum())) - first_row[owner]
+    fraction = step / np.maximum(stage[owner], 1)
+    actor = np.where(handler[owner] > 0, handler[owner], plan.user_offset + 1)
+    audits = {
+        "grievance_id": ids[owner],
+        "action": np.where(step == 0, "created", "status_changed").astype(object).tolist(),
+        "performed_by": np.where(step == 0, students[owner], actor),
+        "remarks": [f"{STAGES[s - 1]} -> {STAGES[s]}" if s else None for s in step.tolist()],
+        "timestamp": created[owner] + (span[owner] * fraction).astype(np.int64),
+    }
+
+    attached = np.flatnonzero(has_attachment)
+    files = {
+        "filename": [f"evidence_{ids[i]}.{ATTACHMENTS[kind[i]][0]}" for i in attached.tolist()],
+        "file_path": [attachment_paths[i] for i in attached.tolist()],
+        "content_type": [ATTACHMENTS[kind[i]][1] for i in attached.tolist()],
+        "file_size": np.clip(rng.lognormal(12, 1.2, len(attached)), 1_000, 10_000_000).astype(np.int64),
+        "user_id": students[attached],
+        "created_at": created[attached],
+    }
+    return {"grievances": grievances, "audits": audits, "file_uploads": files}
+
+
+GENERATORS = {"users": generate_users, "grievances": generate_grievances}
+
+
+def _generate(args: Tuple[SyntheticPlan, str, int]) -> Chunk:
+    plan, table, index = args
+    return GENERATORS[table](plan, index)
+
+
+def generate(plan: SyntheticPlan, table: str, workers: int = 1) -> Iterator[Chunk]:
+    """The chunks of `table` in order, built by `workers` processes (a few chunks ahead of the consumer)."""
+    tasks = [(plan, table, index) for index in plan.chunks(table)]
+    if workers <= 1 or len(tasks) <= 1:
+        for task in tasks:
+            yield _generate(task)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        ahead = 2 * workers
+        pending = [pool.submit(_generate, task) for task in tasks[:ahead]]
+        for next_task in tasks[ahead:] + [None] * ahead:
+            if not pending:
+                break
+            chunk = pending.pop(0).result()
+            if next_task is not None:
+                pending.append(pool.submit(_generate, next_task))
+            yield chunk
+
+
+# Loading
+
+TABLES = {"users": User.__table__, "grievances": Grievance.__table__,
+          "audits": Audit.__table__, "file_uploads": FileUpload.__table__}
+
+
+def _timestamps(values: np.ndarray, suffix: str = "") -> List[str]:
+    """Microseconds since the epoch as SQLAlchemy's SQLite DATETIME text (or Postgres with `suffix`)."""
+    text_values = np.datetime_as_string(np.asarray(values, dtype="datetime64[us]"), unit="us")
+    return [v.replace("T", " ") + suffix for v in text_values.tolist()]
+
+
+def _columns(table_name: str, columns: Dict[str, object], dialect: str) -> Tuple[List[str], List[list]]:
+    """Column names and per-column value lists in the form the dialect's loader takes."""
+    table = TABLES[table_name]
+    names, values = [], []
+    for name, column in columns.items():
+        if isinstance(table.c[name].type, DateTime):
+            if dialect == "sqlite":
+                column = _timestamps(column)
+            elif dialect == "postgresql":
+                column = _timestamps(column, "+00")
+            else:
+                column = [datetime.fromtimestamp(us / 1e6, timezone.utc) for us in np.asarray(column).tolist()]
+        elif isinstance(column, np.ndarray):
+            column = column.tolist()
+            if column and isinstance(column[0], bool) and dialect == "postgresql":
+                column = ["t" if v else "f" for v in column]
+        names.append(name)
+        values.append(column)
+    return names, values
+
+
+def _copy(conn: Connection, table_name: str, names: List[str], values: List[list]) -> None:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(zip(*values))
+    buffer.seek(0)
+    statement = f"COPY {table_name} ({', '.join(names)}) FROM STDIN WITH (FORMAT csv)"
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        if hasattr(cursor, "copy_expert"):  # psycopg2
+            cursor.copy_expert(statement, buffer)
+        else:  # psycopg 3
+            with cursor.copy(statement) as copy:
+                copy.write(buffer.getvalue())
+    finally:
+        cursor.close()
+
+
+def _write(conn: Connection, table_name: str, columns: Dict[str, object]) -> int:
+    dialect = conn.dialect.name
+    names, values = _columns(table_name, columns, dialect)
+    rows = len(values[0]) if values else 0
+    if not rows:
+        return 0
+    if dialect == "postgresql":
+        _copy(conn, table_name, names, values)
+    elif dialect == "sqlite":
+        placeholders = ", ".join("?" * len(names))
+        conn.exec_driver_sql(
+            f"INSERT INTO {table_name} ({', '.join(names)}) VALUES ({placeholders})", list(zip(*values))
+        )
+    else:
+        conn.execute(insert(TABLES[table_name]), [dict(zip(names, row)) for row in zip(*values)])
+    return rows
+
+
+@dataclass
+class SyntheticDataReport:
+    seed: int
+    rows: Dict[str, int] = field(default_factory=dict)
+    seconds: float = 0.0
+    rows_per_sec: float = 0.0
+    grievances_per_sec: float = 0.0
+    user_ids: Tuple[int, int] = (0, 0)
+    grievance_ids: Tuple[int, int] = (0, 0)
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def _departments(conn: Connection, count: int) -> Tuple[Tuple[int, ...], int]:
+    """Ids of the first `count` catalogue departments, creating missing ones."""
+    names = [name for name, _ in DEPARTMENTS[:count]]
+    existing = dict(conn.execute(select(Department.name, Department.id).where(Department.name.in_(names))).all())
+    missing = [{"name": name} for name in names if name not in existing]
+    if missing:
+        conn.execute(insert(Department), missing)
+        existing = dict(conn.execute(select(Department.name, Department.id).where(Department.name.in_(names))).all())
+    return tuple(existing[name] for name in names), len(missing)
+
+
+def _max_id(conn: Connection, column) -> int:
+    return conn.execute(select(func.coalesce(func.max(column), 0))).scalar_one()
+
+
+def _reset_sequences(conn: Connection) -> None:
+    """Explicit ids bypass Postgres sequences; move them past the loaded rows."""
+    for table in ("users", "grievances"):
+        conn.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT max(id) FROM {table}))"
+        ))
+
+
+def load(engine: Engine, plan: SyntheticPlan, workers: Optional[int] = None) -> SyntheticDataReport:
+    """Generate `plan` and load it into `engine`'s database; the tables must exist."""
+    plan.validate()
+    workers = workers if workers is not None else (os.cpu_count() or 1)
+    started = time.perf_counter()
+    report = SyntheticDataReport(seed=plan.seed, rows={name: 0 for name in ("departments", "handlers", *TABLES)})
+
+    with engine.begin() as conn:
+        dept_ids, created = _departments(conn, plan.departments)
+        plan = replace(
+            plan,
+            now_us=plan.now_us or int(datetime.now(timezone.utc).timestamp() * 1_000_000),
+            user_offset=_max_id(conn, User.id),
+            grievance_offset=_max_id(conn, Grievance.id),
+            dept_ids=dept_ids,
+            password_hash=plan.password_hash or get_password_hash(SYNTHETIC_PASSWORD),
+        )
+    report.rows["departments"] = created
+    report.user_ids = (plan.user_offset + 1, plan.user_offset + plan.users)
+    report.grievance_ids = (plan.grievance_offset + 1, plan.grievance_offset + plan.grievances)
+
+    with engine.connect() as conn:
+        if conn.dialect.name == "sqlite":
+            # Durability is pointless for throwaway data; this connection only
+            conn.exec_driver_sql("PRAGMA synchronous=OFF")
+            conn.commit()
+        for table in ("users", "grievances"):
+            for chunk in generate(plan, table, workers):
+                with conn.begin():
+                    for table_name, columns in chunk.items():
+                        report.rows[table_name] += _write(conn, table_name, columns)
+                logger.info("Loaded %d of %d %s", report.rows[table], getattr(plan, table), table)
+            if table == "users":
+                with conn.begin():
+                    handlers = [
+                        {"user_id": plan.first_handler + i, "dept_id": dept_ids[i % plan.departments], "is_active": True}
+                        for i in range(plan.handlers)
+                    ]
+                    if handlers:
+                        conn.execute(insert(Handler), handlers)
+                    report.rows["handlers"] = len(handlers)
+        if conn.dialect.name == "postgresql":
+            with conn.begin():
+                _reset_sequences(conn)
+
+    report.seconds = round(time.perf_counter() - started, 3)
+    if report.seconds:
+        report.rows_per_sec = round(sum(report.rows.values()) / report.seconds, 1)
+        report.grievances_per_sec = round(report.rows["grievances"] / report.seconds, 1)
+    return report
@@ -0,0 +1 @@
+"""Background worker processes (run separately from the web tier)."""
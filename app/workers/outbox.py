@@ -0,0 +1,79 @@
+"""
+Notification outbox worker.
+Failed-email retries run on their own thread so slow SMTP retries never
+delay new notifications.
+Run: python -m app.workers.outbox
+"""
+import argparse
+import logging
+import signal
+import threading
+
+from app.core.config import settings
+from app.core.logging_setup import setup_logging
+from app.db.upgrade import upgrade_schema
+from app.db.session import SessionLocal, engine
+from app.services import email_retry
+from app.services.digest import coalescer
+from app.services.outbox import process_batch
+
+logger = logging.getLogger(__name__)
+
+
+def run(stop: threading.Event, batch_size: int, poll_interval: float) -> None:
+    """Drain the outbox until `stop` is set, sleeping only when it is empty."""
+    while not stop.is_set():
+        db = SessionLocal()
+        try:
+            claimed = process_batch(db, batch_size)
+            coalescer.flush_due()
+        except Exception:
+            logger.exception("Outbox batch failed")
+            db.rollback()
+            claimed = 0
+        finally:
+            db.close()
+        if claimed < batch_size:
+            stop.wait(poll_interval)
+
+
+def run_retries(stop: threading.Event, poll_interval: float) -> None:
+    """Retry failed emails until `stop` is set, sleeping only when none are due."""
+    while not stop.is_set():
+        db = SessionLocal()
+        try:
+            retried = email_retry.process_due(db)
+        except Exception:
+            logger.exception("Email retry tick failed")
+            db.rollback()
+            retried = 0
+        finally:
+            db.close()
+        if retried < settings.EMAIL_RETRY_BATCH_SIZE:
+            stop.wait(poll_interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deliver queued notifications from the outbox")
+    parser.add_argument("--batch-size", type=int, default=settings.OUTBOX_BATCH_SIZE)
+    parser.add_argument("--poll-interval", type=float, default=settings.OUTBOX_POLL_INTERVAL)
+    args = parser.parse_args()
+
+    setup_logging()
+    upgrade_schema(engine)
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    retries = threading.Thread(
+        target=run_retries, args=(stop, settings.EMAIL_RETRY_POLL_INTERVAL), name="email-retries", daemon=True
+    )
+    retries.start()
+    logger.info("Outbox worker started (batch_size=%d)", args.batch_size)
+    run(stop, args.batch_size, args.poll_interval)
+    retries.join()
+    logger.info("Outbox worker stopped")
+
+
+if __name__ == "__main__":
+    main()
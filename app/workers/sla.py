@@ -0,0 +1,56 @@
+"""
+SLA escalation scheduler.
+Run: python -m app.workers.sla
+"""
+import argparse
+import logging
+import signal
+import threading
+import time
+
+from app.core.config import settings
+from app.core.logging_setup import setup_logging
+from app.db.upgrade import upgrade_schema
+from app.db.session import SessionLocal, engine
+from app.services.sla import scan_overdue
+
+logger = logging.getLogger(__name__)
+
+
+def run(stop: threading.Event, tick: float, batch_size: int) -> None:
+    """Scan for newly overdue grievances every `tick` seconds until `stop` is set."""
+    while not stop.is_set():
+        started = time.monotonic()
+        db = SessionLocal()
+        try:
+            # Leave headroom so a large backlog is worked off over several ticks
+            report = scan_overdue(db, batch_size=batch_size, max_runtime=tick * 0.8)
+            if not report.complete:
+                logger.warning("SLA scan hit the time limit after %d rows; continuing next tick", report.scanned)
+        except Exception:
+            logger.exception("SLA scan failed")
+            db.rollback()
+        finally:
+            db.close()
+        stop.wait(max(tick - (time.monotonic() - started), 0))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Escalate grievances that breached their SLA")
+    parser.add_argument("--tick", type=float, default=settings.SLA_TICK_SECONDS)
+    parser.add_argument("--batch-size", type=int, default=settings.SLA_SCAN_BATCH_SIZE)
+    args = parser.parse_args()
+
+    setup_logging()
+    upgrade_schema(engine)
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    logger.info("SLA scheduler started (tick=%ss)", args.tick)
+    run(stop, args.tick, args.batch_size)
+    logger.info("SLA scheduler stopped")
+
+
+if __name__ == "__main__":
+    main()
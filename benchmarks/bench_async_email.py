@@ -0,0 +1,92 @@
+"""
+Email throughput: threadpool + sync pool (current send_email_async path)
+vs the asyncio sender, both limited to the same number of SMTP sessions.
+
+Besides messages/second, `worker_threads` shows how many threadpool threads
+each approach held while sending; those threads are shared with every sync
+endpoint in the web worker. Pass --sink-host/--sink-port to target a sink
+running in another process (python -m benchmarks.smtp_sink), otherwise the
+in-process sink competes with the client for the GIL.
+Run:
+  python -m benchmarks.bench_async_email --messages 1000 --concurrency 10 --message-delay 0.005
+"""
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.email import AsyncEmailSender, SMTPConnectionPool, build_message
+from benchmarks.smtp_sink import SMTPSink
+
+
+def _messages(n: int):
+    return [(f"student{i}@example.com", f"Grievance Status Update {i}", "body") for i in range(n)]
+
+
+async def _threadpool(host: str, port: int, messages, concurrency: int, threads: int) -> float:
+    # What BackgroundTasks does today: each send occupies a threadpool thread
+    pool = SMTPConnectionPool(host, port, max_size=concurrency)
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            loop.run_in_executor(executor, pool.send_message, build_message(*m)) for m in messages
+        ))
+        elapsed = time.perf_counter() - start
+    pool.close()
+    return elapsed
+
+
+async def _asyncio(host: str, port: int, messages, concurrency: int) -> float:
+    sender = AsyncEmailSender(host, port, max_concurrency=concurrency)
+    start = time.perf_counter()
+    results = await sender.send_many(messages)
+    elapsed = time.perf_counter() - start
+    await sender.close()
+    assert all(results), "async sends failed"
+    return elapsed
+
+
+async def _run_all(host: str, port: int, args) -> dict:
+    messages = _messages(args.messages)
+    results = {}
+    for name, run, threads in (
+        ("threadpool", lambda: _threadpool(host, port, messages, args.concurrency, args.threads),
+         min(args.threads, args.messages)),
+        ("asyncio", lambda: _asyncio(host, port, messages, args.concurrency), 0),
+    ):
+        elapsed = await run()
+        results[name] = {
+            "seconds": round(elapsed, 4),
+            "messages_per_second": round(args.messages / elapsed, 1),
+            "worker_threads": threads,
+        }
+    return results
+
+
+async def _main(args) -> dict:
+    if args.sink_port:
+        results = await _run_all(args.sink_host, args.sink_port, args)
+    else:
+        with SMTPSink(connect_delay=args.connect_delay, message_delay=args.message_delay) as sink:
+            results = await _run_all(sink.host, sink.port, args)
+    results["params"] = vars(args)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Async vs threadpool email throughput")
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=10, help="Max concurrent SMTP sessions")
+    parser.add_argument("--threads", type=int, default=40, help="Threadpool size (anyio default is 40)")
+    parser.add_argument("--connect-delay", type=float, default=0.02)
+    parser.add_argument("--message-delay", type=float, default=0.005)
+    parser.add_argument("--sink-host", default="127.0.0.1")
+    parser.add_argument("--sink-port", type=int, default=0, help="Use an external sink instead")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(_main(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Classifier latency: GrievanceClassifier.predict() per created grievance
+(tokenize, hash, tf-idf, both softmax heads) and predict_batch() throughput
+for the reclassification path, on a synthetic corpus with `--categories`
+categories spread over `--departments` departments. Training time and
+holdout accuracy are reported too.
+Run:
+  python -m benchmarks.bench_classifier --train 20000 --queries 2000
+"""
+import argparse
+import json
+import random
+import time
+
+from app.services.classifier import GrievanceClassifier
+from benchmarks.bench_dedup import vocabulary
+from benchmarks.stats import latency_summary
+
+
+def corpus(rng: random.Random, n: int, topics: list) -> list:
+    """(text, category, dept_id): topic words mixed with noise, as free text is."""
+    rows = []
+    for _ in range(n):
+        category, dept_id, words = rng.choice(topics)
+        noise = rng.choices(topics[0][2] + topics[-1][2], k=rng.randint(2, 6))
+        text = " ".join(rng.choices(words, k=rng.randint(8, 30)) + noise)
+        rows.append((text, category, dept_id))
+    return rows
+
+
+def run_benchmark(train: int = 20000, queries: int = 2000, categories: int = 20, departments: int = 8,
+                  batch_size: int = 1000, seed: int = 7) -> dict:
+    rng = random.Random(seed)
+    words = vocabulary(rng)
+    topics = [(f"category-{i}", i % departments + 1, rng.sample(words, 40)) for i in range(categories)]
+    rows = corpus(rng, train, topics)
+    held_out = corpus(rng, queries, topics)
+
+    started = time.perf_counter()
+    model = GrievanceClassifier().fit([t for t, _, _ in rows], [c for _, c, _ in rows], [d for *_, d in rows])
+    train_seconds = time.perf_counter() - started
+
+    latencies, correct = [], 0
+    for text, category, _ in held_out:
+        started = time.perf_counter()
+        suggestion = model.predict(None, text)
+        latencies.append(time.perf_counter() - started)
+        correct += suggestion.category == category
+
+    texts = [t for t, _, _ in held_out]
+    started = time.perf_counter()
+    for start in range(0, len(texts), batch_size):
+        model.predict_batch(texts[start:start + batch_size])
+    batch_seconds = time.perf_counter() - started
+
+    return {
+        "train_examples": train,
+        "train_seconds": round(train_seconds, 3),
+        "queries": queries,
+        "predict_latency_ms": latency_summary(latencies),
+        "category_accuracy": round(correct / queries, 3) if queries else None,
+        "batch_predictions_per_sec": round(queries / batch_seconds, 1) if batch_seconds else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grievance classifier latency benchmark")
+    parser.add_argument("--train", type=int, default=20000, help="Synthetic grievances to train on")
+    parser.add_argument("--queries", type=int, default=2000, help="Held-out grievances to classify")
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--departments", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=1000, help="Grievances per predict_batch call")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.train, args.queries, args.categories, args.departments, args.batch_size, args.seed)
+    results["params"] = vars(args)
+
+    report = json.dumps(results, indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
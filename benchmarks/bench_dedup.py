@@ -0,0 +1,102 @@
+"""
+Duplicate detection latency: the in-memory part of DuplicateDetector.check()
+(MinHash signature, LSH lookup, index insert) per created grievance, with
+`--indexed` grievances already in the index, plus batch signing throughput
+of the backlog path (MinHasher.signatures).
+
+The corpus mixes unrelated synthetic complaints with bursts of reworded
+copies of one incident (`--burst` copies each), like a hostel outage
+producing hundreds of near-identical reports. The report is JSON with
+latency percentiles and how many burst copies were flagged.
+Run:
+  python -m benchmarks.bench_dedup --indexed 20000 --queries 2000
+"""
+import argparse
+import json
+import random
+import time
+
+from app.core.config import settings
+from app.services.dedup import LSHIndex, MinHasher
+from benchmarks.stats import latency_summary
+
+TOPICS = (
+    "hostel water supply library fees exam marks portal wifi canteen food room lab equipment bus "
+    "transport scholarship refund certificate classroom projector attendance faculty timetable"
+).split()
+INCIDENT = "The water supply in Hostel {block} has failed since morning, no water in bathrooms on floor {floor}."
+FILLERS = ["Please fix this urgently.", "This is the second time this week.", "", "Kindly look into it."]
+
+
+def vocabulary(rng: random.Random, size: int = 5000) -> list:
+    """Random words; unrelated texts then overlap about as little as real ones (~0.02)."""
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choices(letters, k=rng.randint(3, 10))) for _ in range(size)]
+
+
+def complaint(rng: random.Random, words: list) -> str:
+    return " ".join(rng.choices(TOPICS, k=2) + rng.choices(words, k=rng.randint(12, 40)))
+
+
+def reworded(rng: random.Random, block: str) -> str:
+    """A copy of one incident with small edits, as different students would write it."""
+    text = INCIDENT.format(block=block, floor=rng.randint(1, 3)) + " " + rng.choice(FILLERS)
+    return text.lower() if rng.random() < 0.5 else text
+
+
+def run_benchmark(indexed: int = 20000, queries: int = 2000, burst: int = 300, seed: int = 7) -> dict:
+    rng = random.Random(seed)
+    hasher = MinHasher()
+    index = LSHIndex(hasher.num_perm, settings.DEDUP_BANDS, settings.DEDUP_THRESHOLD)
+
+    words = vocabulary(rng)
+    corpus = [complaint(rng, words) for _ in range(indexed)]
+    started = time.perf_counter()
+    signatures = hasher.signatures(corpus)
+    batch_seconds = time.perf_counter() - started
+    for grievance_id, signature in enumerate(signatures, 1):
+        index.add(grievance_id, signature, grievance_id)
+
+    latencies, flagged, bursts = [], 0, 0
+    for n in range(queries):
+        in_burst = n % 2 == 0 and bursts < burst
+        text = reworded(rng, "B") if in_burst else complaint(rng, words)
+        bursts += in_burst
+        started = time.perf_counter()
+        signature = hasher.signature(text)
+        match = index.best_match(signature)
+        index.add(indexed + n + 1, signature, match.cluster_id if match else indexed + n + 1)
+        latencies.append(time.perf_counter() - started)
+        flagged += bool(in_burst and match)
+
+    return {
+        "indexed": indexed,
+        "queries": queries,
+        "check_latency_ms": latency_summary(latencies),
+        "burst_copies": bursts,
+        "burst_flagged": flagged,  # The first copy of the burst starts the cluster
+        "batch_signatures_per_sec": round(indexed / batch_seconds, 1) if batch_seconds else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Near-duplicate detection latency benchmark")
+    parser.add_argument("--indexed", type=int, default=20000, help="Grievances already in the index")
+    parser.add_argument("--queries", type=int, default=2000, help="Grievances created during the run")
+    parser.add_argument("--burst", type=int, default=300, help="Reworded copies of one incident among them")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.indexed, args.queries, args.burst, args.seed)
+    results["params"] = vars(args)
+
+    report = json.dumps(results, indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,403 @@
+"""
+End-to-end HTTP benchmark of the hot endpoints (login, create grievance,
+list grievances, upload, download) as a weighted mix (`--mix`) driven by
+`--concurrency` virtual users, against a database seeded with
+app.services.synthetic_data.
+
+`--mode inprocess` runs the app in this process through httpx's ASGI
+transport (no sockets: the app's own cost); `--mode uvicorn` starts
+uvicorn with `--workers` processes and goes over real HTTP (the client
+shares this process, so at high concurrency it can be the bottleneck).
+Each concurrency level runs for `--duration` seconds after `--warmup`;
+requests/s and latency percentiles are reported per endpoint.
+
+With `--baseline FILE` the results are compared with a stored run: an
+endpoint whose throughput drops, or whose p50/p99 latency grows, by more
+than `--tolerance` is a regression and the exit status is 1. Record the
+baseline with `--update-baseline` on the machine that runs the
+comparison; numbers from different hardware are not comparable.
+
+Run:
+  python -m benchmarks.bench_http --grievances 100000 --concurrency 1,8,32 --duration 10
+  python -m benchmarks.bench_http --mode uvicorn --workers 4 --baseline http-baseline.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from benchmarks.stats import latency_summary
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+MEDIA_ENV = "BENCH_HTTP_MEDIA_ROOT"
+DEFAULT_MIX = {"login": 5, "create": 20, "list": 45, "upload": 10, "download": 20}
+# Per-endpoint figures compared with a baseline, and whether a larger value is worse
+COMPARED = {"requests_per_sec": False, "p50": True, "p99": True}
+
+
+def create_app(media_root: Optional[str] = None) -> FastAPI:
+    """app.main.app storing uploads under `media_root`; uvicorn calls this (--factory) in each worker."""
+    from app.core import storage
+    from app.main import app
+
+    storage.MEDIA_ROOT = Path(media_root or os.environ[MEDIA_ENV])
+    return app
+
+
+@dataclass
+class VirtualUser:
+    user_id: int
+    email: str
+    headers: Dict[str, str]
+    file_id: int
+
+
+def prepare(database_url: str, media_root: Path, users: int, grievances: int, clients: int,
+            upload_bytes: int, seed: int, skip_seed: bool) -> dict:
+    """Seed the database (unless `skip_seed`) and register one fixture file per client student."""
+    from app.core.security import create_access_token
+    from app.db.base import Base
+    from app.models.file_upload import FileUpload
+    from app.models.user import User
+    from app.services.synthetic_data import EMAIL_DOMAIN, SyntheticPlan, load
+
+    engine = create_engine(database_url)
+    try:
+        Base.metadata.create_all(engine)
+        rows = {}
+        if not skip_seed:
+            plan = SyntheticPlan(users=users, grievances=grievances, handlers=max(min(users // 50, 200), 1),
+                                 seed=seed, chunk_size=min(grievances, 50_000) or 1)
+            rows = load(engine, plan, workers=1).rows
+        with Session(engine) as db:
+            students = db.execute(
+                select(User.id, User.email).where(User.email.like(f"student%@{EMAIL_DOMAIN}")).order_by(User.id)
+            ).all()
+            if not students:
+                raise SystemExit("No synthetic students in the database; run without --skip-seed")
+            picked = random.Random(seed).sample(students, min(clients, len(students)))
+            media_root.mkdir(parents=True, exist_ok=True)
+            payload = os.urandom(upload_bytes)
+            virtual_users = []
+            for user_id, email in picked:
+                path = media_root / f"fixture_{user_id}.pdf"
+                path.write_bytes(payload)
+                file_id = db.execute(insert(FileUpload).values(
+                    filename=path.name, file_path=str(path), content_type="application/pdf",
+                    file_size=len(payload), user_id=user_id,
+                ).returning(FileUpload.id)).scalar_one()
+                token = create_access_token(email)
+                virtual_users.append(VirtualUser(user_id, email, {"Authorization": f"Bearer {token}"}, file_id))
+            db.commit()
+    finally:
+        engine.dispose()
+    return {"rows": rows, "users": virtual_users}
+
+
+# One request of each kind; True when it got the expected status
+
+async def _login(client: httpx.AsyncClient, user: VirtualUser, rng: random.Random, payload: bytes) -> bool:
+    from app.services.synthetic_data import SYNTHETIC_PASSWORD
+
+    response = await client.post("/api/v1/auth/login", json={"email": user.email, "password": SYNTHETIC_PASSWORD})
+    return response.status_code == 200
+
+
+async def _create(client: httpx.AsyncClient, user: VirtualUser, rng: random.Random, payload: bytes) -> bool:
+    from app.services.synthetic_data import DEPARTMENTS, OPENINGS, SENTENCES
+
+    dept_index = rng.randrange(len(DEPARTMENTS))
+    category = rng.choice(DEPARTMENTS[dept_index][1])
+    description = " ".join([rng.choice(OPENINGS).format(category)] + rng.sample(SENTENCES, 3))
+    response = await client.post("/api/v1/grievances/", headers=user.headers, json={
+        "title": f"Problem with {category}", "category": category, "dept_id": None, "description": description,
+    })
+    return response.status_code == 201
+
+
+async def _list(client: httpx.AsyncClient, user: VirtualUser, rng: random.Random, payload: bytes) -> bool:
+    response = await client.get("/api/v1/grievances/", headers=user.headers)
+    return response.status_code == 200
+
+
+async def _upload(client: httpx.AsyncClient, user: VirtualUser, rng: random.Random, payload: bytes) -> bool:
+    response = await client.post("/api/v1/files/upload", headers=user.headers, files={
+        "file": ("evidence.pdf", payload, "application/pdf"),
+    })
+    return response.status_code == 201
+
+
+async def _download(client: httpx.AsyncClient, user: VirtualUser, rng: random.Random, payload: bytes) -> bool:
+    response = await client.get(f"/api/v1/files/{user.file_id}", headers=user.headers)
+    return response.status_code == 200
+
+
+OPERATIONS = {"login": _login, "create": _create, "list": _list, "upload": _upload, "download": _download}
+
+
+class EndpointStats:
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.errors = 0
+
+    def summary(self, seconds: float) -> dict:
+        return {
+            "requests": len(self.latencies),
+            "errors": self.errors,
+            "requests_per_sec": round(len(self.latencies) / seconds, 1) if seconds else None,
+            "latency_ms": latency_summary(self.latencies),
+        }
+
+
+async def _virtual_user(client, user: VirtualUser, rng: random.Random, mix: Dict[str, int],
+                        stats: Dict[str, EndpointStats], payload: bytes, record_from: float,
+                        deadline: float) -> None:
+    names, weights = list(mix), list(mix.values())
+    while True:
+        started = time.perf_counter()
+        if started >= deadline:
+            return
+        name = rng.choices(names, weights)[0]
+        try:
+            ok = await OPERATIONS[name](client, user, rng, payload)
+        except httpx.HTTPError:
+            ok = False
+        if started >= record_from:
+            stats[name].latencies.append(time.perf_counter() - started)
+            stats[name].errors += not ok
+
+
+async def run_level(client: httpx.AsyncClient, users: List[VirtualUser], concurrency: int, mix: Dict[str, int],
+                    duration: float, warmup: float, seed: int, payload: bytes) -> dict:
+    """`concurrency` virtual users for warmup + duration seconds; only the last `duration` are recorded."""
+    stats = {name: EndpointStats() for name in mix}
+    record_from = time.perf_counter() + warmup
+    deadline = record_from + duration
+    await asyncio.gather(*(
+        _virtual_user(client, users[n % len(users)], random.Random(f"{seed}-{concurrency}-{n}"), mix, stats,
+                      payload, record_from, deadline)
+        for n in range(concurrency)
+    ))
+    endpoints = {name: s.summary(duration) for name, s in stats.items()}
+    total = sum(e["requests"] for e in endpoints.values())
+    return {
+        "concurrency": concurrency,
+        "seconds": duration,
+        "requests": total,
+        "errors": sum(e["errors"] for e in endpoints.values()),
+        "requests_per_sec": round(total / duration, 1),
+        "endpoints": endpoints,
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_uvicorn(database_url: str, media_root: Path, workers: int) -> tuple:
+    port = _free_port()
+    env = dict(os.environ, DATABASE_URL=database_url, PYTHONPATH=str(PROJECT_ROOT), **{MEDIA_ENV: str(media_root)})
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "benchmarks.bench_http:create_app", "--factory",
+         "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers),
+         "--log-level", "warning", "--no-access-log"],
+        cwd=PROJECT_ROOT, env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with status {process.returncode}")
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1).status_code == 200:
+                return process, base_url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("uvicorn did not start within 60 s")
+
+
+async def _run_levels(client: httpx.AsyncClient, users: List[VirtualUser], levels: List[int], mix: Dict[str, int],
+                      duration: float, warmup: float, seed: int, upload_bytes: int) -> List[dict]:
+    payload = os.urandom(upload_bytes)
+    return [await run_level(client, users, c, mix, duration, warmup, seed, payload) for c in levels]
+
+
+def run_benchmark(mode: str = "inprocess", concurrency: tuple = (1, 8, 32), duration: float = 10.0,
+                  warmup: float = 2.0, mix: Optional[Dict[str, int]] = None, users: int = 2000,
+                  grievances: int = 20000, clients: int = 50, workers: int = 2, upload_bytes: int = 64 * 1024,
+                  database_url: Optional[str] = None, skip_seed: bool = False, seed: int = 42) -> dict:
+    mix = {name: weight for name, weight in (mix or DEFAULT_MIX).items() if weight > 0}
+    workdir = Path(tempfile.mkdtemp(prefix="bench_http_"))
+    media_root = workdir / "media"
+    database_url = database_url or f"sqlite:///{workdir / 'bench.db'}"
+    started = time.perf_counter()
+    try:
+        prepared = prepare(database_url, media_root, users, grievances, clients, upload_bytes, seed, skip_seed)
+        setup_seconds = time.perf_counter() - started
+        limits = httpx.Limits(max_connections=max(concurrency), max_keepalive_connections=max(concurrency))
+        if mode == "uvicorn":
+            process, base_url = _start_uvicorn(database_url, media_root, workers)
+            try:
+                async def drive():
+                    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+                        return await _run_levels(client, prepared["users"], list(concurrency), mix,
+                                                 duration, warmup, seed, upload_bytes)
+                levels = asyncio.run(drive())
+            finally:
+                process.terminate()
+                process.wait(timeout=30)
+        else:
+            from app.core import storage
+            from app.db import session
+
+            # Point every SessionLocal user (endpoints, audit writer, workers) at the benchmark database
+            engine = create_engine(
+                database_url, connect_args={"check_same_thread": False} if database_url.startswith("sqlite") else {}
+            )
+            original = session.SessionLocal.kw["bind"], storage.MEDIA_ROOT
+            session.SessionLocal.configure(bind=engine)
+            try:
+                app = create_app(str(media_root))
+
+                async def drive():
+                    transport = httpx.ASGITransport(app=app)
+                    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+                        return await _run_levels(client, prepared["users"], list(concurrency), mix,
+                                                 duration, warmup, seed, upload_bytes)
+                levels = asyncio.run(drive())
+            finally:
+                from app.services.audit import audit_writer
+
+                audit_writer.flush()  # Buffered audit rows belong to the benchmark database
+                session.SessionLocal.configure(bind=original[0])
+                storage.MEDIA_ROOT = original[1]
+                engine.dispose()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "mode": mode,
+        "workers": workers if mode == "uvicorn" else 1,
+        "database": database_url.split(":", 1)[0] if "://" in database_url else database_url,
+        "seeded_rows": prepared["rows"],
+        "setup_seconds": round(setup_seconds, 2),
+        "mix": mix,
+        "levels": levels,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float = 0.25, min_latency_ms: float = 1.0) -> List[dict]:
+    """
+    Regressions against `baseline`: per concurrency level and endpoint in both
+    runs, requests/s lower, or p50/p99 higher, by more than `tolerance`.
+    Latency changes under `min_latency_ms` are noise and ignored.
+    """
+    before = {(level["concurrency"], name): e for level in baseline.get("levels", [])
+              for name, e in level["endpoints"].items()}
+    regressions = []
+    for level in results["levels"]:
+        for name, now in level["endpoints"].items():
+            old = before.get((level["concurrency"], name))
+            if not old or not old["requests"] or not now["requests"]:
+                continue
+            for metric, higher_is_worse in COMPARED.items():
+                if metric == "requests_per_sec":
+                    was, value = old[metric], now[metric]
+                else:
+                    was, value = old["latency_ms"][metric], now["latency_ms"][metric]
+                    if value - was < min_latency_ms:
+                        continue
+                change = (value - was) / was if was else 0.0
+                if (change > tolerance) if higher_is_worse else (change < -tolerance):
+                    regressions.append({
+                        "concurrency": level["concurrency"], "endpoint": name, "metric": metric,
+                        "baseline": was, "current": value, "change": round(change, 3),
+                    })
+    return regressions
+
+
+def parse_mix(text: str) -> Dict[str, int]:
+    """'list=45,create=20' -> {"list": 45, "create": 20}; endpoints left out get no traffic."""
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in OPERATIONS:
+            raise ValueError(f"Unknown endpoint {name.strip()!r}; choose from {', '.join(OPERATIONS)}")
+        mix[name.strip()] = int(weight)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end HTTP benchmark of the hot endpoints")
+    parser.add_argument("--mode", choices=("inprocess", "uvicorn"), default="inprocess")
+    parser.add_argument("--workers", type=int, default=2, help="uvicorn worker processes")
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated virtual user counts")
+    parser.add_argument("--duration", type=float, default=10.0, help="Measured seconds per level")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Unmeasured seconds before each level")
+    parser.add_argument("--mix", default=",".join(f"{k}={v}" for k, v in DEFAULT_MIX.items()))
+    parser.add_argument("--users", type=int, default=2000, help="Synthetic users to seed")
+    parser.add_argument("--grievances", type=int, default=20000, help="Synthetic grievances to seed")
+    parser.add_argument("--clients", type=int, default=50, help="Distinct students the virtual users act as")
+    parser.add_argument("--upload-bytes", type=int, default=64 * 1024)
+    parser.add_argument("--database-url", help="Benchmark this database instead of a temporary SQLite file")
+    parser.add_argument("--skip-seed", action="store_true", help="Use the synthetic data already in --database-url")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    parser.add_argument("--baseline", help="Compare with this stored report and exit 1 on regressions")
+    parser.add_argument("--update-baseline", action="store_true", help="Write the report to --baseline instead")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative change before a regression")
+    args = parser.parse_args()
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+    results = run_benchmark(
+        args.mode, tuple(int(c) for c in args.concurrency.split(",")), args.duration, args.warmup, mix,
+        args.users, args.grievances, args.clients, args.workers, args.upload_bytes, args.database_url,
+        args.skip_seed, args.seed,
+    )
+    results["params"] = vars(args)
+
+    regressions = []
+    if args.baseline and args.update_baseline:
+        with open(args.baseline, "w") as f:
+            f.write(json.dumps(results, indent=2) + "\n")
+    elif args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        results["regressions"] = regressions
+
+    report = json.dumps(results, indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report + "\n")
+    if regressions:
+        for r in regressions:
+            print(f"REGRESSION c={r['concurrency']} {r['endpoint']} {r['metric']}: "
+                  f"{r['baseline']} -> {r['current']} ({r['change']:+.0%})", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
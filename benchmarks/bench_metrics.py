@@ -0,0 +1,103 @@
+"""
+Metrics middleware overhead: the same trivial route called straight through
+the ASGI interface (no HTTP server or client) with and without
+MetricsMiddleware, so the difference is the per-request cost of recording
+latency, size, in-flight and SQL metrics. Also times one /metrics render.
+Run:
+  python -m benchmarks.bench_metrics --requests 20000
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from fastapi import FastAPI
+
+from app.core.metrics import MetricsMiddleware, Registry, RequestMetrics
+from benchmarks.stats import latency_summary
+
+
+def make_app(instrumented: bool, metrics: RequestMetrics) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/grievances/{grievance_id}")
+    async def read(grievance_id: int):
+        return {"id": grievance_id}
+
+    if instrumented:
+        app.add_middleware(MetricsMiddleware, metrics=metrics)
+    return app
+
+
+async def _call(app, path: str) -> None:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"", "headers": [],
+        "client": ("127.0.0.1", 1), "server": ("test", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+async def _measure(apps: list, requests: int, round_size: int = 500) -> list:
+    """Latencies per app, alternating rounds so drift affects both alike."""
+    for app in apps:
+        for n in range(200):  # Warm up (route compilation, first-call caches)
+            await _call(app, f"/grievances/{n}")
+    latencies = [[] for _ in apps]
+    for start in range(0, requests, round_size):
+        for app, samples in zip(apps, latencies):
+            for n in range(start, min(start + round_size, requests)):
+                started = time.perf_counter()
+                await _call(app, f"/grievances/{n}")
+                samples.append(time.perf_counter() - started)
+    return latencies
+
+
+def run_benchmark(requests: int = 20000) -> dict:
+    metrics = RequestMetrics(Registry())
+    plain, instrumented = asyncio.run(_measure([make_app(False, metrics), make_app(True, metrics)], requests))
+    plain_summary, instrumented_summary = latency_summary(plain), latency_summary(instrumented)
+
+    registry = Registry()
+    many = RequestMetrics(registry)
+    for n in range(200):  # A few hundred label sets, like a real API
+        many.duration.observe(("GET", f"/route/{n}"), 0.01)
+    started = time.perf_counter()
+    body = registry.render()
+    render_ms = (time.perf_counter() - started) * 1000
+
+    return {
+        "requests": requests,
+        "plain_ms": plain_summary,
+        "instrumented_ms": instrumented_summary,
+        "overhead_p50_us": round((instrumented_summary["p50"] - plain_summary["p50"]) * 1000, 1),
+        "render_200_series_ms": round(render_ms, 3),
+        "render_bytes": len(body),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Metrics middleware overhead benchmark")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.requests)
+    results["params"] = vars(args)
+
+    report = json.dumps(results, indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+End-to-end notification throughput: grievance lifecycle events driven
+through app/services/notifications.py (templates, digest coalescer, inbox
+writes, retry store) and app/core/email.py (pooled SMTP) into a local sink.
+
+Each grievance produces six events, one per outbox message: created (admin
+and student), two status changes, assigned and resolved. Events run on
+`--concurrency` threads, as several outbox workers would. An event whose
+email is rejected raises, as the outbox would see it before retrying. The
+report is JSON: throughput, per-event latency percentiles and failure
+counts; `--output` also writes it to a file so runs can be compared for
+regressions.
+
+Inbox rows and failed emails go to a throwaway SQLite database, never the
+application database. Pass --sink-host/--sink-port to target a sink running
+in another process (python -m benchmarks.smtp_sink).
+Run:
+  python -m benchmarks.bench_notifications --grievances 200 --concurrency 8
+  python -m benchmarks.bench_notifications --fail-every 20 --output results.json
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from unittest import mock
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.core import email
+from app.core.config import settings
+from app.db.base import Base
+from app.models.failed_email import FailedEmail
+from app.models.user import User
+from app.services import email_retry, inbox, notifications
+from app.services.digest import NotificationCoalescer
+from benchmarks.smtp_sink import SMTPSink
+from benchmarks.stats import latency_summary
+
+STATUSES = ["Submitted", "Under Review", "In Progress", "Resolved"]
+
+
+def lifecycle_events(grievances: int):
+    """(name, function, kwargs) for every event, grievance by grievance."""
+    events = []
+    for i in range(1, grievances + 1):
+        student = {"student_email": f"student{i}@example.com", "student_name": f"Student {i}"}
+        title = f"Benchmark grievance {i}"
+        events.append(("created_admin", notifications.notify_grievance_created_admin,
+                       dict(grievance_id=i, title=title, **student)))
+        events.append(("created_student", notifications.notify_grievance_created_student,
+                       dict(grievance_id=i, title=title, **student)))
+        for old, new in zip(STATUSES[:2], STATUSES[1:3]):
+            events.append(("status_changed", notifications.notify_grievance_status_changed,
+                           dict(grievance_id=i, title=title, old_status=old, new_status=new, **student)))
+        events.append(("assigned", notifications.notify_grievance_assigned,
+                       dict(grievance_id=i, handler_email=f"handler{i % 10}@example.com",
+                            handler_name=f"Handler {i % 10}", grievance_title=title)))
+        events.append(("resolved", notifications.notify_grievance_resolved,
+                       dict(grievance_id=i, title=title, resolution="Fixed", **student)))
+    return events
+
+
+@contextmanager
+def _environment(host: str, port: int, pool_size: int, digest_window: float, users: int):
+    """Point the notification pipeline at the sink and a scratch database."""
+    fd, path = tempfile.mkstemp(suffix=".db", prefix="bench-notifications-")
+    os.close(fd)
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False, "timeout": 30})
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    with Session() as db:
+        db.add_all(User(email=f"student{i}@example.com", hashed_password="x") for i in range(1, users + 1))
+        db.commit()
+
+    sent, failed = [], []
+    lock = threading.Lock()
+
+    def send(to, subject, body, html_body=None):
+        ok = email.send_email(to, subject, body, html_body=html_body)
+        with lock:
+            (sent if ok else failed).append(to)
+        return ok
+
+    coalescer = NotificationCoalescer(window=digest_window, send=send, session_factory=Session)
+    with ExitStack() as stack:
+        for name, value in (("SMTP_HOST", host), ("SMTP_PORT", port), ("SMTP_POOL_SIZE", pool_size)):
+            stack.enter_context(mock.patch.object(settings, name, value))
+        stack.enter_context(mock.patch.object(notifications, "coalescer", coalescer))
+        stack.enter_context(mock.patch.object(inbox, "SessionLocal", Session))
+        stack.enter_context(mock.patch.object(email_retry, "SessionLocal", Session))
+        email.reset_smtp_pool()
+        try:
+            yield {"coalescer": coalescer, "sent": sent, "failed": failed, "Session": Session}
+        finally:
+            email.reset_smtp_pool()
+            engine.dispose()
+            os.unlink(path)
+
+
+def run_benchmark(
+    host: str,
+    port: int,
+    grievances: int = 100,
+    concurrency: int = 4,
+    pool_size: int = 4,
+    digest_window: float = 0.0,
+) -> dict:
+    """Drive the lifecycle events and return the report (without params)."""
+    events = lifecycle_events(grievances)
+    latencies, errors = [], []
+
+    with _environment(host, port, pool_size, digest_window, users=grievances) as env:
+        def run(event):
+            name, handler, kwargs = event
+            start = time.perf_counter()
+            try:
+                handler(**kwargs)
+            except Exception as e:
+                errors.append(f"{name}: {e!r}")
+            latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(run, events))
+        env["coalescer"].flush_all()
+        elapsed = time.perf_counter() - start
+
+        with env["Session"]() as db:
+            queued_for_retry = db.execute(select(func.count()).select_from(FailedEmail)).scalar()
+        emails_sent, emails_failed = len(env["sent"]), len(env["failed"])
+
+    return {
+        "events": len(events),
+        "seconds": round(elapsed, 4),
+        "events_per_second": round(len(events) / elapsed, 1),
+        "emails_sent": emails_sent,
+        "emails_per_second": round(emails_sent / elapsed, 1),
+        "latency_ms": latency_summary(latencies),
+        "failures": {
+            "events": len(errors),
+            "emails": emails_failed,
+            "queued_for_retry": queued_for_retry,  # Failed digests; failed events are the outbox's to retry
+            "examples": errors[:5],
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Notification pipeline throughput benchmark")
+    parser.add_argument("--grievances", type=int, default=200, help="Each grievance produces 6 events")
+    parser.add_argument("--concurrency", type=int, default=8, help="Threads delivering events")
+    parser.add_argument("--pool-size", type=int, default=4, help="SMTP connection pool size")
+    parser.add_argument("--digest-window", type=float, default=0.0, help="Coalescing window (0 sends immediately)")
+    parser.add_argument("--connect-delay", type=float, default=0.02)
+    parser.add_argument("--message-delay", type=float, default=0.0)
+    parser.add_argument("--fail-every", type=int, default=0, help="Sink rejects every n-th message")
+    parser.add_argument("--sink-host", default="127.0.0.1")
+    parser.add_argument("--sink-port", type=int, default=0, help="Use an external sink instead")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    options = dict(
+        grievances=args.grievances,
+        concurrency=args.concurrency,
+        pool_size=args.pool_size,
+        digest_window=args.digest_window,
+    )
+    if args.sink_port:
+        results = run_benchmark(args.sink_host, args.sink_port, **options)
+    else:
+        with SMTPSink(
+            connect_delay=args.connect_delay, message_delay=args.message_delay, fail_every=args.fail_every
+        ) as sink:
+            results = run_benchmark(sink.host, sink.port, **options)
+            results["sink_messages"] = len(sink.messages)
+    results["params"] = vars(args)
+
+    report = json.dumps(results, indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Grievance routing throughput: app/services/routing.py against the query a
+router without in-memory state would run per grievance (open counts of the
+eligible handlers via GROUP BY, then an UPDATE).
+
+Seeds a throwaway SQLite database with `--handlers` handlers spread over
+`--departments` departments and categories, and a backlog of
+`--grievances` unassigned grievances. Reports, as JSON:
+  - backlog: one `route_backlog()` pass (SELECT, heap routing, bulk UPDATE)
+  - choose: single in-memory routing decisions per second
+  - naive: per-grievance query routing, on a sample of the backlog
+`--output` also writes the report to a file.
+Run:
+  python -m benchmarks.bench_routing --grievances 5000 --handlers 50
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import create_engine, func, or_, select, update
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.models.department import Department
+from app.models.grievance import Grievance
+from app.models.handler import Handler
+from app.models.user import User
+from app.services.routing import CLOSED_STATUSES, RoutingEngine
+
+CATEGORIES = ["academic", "finance", "hostel", "transport", "library"]
+
+
+def seed(db, grievances: int, handlers: int, departments: int, rng: random.Random) -> None:
+    """Departments, handlers (some department-wide, some any-department) and the backlog."""
+    db.add_all(Department(id=d, name=f"Department {d}") for d in range(1, departments + 1))
+    db.add(User(id=1, email="student@example.com", hashed_password="x"))
+    for n in range(handlers):
+        user_id = 1000 + n
+        db.add(User(id=user_id, email=f"handler{n}@example.com", hashed_password="x"))
+        db.add(Handler(
+            user_id=user_id,
+            dept_id=None if n % 5 == 0 else rng.randint(1, departments),
+            categories=None if n % 3 == 0 else ",".join(rng.sample(CATEGORIES, 2)),
+        ))
+    db.flush()
+    db.execute(
+        Grievance.__table__.insert(),
+        [
+            {
+                "student_id": 1,
+                "dept_id": rng.randint(1, departments),
+                "category": rng.choice(CATEGORIES),
+                "title": f"Benchmark grievance {i}",
+                "description": "Routing benchmark",
+                "status": "submitted",
+            }
+            for i in range(grievances)
+        ],
+    )
+    db.commit()
+
+
+def naive_route(db, dept_id, category):
+    """Least-loaded eligible handler found with one query, as a stateless router would."""
+    load = func.count(Grievance.id)
+    query = (
+        select(Handler.user_id)
+        .outerjoin(
+            Grievance,
+            (Grievance.handler_id == Handler.user_id) & Grievance.status.not_in(CLOSED_STATUSES),
+        )
+        .where(
+            Handler.is_active.is_(True),
+            or_(Handler.dept_id.is_(None), Handler.dept_id == dept_id),
+            or_(Handler.categories.is_(None), Handler.categories.contains(category)),
+        )
+        .group_by(Handler.user_id, Handler.capacity)
+        .having(or_(Handler.capacity.is_(None), load < Handler.capacity))
+        .order_by(load, Handler.user_id)
+        .limit(1)
+    )
+    return db.execute(query).scalar()
+
+
+def run_benchmark(grievances: int = 5000, handlers: int = 50, departments: int = 10,
+                  naive_sample: int = 500, seed_value: int = 7) -> dict:
+    rng = random.Random(seed_value)
+    fd, path = tempfile.mkstemp(suffix=".db", prefix="bench_routing_")
+    os.close(fd)
+    engine = create_engine(f"sqlite:///{path}")
+    Session = sessionmaker(bind=engine)
+    try:
+        Base.metadata.create_all(bind=engine)
+        db = Session()
+        seed(db, grievances, handlers, departments, rng)
+
+        # Stateless baseline on a sample, rolled back afterwards
+        sample = db.execute(
+            select(Grievance.id, Grievance.dept_id, Grievance.category).limit(naive_sample)
+        ).all()
+        started = time.perf_counter()
+        for grievance_id, dept_id, category in sample:
+            user_id = naive_route(db, dept_id, category)
+            db.execute(update(Grievance).where(Grievance.id == grievance_id).values(handler_id=user_id))
+        naive_seconds = time.perf_counter() - started
+        db.rollback()
+
+        routing = RoutingEngine()
+        started = time.perf_counter()
+        report, _ = routing.route_backlog(db)
+        db.commit()
+        backlog_seconds = time.perf_counter() - started
+
+        keys = [(rng.randint(1, departments), rng.choice(CATEGORIES)) for _ in range(10000)]
+        started = time.perf_counter()
+        for dept_id, category in keys:
+            routing.choose(dept_id, category)
+        choose_seconds = time.perf_counter() - started
+
+        loads = [routing.load(1000 + n) for n in range(handlers)]
+        db.close()
+    finally:
+        engine.dispose()
+        os.unlink(path)
+
+    return {
+        "grievances": grievances,
+        "handlers": handlers,
+        "backlog": {
+            "routed": report.routed,
+            "unroutable": report.unroutable,
+            "seconds": round(backlog_seconds, 4),
+            "assignments_per_sec": round(report.routed / backlog_seconds, 1) if backlog_seconds else None,
+        },
+        "choose_per_sec": round(len(keys) / choose_seconds, 1) if choose_seconds else None,
+        "naive": {
+            "sample": len(sample),
+            "seconds": round(naive_seconds, 4),
+            "assignments_per_sec": round(len(sample) / naive_seconds, 1) if naive_seconds else None,
+        },
+        "load": {"min": min(loads), "max": max(loads)},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grievance routing throughput benchmark")
+    parser.add_argument("--grievances", type=int, default=5000, help="Unassigned backlog size")
+    parser.add_argument("--handlers", type=int, default=50)
+    parser.add_argument("--departments", type=int, default=10)
+    parser.add_argument("--naive-sample", type=int, default=500, help="Grievances routed by the query baseline")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.grievances, args.handlers, args.departments, args.naive_sample, args.seed)
+    results["params"] = vars(args)
+
+    report = json.dumps(results, indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Messages/second for unpooled vs pooled SMTP delivery against a local sink.
+Run:
+  python -m benchmarks.bench_smtp_pool --messages 500 --threads 4 --connect-delay 0.02
+"""
+import argparse
+import json
+import smtplib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.mime.text import MIMEText
+
+from app.core.email import SMTPConnectionPool
+from benchmarks.smtp_sink import SMTPSink
+
+
+def _message(i: int) -> MIMEText:
+    msg = MIMEText(f"Benchmark message {i}")
+    msg["Subject"] = f"Benchmark {i}"
+    msg["From"] = "bench@grievanceportal.local"
+    msg["To"] = "student@example.com"
+    return msg
+
+
+def _run(send, messages: int, threads: int) -> float:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(send, range(messages)))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SMTP pool throughput benchmark")
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--connect-delay", type=float, default=0.02, help="Simulated handshake cost (s)")
+    args = parser.parse_args()
+
+    with SMTPSink(connect_delay=args.connect_delay) as sink:
+        def unpooled(i):
+            with smtplib.SMTP(sink.host, sink.port) as server:
+                server.send_message(_message(i))
+
+        pool = SMTPConnectionPool(sink.host, sink.port, max_size=args.threads)
+
+        def pooled(i):
+            pool.send_message(_message(i))
+
+        results = {}
+        for name, send in (("unpooled", unpooled), ("pooled", pooled)):
+            opened_before = sink.connections_opened
+            elapsed = _run(send, args.messages, args.threads)
+            results[name] = {
+                "seconds": round(elapsed, 4),
+                "messages_per_second": round(args.messages / elapsed, 1),
+                "connections": sink.connections_opened - opened_before,
+            }
+        pool.close()
+
+    results["speedup"] = round(results["pooled"]["messages_per_second"] / results["unpooled"]["messages_per_second"], 2)
+    results["params"] = vars(args)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Local SMTP sink server for tests and benchmarks.
+Speaks just enough SMTP for smtplib/aiosmtplib clients and keeps every
+accepted message in memory. Nothing is ever delivered.
+
+Usage:
+    with SMTPSink() as sink:
+        settings.SMTP_HOST, settings.SMTP_PORT = sink.host, sink.port
+        ...
+        assert len(sink.messages) == 1
+"""
+import socketserver
+import threading
+import time
+from typing import List, Optional, Tuple
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def _reply(self, line: str) -> None:
+        self.wfile.write(line.encode("ascii") + b"\r\n")
+
+    def handle(self):
+        sink = self.server.sink
+        sink._opened(self.connection)
+        try:
+            if sink.connect_delay:
+                time.sleep(sink.connect_delay)
+            self._reply("220 smtp-sink ESMTP ready")
+            mail_from: Optional[str] = None
+            rcpts: List[str] = []
+            while True:
+                line = self.rfile.readline()
+                if not line:
+                    break
+                command = line.decode("utf-8", "replace").rstrip("\r\n")
+                verb = command.split(" ", 1)[0].upper()
+                if verb == "EHLO":
+                    self.wfile.write(b"250-smtp-sink\r\n250-8BITMIME\r\n250 SIZE 33554432\r\n")
+                elif verb == "HELO":
+                    self._reply("250 smtp-sink")
+                elif verb == "MAIL":
+                    mail_from, rcpts = command[10:].split(" ")[0].strip("<>"), []
+                    self._reply("250 OK")
+                elif verb == "RCPT":
+                    rcpts.append(command[8:].split(" ")[0].strip("<>"))
+                    self._reply("250 OK")
+                elif verb == "DATA":
+                    self._reply("354 End data with <CR><LF>.<CR><LF>")
+                    data = self._read_data()
+                    if sink.message_delay:
+                        time.sleep(sink.message_delay)
+                    if sink._received(mail_from, rcpts, data):
+                        self._reply("250 OK queued")
+                    else:
+                        self._reply("451 Temporary failure, try again later")
+                elif verb in ("RSET", "NOOP"):
+                    self._reply("250 OK")
+                elif verb == "QUIT":
+                    self._reply("221 Bye")
+                    break
+                else:
+                    self._reply("502 Command not implemented")
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            sink._closed(self.connection)
+
+    def _read_data(self) -> bytes:
+        lines = []
+        while True:
+            line = self.rfile.readline()
+            if not line or line in (b".\r\n", b".\n"):
+                break
+            if line.startswith(b".."):
+                line = line[1:]
+            lines.append(line)
+        return b"".join(lines)
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class SMTPSink:
+    """
+    Threaded in-process SMTP server.
+    `connect_delay` simulates greeting/TLS/auth cost per connection and
+    `message_delay` simulates per-message server latency, and with
+    `fail_every=n` every n-th message is rejected with a temporary error.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        connect_delay: float = 0.0,
+        message_delay: float = 0.0,
+        fail_every: int = 0,
+    ):
+        self.connect_delay = connect_delay
+        self.message_delay = message_delay
+        self.fail_every = fail_every
+        self.messages: List[Tuple[str, List[str], bytes]] = []
+        self.rejected = 0
+        self.connections_opened = 0
+        self._active = set()
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), _SMTPHandler)
+        self._server.sink = self
+        self.host, self.port = self._server.server_address[:2]
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "SMTPSink":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="smtp-sink", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.drop_connections()
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "SMTPSink":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def drop_connections(self) -> None:
+        """Close every open client connection, as a server restart would."""
+        with self._lock:
+            active = list(self._active)
+        for sock in active:
+            try:
+                sock.shutdown(2)
+                sock.close()
+            except OSError:
+                pass
+
+    def _opened(self, sock) -> None:
+        with self._lock:
+            self.connections_opened += 1
+            self._active.add(sock)
+
+    def _closed(self, sock) -> None:
+        with self._lock:
+            self._active.discard(sock)
+
+    def _received(self, mail_from: Optional[str], rcpts: List[str], data: bytes) -> bool:
+        with self._lock:
+            if self.fail_every and (len(self.messages) + self.rejected + 1) % self.fail_every == 0:
+                self.rejected += 1
+                return False
+            self.messages.append((mail_from, list(rcpts), data))
+            return True
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run a local SMTP sink")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    parser.add_argument("--connect-delay", type=float, default=0.0)
+    parser.add_argument("--message-delay", type=float, default=0.0)
+    parser.add_argument("--fail-every", type=int, default=0, help="Reject every n-th message")
+    args = parser.parse_args()
+
+    sink = SMTPSink(args.host, args.port, args.connect_delay, args.message_delay, args.fail_every).start()
+    print(f"SMTP sink listening on {sink.host}:{sink.port}", flush=True)
+    try:
+        while True:
+            time.sleep(10)
+            print(f"{len(sink.messages)} messages received", flush=True)
+    except KeyboardInterrupt:
+        sink.stop()
+
+
+if __name__ == "__main__":
+    main()
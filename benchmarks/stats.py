@@ -0,0 +1,22 @@
+"""Summary statistics shared by the benchmark scripts."""
+import math
+from typing import Dict, Sequence
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of `values` (0 for an empty sequence)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def latency_summary(seconds: Sequence[float]) -> Dict[str, float]:
+    """p50/p90/p99/max of latencies given in seconds, reported in milliseconds."""
+    return {
+        "p50": round(percentile(seconds, 50) * 1000, 3),
+        "p90": round(percentile(seconds, 90) * 1000, 3),
+        "p99": round(percentile(seconds, 99) * 1000, 3),
+        "max": round(max(seconds, default=0.0) * 1000, 3),
+    }
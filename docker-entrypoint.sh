@@ -1,10 +1,11 @@
 #!/usr/bin/env bash
 set -e
 
-# Optional: run alembic migrations if RUN_MIGRATIONS=yes
+# Optional: create/upgrade the schema before starting if RUN_MIGRATIONS=yes
+# (the app and workers also run the same idempotent upgrade on startup)
 if [ "${RUN_MIGRATIONS:-no}" = "yes" ]; then
-  echo "Running alembic migrations..."
-  alembic upgrade head
+  echo "Upgrading database schema..."
+  python scripts/create_db.py
 fi
 
 exec "$@"
@@ -30,6 +30,17 @@ export const grievancesAPI = {
   update: (id, data) => api.patch(`/api/v1/grievances/${id}`, data).then(res => res.data),
 }
 
+// The API reports statuses by name ("in_progress"); these are their display labels
+const STATUS_LABELS = {
+  submitted: 'Submitted',
+  under_review: 'Under Review',
+  in_progress: 'In Progress',
+  resolved: 'Resolved',
+  closed: 'Closed',
+}
+
+export const statusLabel = (status) => STATUS_LABELS[status] || status
+
 export const filesAPI = {
   upload: (file, userId) => {
     const formData = new FormData()
@@ -38,8 +49,26 @@ export const filesAPI = {
       headers: { 'Content-Type': 'multipart/form-data' },
     })
   },
+  uploadBatch: (files) => {
+    const formData = new FormData()
+    for (const file of files) {
+      formData.append('files', file)
+    }
+    return api.post('/api/v1/files/upload/batch', formData, {
+      headers: { 'Content-Type': 'multipart/form-data' },
+    })
+  },
   download: (fileId) => api.get(`/api/v1/files/${fileId}`),
   delete: (fileId) => api.delete(`/api/v1/files/${fileId}`),
 }
 
+export const eventsAPI = {
+  // EventSource cannot send headers, so it gets a short-lived stream token in the query string.
+  // The token is only checked on connect: fetch a new URL for every (re)connect.
+  streamUrl: async () => {
+    const { data } = await api.post('/api/v1/events/token')
+    return `${API_BASE}/api/v1/events/?token=${encodeURIComponent(data.token)}`
+  },
+}
+
 export default api
@@ -1,6 +1,6 @@
 import { useState, useEffect } from 'react'
 import { useSearchParams, Link } from 'react-router-dom'
-import { grievancesAPI } from '../api'
+import { grievancesAPI, statusLabel } from '../api'
 
 export default function Dashboard() {
   const [grievances, setGrievances] = useState([])
@@ -19,7 +19,7 @@ export default function Dashboard() {
       setError('')
       // TODO: Use filter parameter in API call once backend supports it
       const data = await grievancesAPI.list()
-      setGrievances(data)
+      setGrievances(data.map((g) => ({ ...g, status: statusLabel(g.status) })))
     } catch (err) {
       setError(err.response?.data?.detail || 'Failed to load grievances')
     } finally {
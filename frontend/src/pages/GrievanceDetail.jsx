@@ -1,6 +1,6 @@
 import { useState, useEffect } from 'react'
 import { useParams, Link } from 'react-router-dom'
-import { grievancesAPI } from '../api'
+import { grievancesAPI, eventsAPI, statusLabel } from '../api'
 
 export default function GrievanceDetail() {
   const { id } = useParams()
@@ -13,12 +13,49 @@ export default function GrievanceDetail() {
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [id])
 
+  // Live status updates instead of reloading the page
+  useEffect(() => {
+    let source = null
+    let retry = null
+    let closed = false
+
+    const connect = async () => {
+      try {
+        const url = await eventsAPI.streamUrl()
+        if (closed) return
+        source = new EventSource(url)
+      } catch {
+        retry = setTimeout(connect, 5000)
+        return
+      }
+      source.addEventListener('grievance_status', (e) => {
+        const event = JSON.parse(e.data)
+        if (String(event.grievance_id) === String(id)) {
+          setGrievance((g) => (g ? { ...g, status: statusLabel(event.status) } : g))
+        }
+      })
+      // The browser gives up once the expired token is refused; reconnect with a fresh one
+      source.onerror = () => {
+        if (source.readyState === EventSource.CLOSED && !closed) {
+          retry = setTimeout(connect, 5000)
+        }
+      }
+    }
+
+    connect()
+    return () => {
+      closed = true
+      clearTimeout(retry)
+      if (source) source.close()
+    }
+  }, [id])
+
   const fetchGrievance = async () => {
     try {
       setLoading(true)
       setError('')
       const data = await grievancesAPI.get(id)
-      setGrievance(data)
+      setGrievance({ ...data, status: statusLabel(data.status) })
     } catch (err) {
       setError(err.response?.data?.detail || 'Failed to load grievance')
     } finally {
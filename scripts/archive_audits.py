@@ -0,0 +1,49 @@
+"""Move old audit rows into compressed archive segments.
+Run (e.g. from cron or the systemd timer in deploy/systemd):
+  python scripts/archive_audits.py --older-than-days 180
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import timedelta
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from app.db.session import SessionLocal
+from app.services.audit_archive import AuditArchive, archive_audits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--archive-dir", default=None, help="Archive directory (default AUDIT_ARCHIVE_DIR)")
+    parser.add_argument("--older-than-days", type=int, default=None, help="Archive rows older than this")
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--max-runtime", type=float, default=None, help="Stop after this many seconds")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        report = archive_audits(
+            db,
+            archive=AuditArchive(args.archive_dir),
+            older_than=timedelta(days=args.older_than_days) if args.older_than_days is not None else None,
+            batch_size=args.batch_size,
+            max_runtime=args.max_runtime,
+        )
+    finally:
+        db.close()
+
+    if args.json:
+        print(json.dumps(report.as_dict()))
+        return
+    print(f"Archived {report.archived} audit rows into {report.segments} segments ({report.batches} batches)")
+    if not report.complete:
+        print("Stopped at max runtime; remaining rows will be archived on the next run")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Train the grievance category/department classifier, or re-run it over existing grievances.
+  python scripts/classifier.py train --min-examples 5
+  python scripts/classifier.py reclassify            # dry run: count changes
+  python scripts/classifier.py reclassify --apply
+"""
+import argparse
+import json
+import os
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services.classifier import get_classifier, reclassify_backlog, train_from_db
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default=settings.CLASSIFIER_MODEL_PATH, help="Model file")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    commands = parser.add_subparsers(dest="command", required=True)
+    train = commands.add_parser("train", help="Fit on historical grievances and save the model")
+    train.add_argument("--min-examples", type=int, default=5, help="Smallest class kept in the model")
+    reclassify = commands.add_parser("reclassify", help="Normalize categories/departments of open grievances")
+    reclassify.add_argument("--apply", action="store_true", help="Write the changes (default: count only)")
+    reclassify.add_argument("--all", action="store_true", help="Include resolved and closed grievances")
+    reclassify.add_argument("--batch-size", type=int, default=1000, help="Grievances per inference batch")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.command == "train":
+            report = train_from_db(db, args.model, min_examples=args.min_examples)
+        else:
+            classifier = get_classifier(args.model)
+            if classifier is None:
+                parser.error(f"No model at {args.model}; run the train command first")
+            report = reclassify_backlog(
+                db, classifier, batch_size=args.batch_size, apply=args.apply, open_only=not args.all
+            )
+    finally:
+        db.close()
+
+    if args.json:
+        print(json.dumps(report.as_dict()))
+    elif args.command == "train":
+        print(
+            f"Trained on {report.examples} grievances in {report.seconds}s: {report.categories} categories "
+            f"(holdout accuracy {report.category_accuracy}), {report.departments} departments "
+            f"(holdout accuracy {report.dept_accuracy})"
+        )
+    else:
+        verb = "Changed" if report.applied else "Would change"
+        print(
+            f"Scanned {report.scanned} grievances in {report.seconds}s. {verb} "
+            f"{report.category_changes} categories and {report.dept_changes} departments"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""Compute MinHash signatures for grievances that have none and cluster likely duplicates.
+Run once after enabling duplicate detection:
+  python scripts/cluster_duplicates.py --batch-size 1000
+"""
+import argparse
+import json
+import os
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from app.db.session import SessionLocal
+from app.services.dedup import DuplicateDetector
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=1000, help="Grievances signed per NumPy batch and commit")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        report = DuplicateDetector().cluster_backlog(db, batch_size=args.batch_size)
+    finally:
+        db.close()
+
+    if args.json:
+        print(json.dumps(report.as_dict()))
+        return
+    print(
+        f"Signed {report.processed} grievances in {report.seconds}s: "
+        f"{report.duplicates} likely duplicates, {report.skipped} without text"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-"""Create database tables from SQLAlchemy models (quick dev helper).
+"""Create database tables from SQLAlchemy models and upgrade existing ones.
 Run: python scripts/create_db.py
 """
 import os
@@ -8,12 +8,12 @@ PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
-from app.db.base import Base
 from app.db.session import engine
+from app.db.upgrade import upgrade_schema
 
 def main():
-    print("Creating database tables...")
-    Base.metadata.create_all(bind=engine)
+    print("Creating and upgrading database tables...")
+    upgrade_schema(engine)
     print("Done")
 
 if __name__ == '__main__':
@@ -8,7 +8,8 @@ sys.path.insert(0, r"f:\\student portal\\grievance_portal")
 from unittest.mock import patch, MagicMock
 from fastapi import BackgroundTasks
 from app.core.notifications import (
-    notify_grievance_created,
+    notify_grievance_created_admin,
+    notify_grievance_created_student,
     notify_grievance_status_changed,
     notify_grievance_assigned,
     notify_grievance_resolved,
@@ -24,13 +25,19 @@ def test_notification_flow():
         mock_send.return_value = True  # Simulate successful send
         print("\n[1] Testing Grievance Created Notification")
         print("-" * 60)
-        notify_grievance_created(
+        notify_grievance_created_admin(
             grievance_id=101,
             student_email="student@example.com",
             student_name="John Doe",
             title="Lab Equipment Malfunction",
             admin_email="admin@example.com",
         )
+        notify_grievance_created_student(
+            grievance_id=101,
+            student_email="student@example.com",
+            student_name="John Doe",
+            title="Lab Equipment Malfunction",
+        )
         print(f"✓ send_email called {mock_send.call_count} times")
         for call in mock_send.call_args_list:
             print(f"  → To: {call[0][0]}, Subject: {call[0][1][:50]}...")
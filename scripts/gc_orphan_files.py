@@ -0,0 +1,60 @@
+"""Remove or quarantine uploaded files that no metadata references.
+Run (e.g. from cron or the systemd timer in deploy/systemd):
+  python scripts/gc_orphan_files.py --dry-run
+"""
+import argparse
+import json
+import os
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from app.core.storage import MEDIA_ROOT
+from app.db.session import SessionLocal
+from app.services.storage_gc import collect_orphans
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--root", default=str(MEDIA_ROOT), help="Media directory to scan")
+    parser.add_argument("--grace-seconds", type=int, default=None, help="Skip files newer than this")
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--max-runtime", type=float, default=None, help="Stop after this many seconds")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--quarantine", action="store_true", help="Move orphans to .quarantine (GC_QUARANTINE default)")
+    mode.add_argument("--delete", action="store_true", help="Delete orphans permanently")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be reclaimed")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        report = collect_orphans(
+            db,
+            root=args.root,
+            grace_period=args.grace_seconds,
+            batch_size=args.batch_size,
+            max_runtime=args.max_runtime,
+            quarantine=False if args.delete else (args.quarantine or None),
+            dry_run=args.dry_run,
+        )
+    finally:
+        db.close()
+
+    if args.json:
+        print(json.dumps(report.as_dict()))
+        return
+    action = "Would reclaim" if report.dry_run else "Reclaimed"
+    if report.resumed_from:
+        print(f"Resumed after {report.resumed_from}")
+    print(f"Scanned {report.scanned} files in {report.batches} batches")
+    print(f"Orphaned: {report.orphaned} (removed {report.removed}, quarantined {report.quarantined})")
+    print(f"{action} {report.reclaimed_bytes} bytes")
+    if not report.complete:
+        print("Stopped at max runtime; the next run resumes where this one stopped")
+
+
+if __name__ == "__main__":
+    main()
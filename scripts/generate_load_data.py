@@ -0,0 +1,69 @@
+"""Generate synthetic users, grievances, audits and attachments for load testing.
+Run after creating tables (against a throwaway database, e.g. DATABASE_URL=sqlite:///./load.db):
+  python scripts/generate_load_data.py --users 100000 --grievances 1000000
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+from datetime import datetime, timezone
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from app.db.session import engine
+from app.services.synthetic_data import DEPARTMENTS, SYNTHETIC_PASSWORD, SyntheticPlan, load
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10_000, help="Users, including admins and handlers")
+    parser.add_argument("--grievances", type=int, default=100_000)
+    parser.add_argument("--handlers", type=int, default=200, help="Staff users with a handler row")
+    parser.add_argument("--departments", type=int, default=len(DEPARTMENTS))
+    parser.add_argument("--days", type=int, default=365, help="Spread submissions over this many days")
+    parser.add_argument("--attachment-rate", type=float, default=0.2, help="Share of grievances with a file")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--now", help="ISO timestamp to generate relative to (default: the current time)")
+    parser.add_argument("--chunk-size", type=int, default=50_000, help="Rows per generated chunk and transaction")
+    parser.add_argument("--workers", type=int, default=None, help="Generator processes (default: CPU count)")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    if not args.json:
+        logging.basicConfig(level=logging.INFO, format="%(message)s")
+    now_us = 0
+    if args.now:
+        now = datetime.fromisoformat(args.now)
+        now_us = int((now if now.tzinfo else now.replace(tzinfo=timezone.utc)).timestamp() * 1_000_000)
+    plan = SyntheticPlan(
+        users=args.users,
+        grievances=args.grievances,
+        handlers=args.handlers,
+        departments=args.departments,
+        days=args.days,
+        attachment_rate=args.attachment_rate,
+        seed=args.seed,
+        chunk_size=args.chunk_size,
+        now_us=now_us,
+    )
+    try:
+        report = load(engine, plan, workers=args.workers)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.json:
+        print(json.dumps(report.as_dict()))
+        return
+    for table, rows in report.rows.items():
+        print(f"  {table}: {rows}")
+    print(f"Loaded {sum(report.rows.values())} rows in {report.seconds} s "
+          f"({report.rows_per_sec:.0f} rows/s, {report.grievances_per_sec:.0f} grievances/s)")
+    print(f"Users {report.user_ids[0]}-{report.user_ids[1]} (password {SYNTHETIC_PASSWORD}), "
+          f"grievances {report.grievance_ids[0]}-{report.grievance_ids[1]}")
+
+
+if __name__ == "__main__":
+    main()
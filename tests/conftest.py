@@ -1,10 +1,38 @@
 """
 Pytest fixtures and configuration for integration tests.
 """
+import os
+
+# Endpoints over their @query_budget fail the test that called them
+os.environ.setdefault("SQL_PROFILER_ENABLED", "true")
+os.environ.setdefault("SQL_PROFILER_STRICT", "true")
+
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.core import sql_profiler
 from app.main import app
 from app.core.security import create_access_token
+from app.db.base import Base
+
+# Profile every engine, including the per-test in-memory ones
+sql_profiler.instrument_engine()
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "query_budget(n): fail if the test runs more than n SQL statements")
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    """Enforce @pytest.mark.query_budget(n) over the test body (not its fixtures)."""
+    marker = item.get_closest_marker("query_budget")
+    if marker is None:
+        return (yield)
+    with sql_profiler.assert_max_queries(marker.args[0], all_threads=True):
+        return (yield)
 
 
 @pytest.fixture
@@ -14,6 +42,23 @@ async def async_client():
         yield ac
 
 
+@pytest.fixture
+def db_session():
+    """Provide a session bound to a fresh in-memory SQLite database."""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
 @pytest.fixture
 def test_user_data():
     """Test user credentials."""
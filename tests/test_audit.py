@@ -0,0 +1,177 @@
+"""
+Unit tests for the batched audit writer and grievance history.
+"""
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import deps, grievances as grievances_api
+from app.db.session import get_db
+from app.models.audit import Audit
+from app.models.user import User
+from app.services import audit
+from app.services.audit import AuditWriter
+from app.services.dedup import DuplicateDetector
+
+
+@pytest.fixture
+def writes(db_session):
+    """Session factory for the writer that counts INSERT batches."""
+    batches = []
+
+    class CountingSession:
+        def __init__(self):
+            self.db = db_session
+
+        def execute(self, stmt, rows):
+            batches.append(len(rows))
+            return self.db.execute(stmt, rows)
+
+        def commit(self):
+            self.db.commit()
+
+        def close(self):
+            pass
+
+    return batches, CountingSession
+
+
+def _actions(db_session):
+    db_session.expire_all()
+    return [a.action for a in db_session.query(Audit).order_by(Audit.id)]
+
+
+class TestAuditWriter:
+    """Test buffering, batching and durable writes."""
+
+    def test_batches_on_size_threshold(self, db_session, writes):
+        """A full batch is written as one multi-row insert."""
+        batches, factory = writes
+        writer = AuditWriter(factory, batch_size=5, flush_interval=60)
+        for n in range(4):
+            writer.record(1, f"event{n}")
+        time.sleep(0.05)
+        assert batches == [] and writer.pending() == 4
+
+        writer.record(1, "event4")
+        deadline = time.time() + 2
+        while not batches and time.time() < deadline:
+            time.sleep(0.01)
+        assert batches == [5]
+        writer.close()
+        assert _actions(db_session) == [f"event{n}" for n in range(5)]
+
+    def test_flushes_on_time_threshold(self, db_session, writes):
+        """A partial batch is written once the interval passes."""
+        batches, factory = writes
+        writer = AuditWriter(factory, batch_size=100, flush_interval=0.05)
+        writer.record(1, "created")
+        deadline = time.time() + 2
+        while not batches and time.time() < deadline:
+            time.sleep(0.01)
+        assert batches == [1]
+        writer.close()
+
+    def test_durable_joins_callers_transaction(self, db_session, writes):
+        """Durable events commit or roll back with the caller's change."""
+        batches, factory = writes
+        writer = AuditWriter(factory)
+        writer.record(1, "resolved", durable=True, db=db_session)
+        db_session.rollback()
+        assert _actions(db_session) == []
+
+        writer.record(1, "resolved", durable=True, db=db_session)
+        db_session.commit()
+        assert _actions(db_session) == ["resolved"]
+        assert batches == [] and writer.pending() == 0
+
+    def test_durable_without_session_writes_immediately(self, db_session, writes):
+        """Without a session a durable event is committed before returning."""
+        batches, factory = writes
+        AuditWriter(factory).record(1, "escalated", durable=True)
+        assert batches == [1]
+        assert _actions(db_session) == ["escalated"]
+
+    def test_failed_flush_keeps_events(self, db_session):
+        """Events survive a failed write, in order."""
+        def broken():
+            raise RuntimeError("database down")
+
+        writer = AuditWriter(broken, batch_size=100, flush_interval=60)
+        writer.record(1, "a")
+        writer.record(1, "b")
+        with pytest.raises(RuntimeError):
+            writer.flush()
+        assert [row["action"] for row in writer._buffer] == ["a", "b"]
+
+    def test_history_newest_first(self, db_session):
+        """History is per grievance, newest first, and paginated."""
+        writer = AuditWriter(lambda: db_session)
+        for action in ("created", "assigned", "resolved"):
+            writer.record(1, action)
+        writer.record(2, "created")
+        writer.flush()
+        assert [a.action for a in audit.history(db_session, 1)] == ["resolved", "assigned", "created"]
+        assert [a.action for a in audit.history(db_session, 1, limit=1, offset=1)] == ["assigned"]
+
+    def test_history_merges_buffered_events(self, db_session):
+        """Buffered events of the grievance join the page by time, without being written."""
+        writer = AuditWriter(lambda: db_session, flush_interval=60)
+        writer.record(1, "created")
+        writer.record(1, "assigned", durable=True)
+        writer.record(1, "resolved")
+        writer.record(2, "created")
+
+        pending = writer.buffered(1)
+        entries = audit.history(db_session, 1, pending=pending)
+        assert [(a.action, a.id is None) for a in entries] == [("resolved", True), ("assigned", False), ("created", True)]
+        assert [a.action for a in audit.history(db_session, 1, limit=1, offset=1, pending=pending)] == ["assigned"]
+        assert writer.pending() == 3
+
+
+class TestHistoryEndpoint:
+    """Test the per-grievance history route."""
+
+    def test_lifecycle_is_audited(self, db_session, monkeypatch):
+        """Create, status change, assign and resolve all appear in history, buffered ones without a flush."""
+        writer = AuditWriter(lambda: db_session, flush_interval=60)
+        monkeypatch.setattr(grievances_api, "publish_grievance_status", lambda *a, **k: None)
+        monkeypatch.setattr(grievances_api, "audit_writer", writer)
+        monkeypatch.setattr(grievances_api, "duplicate_detector", DuplicateDetector())
+        db_session.add_all([
+            User(id=1, email="one@example.com", hashed_password="x"),
+            User(id=2, email="two@example.com", hashed_password="x"),
+            User(id=9, email="admin@example.com", hashed_password="x", is_admin=True),
+        ])
+        db_session.commit()
+
+        app = FastAPI()
+        app.include_router(grievances_api.router)
+        app.dependency_overrides[get_db] = lambda: db_session
+        app.dependency_overrides[deps.get_current_user] = lambda: db_session.get(User, 1)
+        client = TestClient(app)
+
+        gid = client.post(
+            "/api/v1/grievances/",
+            json={"title": "Fees", "category": "finance", "description": "Double charged"},
+        ).json()["id"]
+        app.dependency_overrides[deps.get_current_user] = lambda: db_session.get(User, 9)
+        client.patch(f"/api/v1/grievances/{gid}", json={"status": "in_progress"})
+        client.post(f"/api/v1/grievances/{gid}/assign", params={"handler_id": 1})
+        client.post(f"/api/v1/grievances/{gid}/resolve", params={"resolution": "Refunded"})
+
+        app.dependency_overrides[deps.get_current_user] = lambda: db_session.get(User, 1)
+        entries = client.get(f"/api/v1/grievances/{gid}/history").json()
+        assert [e["action"] for e in entries] == ["resolved", "assigned", "status_changed", "created"]
+        assert entries[0]["remarks"] == "Refunded"
+        assert entries[2]["remarks"] == "submitted -> in_progress"
+        assert [e["performed_by"] for e in entries] == [9, 9, 9, 1]
+        # Only the durable resolution is written; the rest are merged from the buffer
+        assert [e["id"] is None for e in entries] == [False, True, True, True]
+        assert writer.pending() == 3
+
+        app.dependency_overrides[deps.get_current_user] = lambda: db_session.get(User, 2)
+        assert client.get(f"/api/v1/grievances/{gid}/history").status_code == 403
+        assert client.patch(f"/api/v1/grievances/{gid}", json={"status": "closed"}).status_code == 403
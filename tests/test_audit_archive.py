@@ -0,0 +1,148 @@
+"""
+Unit tests for audit archival to compressed segments.
+"""
+import gzip
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.models.audit import Audit
+from app.services import audit_archive as audit_archive_service
+from app.services.audit_archive import AuditArchive, archive_audits, full_history
+
+NOW = datetime(2024, 9, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def archive(tmp_path):
+    return AuditArchive(tmp_path / "audits")
+
+
+def _audit(db, grievance_id, action, when):
+    db.add(Audit(grievance_id=grievance_id, action=action, timestamp=when))
+
+
+@pytest.fixture
+def seeded(db_session):
+    """Audits for grievances 1-3 in January, February and August 2024."""
+    _audit(db_session, 1, "created", datetime(2024, 1, 10, tzinfo=timezone.utc))
+    _audit(db_session, 2, "created", datetime(2024, 1, 20, tzinfo=timezone.utc))
+    _audit(db_session, 1, "resolved", datetime(2024, 2, 5, tzinfo=timezone.utc))
+    _audit(db_session, 3, "created", datetime(2024, 2, 6, tzinfo=timezone.utc))
+    _audit(db_session, 1, "reopened", datetime(2024, 8, 20, tzinfo=timezone.utc))
+    db_session.commit()
+    return db_session
+
+
+class TestArchiveAudits:
+    """Test moving rows from the hot table into segments."""
+
+    def test_moves_old_rows_into_monthly_segments(self, seeded, archive):
+        """Old rows leave the table; each month gets its own gzip segment."""
+        report = archive_audits(seeded, archive, older_than=timedelta(days=90), now=NOW)
+        assert report.archived == 4 and report.complete
+
+        assert [a.action for a in seeded.query(Audit)] == ["reopened"]
+        segments = archive.segments()
+        assert [(s["month"], s["rows"], json.loads((archive.root / s["ids"]).read_text())) for s in segments] == [
+            ("2024-01", 2, [1, 2]),
+            ("2024-02", 2, [1, 3]),
+        ]
+        with gzip.open(archive.root / segments[0]["file"], "rt") as f:
+            assert [json.loads(line)["action"] for line in f] == ["created", "created"]
+
+    def test_later_runs_append_new_segments(self, seeded, archive):
+        """Existing segments are never rewritten."""
+        archive_audits(seeded, archive, older_than=timedelta(days=90), now=NOW)
+        first = archive.segments()[0]
+        original = (archive.root / first["file"]).read_bytes()
+
+        _audit(seeded, 4, "created", datetime(2024, 1, 25, tzinfo=timezone.utc))
+        seeded.commit()
+        archive_audits(seeded, archive, older_than=timedelta(days=90), now=NOW)
+
+        assert [s["file"] for s in archive.segments()] == [
+            "2024-01/000001.ndjson.gz", "2024-01/000002.ndjson.gz", "2024-02/000001.ndjson.gz",
+        ]
+        assert (archive.root / first["file"]).read_bytes() == original
+
+    def test_manifest_holds_one_summary_per_month(self, seeded, archive):
+        """Archiving more segments widens month summaries instead of growing the manifest."""
+        archive_audits(seeded, archive, older_than=timedelta(days=90), batch_size=1, now=NOW)
+        manifest = archive.load_manifest()
+        assert sorted(manifest["months"]) == ["2024-01", "2024-02"]
+        january = manifest["months"]["2024-01"]
+        assert (january["segments"], january["rows"]) == (2, 2)
+        assert (january["min_grievance_id"], january["max_grievance_id"]) == (1, 2)
+        assert "grievance_ids" not in json.dumps(manifest)
+
+    def test_directories_are_synced_before_rows_are_deleted(self, seeded, archive, monkeypatch):
+        """New files and renames are made durable while the rows still exist in the table."""
+        synced = []
+
+        def fsync_dir(path):
+            synced.append((path, seeded.query(Audit).count()))
+
+        monkeypatch.setattr(audit_archive_service, "_fsync_dir", fsync_dir)
+        archive_audits(seeded, archive, older_than=timedelta(days=90), now=NOW)
+        assert {path for path, _ in synced} == {archive.root, archive.root / "2024-01", archive.root / "2024-02"}
+        assert all(rows == 5 for _, rows in synced)
+
+    def test_batches_and_runtime_limit(self, seeded, archive):
+        """Rows move in bounded batches and a runtime limit stops early."""
+        report = archive_audits(seeded, archive, older_than=timedelta(days=90), batch_size=3, now=NOW)
+        assert (report.archived, report.batches) == (4, 2)
+        assert archive_audits(seeded, archive, max_runtime=0, now=NOW).complete is False
+
+
+class TestArchivedHistory:
+    """Test historical queries over the archive indexes."""
+
+    def test_only_matching_segments_are_scanned(self, seeded, archive):
+        """Month summaries and segment entries prune by grievance id and date range."""
+        archive_audits(seeded, archive, older_than=timedelta(days=90), now=NOW)
+        assert [s["month"] for s in archive.segments_for(1)] == ["2024-01", "2024-02"]
+        assert [s["month"] for s in archive.segments_for(2)] == ["2024-01"]
+        assert archive.segments_for(99) == []
+        feb = datetime(2024, 2, 1, tzinfo=timezone.utc)
+        assert [s["month"] for s in archive.segments_for(1, since=feb)] == ["2024-02"]
+        assert [r["action"] for r in archive.read(1, since=feb)] == ["resolved"]
+
+    def test_full_history_merges_hot_and_archived(self, seeded, archive):
+        """Archived and hot events come back together, newest first."""
+        archive_audits(seeded, archive, older_than=timedelta(days=90), now=NOW)
+        assert [r["action"] for r in full_history(seeded, 1, archive)] == ["reopened", "resolved", "created"]
+
+    def test_rows_archived_but_not_deleted_are_not_duplicated(self, seeded, archive):
+        """A crash between indexing and the delete cannot duplicate history."""
+        rows = [
+            {"id": a.id, "grievance_id": a.grievance_id, "action": a.action, "performed_by": None,
+             "remarks": None, "timestamp": a.timestamp.replace(tzinfo=timezone.utc).isoformat()}
+            for a in seeded.query(Audit).filter(Audit.grievance_id == 1)
+        ]
+        archive.append(rows)
+        assert [r["action"] for r in full_history(seeded, 1, archive)] == ["reopened", "resolved", "created"]
+
+    def test_full_history_pages(self, seeded, archive):
+        """Pages come out of the merged history without building all of it."""
+        _audit(seeded, 1, "commented", datetime(2024, 1, 15, tzinfo=timezone.utc))
+        seeded.commit()
+        archive_audits(seeded, archive, older_than=timedelta(days=90), now=NOW)
+        pending = [{"grievance_id": 1, "action": "noted", "performed_by": None, "remarks": None,
+                    "timestamp": datetime(2024, 8, 21, tzinfo=timezone.utc)}]
+
+        pages = [full_history(seeded, 1, archive, pending=pending, limit=2, offset=o) for o in (0, 2, 4)]
+        assert [[r["action"] for r in page] for page in pages] == [
+            ["noted", "reopened"], ["resolved", "commented"], ["created"],
+        ]
+
+    def test_full_history_stops_at_older_segments(self, seeded, archive, monkeypatch):
+        """Segments older than the requested page are never opened."""
+        archive_audits(seeded, archive, older_than=timedelta(days=90), now=NOW)
+        opened = []
+        read_segment = archive.read_segment
+        monkeypatch.setattr(archive, "read_segment", lambda s, *a: opened.append(s["month"]) or read_segment(s, *a))
+
+        assert [r["action"] for r in full_history(seeded, 1, archive, limit=2)] == ["reopened", "resolved"]
+        assert opened == ["2024-02"]
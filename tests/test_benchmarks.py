@@ -0,0 +1,105 @@
+"""
+Smoke tests for the benchmark harnesses (tiny runs, not measurements).
+"""
+from benchmarks import bench_classifier, bench_dedup, bench_http, bench_metrics, bench_routing
+from benchmarks.bench_notifications import run_benchmark
+from benchmarks.smtp_sink import SMTPSink
+from benchmarks.stats import latency_summary, percentile
+
+
+class TestStats:
+    """Test percentile helpers."""
+
+    def test_nearest_rank_percentiles(self):
+        """Percentiles pick actual samples by nearest rank."""
+        values = list(range(1, 101))
+        assert percentile(values, 50) == 50
+        assert percentile(values, 99) == 99
+        assert percentile([0.5], 99) == 0.5
+        assert percentile([], 50) == 0.0
+        assert latency_summary([0.001, 0.002])["max"] == 2.0
+
+
+class TestNotificationBenchmark:
+    """Test the notification throughput harness end to end."""
+
+    def test_reports_throughput_and_failures(self):
+        """Every lifecycle email reaches the sink; rejected ones fail their event for the outbox to retry."""
+        with SMTPSink(fail_every=6) as sink:
+            results = run_benchmark(sink.host, sink.port, grievances=3, concurrency=2, pool_size=2)
+
+        assert results["events"] == 18
+        assert results["emails_sent"] + results["failures"]["emails"] == 18
+        assert results["failures"]["emails"] == sink.rejected == 3
+        assert results["failures"]["events"] == 3
+        assert results["failures"]["queued_for_retry"] == 0
+        assert set(results["latency_ms"]) == {"p50", "p90", "p99", "max"}
+
+
+class TestRoutingBenchmark:
+    """Test the routing throughput harness."""
+
+    def test_routes_whole_backlog(self):
+        """Every grievance in the backlog is assigned and both rates are reported."""
+        results = bench_routing.run_benchmark(grievances=200, handlers=10, departments=3, naive_sample=20)
+        assert results["backlog"]["routed"] + results["backlog"]["unroutable"] == 200
+        assert results["naive"]["sample"] == 20
+        assert results["choose_per_sec"] > 0
+
+
+class TestDedupBenchmark:
+    """Test the duplicate detection harness."""
+
+    def test_flags_burst_copies(self):
+        """Reworded copies of one incident are flagged after the first."""
+        results = bench_dedup.run_benchmark(indexed=200, queries=40, burst=10)
+        assert results["burst_copies"] == 10
+        assert results["burst_flagged"] >= 8
+        assert results["check_latency_ms"]["p50"] > 0
+
+
+class TestClassifierBenchmark:
+    """Test the classifier latency harness."""
+
+    def test_reports_latency_and_accuracy(self):
+        """A small run trains, classifies every query and reports both rates."""
+        results = bench_classifier.run_benchmark(train=300, queries=50, categories=4, departments=2, batch_size=20)
+        assert results["category_accuracy"] >= 0.9
+        assert results["predict_latency_ms"]["p50"] > 0
+        assert results["batch_predictions_per_sec"] > 0
+
+
+class TestMetricsBenchmark:
+    """Test the metrics overhead harness."""
+
+    def test_reports_both_variants(self):
+        """Plain and instrumented latencies and a render time are reported."""
+        results = bench_metrics.run_benchmark(requests=50)
+        assert results["plain_ms"]["p50"] > 0 and results["instrumented_ms"]["p50"] > 0
+        assert results["render_bytes"] > 0
+
+
+class TestHttpBenchmark:
+    """Test the end-to-end HTTP harness."""
+
+    def test_drives_every_endpoint(self):
+        """A short in-process run seeds a database and serves the whole mix without errors."""
+        results = bench_http.run_benchmark(concurrency=(2,), duration=1.0, warmup=0.2, users=60,
+                                           grievances=300, clients=5, upload_bytes=1024)
+        level = results["levels"][0]
+        assert results["seeded_rows"]["grievances"] == 300
+        assert level["errors"] == 0
+        assert all(level["endpoints"][name]["requests"] > 0 for name in ("create", "list", "upload", "download"))
+
+    def test_compare_flags_regressions(self):
+        """Throughput drops and latency growth past the tolerance are reported; noise is not."""
+        def report(rps, p50):
+            latency = {"p50": p50, "p90": p50, "p99": p50, "max": p50}
+            return {"levels": [{"concurrency": 8, "endpoints": {
+                "list": {"requests": 100, "requests_per_sec": rps, "latency_ms": latency},
+            }}]}
+
+        assert bench_http.compare(report(100, 10), report(100, 10)) == []
+        assert bench_http.compare(report(90, 10.5), report(100, 10)) == []
+        found = {(r["metric"], r["change"]) for r in bench_http.compare(report(50, 30), report(100, 10))}
+        assert found == {("requests_per_sec", -0.5), ("p50", 2.0), ("p99", 2.0)}
@@ -0,0 +1,172 @@
+"""
+Unit tests for bulk grievance status updates.
+"""
+import json
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.api import deps
+from app.api.v1 import admin
+from app.db.session import get_db
+from app.models.audit import Audit
+from app.models.grievance import Grievance, StatusEnum
+from app.models.handler import Handler
+from app.models.outbox import OutboxMessage
+from app.models.user import User
+from app.services import bulk_status
+from app.services.bulk_status import BulkStatusFilter, bulk_update_status
+from app.services.routing import RoutingEngine
+
+
+@pytest.fixture
+def db(db_session, monkeypatch):
+    db_session.add(User(id=1, email="student@example.com", hashed_password="x"))
+    db_session.add(User(id=9, email="admin@example.com", hashed_password="x"))
+    db_session.commit()
+    monkeypatch.setattr(bulk_status, "routing_engine", RoutingEngine())
+    monkeypatch.setattr(bulk_status, "publish_grievance_status", lambda *a, **k: None)
+    return db_session
+
+
+def _grievances(db, count, status=StatusEnum.resolved, **fields):
+    rows = [Grievance(student_id=1, title=f"G{i}", description="D", status=status, **fields) for i in range(count)]
+    db.add_all(rows)
+    db.commit()
+    return [g.id for g in rows]
+
+
+def _statements(db):
+    """Count statements run on the session's connection."""
+    counter = SimpleNamespace(n=0)
+
+    def count(*args):
+        counter.n += 1
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", count)
+    return counter, lambda: event.remove(engine, "before_cursor_execute", count)
+
+
+class TestBulkUpdateStatus:
+    """Test the chunked set-based update."""
+
+    def test_ids_with_per_id_results(self, db):
+        """Every requested id is reported: updated, unchanged or not found."""
+        resolved = _grievances(db, 3)
+        closed = _grievances(db, 1, status=StatusEnum.closed)
+        report = bulk_update_status(db, "Closed", ids=resolved + closed + [999], performed_by=9, chunk_size=2)
+
+        assert (report.matched, report.updated, report.unchanged, report.not_found) == (4, 3, 1, 1)
+        results = {r["grievance_id"]: r["result"] for r in report.results}
+        assert results == {**{gid: "updated" for gid in resolved}, closed[0]: "unchanged", 999: "not_found"}
+        db.expire_all()
+        assert {g.status for g in db.query(Grievance)} == {StatusEnum.closed}
+
+    def test_audit_and_notifications_written_in_bulk(self, db):
+        """One audit row and one notification (email and inbox message) per change, committed with it."""
+        ids = _grievances(db, 4)
+        bulk_update_status(db, "closed", ids=ids, performed_by=9)
+        audits = db.query(Audit).filter(Audit.action == "status_changed").all()
+        assert sorted(a.grievance_id for a in audits) == ids
+        assert {(a.performed_by, a.remarks) for a in audits} == {(9, "resolved -> closed (bulk)")}
+        emails = db.query(OutboxMessage).filter(OutboxMessage.event == "grievance_status_changed")
+        payloads = [json.loads(m.payload) for m in emails]
+        assert [p["grievance_id"] for p in payloads] == ids
+        assert db.query(OutboxMessage).filter(OutboxMessage.event == "grievance_status_changed.inbox").count() == 4
+        assert payloads[0]["student_email"] == "student@example.com"
+        assert payloads[0]["new_status"] == "closed"
+
+    def test_statement_count_does_not_grow_with_rows(self, db):
+        """A chunk costs the same handful of statements for 10 rows as for 300."""
+        small, large = _grievances(db, 10), _grievances(db, 300)
+        counts = []
+        for ids in (small, large):
+            counter, stop = _statements(db)
+            bulk_update_status(db, "closed", ids=ids, chunk_size=500)
+            stop()
+            counts.append(counter.n)
+        assert counts[0] == counts[1]
+
+    def test_filter_with_limit(self, db):
+        """Filters pick the rows; a limit leaves the rest for the next request."""
+        old = datetime.now(timezone.utc) - timedelta(days=200)
+        ids = _grievances(db, 5, dept_id=None, category="Hostel", updated_at=old)
+        _grievances(db, 2, category="Fees", updated_at=old)
+        _grievances(db, 2, status=StatusEnum.in_progress, category="hostel", updated_at=old)
+
+        selection = BulkStatusFilter(status="Resolved", category="hostel",
+                                     updated_before=datetime.now(timezone.utc) - timedelta(days=90))
+        first = bulk_update_status(db, "closed", filter=selection, limit=3, chunk_size=2)
+        assert (first.updated, first.complete) == (3, False)
+        second = bulk_update_status(db, "closed", filter=selection)
+        assert (second.updated, second.complete) == (2, True)
+        db.expire_all()
+        assert sorted(g.id for g in db.query(Grievance).filter(Grievance.status == StatusEnum.closed)) == ids
+
+    def test_handler_loads_follow_open_state(self, db):
+        """Closing releases handler load; reopening counts it again."""
+        db.add(User(id=5, email="handler@example.com", hashed_password="x"))
+        db.add(Handler(user_id=5))
+        db.commit()
+        ids = _grievances(db, 2, status=StatusEnum.in_progress, handler_id=5)
+        engine = bulk_status.routing_engine
+        engine.rebuild(db)
+        bulk_update_status(db, "closed", ids=ids)
+        assert engine.load(5) == 0
+        bulk_update_status(db, "in_progress", ids=ids)
+        assert engine.load(5) == 2
+
+    def test_unknown_status(self, db):
+        """An unknown target status is refused before anything is written."""
+        with pytest.raises(ValueError):
+            bulk_update_status(db, "archived", ids=[1])
+
+    def test_empty_filter_is_refused(self, db):
+        """A filter without criteria would match everything, so nothing is changed."""
+        ids = _grievances(db, 3)
+        with pytest.raises(ValueError):
+            bulk_update_status(db, "closed", filter=BulkStatusFilter())
+        with pytest.raises(ValueError):
+            bulk_update_status(db, "closed")
+        db.expire_all()
+        assert db.query(Grievance).filter(Grievance.id.in_(ids), Grievance.status == StatusEnum.closed).count() == 0
+
+
+class TestBulkStatusEndpoint:
+    """Test the admin endpoint."""
+
+    @pytest.fixture
+    def client(self, db):
+        app = FastAPI()
+        app.include_router(admin.router, prefix="/api/v1/admin")
+        app.dependency_overrides[get_db] = lambda: db
+        app.dependency_overrides[deps.admin_required] = lambda: db.get(User, 9)
+        return TestClient(app)
+
+    def test_bulk_close(self, client, db):
+        """Thousands of grievances close in one request."""
+        ids = _grievances(db, 2000)
+        response = client.post("/api/v1/admin/grievances/bulk-status", json={"status": "closed", "ids": ids})
+        assert response.status_code == 200
+        assert response.json()["updated"] == 2000
+        assert db.query(OutboxMessage).count() == 2 * 2000
+
+    def test_needs_exactly_one_selector(self, client):
+        """Ids and filter are mutually exclusive, and one is required."""
+        url = "/api/v1/admin/grievances/bulk-status"
+        assert client.post(url, json={"status": "closed"}).status_code == 422
+        assert client.post(url, json={"status": "closed", "ids": [1], "filter": {}}).status_code == 422
+        assert client.post(url, json={"status": "nope", "ids": [1]}).status_code == 422
+
+    def test_empty_filter_is_rejected(self, client, db):
+        """A filter with no criteria is a 422, not "close every grievance"."""
+        _grievances(db, 2)
+        url = "/api/v1/admin/grievances/bulk-status"
+        assert client.post(url, json={"status": "closed", "filter": {}}).status_code == 422
+        assert client.post(url, json={"status": "closed", "filter": {"category": None}}).status_code == 422
+        assert db.query(OutboxMessage).count() == 0
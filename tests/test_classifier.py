@@ -0,0 +1,208 @@
+"""
+Unit tests for the grievance category/department classifier.
+"""
+import os
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import deps, grievances as grievances_api
+from app.db.session import get_db
+from app.main import app as main_app
+from app.models.grievance import Grievance, StatusEnum
+from app.models.user import User
+from app.services import classifier as classifier_service
+from app.services.audit import AuditWriter
+from app.services.classifier import (
+    GrievanceClassifier,
+    Suggestion,
+    apply_suggestion,
+    get_classifier,
+    reclassify_backlog,
+    train_from_db,
+)
+from app.services.dedup import DuplicateDetector
+
+# category -> (dept_id, words students use for it)
+TOPICS = {
+    "hostel": (1, "room water bathroom warden mess hostel block fan electricity"),
+    "exams": (2, "exam marks result paper revaluation grade semester hall ticket"),
+    "fees": (3, "fee refund payment receipt scholarship challan fine installment"),
+}
+
+
+def _corpus(n, seed=0):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        category = list(TOPICS)[i % len(TOPICS)]
+        dept_id, words = TOPICS[category]
+        text = " ".join(rng.choices(words.split(), k=8))
+        rows.append((f"Issue {i}", text, category, dept_id))
+    return rows
+
+
+def _fit(n=150):
+    rows = _corpus(n)
+    return GrievanceClassifier(n_features=4096).fit(
+        [GrievanceClassifier.text(t, d) for t, d, _, _ in rows], [c for *_, c, _ in rows], [d for *_, d in rows]
+    )
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(classifier_service, "_cache", {"path": None, "mtime": None, "classifier": None})
+
+
+@pytest.fixture
+def db(db_session):
+    db_session.add(User(id=1, email="student@example.com", hashed_password="x"))
+    db_session.commit()
+    return db_session
+
+
+class TestGrievanceClassifier:
+    """Test training, inference and persistence."""
+
+    def test_predicts_category_and_department(self):
+        """Held-out synthetic grievances are classified correctly and confidently."""
+        model = _fit()
+        for title, description, category, dept_id in _corpus(30, seed=1):
+            suggestion = model.predict(title, description)
+            assert (suggestion.category, suggestion.dept_id) == (category, dept_id)
+            assert suggestion.category_confidence > 0.6
+        assert model.categories == ["exams", "fees", "hostel"]
+
+    def test_batch_matches_single(self):
+        """Batched inference gives the same answers, empty text included."""
+        model = _fit()
+        texts = ["refund of my fee", "", "water in hostel room", "exam result missing"]
+        batch = model.predict_batch(texts)
+        assert batch == [model.predict_batch([text])[0] for text in texts]
+
+    def test_rare_classes_are_dropped(self):
+        """Categories below min_examples are not predicted; one class leaves the head untrained."""
+        model = GrievanceClassifier(n_features=1024).fit(
+            ["a b", "a c", "x y"], ["fees", "Fees ", "library"], [None, None, None], min_examples=2
+        )
+        assert model.category_model is None and model.dept_model is None
+        assert model.predict("t", "d") == Suggestion(None, 0.0, None, 0.0)
+
+    def test_save_load_round_trip(self, tmp_path):
+        """A reloaded model predicts exactly what the saved one did."""
+        model = _fit()
+        path = tmp_path / "model.npz"
+        model.save(path)
+        loaded = GrievanceClassifier.load(path)
+        texts = [GrievanceClassifier.text(t, d) for t, d, _, _ in _corpus(12, seed=2)]
+        assert loaded.predict_batch(texts) == model.predict_batch(texts)
+        assert loaded.trained_at == model.trained_at
+
+    def test_get_classifier_reloads_on_change(self, tmp_path):
+        """The model is cached per process until the file changes."""
+        path = tmp_path / "model.npz"
+        assert get_classifier(path) is None
+        _fit().save(path)
+        first = get_classifier(path)
+        assert get_classifier(path) is first
+        _fit(60).save(path)
+        os.utime(path, ns=(1, 1))
+        assert get_classifier(path) is not first
+
+
+class TestApplySuggestion:
+    """Test normalization rules."""
+
+    KNOWN = ["exams", "fees", "hostel"]
+
+    def test_known_category_is_canonicalized(self):
+        """Case and spacing variants of a known category are folded, whatever the model says."""
+        suggestion = Suggestion("hostel", 0.99, 1, 0.99)
+        assert apply_suggestion(" FEES", 3, suggestion, self.KNOWN) == ("fees", 3)
+
+    def test_unknown_category_and_missing_dept_need_confidence(self):
+        """Only confident predictions replace a free-text category or fill a department."""
+        assert apply_suggestion("misc", None, Suggestion("fees", 0.9, 3, 0.9), self.KNOWN) == ("fees", 3)
+        assert apply_suggestion("misc", None, Suggestion("fees", 0.3, 3, 0.3), self.KNOWN) == ("misc", None)
+        assert apply_suggestion("misc", 2, Suggestion("fees", 0.9, 3, 0.9), self.KNOWN) == ("fees", 2)
+
+
+class TestBacklog:
+    """Test training from and reclassifying the database."""
+
+    def _seed(self, db):
+        for title, description, category, dept_id in _corpus(60):
+            db.add(Grievance(student_id=1, title=title, description=description, category=category.upper(),
+                             dept_id=dept_id))
+        db.commit()
+
+    def test_train_from_db(self, db, tmp_path, monkeypatch):
+        """Training reports holdout accuracy and writes a loadable model."""
+        monkeypatch.setattr(classifier_service.settings, "CLASSIFIER_FEATURES", 4096)
+        self._seed(db)
+        path = tmp_path / "model.npz"
+        report = train_from_db(db, path)
+        assert (report.examples, report.categories, report.departments) == (60, 3, 3)
+        assert report.category_accuracy >= 0.9
+        assert get_classifier(path).categories == ["exams", "fees", "hostel"]
+
+    def test_reclassify_dry_run_then_apply(self, db):
+        """Changes are counted without writing, then applied without touching updated_at."""
+        self._seed(db)
+        db.add(Grievance(student_id=1, title="Refund", description="fee refund receipt payment", category="money",
+                         status=StatusEnum.submitted))
+        db.add(Grievance(student_id=1, title="Old", description="exam marks", category="x", status=StatusEnum.closed))
+        db.commit()
+        before = {g.id: g.updated_at for g in db.query(Grievance)}
+        model = _fit()
+
+        report = reclassify_backlog(db, model, batch_size=16)
+        assert (report.scanned, report.category_changes, report.dept_changes) == (61, 61, 1)
+        assert db.query(Grievance).filter(Grievance.category == "fees").count() == 0
+
+        reclassify_backlog(db, model, batch_size=16, apply=True)
+        db.expire_all()
+        grievances = db.query(Grievance).order_by(Grievance.id).all()
+        assert (grievances[60].category, grievances[60].dept_id) == ("fees", 3)
+        assert grievances[61].category == "x"
+        assert {g.id: g.updated_at for g in grievances} == before
+
+
+class TestClassificationOnCreate:
+    """Test the classifier modes on the app's mounted v1 create route."""
+
+    @pytest.fixture
+    def client(self, db, tmp_path, monkeypatch):
+        path = tmp_path / "model.npz"
+        _fit().save(path)
+        monkeypatch.setattr(classifier_service.settings, "CLASSIFIER_MODEL_PATH", str(path))
+        monkeypatch.setattr(grievances_api, "publish_grievance_status", lambda *a, **k: None)
+        monkeypatch.setattr(grievances_api, "audit_writer", AuditWriter(lambda: db, flush_interval=60))
+        monkeypatch.setattr(grievances_api, "duplicate_detector", DuplicateDetector())
+        main_app.dependency_overrides[get_db] = lambda: db
+        main_app.dependency_overrides[deps.get_current_user] = lambda: db.get(User, 1)
+        yield TestClient(main_app)
+        main_app.dependency_overrides.clear()
+
+    def _create(self, client):
+        response = client.post("/api/v1/grievances/", json={
+            "title": "Refund", "category": "Money", "description": "fee refund payment receipt pending",
+        })
+        assert response.status_code == 201
+        return response.json()
+
+    def test_normalize_mode_fixes_category_and_department(self, client, monkeypatch):
+        """A free-text category is replaced and the department filled in."""
+        monkeypatch.setattr(classifier_service.settings, "CLASSIFIER_MODE", "normalize")
+        created = self._create(client)
+        assert (created["category"], created["dept_id"]) == ("fees", 3)
+        assert created["suggested_category"] == "fees"
+
+    def test_suggest_and_off_modes_keep_submission(self, client, monkeypatch):
+        """Suggest mode only reports the prediction; off mode skips the model."""
+        monkeypatch.setattr(classifier_service.settings, "CLASSIFIER_MODE", "suggest")
+        created = self._create(client)
+        assert (created["category"], created["dept_id"], created["suggested_dept_id"]) == ("Money", None, 3)
+        monkeypatch.setattr(classifier_service.settings, "CLASSIFIER_MODE", "off")
+        assert self._create(client)["suggested_category"] is None
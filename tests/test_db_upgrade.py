@@ -0,0 +1,62 @@
+"""
+Unit tests for the in-place schema upgrade.
+"""
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app.db.upgrade import upgrade_schema
+from app.models.grievance import Grievance
+
+# Tables as the first release created them
+BASELINE = [
+    """CREATE TABLE users (id INTEGER NOT NULL, email VARCHAR(255) NOT NULL, hashed_password VARCHAR(255) NOT NULL,
+       is_active BOOLEAN, is_admin BOOLEAN, PRIMARY KEY (id), UNIQUE (email))""",
+    """CREATE TABLE departments (id INTEGER NOT NULL, name VARCHAR(100) NOT NULL, PRIMARY KEY (id), UNIQUE (name))""",
+    """CREATE TABLE grievances (id INTEGER NOT NULL, student_id INTEGER NOT NULL, dept_id INTEGER,
+       title VARCHAR(255) NOT NULL, category VARCHAR(100), description TEXT NOT NULL,
+       attachment_path VARCHAR(255), status VARCHAR(12), created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+       updated_at DATETIME, PRIMARY KEY (id), FOREIGN KEY(student_id) REFERENCES users (id),
+       FOREIGN KEY(dept_id) REFERENCES departments (id))""",
+]
+
+
+@pytest.fixture
+def legacy_engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    with engine.begin() as conn:
+        for ddl in BASELINE:
+            conn.execute(text(ddl))
+        conn.execute(text("INSERT INTO users (id, email, hashed_password) VALUES (1, 's@example.com', 'x')"))
+        conn.execute(text(
+            "INSERT INTO grievances (id, student_id, title, description, status, created_at) "
+            "VALUES (1, 1, 'Old', 'D', 'submitted', '2024-01-01 00:00:00')"
+        ))
+    yield engine
+    engine.dispose()
+
+
+class TestUpgradeSchema:
+    """Test bringing a database created by an older release up to the models."""
+
+    def test_adds_columns_and_indexes_to_existing_tables(self, legacy_engine):
+        """New grievance columns and indexes appear; existing rows stay readable."""
+        upgrade_schema(legacy_engine)
+        inspector = inspect(legacy_engine)
+        columns = {c["name"] for c in inspector.get_columns("grievances")}
+        assert {"handler_id", "resolution"} <= columns
+        indexes = {i["name"] for i in inspector.get_indexes("grievances")}
+        assert {"ix_grievances_status_updated_at", "ix_grievances_handler_id"} <= indexes
+        assert "notification_outbox" in inspector.get_table_names()
+
+        with Session(legacy_engine) as db:
+            grievance = db.get(Grievance, 1)
+            assert (grievance.title, grievance.handler_id, grievance.resolution) == ("Old", None, None)
+
+    def test_is_idempotent(self, legacy_engine):
+        """Running the upgrade again changes nothing."""
+        upgrade_schema(legacy_engine)
+        before = {i["name"] for i in inspect(legacy_engine).get_indexes("grievances")}
+        upgrade_schema(legacy_engine)
+        assert {i["name"] for i in inspect(legacy_engine).get_indexes("grievances")} == before
@@ -0,0 +1,168 @@
+"""
+Unit tests for MinHash/LSH near-duplicate detection.
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import deps, grievances as grievances_api
+from app.db.session import get_db
+from app.main import app as main_app
+from app.models.grievance import Grievance
+from app.models.grievance_signature import GrievanceSignature
+from app.models.user import User
+from app.services.audit import AuditWriter
+from app.services.dedup import DuplicateDetector, LSHIndex, MinHasher, shingles
+
+WATER = "The water supply in Hostel B has failed since morning, no water in bathrooms on the second floor."
+WATER_AGAIN = "Water supply in hostel B failed since this morning. No water in the bathrooms on second floor!"
+EXAM = "My exam result for the maths course is missing from the portal, please check the marks."
+
+
+def _similarity(a, b):
+    return float((a == b).mean())
+
+
+@pytest.fixture
+def db(db_session):
+    db_session.add(User(id=1, email="student@example.com", hashed_password="x"))
+    db_session.commit()
+    return db_session
+
+
+def _grievance(db, description, created_at=None):
+    grievance = Grievance(student_id=1, title="T", description=description, created_at=created_at)
+    db.add(grievance)
+    db.flush()
+    return grievance.id
+
+
+class TestMinHash:
+    """Test signatures and the LSH index."""
+
+    def test_similar_texts_have_similar_signatures(self):
+        """Rewordings score high, unrelated complaints near zero."""
+        hasher = MinHasher(128)
+        water, again, exam = (hasher.signature(t) for t in (WATER, WATER_AGAIN, EXAM))
+        assert water.dtype == np.uint32 and water.shape == (128,)
+        assert _similarity(water, again) >= 0.5
+        assert _similarity(water, exam) < 0.1
+        assert hasher.signature("!!!") is None
+        assert shingles("Ab").size == 1
+
+    def test_batch_signatures_match_single(self):
+        """The vectorized batch path gives the same signatures, across chunk boundaries."""
+        hasher = MinHasher(64)
+        texts = [WATER, "", EXAM, WATER_AGAIN]
+        batch = hasher.signatures(texts, chunk_shingles=100)
+        assert batch[1] is None
+        for text, signature in zip(texts, batch):
+            if signature is not None:
+                assert np.array_equal(signature, hasher.signature(text))
+
+    def test_index_match_and_remove(self):
+        """Lookups find the similar grievance and forget removed ones."""
+        hasher = MinHasher(128)
+        index = LSHIndex(128, 32, 0.5)
+        index.add(1, hasher.signature(WATER), 1)
+        index.add(2, hasher.signature(EXAM), 2)
+        match = index.best_match(hasher.signature(WATER_AGAIN))
+        assert (match.grievance_id, match.cluster_id) == (1, 1)
+        index.remove(1)
+        assert index.best_match(hasher.signature(WATER_AGAIN)) is None
+        assert len(index) == 1
+
+
+class TestDuplicateDetector:
+    """Test clustering on create, across workers and over a backlog."""
+
+    def test_duplicates_join_earliest_cluster(self, db):
+        """Near-identical grievances share the first one's cluster id."""
+        detector = DuplicateDetector()
+        first = _grievance(db, WATER)
+        assert detector.check(db, first, WATER) is None
+        second = _grievance(db, WATER_AGAIN)
+        match = detector.check(db, second, WATER_AGAIN)
+        assert (match.grievance_id, match.cluster_id) == (first, first)
+        other = _grievance(db, EXAM)
+        assert detector.check(db, other, EXAM) is None
+        db.commit()
+        assert detector.cluster_members(db, first) == [first, second]
+
+    def test_other_workers_rows_are_synced(self, db):
+        """A second process sees signatures stored by the first after a resync."""
+        first = _grievance(db, WATER)
+        DuplicateDetector().check(db, first, WATER)
+        db.commit()
+        other_worker = DuplicateDetector(resync_interval=0)
+        second = _grievance(db, WATER_AGAIN)
+        assert other_worker.check(db, second, WATER_AGAIN).cluster_id == first
+
+    def test_rows_committed_after_a_sync_are_not_missed(self, db):
+        """A signature stamped before a sync but committed after it is loaded by the next one."""
+        first, second = _grievance(db, WATER), _grievance(db, EXAM)
+        DuplicateDetector().check(db, second, EXAM)
+        db.commit()
+        worker = DuplicateDetector()
+        worker.sync(db)
+
+        DuplicateDetector().check(db, first, WATER)
+        db.query(GrievanceSignature).filter(GrievanceSignature.grievance_id == first).update(
+            {"created_at": datetime.utcnow() - timedelta(seconds=10)}
+        )
+        db.commit()
+        worker.sync(db)
+        assert first in worker.index
+
+    def test_cluster_backlog(self, db):
+        """Existing grievances are signed in batches and clustered in id order."""
+        ids = [_grievance(db, text) for text in (WATER, EXAM, WATER_AGAIN, "", WATER)]
+        db.commit()
+        report = DuplicateDetector().cluster_backlog(db, batch_size=2)
+        assert (report.processed, report.duplicates, report.skipped) == (5, 2, 1)
+        clusters = dict(db.query(GrievanceSignature.grievance_id, GrievanceSignature.cluster_id))
+        assert clusters == {ids[0]: ids[0], ids[1]: ids[1], ids[2]: ids[0], ids[4]: ids[0]}
+        assert DuplicateDetector().cluster_backlog(db).processed == 1  # Only the empty one is left
+
+    def test_cluster_backlog_uses_creation_time(self, db):
+        """Backlog grievances are only matched within the window and keep their own created_at."""
+        start = datetime(2024, 1, 1)
+        ids = [
+            _grievance(db, WATER, created_at=start),
+            _grievance(db, WATER_AGAIN, created_at=start + timedelta(days=60)),
+            _grievance(db, WATER, created_at=start + timedelta(days=61)),
+        ]
+        db.commit()
+        report = DuplicateDetector(window_days=30).cluster_backlog(db)
+        assert report.duplicates == 1
+        rows = {r.grievance_id: r for r in db.query(GrievanceSignature)}
+        assert [rows[i].cluster_id for i in ids] == [ids[0], ids[1], ids[1]]
+        assert rows[ids[0]].created_at == start
+
+
+class TestDuplicateFlagOnCreate:
+    """Test the create endpoint's duplicate flag."""
+
+    def test_create_reports_duplicate_of(self, db, monkeypatch):
+        """The mounted v1 create route returns duplicate_of for the second near-identical grievance."""
+        monkeypatch.setattr(grievances_api, "audit_writer", AuditWriter(lambda: db, flush_interval=60))
+        monkeypatch.setattr(grievances_api, "duplicate_detector", DuplicateDetector())
+        monkeypatch.setattr(grievances_api.settings, "AUTO_ROUTING", False)
+        main_app.dependency_overrides[get_db] = lambda: db
+        main_app.dependency_overrides[deps.get_current_user] = lambda: db.get(User, 1)
+        try:
+            client = TestClient(main_app)
+            first = client.post(
+                "/api/v1/grievances/", json={"title": "Water", "category": "hostel", "description": WATER}
+            )
+            second = client.post(
+                "/api/v1/grievances/", json={"title": "Water", "category": "hostel", "description": WATER_AGAIN}
+            )
+        finally:
+            main_app.dependency_overrides.clear()
+
+        assert (first.status_code, second.status_code) == (201, 201)
+        assert first.json()["duplicate_of"] is None
+        assert second.json()["duplicate_of"] == first.json()["id"]
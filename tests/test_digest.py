@@ -0,0 +1,128 @@
+"""
+Unit tests for per-recipient notification digests.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.models.digest_item import DigestItem
+from app.models.failed_email import FailedEmail
+from app.services.digest import NotificationCoalescer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = datetime(2026, 1, 1, 12, 0)
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def sent_mail():
+    """Collects (to, subject, body) of every email sent."""
+    return []
+
+
+@pytest.fixture
+def coalescer(db_session, sent_mail):
+    """Coalescer with a 60s window driven by a fake clock, buffering in the test database."""
+    clock = FakeClock()
+
+    def send(to, subject, body, html_body=None):
+        sent_mail.append((to, subject, body))
+        return True
+
+    c = NotificationCoalescer(
+        window=60, send=send, clock=clock, session_factory=sessionmaker(bind=db_session.get_bind())
+    )
+    c.clock_ref = clock
+    return c
+
+
+class TestNotificationCoalescer:
+    """Test immediate vs digested delivery and coalescing."""
+
+    def test_immediate_events_bypass_buffer(self, coalescer, sent_mail):
+        """Immediate events are sent straight away."""
+        coalescer.submit("grievance_resolved", "s@example.com", "Resolved", "body", summary="#1 resolved")
+        assert sent_mail == [("s@example.com", "Resolved", "body")]
+        assert coalescer.pending() == 0
+
+    def test_status_changes_collapse_into_one_digest(self, coalescer, sent_mail):
+        """Several transitions of one grievance become one line in one email."""
+        for old, new in [("Submitted", "Under Review"), ("Under Review", "In Progress")]:
+            coalescer.submit(
+                "grievance_status_changed", "s@example.com", "Update", "body",
+                summary="Grievance #7 (Lab)", name="Sam", key=("status", 7), since=old, until=new,
+            )
+        coalescer.submit(
+            "grievance_status_changed", "s@example.com", "Update", "body",
+            summary="Grievance #8 (Hostel)", key=("status", 8), since="Submitted", until="Under Review",
+        )
+
+        assert coalescer.flush_due() == 0
+        assert sent_mail == []
+
+        coalescer.clock_ref.now += timedelta(seconds=61)
+        assert coalescer.flush_due() == 1
+
+        [(to, subject, body)] = sent_mail
+        assert to == "s@example.com"
+        assert subject == "Grievance Portal: 2 updates"
+        assert "Hello Sam" in body
+        assert "Grievance #7 (Lab): Submitted -> In Progress" in body
+        assert "Grievance #8 (Hostel): Submitted -> Under Review" in body
+
+    def test_single_item_keeps_original_email(self, coalescer, sent_mail):
+        """A window with one event sends that event's own email."""
+        coalescer.submit("grievance_created.admin", "admin@example.com", "New Grievance", "full body",
+                         summary="#1 new")
+        coalescer.clock_ref.now += timedelta(seconds=61)
+        coalescer.flush_due()
+        assert sent_mail == [("admin@example.com", "New Grievance", "full body")]
+
+    def test_recipients_are_buffered_separately(self, coalescer, sent_mail):
+        """Each recipient gets their own digest."""
+        for i in range(3):
+            coalescer.submit("grievance_created.admin", "admin@example.com", "New", "b", summary=f"#{i}")
+        coalescer.submit("grievance_status_changed", "s@example.com", "Update", "b", summary="#1",
+                         key=("status", 1), since="a", until="b")
+
+        assert coalescer.flush_all() == 2
+        assert sorted(to for to, _, _ in sent_mail) == ["admin@example.com", "s@example.com"]
+        admin_body = next(body for to, _, body in sent_mail if to == "admin@example.com")
+        assert all(f"#{i}" in admin_body for i in range(3))
+
+    def test_zero_window_disables_digests(self, sent_mail):
+        """A zero window sends everything immediately."""
+        c = NotificationCoalescer(window=0, send=lambda *a, **kw: sent_mail.append(a))
+        c.submit("grievance_status_changed", "s@example.com", "Update", "b", summary="#1")
+        assert len(sent_mail) == 1
+
+    def test_buffered_items_survive_a_restart(self, coalescer, db_session, sent_mail):
+        """Items are rows, so a new worker flushes what the old one buffered, once."""
+        for _ in range(2):  # The outbox redelivering the same message replaces the item
+            coalescer.submit("grievance_created.admin", "admin@example.com", "New", "b", summary="#1 new",
+                             key=("created", 1))
+        restarted = NotificationCoalescer(window=60, send=coalescer._send, clock=coalescer.clock_ref,
+                                          session_factory=coalescer.session_factory)
+        assert restarted.pending() == 1
+
+        coalescer.clock_ref.now += timedelta(seconds=61)
+        assert restarted.flush_due() == 1
+        assert restarted.flush_due() == 0
+        assert sent_mail == [("admin@example.com", "New", "b")]
+        assert db_session.query(DigestItem).count() == 0
+
+    def test_failed_digest_goes_to_retry_store(self, coalescer, db_session):
+        """A digest that cannot be sent becomes a failed email instead of being lost."""
+        coalescer._send = lambda *args, **kwargs: False
+        for n in (1, 2):
+            coalescer.submit("grievance_created.admin", "admin@example.com", "New", "b", summary=f"#{n} new")
+        assert coalescer.flush_all() == 1
+
+        failed = db_session.query(FailedEmail).one()
+        assert (failed.recipient, failed.subject) == ("admin@example.com", "Grievance Portal: 2 updates")
+        assert db_session.query(DigestItem).count() == 0
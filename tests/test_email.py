@@ -0,0 +1,129 @@
+"""
+Tests for SMTP delivery against a local SMTP sink.
+"""
+import time
+from email.mime.text import MIMEText
+
+import pytest
+
+from app.core.email import SMTPConnectionPool
+from benchmarks.smtp_sink import SMTPSink
+
+
+def _message(to="student@example.com"):
+    msg = MIMEText("body")
+    msg["Subject"] = "subject"
+    msg["From"] = "noreply@grievanceportal.local"
+    msg["To"] = to
+    return msg
+
+
+@pytest.fixture
+def smtp_sink():
+    with SMTPSink() as sink:
+        yield sink
+
+
+class TestSMTPConnectionPool:
+    """Test connection reuse, recycling and reconnects."""
+
+    def test_reuses_connection(self, smtp_sink):
+        """Sequential sends share one connection."""
+        pool = SMTPConnectionPool(smtp_sink.host, smtp_sink.port, max_size=2)
+        for _ in range(5):
+            pool.send_message(_message())
+        pool.close()
+
+        assert len(smtp_sink.messages) == 5
+        assert smtp_sink.connections_opened == 1
+        assert smtp_sink.messages[0][1] == ["student@example.com"]
+
+    def test_recycles_after_max_messages(self, smtp_sink):
+        """A connection is replaced once it has sent max_messages."""
+        pool = SMTPConnectionPool(smtp_sink.host, smtp_sink.port, max_messages=2)
+        for _ in range(5):
+            pool.send_message(_message())
+        pool.close()
+
+        assert len(smtp_sink.messages) == 5
+        assert smtp_sink.connections_opened == 3
+
+    def test_reconnects_after_server_drop(self, smtp_sink):
+        """A dropped pooled connection is replaced transparently."""
+        pool = SMTPConnectionPool(smtp_sink.host, smtp_sink.port, noop_interval=60)
+        pool.send_message(_message())
+        smtp_sink.drop_connections()
+        time.sleep(0.05)
+        pool.send_message(_message())
+        pool.close()
+
+        assert len(smtp_sink.messages) == 2
+        assert smtp_sink.connections_opened == 2
+
+    def test_noop_health_check_discards_dead_connection(self, smtp_sink):
+        """Idle connections are probed with NOOP before reuse."""
+        pool = SMTPConnectionPool(smtp_sink.host, smtp_sink.port, noop_interval=0)
+        pool.send_message(_message())
+        smtp_sink.drop_connections()
+        time.sleep(0.05)
+        pool.send_message(_message(), retries=0)
+        pool.close()
+
+        assert len(smtp_sink.messages) == 2
+
+    def test_send_email_uses_pool(self, smtp_sink, monkeypatch):
+        """send_email delivers through the shared pool."""
+        from app.core import email
+
+        monkeypatch.setattr(email.settings, "SMTP_HOST", smtp_sink.host)
+        monkeypatch.setattr(email.settings, "SMTP_PORT", smtp_sink.port)
+        email.reset_smtp_pool()
+        try:
+            assert email.send_email("a@example.com", "one", "body")
+            assert email.send_email("b@example.com", "two", "body")
+        finally:
+            email.reset_smtp_pool()
+
+        assert [m[1] for m in smtp_sink.messages] == [["a@example.com"], ["b@example.com"]]
+        assert smtp_sink.connections_opened == 1
+
+
+class TestAsyncEmailSender:
+    """Test the asyncio sender against the local sink."""
+
+    async def test_send_many_bounds_sessions(self, smtp_sink):
+        """Concurrent sends never open more sessions than the limit."""
+        from app.core.email import AsyncEmailSender
+
+        sender = AsyncEmailSender(smtp_sink.host, smtp_sink.port, max_concurrency=3)
+        messages = [(f"s{i}@example.com", f"subject {i}", "body") for i in range(20)]
+
+        results = await sender.send_many(messages)
+        await sender.close()
+
+        assert results == [True] * 20
+        assert len(smtp_sink.messages) == 20
+        assert smtp_sink.connections_opened <= 3
+
+    async def test_timeout_returns_false(self):
+        """A server slower than the per-message timeout fails fast."""
+        from app.core.email import AsyncEmailSender
+
+        with SMTPSink(message_delay=1.0) as sink:
+            sender = AsyncEmailSender(sink.host, sink.port, timeout=0.2)
+            started = time.perf_counter()
+            assert not await sender.send("s@example.com", "subject", "body")
+            assert time.perf_counter() - started < 1.0
+            await sender.close()
+
+    async def test_reconnects_after_server_drop(self, smtp_sink):
+        """A dropped idle session is replaced transparently."""
+        from app.core.email import AsyncEmailSender
+
+        sender = AsyncEmailSender(smtp_sink.host, smtp_sink.port, max_concurrency=1)
+        assert await sender.send("a@example.com", "one", "body")
+        smtp_sink.drop_connections()
+        assert await sender.send("b@example.com", "two", "body")
+        await sender.close()
+
+        assert len(smtp_sink.messages) == 2
@@ -0,0 +1,148 @@
+"""
+Unit tests for failed-email retries and the dead-letter store.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.config import settings
+from app.models.failed_email import FailedEmail
+from app.services import email_retry
+
+
+@pytest.fixture
+def smtp(monkeypatch):
+    """Controls whether send_email succeeds and records the calls."""
+    state = {"ok": False, "sent": []}
+
+    def fake_send(to, subject, body, html=False, html_body=None):
+        state["sent"].append(to)
+        return state["ok"]
+
+    monkeypatch.setattr(email_retry, "send_email", fake_send)
+    return state
+
+
+def _make_due(db_session):
+    for failed in db_session.query(FailedEmail):
+        failed.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+    db_session.commit()
+
+
+class TestBackoff:
+    """Test exponential backoff with jitter."""
+
+    def test_delay_grows_and_is_capped(self, monkeypatch):
+        """Delays double per attempt up to the cap."""
+        monkeypatch.setattr(settings, "EMAIL_RETRY_BASE_SECONDS", 10)
+        monkeypatch.setattr(settings, "EMAIL_RETRY_MAX_SECONDS", 60)
+        no_jitter = lambda a, b: b  # noqa: E731
+        delays = [email_retry.backoff_delay(n, no_jitter).total_seconds() for n in range(1, 6)]
+        assert delays == [10, 20, 40, 60, 60]
+
+    def test_jitter_stays_within_half_delay(self, monkeypatch):
+        """Jitter only varies the upper half of the delay."""
+        monkeypatch.setattr(settings, "EMAIL_RETRY_BASE_SECONDS", 10)
+        for _ in range(50):
+            seconds = email_retry.backoff_delay(3).total_seconds()
+            assert 20 <= seconds <= 40
+
+
+class TestRetryQueue:
+    """Test recording, retrying and dead-lettering."""
+
+    def test_failed_delivery_is_recorded(self, db_session):
+        """A failed send is stored for retry instead of dropped."""
+        email_retry.record_failure(db_session, "s@example.com", "subject", "body", "<p>body</p>", error="down")
+
+        failed = db_session.query(FailedEmail).one()
+        assert failed.recipient == "s@example.com"
+        assert failed.html_body == "<p>body</p>"
+        assert failed.status == "retrying"
+        assert failed.next_attempt_at > datetime.utcnow()
+
+    def test_successful_retry_removes_row(self, db_session, smtp):
+        """Retries wait for the backoff and clear the row on success."""
+        email_retry.record_failure(db_session, "s@example.com", "subject", "body")
+        assert email_retry.process_due(db_session) == 0  # backoff not elapsed
+
+        _make_due(db_session)
+        smtp["ok"] = True
+        assert email_retry.process_due(db_session) == 1
+        assert smtp["sent"] == ["s@example.com"]
+        assert db_session.query(FailedEmail).count() == 0
+
+    def test_dead_letter_after_max_attempts_and_replay(self, db_session, smtp, monkeypatch):
+        """Exhausted emails are dead-lettered and can be replayed."""
+        monkeypatch.setattr(settings, "EMAIL_MAX_ATTEMPTS", 3)
+        email_retry.record_failure(db_session, "s@example.com", "subject", "body")
+        for _ in range(2):
+            _make_due(db_session)
+            email_retry.process_due(db_session)
+
+        failed = db_session.query(FailedEmail).one()
+        assert failed.status == "dead"
+        assert failed.attempts == 3
+
+        # Dead letters are never picked up automatically
+        _make_due(db_session)
+        assert email_retry.process_due(db_session) == 0
+
+        email_retry.replay(db_session, failed)
+        smtp["ok"] = True
+        assert email_retry.process_due(db_session) == 1
+        assert db_session.query(FailedEmail).count() == 0
+
+    def test_claimed_rows_are_not_retried_twice(self, db_session, smtp):
+        """A row being retried by one worker is invisible to another."""
+        email_retry.record_failure(db_session, "s@example.com", "subject", "body")
+        _make_due(db_session)
+        from app.db.claim import claim_rows
+
+        now = datetime.utcnow()
+        claimed = claim_rows(db_session, FailedEmail, email_retry._claimable(now), 10, "sending", now)
+        assert len(claimed) == 1
+        assert email_retry.process_due(db_session) == 0
+
+    def test_tick_stops_at_max_runtime(self, db_session, smtp, monkeypatch):
+        """A tick stops claiming once its time budget is spent; the rest stay due."""
+        for n in range(3):
+            email_retry.record_failure(db_session, f"s{n}@example.com", "subject", "body")
+        _make_due(db_session)
+        clock = iter([0, 0, 5, 11, 11])  # Deadline at 10 s
+        monkeypatch.setattr("app.services.email_retry.time.monotonic", lambda: next(clock))
+        smtp["ok"] = True
+
+        assert email_retry.process_due(db_session, max_runtime=10) == 2
+        assert db_session.query(FailedEmail).one().status == "retrying"
+
+    def test_each_retry_is_committed(self, db_session, smtp, monkeypatch):
+        """An email is settled before the next is claimed, so a crash strands at most one."""
+        for n in range(3):
+            email_retry.record_failure(db_session, f"s{n}@example.com", "subject", "body")
+        _make_due(db_session)
+
+        def send(to, subject, body, html=False, html_body=None):
+            if len(smtp["sent"]) == 1:
+                raise SystemExit
+            smtp["sent"].append(to)
+            return True
+
+        monkeypatch.setattr(email_retry, "send_email", send)
+        with pytest.raises(SystemExit):
+            email_retry.process_due(db_session)
+        db_session.rollback()
+        assert sorted(f.status for f in db_session.query(FailedEmail)) == ["retrying", "sending"]
+
+    def test_stale_claims_use_retry_lock_timeout(self, db_session, smtp, monkeypatch):
+        """A retry held longer than EMAIL_RETRY_LOCK_TIMEOUT is reclaimed, whatever the outbox uses."""
+        monkeypatch.setattr(settings, "EMAIL_RETRY_LOCK_TIMEOUT", 60)
+        monkeypatch.setattr(settings, "OUTBOX_LOCK_TIMEOUT", 3600)
+        failed = email_retry.record_failure(db_session, "s@example.com", "subject", "body")
+        failed.status = "sending"
+        failed.locked_at = datetime.utcnow() - timedelta(seconds=120)
+        db_session.commit()
+
+        smtp["ok"] = True
+        assert email_retry.process_due(db_session) == 1
+        assert db_session.query(FailedEmail).count() == 0
@@ -0,0 +1,162 @@
+"""
+Unit tests for the real-time event bus and SSE stream.
+"""
+import asyncio
+import json
+import threading
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from app.api import deps, grievances as grievances_api
+from app.api.v1 import events as events_api
+from app.api.v1.events import event_stream
+from app.core import events as events_core, security
+from app.core.config import settings
+from app.core.events import (
+    EventBus,
+    LocalBroker,
+    TooManySubscribers,
+    create_stream_token,
+    user_channel,
+    verify_stream_token,
+)
+from app.db.session import get_db
+from app.main import app as main_app
+from app.models.grievance import Grievance
+from app.models.user import User
+from app.services.audit import AuditWriter
+
+
+@pytest.fixture
+def bus():
+    return EventBus(broker=None, queue_size=3, max_subscribers=2)
+
+
+class TestEventBus:
+    """Test publish/subscribe routing through the local broker."""
+
+    async def test_publish_reaches_channel_subscribers_only(self, bus):
+        """Events go to every stream of the target user and no one else."""
+        with bus.subscribe(user_channel(1)) as a, bus.subscribe(user_channel(2)) as b:
+            bus.publish(user_channel(1), {"grievance_id": 7, "status": "resolved"})
+            assert json.loads(await a.get(timeout=1)) == {"grievance_id": 7, "status": "resolved"}
+            assert await b.get(timeout=0.05) is None
+
+    async def test_publish_from_worker_thread(self, bus):
+        """Sync handlers run in the threadpool; their events reach the loop."""
+        with bus.subscribe("user:1") as subscription:
+            thread = threading.Thread(target=bus.publish, args=("user:1", {"n": 1}))
+            thread.start()
+            thread.join()
+            assert json.loads(await subscription.get(timeout=1)) == {"n": 1}
+
+    async def test_slow_subscriber_drops_oldest(self, bus):
+        """A full queue keeps the newest events."""
+        with bus.subscribe("user:1") as subscription:
+            for n in range(5):
+                bus.publish("user:1", {"n": n})
+            await asyncio.sleep(0)
+            received = [json.loads(subscription.queue.get_nowait())["n"] for _ in range(3)]
+            assert received == [2, 3, 4]
+            assert subscription.dropped == 2
+
+    async def test_subscriber_limit_and_cleanup(self, bus):
+        """Closed streams free their slot."""
+        with bus.subscribe("user:1"), bus.subscribe("user:2"):
+            assert bus.subscriber_count() == 2
+            with pytest.raises(TooManySubscribers):
+                with bus.subscribe("user:3"):
+                    pass
+        assert bus.subscriber_count() == 0
+        assert bus._channels == {}
+
+    def test_default_broker_is_local(self, bus):
+        """Without EVENT_BROKER=redis events stay in-process."""
+        assert isinstance(bus.broker, LocalBroker)
+
+
+class TestEventStream:
+    """Test SSE framing."""
+
+    async def test_stream_frames_events_and_heartbeats(self, bus):
+        """Idle streams get keepalive comments; events get named frames."""
+        stream = event_stream(bus, "user:1", heartbeat=0.05)
+        assert (await stream.__anext__()).startswith("retry:")
+        assert await stream.__anext__() == ": keepalive\n\n"
+
+        bus.publish("user:1", {"grievance_id": 3, "status": "In Progress"})
+        frame = await stream.__anext__()
+        assert frame.startswith("event: grievance_status\ndata: ")
+        assert json.loads(frame.split("data: ", 1)[1]) == {"grievance_id": 3, "status": "In Progress"}
+
+        await stream.aclose()
+        assert bus.subscriber_count() == 0
+
+
+class TestStreamAuth:
+    """Test short-lived stream tokens."""
+
+    @pytest.fixture
+    def client(self, db_session, monkeypatch):
+        db_session.add(User(id=1, email="student@example.com", hashed_password="x"))
+        db_session.commit()
+        monkeypatch.setattr(deps, "SessionLocal", lambda: db_session)
+        app = FastAPI()
+        app.include_router(events_api.router, prefix="/api/v1/events")
+        app.dependency_overrides[get_db] = lambda: db_session
+        return TestClient(app)
+
+    def test_stream_token_opens_only_the_stream(self, client, db_session):
+        """A stream token authenticates the stream but no other endpoint, and only until it expires."""
+        login = security.create_access_token("1")
+        response = client.post("/api/v1/events/token", headers={"Authorization": f"Bearer {login}"})
+        token = response.json()["token"]
+        assert response.json()["expires_in"] == settings.SSE_TOKEN_TTL_SECONDS
+
+        assert verify_stream_token(token) == 1
+        assert deps.get_stream_user(header_token=None, token=token).id == 1
+        with pytest.raises(HTTPException):
+            deps.user_from_token(token, db_session)
+        assert client.post("/api/v1/events/token", headers={"Authorization": f"Bearer {token}"}).status_code == 401
+        assert verify_stream_token(create_stream_token(1, ttl_seconds=-1)) is None
+
+    def test_login_token_is_refused_in_query(self, client):
+        """Login JWTs no longer work as ?token= (or the old ?access_token=)."""
+        login = security.create_access_token("1")
+        assert verify_stream_token(login) is None
+        assert client.get("/api/v1/events/", params={"token": login}).status_code == 401
+        assert client.get("/api/v1/events/", params={"access_token": login}).status_code == 401
+
+
+class TestMountedPublishers:
+    """Test that the app's grievance mutation routes push to the owner's stream."""
+
+    async def test_status_changes_reach_student_stream(self, db_session, monkeypatch):
+        """PATCH, resolve and bulk-status on the mounted app each publish after commit."""
+        local = EventBus(broker=None, queue_size=10, max_subscribers=10)
+        monkeypatch.setattr(events_core, "bus", local)
+        monkeypatch.setattr(grievances_api, "audit_writer", AuditWriter(lambda: db_session, flush_interval=60))
+        db_session.add_all([
+            User(id=1, email="student@example.com", hashed_password="x"),
+            User(id=9, email="admin@example.com", hashed_password="x", is_admin=True),
+        ])
+        db_session.add_all([Grievance(id=n, student_id=1, title="T", description="D") for n in (1, 2)])
+        db_session.commit()
+
+        main_app.dependency_overrides[get_db] = lambda: db_session
+        main_app.dependency_overrides[deps.get_current_user] = lambda: db_session.get(User, 9)
+        try:
+            client = TestClient(main_app)
+            with local.subscribe(user_channel(1)) as subscription:
+                client.patch("/api/v1/grievances/1", json={"status": "in_progress"})
+                client.post("/api/v1/grievances/1/resolve", params={"resolution": "Fixed"})
+                client.post("/api/v1/admin/grievances/bulk-status", json={"status": "closed", "ids": [2]})
+                events = [json.loads(await subscription.get(timeout=1)) for _ in range(3)]
+        finally:
+            main_app.dependency_overrides.clear()
+
+        assert [(e["grievance_id"], e["old_status"], e["status"]) for e in events] == [
+            (1, "submitted", "in_progress"), (1, "in_progress", "resolved"), (2, "submitted", "closed"),
+        ]
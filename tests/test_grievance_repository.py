@@ -0,0 +1,156 @@
+"""
+Unit tests for the grievance repository backends and the router using them.
+"""
+import threading
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import deps, grievances as grievances_api
+from app.db.session import get_db
+from app.models.grievance import Grievance, StatusEnum
+from app.models.outbox import OutboxMessage
+from app.models.user import User
+from app.services.audit import AuditWriter
+from app.services.dedup import DuplicateDetector
+from app.services.grievance_repository import (
+    InMemoryGrievanceRepository,
+    SqlGrievanceRepository,
+    normalize_status,
+)
+
+
+@pytest.fixture(params=["memory", "sql"])
+def repo(request, db_session):
+    """Every contract test runs against both backends."""
+    if request.param == "memory":
+        return InMemoryGrievanceRepository()
+    db_session.add_all([
+        User(id=1, email="one@example.com", hashed_password="x"),
+        User(id=2, email="two@example.com", hashed_password="x"),
+    ])
+    db_session.commit()
+    return SqlGrievanceRepository(db_session)
+
+
+def _add(repo, student_id=1, dept_id=None, **extra):
+    return repo.add(
+        title="Broken projector", description="Room 101", student_id=student_id,
+        category="facilities", dept_id=dept_id,
+        student_email=extra.pop("student_email", f"{'one' if student_id == 1 else 'two'}@example.com"),
+        **extra,
+    )
+
+
+class TestGrievanceRepository:
+    """Test that both backends share the same semantics."""
+
+    def test_add_and_get(self, repo):
+        """New grievances get ids and start as submitted."""
+        created = _add(repo)
+        assert created["id"] == 1
+        assert created["status"] == "submitted"
+        assert repo.get(created["id"]) == created
+        assert repo.get(999) is None
+
+    def test_returned_dicts_are_copies(self, repo):
+        """Mutating a result does not change stored data."""
+        created = _add(repo)
+        created["status"] = "resolved"
+        assert repo.get(created["id"])["status"] == "submitted"
+
+    def test_update_normalizes_status_and_reindexes(self, repo):
+        """Display values map to member names; status lookups follow updates."""
+        first, second = _add(repo), _add(repo)
+        updated = repo.update(first["id"], status="In Progress", handler_id=2)
+        assert updated["status"] == "in_progress"
+        assert updated["handler_id"] == 2
+
+        assert [g["id"] for g in repo.list_by_status("in_progress")] == [first["id"]]
+        assert [g["id"] for g in repo.list_by_status(StatusEnum.submitted)] == [second["id"]]
+        assert repo.update(999, status="resolved") is None
+
+    def test_secondary_lookups(self, repo):
+        """Lookups by student and department return only matching rows, oldest first."""
+        a = _add(repo, student_id=1, dept_id=None)
+        b = _add(repo, student_id=2, dept_id=7)
+        c = _add(repo, student_id=1, dept_id=None)
+        assert [g["id"] for g in repo.list_by_student(1)] == [a["id"], c["id"]]
+        assert [g["id"] for g in repo.list_by_student(2)] == [b["id"]]
+        assert repo.list_by_student(3) == []
+        assert [g["id"] for g in repo.list_by_dept(7)] == [b["id"]]
+
+    def test_rejects_unknown_status_and_fields(self, repo):
+        """Invalid statuses and read-only fields raise ValueError."""
+        created = _add(repo)
+        with pytest.raises(ValueError):
+            repo.update(created["id"], status="lost")
+        with pytest.raises(ValueError):
+            repo.update(created["id"], student_id=2)
+
+
+class TestInMemoryBackend:
+    """Test memory-backend specifics."""
+
+    def test_concurrent_adds_get_unique_ids(self):
+        """The lock keeps ids and indexes consistent across threads."""
+        repo = InMemoryGrievanceRepository()
+
+        def add_many():
+            for _ in range(200):
+                _add(repo)
+
+        threads = [threading.Thread(target=add_many) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        ids = [g["id"] for g in repo.list_by_student(1)]
+        assert len(ids) == len(set(ids)) == 1600
+        assert len(repo.list_by_status("submitted")) == 1600
+
+    def test_normalize_status(self):
+        """Both enum values and names are accepted."""
+        assert normalize_status("Under Review") == "under_review"
+        assert normalize_status("closed") == "closed"
+
+
+class TestGrievanceRouter:
+    """Test app/api/grievances.py on the SQL backend."""
+
+    def test_lifecycle_commits_with_outbox(self, db_session, monkeypatch):
+        """Grievance changes and their outbox messages are committed together."""
+        monkeypatch.setattr(grievances_api, "publish_grievance_status", lambda *a, **k: None)
+        monkeypatch.setattr(grievances_api, "audit_writer", AuditWriter(lambda: db_session, flush_interval=60))
+        monkeypatch.setattr(grievances_api, "duplicate_detector", DuplicateDetector())
+        db_session.add(User(id=1, email="one@example.com", hashed_password="x"))
+        db_session.add(User(id=9, email="admin@example.com", hashed_password="x", is_admin=True))
+        db_session.commit()
+
+        app = FastAPI()
+        app.include_router(grievances_api.router)
+        app.dependency_overrides[get_db] = lambda: db_session
+        app.dependency_overrides[deps.get_current_user] = lambda: db_session.get(User, 1)
+        app.dependency_overrides[deps.admin_required] = lambda: db_session.get(User, 9)
+        client = TestClient(app)
+
+        created = client.post(
+            "/api/v1/grievances/",
+            json={"title": "Fees", "category": "finance", "description": "Double charged"},
+        ).json()
+        gid = created["id"]
+        assert client.patch(f"/api/v1/grievances/{gid}", json={"status": "under_review"}).json()["status"] == "under_review"
+        assert client.patch(f"/api/v1/grievances/{gid}", json={"status": "lost"}).status_code == 422
+        assert client.post(f"/api/v1/grievances/{gid}/resolve", params={"resolution": "Refunded"}).status_code == 200
+
+        stored = db_session.get(Grievance, gid)
+        assert stored.status == StatusEnum.resolved
+        assert stored.resolution == "Refunded"
+        assert [m.event for m in db_session.query(OutboxMessage).order_by(OutboxMessage.id)] == [
+            "grievance_created.admin", "grievance_created.admin.inbox",
+            "grievance_created.student", "grievance_created.student.inbox",
+            "grievance_status_changed", "grievance_status_changed.inbox",
+            "grievance_resolved", "grievance_resolved.inbox",
+        ]
+        assert [g["id"] for g in client.get("/api/v1/grievances/", params={"status": "Resolved"}).json()] == [gid]
@@ -0,0 +1,80 @@
+"""
+Unit tests for the in-app notification inbox and its unread counter.
+"""
+from sqlalchemy import func, select
+
+from app.models.notification import Notification
+from app.models.user import User
+from app.services import inbox
+
+
+def _user(db, email="student@example.com"):
+    user = User(email=email, hashed_password="x")
+    db.add(user)
+    db.commit()
+    return user
+
+
+def _count_unread(db, user_id):
+    return db.execute(
+        select(func.count()).where(Notification.user_id == user_id, Notification.is_read.is_(False))
+    ).scalar()
+
+
+class TestInbox:
+    """Test notifications, pagination and the denormalized counter."""
+
+    def test_add_increments_counter(self, db_session):
+        """The counter tracks inserts without counting rows."""
+        user = _user(db_session)
+        assert inbox.unread_count(db_session, user.id) == 0
+        for n in range(3):
+            inbox.add_notification(db_session, user.id, "grievance_status_changed", f"Update {n}")
+        db_session.commit()
+        assert inbox.unread_count(db_session, user.id) == 3
+
+    def test_keyset_pagination_newest_first(self, db_session):
+        """Pages follow the `before` cursor without overlap."""
+        user = _user(db_session)
+        for n in range(5):
+            inbox.add_notification(db_session, user.id, "k", f"n{n}")
+        db_session.commit()
+
+        first = inbox.list_notifications(db_session, user.id, limit=2)
+        second = inbox.list_notifications(db_session, user.id, limit=2, before=first[-1].id)
+        assert [n.title for n in first] == ["n4", "n3"]
+        assert [n.title for n in second] == ["n2", "n1"]
+
+    def test_mark_read_bulk_keeps_counter_exact(self, db_session):
+        """Marking read decrements by the rows actually changed."""
+        user = _user(db_session)
+        other = _user(db_session, "other@example.com")
+        first = inbox.add_notification(db_session, user.id, "k", "t")
+        db_session.flush()
+        ids = [first.id]
+        for _ in range(3):
+            inbox.add_notification(db_session, user.id, "k", "t")
+        inbox.add_notification(db_session, other.id, "k", "t")
+        db_session.commit()
+
+        assert inbox.mark_read(db_session, user.id, ids) == 1
+        assert inbox.mark_read(db_session, user.id, ids) == 0  # already read
+        assert inbox.unread_count(db_session, user.id) == 3
+
+        # Another user's notifications cannot be marked
+        other_id = inbox.list_notifications(db_session, other.id)[0].id
+        assert inbox.mark_read(db_session, user.id, [other_id]) == 0
+
+        assert inbox.mark_read(db_session, user.id) == 3
+        assert inbox.unread_count(db_session, user.id) == _count_unread(db_session, user.id) == 0
+        assert inbox.unread_count(db_session, other.id) == 1
+        assert len(inbox.list_notifications(db_session, user.id, unread_only=True)) == 0
+
+    def test_record_notification_by_email(self, db_session, monkeypatch):
+        """Hooks address users by email; unknown addresses are skipped."""
+        user_id = _user(db_session).id
+        monkeypatch.setattr(inbox, "SessionLocal", lambda: db_session)
+        assert inbox.record_notification("student@example.com", "grievance_resolved", "Resolved", grievance_id=9)
+        assert not inbox.record_notification("nobody@example.com", "grievance_resolved", "Resolved")
+        assert inbox.unread_count(db_session, user_id) == 1
+        assert inbox.list_notifications(db_session, user_id)[0].grievance_id == 9
@@ -0,0 +1,130 @@
+"""
+Unit tests for queued, structured logging.
+"""
+import json
+import logging
+import queue
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.logging_setup import BoundedQueueHandler, RequestIdMiddleware, setup_logging, shutdown_logging
+
+
+class ListHandler(logging.Handler):
+    def __init__(self, delay: float = 0.0):
+        super().__init__()
+        self.delay = delay
+        self.lines = []
+
+    def emit(self, record):
+        time.sleep(self.delay)
+        self.lines.append(self.format(record))
+
+
+@pytest.fixture
+def capture():
+    """Route logging to an in-memory target for the test, then restore the app's setup."""
+    shutdown_logging()
+    target = ListHandler()
+    handler = setup_logging(level="INFO", log_format="json", target=target, queue_size=100)
+    yield target, handler
+    shutdown_logging()
+    setup_logging()
+
+
+def _isolated_logger(handler: BoundedQueueHandler) -> logging.Logger:
+    logger = logging.getLogger("tests.logging_setup.isolated")
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+class TestStructuredRecords:
+    """Test the JSON output and request correlation."""
+
+    def test_json_record_with_extra_and_traceback(self, capture):
+        """Each record is one JSON object with its extra fields and traceback."""
+        target, handler = capture
+        logger = logging.getLogger("tests.logging_setup")
+        logger.debug("hidden %s", "debug")
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("Sending %s failed", "digest", extra={"grievance_id": 7})
+        handler.queue.join()
+
+        entries = [json.loads(line) for line in target.lines if '"tests.logging_setup"' in line]
+        assert len(entries) == 1
+        entry = entries[0]
+        assert (entry["level"], entry["message"], entry["grievance_id"]) == ("ERROR", "Sending digest failed", 7)
+        assert "ValueError: boom" in entry["exc_info"] and "request_id" not in entry
+
+    def test_request_id_reaches_threadpool_records(self, capture):
+        """Records from a sync endpoint carry the request id, which is echoed or generated."""
+        target, handler = capture
+        app = FastAPI()
+
+        @app.get("/work")
+        def work():
+            logging.getLogger("tests.logging_setup").info("working")
+            return {}
+
+        app.add_middleware(RequestIdMiddleware)
+        client = TestClient(app)
+        given = client.get("/work", headers={"X-Request-ID": "req-123"})
+        generated = client.get("/work", headers={"X-Request-ID": "x" * 500})
+        handler.queue.join()
+
+        assert given.headers["x-request-id"] == "req-123"
+        assert len(generated.headers["x-request-id"]) == 32
+        ids = [json.loads(line).get("request_id") for line in target.lines if "working" in line]
+        assert ids == ["req-123", generated.headers["x-request-id"]]
+
+
+class TestBoundedQueue:
+    """Test the overflow policies and the non-blocking write path."""
+
+    def test_drop_newest_counts_and_reports(self):
+        """Records past the bound are dropped, then reported once there is room."""
+        handler = BoundedQueueHandler(queue.Queue(2), "drop_newest")
+        logger = _isolated_logger(handler)
+        for n in range(5):
+            logger.info("record %d", n)
+        assert handler.dropped_total == 3
+        assert [handler.queue.get_nowait().getMessage() for _ in range(2)] == ["record 0", "record 1"]
+
+        logger.info("record 5")
+        messages = [handler.queue.get_nowait().getMessage() for _ in range(2)]
+        assert messages == ["record 5", "3 log records dropped: logging queue full"]
+        with pytest.raises(ValueError):
+            BoundedQueueHandler(queue.Queue(2), "discard")
+
+    def test_drop_oldest_keeps_newest(self):
+        """With drop_oldest the queue ends up holding the latest records."""
+        handler = BoundedQueueHandler(queue.Queue(2), "drop_oldest")
+        logger = _isolated_logger(handler)
+        for n in range(4):
+            logger.info("record %d", n)
+        assert [handler.queue.get_nowait().getMessage() for _ in range(2)] == ["record 2", "record 3"]
+        assert handler.dropped_total == 2
+
+    def test_slow_writer_does_not_block_callers(self, capture):
+        """Logging returns immediately while the target takes 20 ms per record."""
+        shutdown_logging()
+        target = ListHandler(delay=0.02)
+        handler = setup_logging(level="INFO", log_format="text", target=target, queue_size=100)
+        logger = logging.getLogger("tests.logging_setup")
+
+        started = time.perf_counter()
+        for n in range(25):
+            logger.info("record %d", n)
+        elapsed = time.perf_counter() - started
+        handler.queue.join()
+
+        assert elapsed < 0.25  # Writing them takes 0.5 s
+        assert sum("record" in line for line in target.lines) == 25
+        assert any(line.endswith("tests.logging_setup [-]: record 0") for line in target.lines)
@@ -0,0 +1,114 @@
+"""
+Unit tests for request and SQL metrics.
+"""
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.metrics import (
+    Counter,
+    Histogram,
+    MetricsMiddleware,
+    Registry,
+    RequestMetrics,
+    instrument_engine,
+    request_metrics,
+)
+from app.main import app as main_app
+
+
+class TestExposition:
+    """Test the Prometheus text format."""
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Bucket lines count every observation at or below their bound."""
+        registry = Registry()
+        histogram = registry.register(Histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1)))
+        for value in (0.05, 0.1, 0.5, 3):
+            histogram.observe(("/a",), value)
+        lines = registry.render().splitlines()
+        assert lines[:2] == ["# HELP latency_seconds Latency.", "# TYPE latency_seconds histogram"]
+        assert 'latency_seconds_bucket{route="/a",le="0.1"} 2' in lines
+        assert 'latency_seconds_bucket{route="/a",le="1"} 3' in lines
+        assert 'latency_seconds_bucket{route="/a",le="+Inf"} 4' in lines
+        assert 'latency_seconds_sum{route="/a"} 3.65' in lines
+        assert 'latency_seconds_count{route="/a"} 4' in lines
+
+    def test_label_values_are_escaped(self):
+        """Quotes, backslashes and newlines cannot break a sample line."""
+        registry = Registry()
+        counter = registry.register(Counter("events_total", "Events.", ("name",)))
+        counter.inc(('a"b\\c\n',))
+        assert 'events_total{name="a\\"b\\\\c\\n"} 1' in registry.render()
+
+
+class TestMetricsMiddleware:
+    """Test per-request recording."""
+
+    @pytest.fixture
+    def client(self, db_session):
+        instrument_engine(db_session.get_bind())
+        metrics = RequestMetrics(Registry())
+        app = FastAPI()
+
+        @app.get("/items/{item_id}")
+        def read_item(item_id: int, db=Depends(lambda: db_session)):
+            for _ in range(3):
+                db.execute(text("SELECT 1"))
+            return {"item_id": item_id}
+
+        @app.get("/boom")
+        def boom():
+            raise RuntimeError("boom")
+
+        app.add_middleware(MetricsMiddleware, metrics=metrics)
+        return TestClient(app, raise_server_exceptions=False), metrics
+
+    def test_records_route_template_and_sql(self, client):
+        """Requests are labelled by route template and count their SQL statements."""
+        client, metrics = client
+        for item_id in (1, 2):
+            client.get(f"/items/{item_id}")
+        labels = ("GET", "/items/{item_id}")
+        assert metrics.requests.value(labels + ("200",)) == 2
+        assert metrics.duration.snapshot(labels)[2] == 2
+        assert metrics.db_queries.snapshot(labels)[1] == 6
+        assert metrics.db_seconds.snapshot(labels)[1] > 0
+        assert metrics.response_size.snapshot(labels)[1] == 2 * len(b'{"item_id":1}')
+        assert metrics.in_progress.value(("GET",)) == 0
+
+    def test_unmatched_and_failing_requests(self, client):
+        """Unknown paths share one label; exceptions are counted as 500s."""
+        client, metrics = client
+        client.get("/nope/1")
+        client.get("/nope/2")
+        client.get("/boom")
+        assert metrics.requests.value(("GET", "unmatched", "404")) == 2
+        assert metrics.requests.value(("GET", "/boom", "500")) == 1
+        assert metrics.db_queries.snapshot(("GET", "/boom"))[1] == 0
+
+
+class TestMetricsEndpoint:
+    """Test GET /metrics on the application."""
+
+    def test_scrape(self, monkeypatch):
+        """The app exposes its own request metrics to scrapers holding the token."""
+        monkeypatch.setattr(settings, "METRICS_TOKEN", "s3cret")
+        client = TestClient(main_app)
+        client.get("/health")
+        response = client.get("/metrics", headers={"Authorization": "Bearer s3cret"})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert 'http_requests_total{method="GET",route="/health",status="200"}' in response.text
+        assert request_metrics.requests.value(("GET", "/health", "200")) >= 1
+
+    def test_scrape_requires_token(self, monkeypatch):
+        """Without a configured token the endpoint is closed; a wrong token is rejected."""
+        client = TestClient(main_app)
+        monkeypatch.setattr(settings, "METRICS_TOKEN", "")
+        assert client.get("/metrics", headers={"Authorization": "Bearer "}).status_code == 404
+        monkeypatch.setattr(settings, "METRICS_TOKEN", "s3cret")
+        assert client.get("/metrics").status_code == 401
+        assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
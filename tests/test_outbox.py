@@ -0,0 +1,245 @@
+"""
+Unit tests for the notification outbox.
+"""
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import deps
+from app.api.v1 import admin
+from app.core.config import settings
+from app.db.session import get_db
+from app.models.outbox import OutboxMessage
+from app.models.user import User
+from app.services import digest, inbox, notifications, outbox
+
+
+@pytest.fixture
+def delivered(monkeypatch):
+    """Replace notification handlers with recorders."""
+    calls = []
+    for event in list(outbox.NOTIFICATION_HANDLERS):
+        monkeypatch.setitem(
+            outbox.NOTIFICATION_HANDLERS, event, lambda event=event, **kw: calls.append((event, kw))
+        )
+    return calls
+
+
+class TestOutbox:
+    """Test enqueue, claiming and retry state."""
+
+    def test_enqueue_is_part_of_caller_transaction(self, db_session):
+        """Rolled-back changes leave no outbox rows behind."""
+        outbox.enqueue(db_session, "grievance_resolved", grievance_id=1, student_email="s@example.com",
+                       student_name="S", title="t")
+        db_session.rollback()
+        assert db_session.query(OutboxMessage).count() == 0
+
+        outbox.enqueue(db_session, "grievance_resolved", grievance_id=1, student_email="s@example.com",
+                       student_name="S", title="t")
+        db_session.commit()
+        messages = db_session.query(OutboxMessage).order_by(OutboxMessage.id).all()
+        assert [m.event for m in messages] == ["grievance_resolved", "grievance_resolved.inbox"]
+        assert {m.status for m in messages} == {"pending"}
+        assert json.loads(messages[1].payload) == json.loads(messages[0].payload)
+        assert json.loads(messages[0].payload)["grievance_id"] == 1
+
+    def test_enqueue_rejects_unknown_event(self, db_session):
+        """Only events with a registered handler, or that fan out to recipients that have one, can be queued."""
+        with pytest.raises(ValueError):
+            outbox.enqueue(db_session, "no_such_event")
+        with pytest.raises(ValueError):
+            outbox.enqueue(db_session, "grievance_resolved" + outbox.INBOX_SUFFIX)
+        assert "grievance_created" not in outbox.NOTIFICATION_HANDLERS
+        assert [m.event for m in outbox.enqueue(db_session, "grievance_created", grievance_id=1)] == [
+            "grievance_created.admin", "grievance_created.admin.inbox",
+            "grievance_created.student", "grievance_created.student.inbox",
+        ]
+
+    def test_process_batch_delivers_messages(self, db_session, delivered):
+        """Claimed messages are dispatched and marked sent."""
+        for i in range(3):
+            outbox.enqueue(db_session, "grievance_assigned", grievance_id=i, handler_email="h@example.com",
+                           handler_name="H", grievance_title="t")
+        db_session.commit()
+
+        assert outbox.process_batch(db_session, batch_size=4) == 4
+        assert outbox.process_batch(db_session, batch_size=4) == 2
+        assert outbox.process_batch(db_session, batch_size=4) == 0
+
+        assert [(event, kw["grievance_id"]) for event, kw in delivered if event == "grievance_assigned"] == [
+            ("grievance_assigned", 0), ("grievance_assigned", 1), ("grievance_assigned", 2)
+        ]
+        assert len(delivered) == 6
+        statuses = {m.status for m in db_session.query(OutboxMessage)}
+        assert statuses == {"sent"}
+
+    def test_claims_do_not_overlap(self, db_session):
+        """A claimed message is not handed out again."""
+        for i in range(4):
+            outbox.enqueue(db_session, "grievance_assigned", grievance_id=i, handler_email="h@example.com",
+                           handler_name="H", grievance_title="t")
+        db_session.commit()
+
+        first = outbox.claim_batch(db_session, 5)
+        second = outbox.claim_batch(db_session, 5)
+
+        assert len(first) == 5
+        assert len(second) == 3
+        assert not {m.id for m in first} & {m.id for m in second}
+
+    def test_failure_schedules_retry_then_gives_up(self, db_session, monkeypatch):
+        """Failed messages back off and are marked failed after max attempts."""
+        def boom(**kwargs):
+            raise RuntimeError("smtp down")
+
+        monkeypatch.setitem(outbox.NOTIFICATION_HANDLERS, "grievance_resolved", boom)
+        monkeypatch.setattr(notifications, "record_notification", lambda *args: True)
+        monkeypatch.setattr(settings, "OUTBOX_MAX_ATTEMPTS", 2)
+        outbox.enqueue(db_session, "grievance_resolved", grievance_id=1, student_email="s@example.com",
+                       student_name="S", title="t")
+        db_session.commit()
+
+        outbox.process_batch(db_session)
+        message = db_session.query(OutboxMessage).filter(OutboxMessage.event == "grievance_resolved").one()
+        assert message.status == "pending"
+        assert message.attempts == 1
+        assert message.last_error == "smtp down"
+        assert message.next_attempt_at > datetime.utcnow()
+
+        # Not due yet
+        assert outbox.process_batch(db_session) == 0
+
+        message.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+        db_session.commit()
+        outbox.process_batch(db_session)
+        db_session.refresh(message)
+        assert message.status == "failed"
+        assert message.attempts == 2
+
+    def test_retry_delay_is_jittered_and_capped(self, monkeypatch):
+        """Retries back off exponentially, up to the cap, with the upper half randomized."""
+        monkeypatch.setattr(settings, "OUTBOX_RETRY_BASE_SECONDS", 10)
+        monkeypatch.setattr(settings, "OUTBOX_RETRY_MAX_SECONDS", 60)
+        no_jitter = lambda a, b: b  # noqa: E731
+        assert [outbox.retry_delay(n, no_jitter).total_seconds() for n in range(1, 6)] == [10, 20, 40, 60, 60]
+        for _ in range(50):
+            assert 20 <= outbox.retry_delay(3).total_seconds() <= 40
+
+    def test_stale_claims_are_reclaimed(self, db_session):
+        """Messages locked by a dead worker become claimable after the lock timeout."""
+        outbox.enqueue(db_session, "grievance_assigned", grievance_id=1, handler_email="h@example.com",
+                       handler_name="H", grievance_title="t")
+        db_session.commit()
+        assert len(outbox.claim_batch(db_session, 10)) == 2
+
+        later = datetime.utcnow() + timedelta(seconds=settings.OUTBOX_LOCK_TIMEOUT + 1)
+        reclaimed = outbox.claim_batch(db_session, 10, now=later)
+        assert len(reclaimed) == 2
+        assert {m.attempts for m in reclaimed} == {2}
+
+    def test_each_message_is_committed_before_the_next(self, db_session, monkeypatch):
+        """A worker dying mid-batch leaves the messages it already delivered marked sent."""
+        def die_on_second(grievance_id, **kwargs):
+            if grievance_id == 1:
+                raise SystemExit("worker killed")
+
+        monkeypatch.setitem(outbox.NOTIFICATION_HANDLERS, "grievance_assigned", die_on_second)
+        monkeypatch.setattr(notifications, "record_notification", lambda *args: True)
+        for i in range(3):
+            outbox.enqueue(db_session, "grievance_assigned", grievance_id=i, handler_email="h@example.com",
+                           handler_name="H", grievance_title="t")
+        db_session.commit()
+
+        with pytest.raises(SystemExit):
+            outbox.process_batch(db_session)
+        db_session.rollback()
+        statuses = [m.status for m in db_session.query(OutboxMessage).order_by(OutboxMessage.id)]
+        assert statuses == ["sent", "sent", "processing", "processing", "processing", "processing"]
+
+    def test_failed_send_is_retried_per_recipient(self, db_session, monkeypatch):
+        """grievance_created is one message per recipient; a rejected email fails only its own message."""
+        sent = []
+
+        def smtp(to, subject, body, html_body=None):
+            sent.append(to)
+            return to != settings.ADMIN_EMAIL
+
+        monkeypatch.setattr(digest.coalescer, "window", 0)
+        monkeypatch.setattr(digest, "send_email", smtp)
+        monkeypatch.setattr(notifications, "record_notification", lambda *args: True)
+        outbox.enqueue(db_session, "grievance_created", grievance_id=1, student_email="s@example.com",
+                       student_name="S", title="t")
+        db_session.commit()
+
+        assert outbox.process_batch(db_session) == 4
+        messages = {m.event: m for m in db_session.query(OutboxMessage)}
+        assert messages["grievance_created.student"].status == "sent"
+        assert messages["grievance_created.admin.inbox"].status == "sent"
+        assert messages["grievance_created.admin"].status == "pending"
+        assert settings.ADMIN_EMAIL in messages["grievance_created.admin"].last_error
+        assert sorted(sent) == sorted([settings.ADMIN_EMAIL, "s@example.com"])
+
+    def test_inbox_entry_survives_smtp_outage(self, db_session, monkeypatch):
+        """The inbox entry is written once even while its email keeps failing."""
+        def smtp_down(*args, **kwargs):
+            raise ConnectionRefusedError("smtp down")
+
+        db_session.add(User(id=1, email="s@example.com", hashed_password="x"))
+        db_session.commit()
+        monkeypatch.setattr(digest.coalescer, "window", 0)
+        monkeypatch.setattr(digest, "send_email", smtp_down)
+        monkeypatch.setattr(inbox, "SessionLocal", lambda: db_session)
+        outbox.enqueue(db_session, "grievance_resolved", grievance_id=1, student_email="s@example.com",
+                       student_name="S", title="t", resolution="Refunded")
+        db_session.commit()
+
+        assert outbox.process_batch(db_session) == 2
+        email = db_session.query(OutboxMessage).filter(OutboxMessage.event == "grievance_resolved").one()
+        email.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+        db_session.commit()
+        assert outbox.process_batch(db_session) == 1
+
+        assert (email.status, email.attempts) == ("pending", 2)
+        assert "smtp down" in email.last_error
+        entries = inbox.list_notifications(db_session, 1)
+        assert [(n.kind, n.body, n.grievance_id) for n in entries] == [("grievance_resolved", "Refunded", 1)]
+
+
+class TestFailedNotificationEndpoints:
+    """Test listing and replaying failed outbox messages."""
+
+    @pytest.fixture
+    def client(self, db_session):
+        db_session.add(User(id=9, email="admin@example.com", hashed_password="x", is_admin=True))
+        db_session.commit()
+        app = FastAPI()
+        app.include_router(admin.router, prefix="/api/v1/admin")
+        app.dependency_overrides[get_db] = lambda: db_session
+        app.dependency_overrides[deps.admin_required] = lambda: db_session.get(User, 9)
+        return TestClient(app)
+
+    def test_failed_messages_are_listed_and_replayed(self, client, db_session, delivered):
+        """Exhausted notifications show up as dead letters and go out again once replayed."""
+        failed, *sent = outbox.enqueue(db_session, "grievance_created", grievance_id=1, student_email="s@example.com",
+                                       student_name="S", title="t")
+        failed.status, failed.attempts, failed.last_error = "failed", 5, "smtp down"
+        for message in sent:
+            message.status = "sent"
+        db_session.commit()
+
+        listed = client.get("/api/v1/admin/dead-letters/outbox").json()
+        assert [(m["id"], m["event"], m["last_error"]) for m in listed] == [
+            (failed.id, "grievance_created.admin", "smtp down")
+        ]
+        assert client.post(f"/api/v1/admin/dead-letters/outbox/{sent[0].id}/replay").status_code == 404
+
+        replayed = client.post(f"/api/v1/admin/dead-letters/outbox/{failed.id}/replay")
+        assert replayed.status_code == 202
+        assert (replayed.json()["status"], replayed.json()["attempts"]) == ("pending", 0)
+        assert outbox.process_batch(db_session) == 1
+        assert [event for event, _ in delivered] == ["grievance_created.admin"]
+        assert client.get("/api/v1/admin/dead-letters/outbox").json() == []
@@ -0,0 +1,155 @@
+"""
+Unit tests for the on-demand request profiler.
+"""
+import threading
+import time
+import xml.etree.ElementTree as ET
+from collections import Counter
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import deps
+from app.api.v1 import admin
+from app.core import request_profiler
+from app.core.request_profiler import (
+    ProfileStore,
+    RequestProfilerMiddleware,
+    StackSampler,
+    create_profile_token,
+    flamegraph_svg,
+    verify_profile_token,
+)
+from app.core.security import create_access_token
+
+
+def busy_handler(seconds=0.15):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        sum(range(1000))
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ProfileStore(str(tmp_path / "profiles"), max_stored=3)
+
+
+def _app(store, **options):
+    app = FastAPI()
+
+    @app.get("/slow/{n}")
+    def slow(n: int):
+        busy_handler()
+        return {"n": n}
+
+    app.add_middleware(RequestProfilerMiddleware, store=store, **options)
+    return TestClient(app)
+
+
+class TestSampling:
+    """Test the sampler and its artifacts."""
+
+    def test_sampler_sees_busy_threads_only(self):
+        """A worker thread's hot function is sampled; an idle waiting thread is not."""
+        idle = threading.Event()
+        waiter = threading.Thread(target=idle.wait, name="idle")
+        waiter.start()
+        sampler = StackSampler(interval=0.002, max_seconds=5).start()
+        worker = threading.Thread(target=busy_handler)
+        worker.start()
+        worker.join()
+        sampler.stop()
+        idle.set()
+        waiter.join()
+        hot = sum(n for stack, n in sampler.stacks.items() if "busy_handler (tests/test_request_profiler.py" in stack)
+        assert sampler.samples > 10 and hot > 5
+        assert not any(stack.endswith("wait (threading.py") for stack in sampler.stacks)
+
+    def test_flamegraph_is_valid_svg(self):
+        """Frames become nested rectangles with escaped tooltips."""
+        svg = flamegraph_svg(Counter({"main;handler<T>": 3, "main;other": 1}), "GET /x & y")
+        root = ET.fromstring(svg)
+        titles = [t.text for t in root.iter("{http://www.w3.org/2000/svg}title")]
+        assert "handler<T> (3 samples, 75.0%)" in titles
+        assert "all (4 samples, 100.0%)" in titles
+
+
+class TestTokens:
+    """Test profile tokens."""
+
+    def test_profile_tokens_only(self):
+        """Profile tokens verify; login tokens and garbage do not."""
+        assert verify_profile_token(create_profile_token(7)) == 7
+        assert verify_profile_token(create_access_token("7")) is None
+        assert verify_profile_token("nonsense") is None
+
+
+class TestRequestProfilerMiddleware:
+    """Test triggering, limits and storage."""
+
+    def test_token_triggers_a_stored_profile(self, store):
+        """A request with a valid token is profiled and points to its artifacts."""
+        response = _app(store).get("/slow/1", headers={"X-Profile-Token": create_profile_token(9)})
+        profile_id = response.headers["x-profile-id"]
+        [summary] = store.list()
+        assert (summary["id"], summary["route"], summary["trigger"], summary["requested_by"]) == (
+            profile_id, "/slow/{n}", "token", 9)
+        assert "busy_handler" in store.path(profile_id, "folded").read_text()
+        assert store.path(profile_id, "svg").read_text().startswith("<svg")
+
+    def test_untriggered_requests_are_not_profiled(self, store):
+        """No token (or a bad one) and a zero sample rate leave requests alone."""
+        client = _app(store)
+        assert "x-profile-id" not in client.get("/slow/1").headers
+        assert "x-profile-id" not in client.get("/slow/1", headers={"X-Profile-Token": "forged"}).headers
+        assert store.list() == []
+
+    def test_sampling_rate(self, store):
+        """With rate 1 every request is profiled."""
+        _app(store, sample_rate=1.0).get("/slow/2")
+        assert store.list()[0]["trigger"] == "sampled"
+
+    def test_concurrency_limit(self, store):
+        """Triggers beyond the concurrent limit are served unprofiled."""
+        inner = FastAPI()
+        inner.get("/ping")(lambda: {"ok": True})
+        middleware = RequestProfilerMiddleware(inner, store=store, sample_rate=1.0, max_concurrent=1)
+        middleware._slots.acquire()  # Another request is being profiled
+        response = TestClient(middleware).get("/ping")
+        assert response.status_code == 200 and "x-profile-id" not in response.headers
+        assert middleware.skipped == 1
+        middleware._slots.release()
+
+    def test_store_keeps_newest(self, store):
+        """Older profiles are pruned with all their files."""
+        for n in range(5):
+            summary = {"id": f"2024010{n + 1}T000000-0000000{n}", "method": "GET", "route": "/r",
+                       "duration_ms": 1, "samples": 1}
+            store.save(summary, Counter({"a;b": 1}))
+        assert [s["id"][:9] for s in store.list()] == ["20240105T", "20240104T", "20240103T"]
+        assert len(list(store.directory.iterdir())) == 9
+        assert store.path("../../etc/passwd", "svg") is None
+
+
+class TestProfileEndpoints:
+    """Test the admin endpoints."""
+
+    def test_token_list_and_download(self, store, monkeypatch):
+        """Admins get a token, list profiles and download a flamegraph."""
+        monkeypatch.setattr(admin, "profile_store", store)
+        app = FastAPI()
+        app.include_router(admin.router, prefix="/api/v1/admin")
+        app.dependency_overrides[deps.get_current_user] = lambda: type("Admin", (), {"id": 4, "is_admin": True})()
+        app.add_middleware(RequestProfilerMiddleware, store=store)
+        client = TestClient(app)
+
+        token = client.post("/api/v1/admin/profiles/token").json()
+        assert token["header"] == "x-profile-token"
+        profile_id = client.get(
+            "/api/v1/admin/profiles", headers={"X-Profile-Token": token["token"]}
+        ).headers["x-profile-id"]
+        assert [p["id"] for p in client.get("/api/v1/admin/profiles").json()] == [profile_id]
+        svg = client.get(f"/api/v1/admin/profiles/{profile_id}/svg")
+        assert svg.headers["content-type"] == "image/svg+xml"
+        assert client.get(f"/api/v1/admin/profiles/{profile_id}/exe").status_code == 404
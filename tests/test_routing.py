@@ -0,0 +1,169 @@
+"""
+Unit tests for load-aware grievance routing.
+"""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import deps, grievances as grievances_api
+from app.db.session import get_db
+from app.models.department import Department
+from app.models.grievance import Grievance, StatusEnum
+from app.models.handler import Handler
+from app.models.outbox import OutboxMessage
+from app.models.user import User
+from app.services.audit import AuditWriter
+from app.services.dedup import DuplicateDetector
+from app.services.routing import RoutingEngine
+
+
+def _handler(db, user_id, dept_id=None, categories=None, capacity=None, is_active=True):
+    db.add(User(id=user_id, email=f"handler{user_id}@example.com", hashed_password="x"))
+    db.add(Handler(user_id=user_id, dept_id=dept_id, categories=categories, capacity=capacity, is_active=is_active))
+
+
+def _grievance(db, dept_id=1, category="finance", handler_id=None, status=StatusEnum.submitted):
+    db.add(Grievance(student_id=1, dept_id=dept_id, category=category, title="T", description="D",
+                     handler_id=handler_id, status=status))
+
+
+@pytest.fixture
+def staffed(db_session):
+    """Department 1 with a finance handler (10), a department-wide one (11) and a global one (12)."""
+    db_session.add_all([Department(id=1, name="Accounts"), Department(id=2, name="Hostel")])
+    db_session.add(User(id=1, email="student@example.com", hashed_password="x"))
+    db_session.add(User(id=9, email="admin@example.com", hashed_password="x", is_admin=True))
+    _handler(db_session, 10, dept_id=1, categories="Finance, fees")
+    _handler(db_session, 11, dept_id=1)
+    _handler(db_session, 12)
+    _handler(db_session, 13, is_active=False)
+    db_session.commit()
+    return db_session
+
+
+class TestRoutingEngine:
+    """Test handler selection and load bookkeeping."""
+
+    def test_loads_come_from_open_grievances(self, staffed):
+        """Open grievances count towards a handler's load; resolved ones do not."""
+        _grievance(staffed, handler_id=10)
+        _grievance(staffed, handler_id=10)
+        _grievance(staffed, handler_id=11, status=StatusEnum.resolved)
+        staffed.commit()
+        engine = RoutingEngine()
+        engine.rebuild(staffed)
+        assert (engine.load(10), engine.load(11), engine.load(12)) == (2, 0, 0)
+        assert engine.load(13) is None
+
+    def test_least_loaded_eligible_handler(self, staffed):
+        """Assignments rotate over every eligible handler by load."""
+        engine = RoutingEngine()
+        engine.rebuild(staffed)
+        chosen = [engine.route(1, "finance") for _ in range(6)]
+        assert sorted(chosen) == [10, 10, 11, 11, 12, 12]
+        assert engine.route(2, "hostel") == 12
+        assert engine.choose(2, "finance") == 12
+
+    def test_capacity_and_release(self, db_session):
+        """A handler at capacity is skipped until one of theirs closes."""
+        _handler(db_session, 10, capacity=1)
+        db_session.commit()
+        engine = RoutingEngine()
+        engine.rebuild(db_session)
+        assert engine.route(None, None) == 10
+        assert engine.route(None, None) is None
+        engine.release(10)
+        assert engine.route(None, None) == 10
+
+    def test_full_handler_does_not_hide_others(self, db_session):
+        """A full handler at the top of a pool gives way to a busier one with room."""
+        _handler(db_session, 10, capacity=1)
+        _handler(db_session, 11)
+        _handler(db_session, 12, capacity=3)
+        db_session.add(User(id=1, email="student@example.com", hashed_password="x"))
+        _grievance(db_session, handler_id=10)
+        for handler_id in (11, 11, 12, 12):
+            _grievance(db_session, handler_id=handler_id)
+        db_session.commit()
+        engine = RoutingEngine()
+        engine.rebuild(db_session)
+
+        assert engine.choose(None, None) == 11
+        assert [engine.route(None, None) for _ in range(3)] == [11, 12, 11]
+        assert engine.load(12) == 3
+        engine.release(10)
+        assert engine.route(None, None) == 10
+        assert engine.route(None, None) == 11
+
+    def test_ensure_fresh_resyncs_after_interval(self, staffed):
+        """Assignments made elsewhere are picked up on the next resync."""
+        engine = RoutingEngine(resync_interval=0)
+        engine.ensure_fresh(staffed)
+        _grievance(staffed, handler_id=12)
+        staffed.commit()
+        engine.ensure_fresh(staffed)
+        assert engine.load(12) == 1
+
+    def test_route_backlog_in_one_pass(self, staffed):
+        """Unassigned open grievances are spread over handlers with one bulk update."""
+        for _ in range(5):
+            _grievance(staffed)
+        _grievance(staffed, dept_id=2, category="hostel")
+        _grievance(staffed, status=StatusEnum.closed)
+        staffed.commit()
+
+        report, assignments = RoutingEngine().route_backlog(staffed)
+        staffed.commit()
+        assert (report.routed, report.unroutable) == (6, 0)
+        assert len(assignments) == 6
+
+        staffed.expire_all()
+        assigned = [g.handler_id for g in staffed.query(Grievance).order_by(Grievance.id)]
+        assert assigned[-1] is None
+        assert assigned[5] == 12
+        assert {assigned.count(h) for h in (10, 11, 12)} == {2}
+
+
+class TestAutoRoutingEndpoints:
+    """Test routing through the grievance API."""
+
+    @pytest.fixture
+    def client(self, staffed, monkeypatch):
+        engine = RoutingEngine()
+        monkeypatch.setattr(grievances_api, "routing_engine", engine)
+        monkeypatch.setattr(grievances_api, "publish_grievance_status", lambda *a, **k: None)
+        monkeypatch.setattr(grievances_api, "audit_writer", AuditWriter(lambda: staffed, flush_interval=60))
+        monkeypatch.setattr(grievances_api, "duplicate_detector", DuplicateDetector())
+        app = FastAPI()
+        app.include_router(grievances_api.router)
+        app.dependency_overrides[get_db] = lambda: staffed
+        app.dependency_overrides[deps.get_current_user] = lambda: staffed.get(User, 1)
+        app.dependency_overrides[deps.admin_required] = lambda: staffed.get(User, 9)
+        return TestClient(app), engine
+
+    def test_new_grievances_are_routed(self, client, staffed):
+        """A new grievance gets a handler and the handler is notified."""
+        client, engine = client
+        created = client.post(
+            "/api/v1/grievances/", json={"title": "Fees", "category": "finance", "description": "D", "dept_id": 2}
+        ).json()
+        assert created["handler_id"] == 12
+        events = [m.event for m in staffed.query(OutboxMessage) if not m.event.endswith(".inbox")]
+        assert events == ["grievance_created.admin", "grievance_created.student", "grievance_assigned"]
+
+        client.post(f"/api/v1/grievances/{created['id']}/resolve", params={"resolution": "Done"})
+        assert engine.load(12) == 0
+
+    def test_assign_without_handler_routes(self, client, staffed, monkeypatch):
+        """Omitting handler_id picks one; with nobody eligible the request is refused."""
+        client, engine = client
+        monkeypatch.setattr(grievances_api.settings, "AUTO_ROUTING", False)
+        gid = client.post(
+            "/api/v1/grievances/", json={"title": "Room", "category": "hostel", "description": "D", "dept_id": 2}
+        ).json()["id"]
+        assert client.post(f"/api/v1/grievances/{gid}/assign").json()["handler_id"] == 12
+
+        staffed.query(Handler).update({"is_active": False})
+        staffed.commit()
+        engine.rebuild(staffed)
+        assert client.post(f"/api/v1/grievances/{gid}/assign").status_code == 409
@@ -127,3 +127,66 @@ class TestStorageService:
             mock_file.filename = "test.bin"
             mock_file.content_type = content_type
             validate_file(mock_file)  # Should not raise
+
+
+class TestBatchUpload:
+    """Test concurrent batch persistence of uploads."""
+
+    @staticmethod
+    def _upload(filename, content, content_type="application/pdf"):
+        from io import BytesIO
+        from starlette.datastructures import Headers, UploadFile
+
+        return UploadFile(
+            file=BytesIO(content),
+            size=len(content),
+            filename=filename,
+            headers=Headers({"content-type": content_type}),
+        )
+
+    async def test_save_uploads_returns_result_per_file(self, tmp_path, monkeypatch):
+        """Valid files are saved, invalid ones reported without aborting the batch."""
+        from app.core import storage
+
+        monkeypatch.setattr(storage, "MEDIA_ROOT", tmp_path)
+        files = [
+            self._upload("a.pdf", b"a" * 10),
+            self._upload("evil.exe", b"MZ", "application/x-executable"),
+            self._upload("b.png", b"b" * 20, "image/png"),
+        ]
+
+        results = await storage.save_uploads(files, prefix="user_1", max_concurrency=2)
+
+        assert [r["status"] for r in results] == ["ok", "error", "ok"]
+        assert results[1]["status_code"] == 400
+        assert results[0]["file_size"] == 10
+        assert results[2]["file_size"] == 20
+        assert len(list(tmp_path.iterdir())) == 2
+        assert results[0]["file_path"] != results[2]["file_path"]
+
+    async def test_save_uploads_rejects_oversized_batch(self, tmp_path, monkeypatch):
+        """Declared sizes over the combined budget reject the whole batch."""
+        from app.core import storage
+
+        monkeypatch.setattr(storage, "MEDIA_ROOT", tmp_path)
+        files = [self._upload("a.pdf", b"a" * 10), self._upload("b.pdf", b"b" * 10)]
+
+        with pytest.raises(HTTPException) as exc_info:
+            await storage.save_uploads(files, max_total_size=15)
+        assert exc_info.value.status_code == 413
+        assert list(tmp_path.iterdir()) == []
+
+    async def test_budget_enforced_while_streaming(self, tmp_path, monkeypatch):
+        """Files with unknown sizes are still held to the combined budget."""
+        from app.core import storage
+
+        monkeypatch.setattr(storage, "MEDIA_ROOT", tmp_path)
+        files = [self._upload("a.pdf", b"a" * 10), self._upload("b.pdf", b"b" * 10)]
+        for f in files:
+            f.size = None
+
+        results = await storage.save_uploads(files, max_concurrency=1, max_total_size=15)
+
+        assert [r["status"] for r in results] == ["ok", "error"]
+        assert results[1]["status_code"] == 413
+        assert len(list(tmp_path.iterdir())) == 1
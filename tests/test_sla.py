@@ -0,0 +1,161 @@
+"""
+Unit tests for SLA escalation scans.
+"""
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db.upgrade import upgrade_schema
+from app.models.grievance import Grievance, StatusEnum
+from app.models.outbox import OutboxMessage
+from app.models.sla_escalation import SlaEscalation
+from app.models.sla_rule import SlaRule
+from app.models.user import User
+from app.services.sla import SlaRules, parse_default_hours, scan_overdue
+
+NOW = datetime(2024, 5, 1, 12, tzinfo=timezone.utc)
+DEFAULTS = {"submitted": 72, "under_review": 168}
+
+
+def _grievance(db, age_hours, status=StatusEnum.submitted, dept_id=None, category="finance", handler_id=None):
+    grievance = Grievance(
+        student_id=1, title=f"Aged {age_hours}h", description="D", status=status, dept_id=dept_id,
+        category=category, handler_id=handler_id, updated_at=NOW - timedelta(hours=age_hours),
+    )
+    db.add(grievance)
+    db.flush()
+    return grievance.id
+
+
+@pytest.fixture
+def db(db_session):
+    db_session.add(User(id=1, email="student@example.com", hashed_password="x"))
+    db_session.add(User(id=5, email="handler@example.com", hashed_password="x"))
+    db_session.commit()
+    return db_session
+
+
+def _scan(db, now=NOW, **kwargs):
+    return scan_overdue(db, SlaRules.load(db, DEFAULTS), now=now, **kwargs)
+
+
+def _payloads(db):
+    """Escalated grievances per recipient, over all sla_escalation messages."""
+    by_recipient = {}
+    for message in db.query(OutboxMessage).filter(OutboxMessage.event == "sla_escalation"):
+        payload = json.loads(message.payload)
+        by_recipient.setdefault(payload["recipient_email"], []).extend(payload["grievances"])
+    return by_recipient
+
+
+class TestSlaRules:
+    """Test rule resolution."""
+
+    def test_most_specific_rule_wins(self, db):
+        """Department+category beats department beats category beats the default."""
+        db.add_all([
+            SlaRule(status=StatusEnum.submitted, dept_id=1, category="finance", max_hours=4),
+            SlaRule(status=StatusEnum.submitted, dept_id=1, max_hours=24),
+            SlaRule(status=StatusEnum.submitted, category="Hostel", max_hours=48),
+        ])
+        db.commit()
+        rules = SlaRules.load(db, DEFAULTS)
+        assert rules.hours_for("submitted", 1, "Finance") == 4
+        assert rules.hours_for("submitted", 1, "library") == 24
+        assert rules.hours_for("submitted", 2, "hostel") == 48
+        assert rules.hours_for("submitted", 2, "library") == 72
+        assert rules.hours_for("in_progress", 1, "finance") is None
+        assert rules.thresholds() == {"submitted": [4, 24, 48, 72], "under_review": [168]}
+
+    def test_parse_defaults(self):
+        """Defaults come from a status=hours list."""
+        assert parse_default_hours("submitted=72, under_review=168") == DEFAULTS
+        with pytest.raises(ValueError):
+            parse_default_hours("pending=1")
+
+
+class TestScanOverdue:
+    """Test the incremental overdue scan."""
+
+    def test_escalates_overdue_once_with_batched_notifications(self, db):
+        """Each overdue grievance is escalated once; one message per recipient per batch."""
+        late = _grievance(db, 100)
+        late_assigned = _grievance(db, 80, handler_id=5)
+        _grievance(db, 10)
+        review = _grievance(db, 200, status=StatusEnum.under_review)
+        _grievance(db, 500, status=StatusEnum.in_progress)
+        db.commit()
+
+        report = _scan(db)
+        assert report.escalated == 3
+        assert sorted(e.grievance_id for e in db.query(SlaEscalation)) == sorted([late, late_assigned, review])
+        payloads = _payloads(db)
+        assert [g["grievance_id"] for g in payloads["handler@example.com"]] == [late_assigned]
+        admin = payloads[settings.SLA_ESCALATION_EMAIL]
+        assert {g["grievance_id"] for g in admin} == {late, late_assigned, review}
+        assert report.notifications == 3  # Admin per threshold batch (2) + handler
+
+        assert _scan(db).escalated == 0
+        assert db.query(SlaEscalation).count() == 3
+
+    def test_later_ticks_only_read_new_rows(self, db):
+        """Rows behind the watermark are not read again; newly overdue ones are."""
+        _grievance(db, 100)
+        fresh = _grievance(db, 70)
+        db.commit()
+        assert _scan(db).scanned == 1
+
+        report = _scan(db, now=NOW + timedelta(hours=3))
+        assert (report.scanned, report.escalated) == (1, 1)
+        assert db.query(SlaEscalation).order_by(SlaEscalation.id).all()[-1].grievance_id == fresh
+
+    def test_update_restarts_the_clock(self, db):
+        """An updated grievance is escalated again only after a new full period."""
+        gid = _grievance(db, 100)
+        db.commit()
+        _scan(db)
+        grievance = db.get(Grievance, gid)
+        grievance.updated_at = NOW + timedelta(hours=1)
+        db.commit()
+        assert _scan(db, now=NOW + timedelta(hours=2)).escalated == 0
+        assert _scan(db, now=NOW + timedelta(hours=74)).escalated == 1
+
+    def test_never_updated_legacy_grievances_are_escalated(self, db):
+        """Rows from before updated_at had an insert default get created_at on upgrade and are scanned."""
+        gid = _grievance(db, 100)
+        db.commit()
+        db.execute(text("UPDATE grievances SET updated_at = NULL, created_at = :at WHERE id = :id"),
+                   {"at": "2024-04-20 08:00:00", "id": gid})
+        db.commit()
+        assert _scan(db).escalated == 0
+
+        upgrade_schema(db.get_bind())
+        db.expire_all()
+        assert db.get(Grievance, gid).updated_at.replace(tzinfo=None) == datetime(2024, 4, 20, 8)
+        assert _scan(db).escalated == 1
+        assert _scan(db).escalated == 0
+
+    def test_ties_and_batches(self, db):
+        """Grievances sharing an updated_at are not skipped across batch boundaries."""
+        ids = [_grievance(db, 100) for _ in range(5)]
+        db.commit()
+        report = _scan(db, batch_size=2)
+        assert (report.scanned, report.escalated) == (5, 5)
+        assert sorted(e.grievance_id for e in db.query(SlaEscalation)) == ids
+
+    def test_runtime_limit(self, db):
+        """A tick out of time reports itself incomplete."""
+        _grievance(db, 100)
+        db.commit()
+        assert _scan(db, max_runtime=0).complete is False
+
+    def test_scan_uses_status_updated_at_index(self, db):
+        """The overdue query is an index range scan, not a table sweep."""
+        plan = db.execute(text(
+            "EXPLAIN QUERY PLAN SELECT id FROM grievances "
+            "WHERE status = 'submitted' AND updated_at <= '2024-01-01' ORDER BY updated_at, id"
+        )).all()
+        assert "ix_grievances_status_updated_at" in " ".join(str(row) for row in plan)
@@ -0,0 +1,118 @@
+"""
+Unit tests for the SQL profiler and query budgets.
+"""
+import logging
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1 import admin
+from app.api import deps
+from app.core.sql_profiler import (
+    QueryBudgetExceeded,
+    SqlProfilerMiddleware,
+    assert_max_queries,
+    profile_queries,
+    query_budget,
+)
+from app.db.session import get_db
+from app.models.grievance import Grievance
+from app.models.grievance_signature import GrievanceSignature
+from app.models.user import User
+
+
+@pytest.fixture
+def db(db_session):
+    db_session.add(User(id=1, email="student@example.com", hashed_password="x", is_admin=True))
+    db_session.add_all([Grievance(student_id=1, title=f"G{i}", description="D") for i in range(8)])
+    db_session.commit()
+    return db_session
+
+
+def _n_plus_one_app(db, **options):
+    app = FastAPI()
+
+    @app.get("/titles")
+    @query_budget(2)
+    def titles():
+        ids = [g.id for g in db.query(Grievance.id)]
+        return [db.query(Grievance.title).filter(Grievance.id == gid).scalar() for gid in ids]
+
+    @app.get("/titles/joined")
+    @query_budget(2)
+    def titles_joined():
+        return [title for (title,) in db.query(Grievance.title).order_by(Grievance.id)]
+
+    app.add_middleware(SqlProfilerMiddleware, **options)
+    return TestClient(app)
+
+
+class TestQueryProfile:
+    """Test statement grouping."""
+
+    def test_groups_parameterized_statements(self, db):
+        """The same query with different parameters is one repeated statement."""
+        with profile_queries() as outer:
+            with profile_queries() as inner:
+                for gid in range(1, 7):
+                    db.get(Grievance, gid)
+            db.query(User).count()
+        assert (inner.count, outer.count) == (6, 7)
+        [(statement, count)] = inner.repeated(5)
+        assert count == 6 and "FROM grievances" in statement
+        assert outer.repeated(10) == []
+
+    def test_assert_max_queries(self, db):
+        """Exceeding the budget raises with a summary of what ran."""
+        with pytest.raises(QueryBudgetExceeded, match="3 SQL statements, budget 2"):
+            with assert_max_queries(2):
+                for gid in (1, 2, 3):
+                    db.get(Grievance, gid)
+
+
+class TestSqlProfilerMiddleware:
+    """Test per-request profiling."""
+
+    def test_headers_and_n_plus_one_warning(self, db, caplog):
+        """Debug headers report the counts; the repeated lookup is logged with its route."""
+        client = _n_plus_one_app(db, headers=True, strict=False)
+        with caplog.at_level(logging.WARNING, logger="app.core.sql_profiler"):
+            response = client.get("/titles")
+        assert response.headers["x-sql-queries"] == "9"
+        assert response.headers["x-sql-repeated"] == "1"
+        assert float(response.headers["x-sql-time-ms"]) > 0
+        assert "Possible N+1 on GET /titles: 8x" in caplog.text
+        assert "budget 2" in caplog.text
+
+    def test_strict_mode_fails_over_budget(self, db):
+        """In strict mode an endpoint over its budget raises in the caller."""
+        client = _n_plus_one_app(db, strict=True)
+        assert client.get("/titles/joined").status_code == 200
+        with pytest.raises(QueryBudgetExceeded, match="GET /titles ran 9 SQL statements, budget 2"):
+            client.get("/titles")
+
+    @pytest.mark.query_budget(2)
+    def test_marker_counts_app_threads(self, db):
+        """The marker's budget covers statements the app runs in TestClient's thread."""
+        client = _n_plus_one_app(db, strict=False)
+        assert len(client.get("/titles/joined").json()) == 8
+
+
+class TestEndpointBudgets:
+    """Test endpoints against their declared budgets."""
+
+    def test_duplicate_clusters_in_constant_queries(self, db):
+        """Listing clusters fetches all members at once instead of per cluster."""
+        db.add_all([
+            GrievanceSignature(grievance_id=gid, signature=b"", cluster_id=1 + (gid - 1) // 2 * 2)
+            for gid in range(1, 9)
+        ])
+        db.commit()
+        app = FastAPI()
+        app.include_router(admin.router, prefix="/api/v1/admin")
+        app.dependency_overrides[get_db] = lambda: db
+        app.dependency_overrides[deps.get_current_user] = lambda: db.get(User, 1)
+        app.add_middleware(SqlProfilerMiddleware, strict=True)
+        clusters = TestClient(app).get("/api/v1/admin/duplicates").json()
+        assert [c["grievance_ids"] for c in clusters] == [[1, 2], [3, 4], [5, 6], [7, 8]]
@@ -0,0 +1,164 @@
+"""
+Unit tests for the orphan file garbage collector.
+"""
+import os
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import deps, files
+from app.core import storage
+from app.db.session import get_db
+from app.models.file_upload import FileUpload
+from app.models.grievance import Grievance
+from app.models.user import User
+from app.services.storage_gc import collect_orphans, read_cursor, CURSOR_FILENAME, QUARANTINE_DIRNAME
+
+
+def _make_file(root, name, size=10, age=None):
+    path = root / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * size)
+    if age is not None:
+        old = time.time() - age
+        os.utime(path, (old, old))
+    return path
+
+
+class TestOrphanFileGC:
+    """Test orphan detection, grace period and reporting."""
+
+    def test_removes_only_unreferenced_old_files(self, db_session, tmp_path):
+        """Referenced and recent files survive, orphans are deleted."""
+        kept = _make_file(tmp_path, "user_1_kept.pdf", age=3600)
+        attached = _make_file(tmp_path, "nested/attached.png", age=3600)
+        orphan = _make_file(tmp_path, "user_1_orphan.pdf", size=25, age=3600)
+        recent = _make_file(tmp_path, "user_1_recent.pdf")
+
+        db_session.add(FileUpload(
+            filename="kept.pdf", file_path=str(kept), content_type="application/pdf",
+            file_size=10, user_id=1,
+        ))
+        db_session.add(Grievance(
+            student_id=1, title="t", description="d", attachment_path="nested/attached.png",
+        ))
+        db_session.commit()
+
+        report = collect_orphans(db_session, root=tmp_path, grace_period=60, batch_size=2, quarantine=False)
+
+        assert kept.exists()
+        assert attached.exists()
+        assert recent.exists()
+        assert not orphan.exists()
+        assert report.scanned == 4
+        assert report.skipped_recent == 1
+        assert report.orphaned == 1
+        assert report.removed == 1
+        assert report.reclaimed_bytes == 25
+        assert report.batches == 2
+        assert report.complete
+
+    def test_dry_run_keeps_files(self, db_session, tmp_path):
+        """Dry run reports reclaimable bytes without touching disk."""
+        orphan = _make_file(tmp_path, "orphan.pdf", size=7, age=3600)
+
+        report = collect_orphans(db_session, root=tmp_path, grace_period=60, dry_run=True)
+
+        assert orphan.exists()
+        assert report.orphaned == 1
+        assert report.reclaimed_bytes == 7
+        assert report.removed == 0
+
+    def test_quarantine_moves_files_aside(self, db_session, tmp_path):
+        """Orphans are quarantined by default and skipped by later runs."""
+        _make_file(tmp_path, "orphan.pdf", age=3600)
+
+        report = collect_orphans(db_session, root=tmp_path, grace_period=60)
+        assert report.quarantined == 1
+        assert (tmp_path / QUARANTINE_DIRNAME / "orphan.pdf").exists()
+
+        second = collect_orphans(db_session, root=tmp_path, grace_period=60, quarantine=True)
+        assert second.scanned == 0
+
+    def test_stops_at_max_runtime(self, db_session, tmp_path):
+        """A zero runtime budget stops before the first batch."""
+        _make_file(tmp_path, "orphan.pdf", age=3600)
+
+        report = collect_orphans(db_session, root=tmp_path, grace_period=60, max_runtime=-1)
+
+        assert not report.complete
+        assert report.scanned == 0
+
+    def test_resumes_after_interrupted_run(self, db_session, tmp_path, monkeypatch):
+        """A run stopped by its time budget saves a cursor; the next run continues after it."""
+        for name in ("a/1.pdf", "a/2.pdf", "b.pdf", "c/3.pdf", "d.pdf"):
+            _make_file(tmp_path, name, age=3600)
+        clock = iter([0, 1, 2, 100, 200, 201, 202, 203, 204])
+        monkeypatch.setattr("app.services.storage_gc.time.monotonic", lambda: next(clock))
+
+        first = collect_orphans(db_session, root=tmp_path, grace_period=60, batch_size=2, max_runtime=10)
+        assert (first.scanned, first.complete) == (4, False)
+        assert read_cursor(tmp_path) == "c/3.pdf"
+
+        second = collect_orphans(db_session, root=tmp_path, grace_period=60, batch_size=2, max_runtime=10)
+        assert (second.resumed_from, second.scanned, second.complete) == ("c/3.pdf", 1, True)
+        assert not (tmp_path / CURSOR_FILENAME).exists()
+        assert sorted(p.name for p in (tmp_path / QUARANTINE_DIRNAME).rglob("*.pdf")) == [
+            "1.pdf", "2.pdf", "3.pdf", "b.pdf", "d.pdf"
+        ]
+
+    def test_uploaded_files_are_referenced(self, db_session, tmp_path, monkeypatch):
+        """Uploads record file_uploads rows, so the collector keeps them once they age."""
+        user = User(email="uploader@example.com", hashed_password="x")
+        db_session.add(user)
+        db_session.commit()
+        monkeypatch.setattr(storage, "MEDIA_ROOT", tmp_path)
+        app = FastAPI()
+        app.include_router(files.router)
+        app.dependency_overrides[get_db] = lambda: db_session
+        app.dependency_overrides[deps.get_current_user] = lambda: user
+        client = TestClient(app)
+
+        response = client.post("/api/v1/files/upload", files={"file": ("a.pdf", b"%PDF", "application/pdf")})
+        batch = client.post("/api/v1/files/upload/batch", files=[("files", ("b.pdf", b"%PDF", "application/pdf"))])
+        assert response.status_code == batch.status_code == 201
+        assert client.get(f"/api/v1/files/{response.json()['id']}").content == b"%PDF"
+        for path in tmp_path.iterdir():
+            os.utime(path, (time.time() - 3600,) * 2)
+
+        report = collect_orphans(db_session, root=tmp_path, grace_period=60)
+        assert (report.scanned, report.referenced, report.orphaned) == (2, 2, 0)
+
+    def test_root_is_resolved_before_matching(self, db_session, tmp_path, monkeypatch):
+        """A root given through a symlink or relative path still matches the absolute paths stored on upload."""
+        media = tmp_path / "media"
+        kept = _make_file(media, "kept.pdf", age=3600)
+        db_session.add(FileUpload(
+            filename="kept.pdf", file_path=str(kept), content_type="application/pdf", file_size=10, user_id=1,
+        ))
+        db_session.commit()
+        (tmp_path / "link").symlink_to(media)
+        monkeypatch.chdir(tmp_path)
+
+        for root in (tmp_path / "link", "media"):
+            report = collect_orphans(db_session, root=root, grace_period=60, quarantine=False)
+            assert (report.scanned, report.referenced, report.orphaned) == (1, 1, 0)
+        assert kept.exists()
+
+    def test_each_directory_is_listed_once(self, db_session, tmp_path, monkeypatch):
+        """Large directories are scanned in a single pass, not once per batch."""
+        for n in range(50):
+            _make_file(tmp_path, f"{n:02}.pdf", age=3600)
+        _make_file(tmp_path, "sub/x.pdf", age=3600)
+        listed = []
+        real_scandir = os.scandir
+
+        def scandir(path):
+            listed.append(os.path.relpath(path, tmp_path))
+            return real_scandir(path)
+
+        monkeypatch.setattr("app.services.storage_gc.os.scandir", scandir)
+        report = collect_orphans(db_session, root=tmp_path, grace_period=60, batch_size=2, dry_run=True)
+        assert (report.scanned, report.batches) == (51, 26)
+        assert sorted(listed) == [".", "sub"]
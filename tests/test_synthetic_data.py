@@ -0,0 +1,112 @@
+"""
+Unit tests for the synthetic load-testing data generator.
+"""
+from collections import Counter
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app.db.base import Base
+from app.models.audit import Audit
+from app.models.department import Department
+from app.models.file_upload import FileUpload
+from app.models.grievance import Grievance, StatusEnum
+from app.models.handler import Handler
+from app.models.user import User
+from app.services.synthetic_data import STAGES, SyntheticPlan, generate, generate_grievances, load
+
+NOW_US = 1_790_000_000_000_000
+PLAN = SyntheticPlan(users=60, handlers=6, departments=3, grievances=700, chunk_size=256,
+                     now_us=NOW_US, password_hash="x", dept_ids=(1, 2, 3))
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+def _count(db, model) -> int:
+    return db.execute(select(func.count()).select_from(model)).scalar_one()
+
+
+class TestGeneration:
+    """Test chunk generation without a database."""
+
+    def test_same_seed_same_rows(self):
+        """A chunk depends only on the plan, not on how many workers built it."""
+        serial = list(generate(PLAN, "grievances", workers=1))
+        parallel = list(generate(PLAN, "grievances", workers=2))
+        assert len(serial) == 3
+        for a, b in zip(serial, parallel):
+            assert a["grievances"]["title"] == b["grievances"]["title"]
+            assert np.array_equal(a["audits"]["timestamp"], b["audits"]["timestamp"])
+
+        other = generate_grievances(SyntheticPlan(**{**PLAN.__dict__, "seed": 7}), 0)
+        assert other["grievances"]["description"] != serial[0]["grievances"]["description"]
+
+    def test_older_grievances_are_further_along(self):
+        """Recent grievances are mostly open, month-old ones mostly resolved or closed."""
+        plan = SyntheticPlan(**{**PLAN.__dict__, "grievances": 20000, "chunk_size": 20000, "days": 90})
+        rows = generate_grievances(plan, 0)["grievances"]
+        age = (NOW_US - rows["created_at"]) / 86_400_000_000
+        status = np.array(rows["status"])
+        done = np.isin(status, ["resolved", "closed"])
+        assert done[age < 3].mean() < 0.2
+        assert done[age > 30].mean() > 0.8
+        assert 0 < (~done[age > 30]).mean() < 0.1  # The stale open tail the SLA scan finds
+        assert (rows["updated_at"] >= rows["created_at"]).all()
+        assert (rows["created_at"] <= NOW_US).all()
+
+    def test_invalid_plan_rejected(self):
+        """Plans without room for students or with unknown departments raise ValueError."""
+        with pytest.raises(ValueError):
+            SyntheticPlan(users=5, handlers=5).validate()
+        with pytest.raises(ValueError):
+            SyntheticPlan(departments=99).validate()
+
+
+class TestLoad:
+    """Test loading into SQLite."""
+
+    def test_loads_consistent_rows(self, engine):
+        """Counts match the plan and every reference points at a matching row."""
+        report = load(engine, PLAN, workers=1)
+
+        assert report.rows["users"] == 60 and report.rows["grievances"] == 700
+        assert report.rows["departments"] == 3 and report.rows["handlers"] == 6
+        with Session(engine) as db:
+            assert _count(db, User) == 60 and _count(db, Grievance) == 700
+            assert _count(db, Audit) == report.rows["audits"]
+            handler_depts = dict(db.execute(select(Handler.user_id, Handler.dept_id)).all())
+            students = set(db.execute(select(User.id).where(User.email.like("student%"))).scalars())
+            audits = Counter(db.execute(select(Audit.grievance_id)).scalars())
+            attached = 0
+            for g in db.execute(select(Grievance)).scalars():
+                assert g.student_id in students
+                assert audits[g.id] == STAGES.index(g.status.name) + 1
+                if g.handler_id is not None:
+                    assert handler_depts[g.handler_id] == g.dept_id
+                assert (g.resolution is not None) == (g.status in (StatusEnum.resolved, StatusEnum.closed))
+                attached += g.attachment_path is not None
+            assert _count(db, FileUpload) == attached > 0
+            first = db.get(Grievance, 1)
+            assert first.updated_at >= first.created_at
+
+    def test_rerun_appends(self, engine):
+        """A second run adds users and grievances above the existing ids and reuses departments."""
+        plan = SyntheticPlan(**{**PLAN.__dict__, "dept_ids": ()})
+        load(engine, plan, workers=1)
+        report = load(engine, plan, workers=1)
+
+        assert report.user_ids == (61, 120) and report.grievance_ids == (701, 1400)
+        assert report.rows["departments"] == 0
+        with Session(engine) as db:
+            assert _count(db, Department) == 3
+            assert _count(db, Grievance) == 1400
+            assert db.execute(select(func.min(Grievance.student_id)).where(Grievance.id > 700)).scalar() > 60
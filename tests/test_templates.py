@@ -0,0 +1,80 @@
+"""
+Unit tests for the email template registry.
+"""
+import os
+
+import pytest
+
+from app.core.email import build_message
+from app.core.templates import TemplateRegistry, Safe, templates
+
+
+class TestTemplateRegistry:
+    """Test rendering, batch rendering and hot reload."""
+
+    def test_all_notification_templates_load(self):
+        """Every shipped template compiles with subject, text and HTML parts."""
+        for name in [
+            "grievance_created_admin",
+            "grievance_created_student",
+            "grievance_status_changed",
+            "grievance_assigned",
+            "grievance_resolved",
+            "digest",
+        ]:
+            template = templates.get(name)
+            assert template.html is not None
+
+    def test_render_text_and_escaped_html(self):
+        """HTML alternative escapes values, the text part keeps them verbatim."""
+        email = templates.render(
+            "grievance_resolved",
+            grievance_id=3,
+            student_name="Sam <script>",
+            title="Wi-Fi & LAN",
+            resolution="Router replaced",
+        )
+        assert email.subject == "Grievance Resolved: Wi-Fi & LAN"
+        assert "Hello Sam <script>," in email.text
+        assert "Sam &lt;script&gt;" in email.html
+        assert "Wi-Fi &amp; LAN" in email.html
+
+    def test_safe_values_are_not_escaped(self, tmp_path):
+        """Values marked Safe are inserted into HTML as-is."""
+        (tmp_path / "t.txt").write_text("Subject: s\n\n$v\n")
+        (tmp_path / "t.html").write_text("<div>$v</div>")
+        registry = TemplateRegistry(tmp_path, auto_reload=False)
+        assert registry.render("t", v=Safe("<b>x</b>")).html == "<div><b>x</b></div>"
+
+    def test_render_many(self):
+        """One call renders a template for many recipients."""
+        contexts = [
+            {"grievance_id": i, "handler_name": f"H{i}", "grievance_title": f"T{i}"} for i in range(3)
+        ]
+        emails = templates.render_many("grievance_assigned", contexts)
+        assert [e.subject for e in emails] == [f"New Grievance Assigned: T{i}" for i in range(3)]
+
+    def test_missing_placeholder_raises(self):
+        """Rendering without a required value fails loudly."""
+        with pytest.raises(KeyError):
+            templates.render("grievance_assigned", grievance_id=1)
+
+    def test_hot_reload(self, tmp_path):
+        """Edited templates are picked up only when auto_reload is on."""
+        path = tmp_path / "t.txt"
+        path.write_text("Subject: one\n\nbody\n")
+        reloading = TemplateRegistry(tmp_path, auto_reload=True)
+        cached = TemplateRegistry(tmp_path, auto_reload=False)
+
+        path.write_text("Subject: two\n\nbody\n")
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        assert reloading.render("t").subject == "two"
+        assert cached.render("t").subject == "one"
+
+    def test_multipart_message(self):
+        """A message with html_body carries plain and HTML alternatives."""
+        msg = build_message("s@example.com", "subject", "plain body", html_body="<p>html body</p>")
+        parts = [p.get_content_type() for p in msg.get_payload()]
+        assert parts == ["text/plain", "text/html"]